@@ -0,0 +1,7 @@
+"""
+Benchmarks and stress tests for Travel Karo
+
+Each module is runnable with ``python -m benchmarks.<name>`` from the
+project root. They run against a throw-away SQLite file, never against
+the development database.
+"""
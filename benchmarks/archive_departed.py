@@ -0,0 +1,111 @@
+"""
+Throughput and lock time of hot/cold archival
+
+Generates travel options, moves a share of them a year into the past,
+gives every option a few bookings, then archives the departed ones with
+bookings.archive a batch at a time. Reports rows moved per second, the
+longest batch (how long writers are blocked) and the hot table sizes
+before and after.
+
+    python -m benchmarks.archive_departed --options 200000 --history 0.8 --bookings 5
+"""
+
+import argparse
+import os
+import random
+import time
+
+from .keyset_pagination import generate_rows
+from .utils import make_user, setup_django
+
+
+def generate_bookings(per_option, batch_size=50000):
+    """Insert per_option bookings on every travel option with executemany"""
+    from django.db import connection, transaction
+    from django.utils import timezone
+    from bookings.models import Booking
+    from travel.models import TravelOption
+
+    rng = random.Random(7)
+    user = make_user('archivist')
+    adapt = connection.ops.adapt_datetimefield_value
+    created = adapt(timezone.now())
+    columns = (
+        'user_id', 'travel_option_id', 'num_seats', 'total_price', 'booking_date', 'status',
+        'passenger_details', 'booking_reference', 'contact_phone', 'contact_email',
+        'special_requests', 'created_at', 'updated_at',
+    )
+    sql = 'INSERT INTO {} ({}) VALUES ({})'.format(
+        Booking._meta.db_table, ', '.join(columns), ', '.join(['%s'] * len(columns))
+    )
+    batch = []
+    with connection.cursor() as cursor:
+        for option_id in TravelOption.objects.values_list('id', flat=True).iterator():
+            for seat in range(per_option):
+                batch.append((
+                    user.pk, option_id, 1, rng.randint(200, 8000), created,
+                    rng.choice(('confirmed', 'confirmed', 'cancelled')), '{}',
+                    f'TB{option_id:09d}{seat:04d}', user.phone, user.email, '', created, created,
+                ))
+            if len(batch) >= batch_size:
+                with transaction.atomic():
+                    cursor.executemany(sql, batch)
+                batch = []
+        with transaction.atomic():
+            cursor.executemany(sql, batch)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--options', type=int, default=200000)
+    parser.add_argument('--history', type=float, default=0.8, help='Share of options already departed')
+    parser.add_argument('--bookings', type=int, default=5, help='Bookings per option')
+    parser.add_argument('--batch-size', type=int, default=100)
+    args = parser.parse_args()
+
+    db_path = setup_django()
+
+    from datetime import timedelta
+    from django.db import connection
+    from django.db.models import F
+    from django.utils import timezone
+    from bookings import archive
+    from bookings.models import Booking
+    from travel.models import TravelOption
+
+    print(f'Generating {args.options:,} travel options with {args.bookings} bookings each...')
+    generate_rows(args.options)
+    departed = int(args.options * args.history)
+    TravelOption.objects.filter(pk__lte=departed).update(
+        departure_datetime=F('departure_datetime') - timedelta(days=400),
+        arrival_datetime=F('arrival_datetime') - timedelta(days=400),
+    )
+    generate_bookings(args.bookings)
+    with connection.cursor() as cursor:
+        cursor.execute('ANALYZE')
+    print(f'hot before:     {TravelOption.objects.count():,} options, {Booking.objects.count():,} bookings')
+
+    before = timezone.now() - timedelta(days=30)
+    options = bookings = 0
+    batches = []
+    started = time.perf_counter()
+    while True:
+        batch_started = time.perf_counter()
+        batch_options, batch_bookings = archive._archive_batch(before, args.batch_size)
+        batches.append(time.perf_counter() - batch_started)
+        options += batch_options
+        bookings += batch_bookings
+        if batch_options < args.batch_size:
+            break
+    elapsed = time.perf_counter() - started
+
+    print(f'archived:       {options:,} options, {bookings:,} bookings in {elapsed:.1f}s '
+          f'({(options + bookings) / elapsed:,.0f} rows/s)')
+    print(f'longest batch:  {max(batches) * 1000:.1f}ms over {len(batches):,} batches')
+    print(f'hot after:      {TravelOption.objects.count():,} options, {Booking.objects.count():,} bookings')
+
+    os.remove(db_path)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,247 @@
+"""
+ASGI vs WSGI benchmark with slow clients
+
+Serves the search and detail pages from travel_booking.wsgi (a
+thread-per-connection server) and from travel_booking.asgi (uvicorn,
+async views), then opens many concurrent clients that trickle their
+requests in and read responses slowly, the way mobile clients on poor
+networks do. Reports requests/sec, latency, and server memory and threads
+per concurrent connection.
+
+Needs uvicorn for the ASGI side (pip install uvicorn).
+
+    python -m benchmarks.asgi_vs_wsgi --concurrency 1000 --duration 20
+"""
+
+import argparse
+import asyncio
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import time
+
+from .utils import setup_django
+
+
+def serve(mode, db_path, port):
+    if mode == 'asgi':
+        os.environ['TRAVEL_ASYNC_VIEWS'] = 'True'
+    setup_django(db_path, migrate=False)
+
+    if mode == 'asgi':
+        import uvicorn
+        from travel_booking.asgi import application
+
+        uvicorn.run(
+            application, host='127.0.0.1', port=port,
+            log_level='warning', lifespan='off', backlog=4096,
+        )
+        return
+
+    from socketserver import ThreadingMixIn
+    from wsgiref.simple_server import WSGIServer, WSGIRequestHandler, make_server
+    from travel_booking.wsgi import application
+
+    class ThreadingWSGIServer(ThreadingMixIn, WSGIServer):
+        daemon_threads = True
+        request_queue_size = 4096
+
+    class QuietHandler(WSGIRequestHandler):
+        def log_message(self, *args):
+            pass
+
+    make_server(
+        '127.0.0.1', port, application,
+        server_class=ThreadingWSGIServer, handler_class=QuietHandler,
+    ).serve_forever()
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def process_stats(pid):
+    """(resident set size in KB, thread count) from /proc"""
+    stats = {}
+    with open(f'/proc/{pid}/status') as f:
+        for line in f:
+            key, _, value = line.partition(':')
+            stats[key] = value.split()[0] if value.split() else ''
+    return int(stats['VmRSS']), int(stats['Threads'])
+
+
+async def slow_request(port, path, chunks, delay):
+    """Send a GET in chunks with pauses, then read the response slowly"""
+    reader, writer = await asyncio.open_connection('127.0.0.1', port)
+    try:
+        request = (
+            f'GET {path} HTTP/1.1\r\nHost: localhost\r\nUser-Agent: slow-client\r\n'
+            f'Accept: text/html\r\nConnection: close\r\n\r\n'
+        ).encode()
+        size = -(-len(request) // chunks)
+        for offset in range(0, len(request), size):
+            writer.write(request[offset:offset + size])
+            await writer.drain()
+            await asyncio.sleep(delay)
+
+        status_line = await reader.readline()
+        while await reader.read(4096):
+            await asyncio.sleep(delay / 10)
+        return status_line.split()[1] == b'200' if status_line else False
+    finally:
+        writer.close()
+
+
+async def run_clients(port, paths, concurrency, duration, chunks, delay, pid):
+    latencies = []
+    errors = 0
+    peak_rss, peak_threads = process_stats(pid)
+    deadline = time.perf_counter() + duration
+
+    async def client(index):
+        nonlocal errors
+        request_number = index
+        while time.perf_counter() < deadline:
+            path = paths[request_number % len(paths)]
+            request_number += concurrency
+            started = time.perf_counter()
+            try:
+                ok = await asyncio.wait_for(slow_request(port, path, chunks, delay), timeout=60)
+            except (OSError, asyncio.TimeoutError):
+                ok = False
+            if ok:
+                latencies.append(time.perf_counter() - started)
+            else:
+                errors += 1
+
+    async def sample():
+        nonlocal peak_rss, peak_threads
+        while time.perf_counter() < deadline:
+            rss, threads = process_stats(pid)
+            peak_rss, peak_threads = max(peak_rss, rss), max(peak_threads, threads)
+            await asyncio.sleep(0.2)
+
+    started = time.perf_counter()
+    await asyncio.gather(sample(), *(client(i) for i in range(concurrency)))
+    elapsed = time.perf_counter() - started
+    return latencies, errors, elapsed, peak_rss, peak_threads
+
+
+def wait_until_ready(port, process, timeout=30):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        if process.poll() is not None:
+            raise SystemExit(f'Server exited with code {process.returncode}')
+        try:
+            with socket.create_connection(('127.0.0.1', port), timeout=1):
+                return
+        except OSError:
+            time.sleep(0.2)
+    raise SystemExit('Server did not start in time')
+
+
+def benchmark(mode, db_path, paths, args):
+    port = free_port()
+    process = subprocess.Popen([
+        sys.executable, '-m', 'benchmarks.asgi_vs_wsgi',
+        '--serve', mode, '--db', db_path, '--port', str(port),
+    ])
+    try:
+        wait_until_ready(port, process)
+        # Warm up imports, templates and caches before measuring the baseline
+        asyncio.run(slow_request(port, paths[0], 1, 0))
+        asyncio.run(slow_request(port, paths[-1], 1, 0))
+        idle_rss, idle_threads = process_stats(process.pid)
+
+        latencies, errors, elapsed, peak_rss, peak_threads = asyncio.run(run_clients(
+            port, paths, args.concurrency, args.duration, args.chunks, args.delay, process.pid,
+        ))
+    finally:
+        process.terminate()
+        process.wait()
+
+    latencies.sort()
+    return {
+        'mode': mode,
+        'requests': len(latencies),
+        'errors': errors,
+        'rps': len(latencies) / elapsed,
+        'p50_ms': statistics.median(latencies) * 1000 if latencies else 0,
+        'p95_ms': latencies[int(len(latencies) * 0.95)] * 1000 if latencies else 0,
+        'idle_rss_mb': idle_rss / 1024,
+        'peak_rss_mb': peak_rss / 1024,
+        'kb_per_connection': (peak_rss - idle_rss) / args.concurrency,
+        'peak_threads': peak_threads,
+        'idle_threads': idle_threads,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--concurrency', type=int, default=1000)
+    parser.add_argument('--duration', type=float, default=20, help='Seconds of load per server')
+    parser.add_argument('--chunks', type=int, default=8, help='Pieces each request is sent in')
+    parser.add_argument('--delay', type=float, default=0.1, help='Seconds between request pieces')
+    parser.add_argument('--options', type=int, default=200)
+    parser.add_argument('--mode', choices=['both', 'wsgi', 'asgi'], default='both')
+    parser.add_argument('--serve', choices=['wsgi', 'asgi'], help=argparse.SUPPRESS)
+    parser.add_argument('--db', help=argparse.SUPPRESS)
+    parser.add_argument('--port', type=int, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.serve:
+        serve(args.serve, args.db, args.port)
+        return
+
+    db_path = setup_django()
+
+    from datetime import timedelta
+    from django.utils import timezone
+    from travel import cities
+    from travel.models import TravelOption
+
+    now = timezone.now()
+    options = TravelOption.objects.bulk_create(
+        TravelOption(
+            travel_type='flight', source=cities.by_name('Delhi'), destination=cities.by_name('Mumbai'),
+            departure_datetime=now + timedelta(days=1, minutes=15 * i),
+            arrival_datetime=now + timedelta(days=1, minutes=15 * i + 130),
+            price=3500 + i, total_seats=180, available_seats=180,
+            operator_name='IndiGo', service_number=f'6E-{1000 + i}',
+        )
+        for i in range(args.options)
+    )
+    paths = ['/travel/search/?source=Delhi&destination=Mumbai']
+    paths += [f'/travel/{option.pk}/' for option in options[:50]]
+
+    modes = ['wsgi', 'asgi'] if args.mode == 'both' else [args.mode]
+    results = []
+    try:
+        for mode in modes:
+            print(f'Running {mode.upper()} with {args.concurrency} slow clients for {args.duration:g}s...')
+            results.append(benchmark(mode, db_path, paths, args))
+    finally:
+        os.remove(db_path)
+
+    print()
+    print(f'{"":18}' + ''.join(f'{r["mode"].upper():>12}' for r in results))
+    for label, key, fmt in (
+        ('requests', 'requests', '{:,}'),
+        ('errors', 'errors', '{:,}'),
+        ('requests/sec', 'rps', '{:,.1f}'),
+        ('p50 latency ms', 'p50_ms', '{:,.0f}'),
+        ('p95 latency ms', 'p95_ms', '{:,.0f}'),
+        ('idle RSS MB', 'idle_rss_mb', '{:,.1f}'),
+        ('peak RSS MB', 'peak_rss_mb', '{:,.1f}'),
+        ('KB/connection', 'kb_per_connection', '{:,.1f}'),
+        ('peak threads', 'peak_threads', '{:,}'),
+    ):
+        print(f'{label:18}' + ''.join(f'{fmt.format(r[key]):>12}' for r in results))
+
+
+if __name__ == '__main__':
+    main()
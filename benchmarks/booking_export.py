@@ -0,0 +1,107 @@
+"""
+Memory and throughput of the streaming booking export
+
+Generates bookings spread over a set of travel options and users, then
+runs the export_bookings command (plain and --manifest) over growing date
+ranges. For each size it reports rows/sec and the peak Python memory
+(tracemalloc), which should stay flat as the row count grows.
+
+    python -m benchmarks.booking_export --bookings 2000000
+"""
+
+import argparse
+import os
+import random
+
+from .keyset_pagination import generate_rows
+from .streaming_feed import measure
+from .utils import make_user, setup_django
+
+
+def generate_bookings(bookings, users=1000, batch_size=50000):
+    """Insert bookings with executemany, one per minute going back in time"""
+    from datetime import timedelta
+    from django.db import connection, transaction
+    from django.utils import timezone
+    from bookings.models import Booking
+    from bookings.references import generate_booking_reference
+    from travel.models import TravelOption
+
+    rng = random.Random(7)
+    user_ids = [make_user(f'export{i}').pk for i in range(users)]
+    option_ids = list(TravelOption.objects.values_list('id', flat=True))
+    adapt = connection.ops.adapt_datetimefield_value
+    now = timezone.now()
+
+    columns = (
+        'user_id', 'travel_option_id', 'num_seats', 'total_price', 'booking_date', 'status',
+        'passenger_details', 'booking_reference', 'contact_phone', 'contact_email',
+        'special_requests', 'created_at', 'updated_at',
+    )
+    sql = 'INSERT INTO {} ({}) VALUES ({})'.format(
+        Booking._meta.db_table, ', '.join(columns), ', '.join(['%s'] * len(columns))
+    )
+    details = '{"passengers": [{"name": "Bench Passenger", "age": 30, "gender": "F"}]}'
+
+    inserted = 0
+    with connection.cursor() as cursor:
+        while inserted < bookings:
+            batch = []
+            for i in range(inserted, min(inserted + batch_size, bookings)):
+                booked = adapt(now - timedelta(minutes=i))
+                seats = rng.randint(1, 4)
+                batch.append((
+                    rng.choice(user_ids), rng.choice(option_ids), seats, 1500 * seats, booked,
+                    'confirmed', details, generate_booking_reference(), '+919800000000',
+                    'bench@example.com', '', booked, booked,
+                ))
+            with transaction.atomic():
+                cursor.executemany(sql, batch)
+            inserted += len(batch)
+            print(f'\r  generated {inserted:,} bookings', end='', flush=True)
+    print()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--bookings', type=int, default=1000000)
+    parser.add_argument('--options', type=int, default=20000)
+    parser.add_argument('--steps', type=int, default=3, help='Export sizes to try, up to --bookings')
+    args = parser.parse_args()
+
+    db_path = setup_django()
+
+    from io import StringIO
+    from datetime import timedelta
+    from django.core.management import call_command
+    from django.utils import timezone
+
+    generate_rows(args.options)
+    generate_bookings(args.bookings)
+
+    def run(argv):
+        err = StringIO()
+        call_command(*argv, stderr=err)
+        return int(err.getvalue().split()[1].replace(',', ''))
+
+    print(f'{"mode":>9} {"rows":>10} {"rows/s":>10} {"peak MB":>9}')
+    try:
+        for step in range(1, args.steps + 1):
+            # Bookings go back one per minute and departures span a year,
+            # so the date range picks the export size
+            minutes = args.bookings * step // args.steps
+            booked_from = timezone.localdate(timezone.now() - timedelta(minutes=minutes)) + timedelta(days=1)
+            departs_to = timezone.localdate() + timedelta(days=365 * step // args.steps)
+            for mode, argv in (
+                ('bookings', ['--from', booked_from.isoformat()]),
+                ('manifest', ['--manifest', '--to', departs_to.isoformat()]),
+            ):
+                argv = ['export_bookings', '--output', os.devnull] + argv
+                rows, elapsed, peak = measure(lambda: run(argv))
+                print(f'{mode:>9} {rows:>10,} {rows / elapsed:>10,.0f} {peak:>9.1f}')
+    finally:
+        os.remove(db_path)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,109 @@
+"""
+Multi-process uniqueness benchmark for booking references
+
+Every worker process generates references as fast as it can and writes
+them to a scratch file; the parent then checks that no reference appears
+twice across all processes and that each process's references come out
+in strictly increasing order.
+
+    python -m benchmarks.booking_references --processes 8 --per-process 500000
+"""
+
+import argparse
+import multiprocessing
+import os
+import tempfile
+import time
+
+
+def worker(path, count, threads, ready, start, queue):
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'travel_booking.settings')
+    from concurrent.futures import ThreadPoolExecutor
+    from bookings.references import generate_booking_reference
+
+    def generate(n):
+        return [generate_booking_reference() for _ in range(n)]
+
+    ready.put(os.getpid())
+    start.wait()
+
+    started = time.perf_counter()
+    if threads > 1:
+        with ThreadPoolExecutor(threads) as pool:
+            chunks = list(pool.map(generate, [count // threads] * threads))
+        references = sorted(ref for chunk in chunks for ref in chunk)
+        ordered = True  # threads interleave, so only uniqueness is checked
+    else:
+        references = generate(count)
+        ordered = all(a < b for a, b in zip(references, references[1:]))
+    elapsed = time.perf_counter() - started
+
+    with open(path, 'w') as f:
+        f.write('\n'.join(references))
+    queue.put((len(references), elapsed, ordered))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--processes', type=int, default=8)
+    parser.add_argument('--per-process', type=int, default=500000)
+    parser.add_argument('--threads', type=int, default=1, help='Generator threads per process')
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix='travel_karo_refs_')
+    paths = [os.path.join(workdir, f'{i}.txt') for i in range(args.processes)]
+
+    ctx = multiprocessing.get_context('spawn')
+    ready = ctx.Queue()
+    start = ctx.Event()
+    queue = ctx.Queue()
+    processes = [
+        ctx.Process(target=worker, args=(path, args.per_process, args.threads, ready, start, queue))
+        for path in paths
+    ]
+
+    for process in processes:
+        process.start()
+    for _ in processes:
+        ready.get()
+
+    started = time.perf_counter()
+    start.set()
+    results = [queue.get() for _ in processes]
+    for process in processes:
+        process.join()
+    elapsed = time.perf_counter() - started
+
+    seen = set()
+    generated = 0
+    longest = 0
+    for path in paths:
+        with open(path) as f:
+            for reference in f.read().split('\n'):
+                seen.add(reference)
+                generated += 1
+                longest = max(longest, len(reference))
+        os.remove(path)
+    os.rmdir(workdir)
+
+    duplicates = generated - len(seen)
+    unordered = sum(1 for r in results if not r[2])
+    per_process_rate = sum(r[0] / r[1] for r in results) / len(results)
+
+    print(f'processes:        {args.processes} x {args.threads} threads')
+    print(f'references:       {generated:,}')
+    print(f'duplicates:       {duplicates}')
+    print(f'longest:          {longest} chars')
+    print(f'elapsed:          {elapsed:.2f}s')
+    print(f'refs/sec total:   {generated / elapsed:,.0f}')
+    print(f'refs/sec/process: {per_process_rate:,.0f}')
+
+    if duplicates or unordered or longest > 20:
+        raise SystemExit(
+            f'FAILED: {duplicates} duplicates, {unordered} processes out of order, longest {longest} chars'
+        )
+    print('OK: all references unique and time-ordered')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,101 @@
+"""
+Table and index size with city names vs small-integer city keys
+
+Generates travel options, then copies them into a shadow table that stores
+source and destination as names, the way TravelOption did before the City
+table, with the same route index. Reports the bytes each table and route
+index takes (SQLite's dbstat) and the median time of a route search on
+each.
+
+    python -m benchmarks.city_keys --rows 1000000
+"""
+
+import argparse
+import os
+
+from .keyset_pagination import generate_rows, timed
+from .utils import setup_django
+
+NAMED_TABLE = 'bench_named_traveloption'
+
+
+def sizes(cursor, names):
+    cursor.execute(
+        'SELECT name, SUM(pgsize) FROM dbstat WHERE name IN ({}) GROUP BY name'.format(
+            ', '.join(['%s'] * len(names))
+        ),
+        names,
+    )
+    return dict(cursor.fetchall())
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--rows', type=int, default=1000000)
+    parser.add_argument('--repeat', type=int, default=20)
+    args = parser.parse_args()
+
+    db_path = setup_django()
+
+    from django.db import connection
+    from django.utils import timezone
+    from travel import cities
+    from travel.models import TravelOption
+
+    print(f'Generating {args.rows:,} travel options...')
+    generate_rows(args.rows)
+    table = TravelOption._meta.db_table
+    # Same columns in the same order, with names in place of the city ids
+    columns = ', '.join(
+        {'source_id': 's.name AS source', 'destination_id': 'd.name AS destination'}.get(
+            field.column, f't.{field.column}'
+        )
+        for field in TravelOption._meta.concrete_fields
+    )
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f'CREATE TABLE {NAMED_TABLE} AS SELECT {columns} FROM {table} t '
+            'JOIN travel_city s ON s.id = t.source_id JOIN travel_city d ON d.id = t.destination_id'
+        )
+        cursor.execute(
+            f'CREATE INDEX bench_named_route_idx ON {NAMED_TABLE} '
+            '(source, destination, departure_datetime, id) WHERE is_active'
+        )
+        cursor.execute('VACUUM')
+        cursor.execute('ANALYZE')
+        measured = sizes(cursor, [table, 'travel_search_route_idx', NAMED_TABLE, 'bench_named_route_idx'])
+
+    now = connection.ops.adapt_datetimefield_value(timezone.now())
+    source, destination = cities.by_name('Delhi'), cities.by_name('Mumbai')
+
+    def search(sql, params):
+        with connection.cursor() as cursor:
+            cursor.execute(sql, params)
+            return cursor.fetchall()
+
+    id_search = timed(lambda: search(
+        f'SELECT id FROM {table} WHERE source_id = %s AND destination_id = %s '
+        'AND is_active AND departure_datetime >= %s '
+        'ORDER BY departure_datetime, id LIMIT 10',
+        [source.pk, destination.pk, now],
+    ), args.repeat)
+    name_search = timed(lambda: search(
+        f'SELECT id FROM {NAMED_TABLE} WHERE source = %s AND destination = %s '
+        'AND is_active AND departure_datetime >= %s '
+        'ORDER BY departure_datetime, id LIMIT 10',
+        [source.name, destination.name, now],
+    ), args.repeat)
+
+    def mb(name):
+        return measured.get(name, 0) / 1024 / 1024
+
+    print()
+    print(f'{"":<14} {"table MB":>10} {"route index MB":>15} {"search ms":>10}')
+    print(f'{"names":<14} {mb(NAMED_TABLE):>10.1f} {mb("bench_named_route_idx"):>15.1f} {name_search:>10.2f}')
+    print(f'{"city ids":<14} {mb(table):>10.1f} {mb("travel_search_route_idx"):>15.1f} {id_search:>10.2f}')
+
+    os.remove(db_path)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,112 @@
+"""
+Connection search benchmark
+
+Builds the in-memory connection graph from synthetic rows (the database
+only holds the city table), then times random 1- and 2-stop searches and incremental
+updates against it.
+
+    python -m benchmarks.connection_search --options 1000000 --queries 200
+"""
+
+import argparse
+import os
+import random
+import resource
+import statistics
+import time
+
+from .utils import setup_django
+
+
+def generate_rows(count, days, seed):
+    from datetime import timedelta
+    from decimal import Decimal
+    from django.utils import timezone
+    from travel import cities
+
+    rng = random.Random(seed)
+    city_ids = [city.pk for city in cities.all_cities()]
+    start = timezone.now().replace(minute=0, second=0, microsecond=0) + timedelta(days=1)
+    journey_hours = {'flight': (1, 4), 'train': (4, 24), 'bus': (4, 16)}
+
+    for option_id in range(1, count + 1):
+        source, destination = rng.sample(city_ids, 2)
+        travel_type = rng.choice(('flight', 'train', 'bus'))
+        departure = start + timedelta(minutes=15 * rng.randrange(days * 96))
+        low, high = journey_hours[travel_type]
+        arrival = departure + timedelta(minutes=30 * rng.randint(low * 2, high * 2))
+        yield (
+            option_id, travel_type, source, destination, departure, arrival,
+            Decimal(rng.randint(200, 8000)), rng.randint(1, 300), 'Operator', f'SVC-{option_id}',
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--options', type=int, default=1000000)
+    parser.add_argument('--days', type=int, default=60)
+    parser.add_argument('--queries', type=int, default=200)
+    parser.add_argument('--updates', type=int, default=20000)
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+
+    db_path = setup_django()
+
+    from datetime import datetime, timedelta
+    from django.utils import timezone
+    from travel import cities
+    from travel.connections import ConnectionGraph, SORT_CHOICES
+    from travel.models import TravelOption
+
+    graph = ConnectionGraph()
+    started = time.perf_counter()
+    graph.load(generate_rows(args.options, args.days, args.seed))
+    build_seconds = time.perf_counter() - started
+    max_rss_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+    rng = random.Random(args.seed)
+    city_names = [city.name for city in cities.all_cities()]
+    first_day = timezone.localtime().replace(hour=0, minute=0, second=0, microsecond=0) + timedelta(days=2)
+    timings = {stops: [] for stops in (1, 2)}
+    found = 0
+    for _ in range(args.queries):
+        source, destination = rng.sample(city_names, 2)
+        day = first_day + timedelta(days=rng.randrange(args.days - 2))
+        sort = rng.choice(SORT_CHOICES)
+        for stops in timings:
+            query_started = time.perf_counter()
+            found += len(graph.search(source, destination, day, day + timedelta(days=1), sort=sort, max_stops=stops))
+            timings[stops].append((time.perf_counter() - query_started) * 1000)
+
+    tz = timezone.get_current_timezone()
+    updates_started = time.perf_counter()
+    for option_id in rng.sample(range(1, args.options + 1), min(args.updates, args.options)):
+        leg = graph._legs.get(option_id)
+        if leg is None:
+            continue
+        graph.upsert(TravelOption(
+            id=leg.id, travel_type=leg.travel_type, source=cities.by_name(leg.source), destination=cities.by_name(leg.destination),
+            departure_datetime=datetime.fromtimestamp(leg.departure, tz=tz),
+            arrival_datetime=datetime.fromtimestamp(leg.arrival, tz=tz),
+            price=leg.price, available_seats=max(leg.seats - 1, 0), is_active=True,
+            operator_name=leg.operator, service_number=leg.service_number,
+        ))
+    update_seconds = time.perf_counter() - updates_started
+
+    def percentile(values, pct):
+        return statistics.quantiles(values, n=100)[pct - 1] if len(values) > 1 else values[0]
+
+    print(f'options:          {args.options:,} over {args.days} days ({len(graph):,} in graph)')
+    print(f'build:            {build_seconds:.1f}s, max RSS {max_rss_mb:,.0f} MB')
+    for stops, values in timings.items():
+        print(
+            f'search <= {stops} stop{"s" if stops > 1 else " "}: p50 {percentile(values, 50):.1f} ms, '
+            f'p95 {percentile(values, 95):.1f} ms, max {max(values):.1f} ms'
+        )
+    print(f'itineraries:      {found:,}')
+    print(f'updates/sec:      {args.updates / update_seconds:,.0f}')
+    os.remove(db_path)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,146 @@
+"""
+Concurrent booking throughput under each SQLite database profile
+
+For every profile, worker processes run request-shaped loops against one
+scratch database for a fixed time: Django's per-request connection
+handling (close_old_connections at the start and end), a read of a travel
+option, and, for --write-share of the requests, a booking (seat UPDATE plus
+Booking INSERT in one transaction). Reports requests and bookings per
+second, latency and "database is locked" failures per profile.
+
+    python -m benchmarks.db_profiles --processes 8 --duration 10
+"""
+
+import argparse
+import multiprocessing
+import os
+import random
+import shutil
+import time
+
+from .utils import make_user, setup_django
+
+PROFILES = ('sqlite-basic', 'sqlite')
+
+
+def worker(db_path, profile, option_ids, worker_index, write_share, ready, start, stop, queue):
+    setup_django(db_path, migrate=False, profile=profile)
+
+    from django.db import OperationalError, close_old_connections, transaction
+    from bookings.models import Booking
+    from travel.inventory import reserve_seats
+    from travel.models import TravelOption
+
+    user = make_user(f'{profile}_worker_{worker_index}')
+    rng = random.Random(worker_index)
+    close_old_connections()
+    ready.put(worker_index)
+    start.wait()
+
+    requests = bookings = locked = 0
+    latencies = []
+    while not stop.is_set():
+        started = time.perf_counter()
+        # What Django does on request_started / request_finished
+        close_old_connections()
+        try:
+            travel_option = TravelOption.objects.get(pk=rng.choice(option_ids))
+            if rng.random() < write_share:
+                with transaction.atomic():
+                    reserve_seats(travel_option, 1)
+                    Booking.objects.create(
+                        user=user, travel_option=travel_option, num_seats=1,
+                        total_price=travel_option.price, contact_phone=user.phone,
+                        contact_email=user.email,
+                    )
+                bookings += 1
+        except OperationalError:
+            # "database is locked": the request would have failed with a 500
+            locked += 1
+        close_old_connections()
+        requests += 1
+        latencies.append(time.perf_counter() - started)
+
+    queue.put((requests, bookings, locked, latencies))
+
+
+def measure(profile, db_path, option_ids, args):
+    ctx = multiprocessing.get_context('spawn')
+    ready, start, stop, queue = ctx.Queue(), ctx.Event(), ctx.Event(), ctx.Queue()
+    processes = [
+        ctx.Process(
+            target=worker,
+            args=(db_path, profile, option_ids, i, args.write_share, ready, start, stop, queue),
+        )
+        for i in range(args.processes)
+    ]
+    for process in processes:
+        process.start()
+    for _ in processes:
+        ready.get()
+
+    start.set()
+    time.sleep(args.duration)
+    stop.set()
+    results = [queue.get() for _ in processes]
+    for process in processes:
+        process.join()
+
+    requests = sum(result[0] for result in results)
+    bookings = sum(result[1] for result in results)
+    locked = sum(result[2] for result in results)
+    latencies = sorted(latency for result in results for latency in result[3])
+    p50 = latencies[len(latencies) // 2] * 1000 if latencies else 0
+    p99 = latencies[int(len(latencies) * 0.99)] * 1000 if latencies else 0
+    print(f'{profile:<13} {requests / args.duration:8.1f} req/s  {bookings / args.duration:8.1f} bookings/s  '
+          f'p50 {p50:6.1f}ms  p99 {p99:7.1f}ms  locked {locked:,}')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--processes', type=int, default=8)
+    parser.add_argument('--duration', type=float, default=10)
+    parser.add_argument('--options', type=int, default=1000)
+    parser.add_argument('--write-share', type=float, default=0.3, help='Share of requests that book')
+    args = parser.parse_args()
+
+    # Create and fill the database once, then copy it for each profile so
+    # both start from the same data
+    db_path = setup_django(profile='sqlite-basic')
+
+    from datetime import timedelta
+    from django.db import connections
+    from django.utils import timezone
+    from travel import cities
+    from travel.models import TravelOption
+
+    city_ids = [city.pk for city in cities.all_cities()]
+    rng = random.Random(1)
+    TravelOption.objects.bulk_create(
+        TravelOption(
+            travel_type='train', source_id=source, destination_id=destination,
+            departure_datetime=timezone.now() + timedelta(days=rng.randint(1, 60)),
+            price=rng.randint(300, 2500), total_seats=1000000, available_seats=1000000,
+            operator_name='Bench', service_number=f'DB-{i}',
+        )
+        for i, (source, destination) in enumerate(rng.sample(city_ids, 2) for _ in range(args.options))
+    )
+    option_ids = list(TravelOption.objects.values_list('pk', flat=True))
+    connections.close_all()
+
+    print(f'{args.processes} processes, {args.write_share:.0%} of requests book, {args.duration:.0f}s each')
+    for profile in PROFILES:
+        copy = f'{db_path}.{profile}'
+        shutil.copyfile(db_path, copy)
+        try:
+            measure(profile, copy, option_ids, args)
+        finally:
+            for suffix in ('', '-wal', '-shm'):
+                if os.path.exists(copy + suffix):
+                    os.remove(copy + suffix)
+
+    os.remove(db_path)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,147 @@
+"""
+Multi-process stress test for the seat inventory service
+
+Several worker processes hammer the same travel option with bookings until
+it sells out. The run fails loudly if more seats were sold than existed or
+if the seat counter and the bookings table disagree.
+
+    python -m benchmarks.inventory_stress --processes 8 --seats 800
+"""
+
+import argparse
+import os
+import multiprocessing
+import random
+import time
+
+from .utils import setup_django, make_user
+
+
+def worker(db_path, option_id, worker_index, max_seats_per_booking, ready, start, queue):
+    setup_django(db_path, migrate=False)
+
+    from django.db import transaction, OperationalError
+    from travel.models import TravelOption
+    from travel.inventory import reserve_seats, InsufficientSeats
+    from bookings.models import Booking
+
+    user = make_user(f'stress_worker_{worker_index}')
+    travel_option = TravelOption.objects.get(pk=option_id)
+    rng = random.Random(worker_index)
+
+    # Only time the booking loop, not interpreter start-up and django.setup()
+    ready.put(worker_index)
+    start.wait()
+
+    bookings = seats = retries = 0
+    while True:
+        num_seats = rng.randint(1, max_seats_per_booking)
+        try:
+            with transaction.atomic():
+                reserve_seats(travel_option, num_seats)
+                Booking.objects.create(
+                    user=user,
+                    travel_option=travel_option,
+                    num_seats=num_seats,
+                    total_price=travel_option.price * num_seats,
+                    status='confirmed',
+                    contact_phone=user.phone,
+                    contact_email=user.email,
+                )
+        except InsufficientSeats:
+            if num_seats == 1:
+                break
+            continue
+        except OperationalError:
+            # Lock timeout under heavy contention; nothing was committed
+            retries += 1
+            continue
+        bookings += 1
+        seats += num_seats
+
+    queue.put((bookings, seats, retries))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--processes', type=int, default=8)
+    parser.add_argument('--seats', type=int, default=800)
+    parser.add_argument('--max-seats-per-booking', type=int, default=4)
+    args = parser.parse_args()
+
+    db_path = setup_django()
+
+    from datetime import timedelta
+    from django.db.models import Sum
+    from django.utils import timezone
+    from travel import cities
+    from travel.models import TravelOption
+    from bookings.models import Booking
+
+    travel_option = TravelOption.objects.create(
+        travel_type='train',
+        source=cities.by_name('Delhi'),
+        destination=cities.by_name('Mumbai'),
+        departure_datetime=timezone.now() + timedelta(days=7),
+        price=1200,
+        total_seats=args.seats,
+        available_seats=args.seats,
+        operator_name='Indian Railways',
+        service_number='12952',
+    )
+
+    ctx = multiprocessing.get_context('spawn')
+    ready = ctx.Queue()
+    start = ctx.Event()
+    queue = ctx.Queue()
+    processes = [
+        ctx.Process(
+            target=worker,
+            args=(db_path, travel_option.pk, i, args.max_seats_per_booking, ready, start, queue),
+        )
+        for i in range(args.processes)
+    ]
+
+    for process in processes:
+        process.start()
+    for _ in processes:
+        ready.get()
+
+    started = time.perf_counter()
+    start.set()
+    results = [queue.get() for _ in processes]
+    for process in processes:
+        process.join()
+    elapsed = time.perf_counter() - started
+
+    travel_option.refresh_from_db()
+    booked_seats = Booking.objects.filter(
+        travel_option=travel_option, status='confirmed'
+    ).aggregate(total=Sum('num_seats'))['total'] or 0
+
+    total_bookings = sum(r[0] for r in results)
+    reported_seats = sum(r[1] for r in results)
+    retries = sum(r[2] for r in results)
+
+    print(f'processes:        {args.processes}')
+    print(f'bookings:         {total_bookings}')
+    print(f'seats sold:       {booked_seats} / {args.seats}')
+    print(f'seats left:       {travel_option.available_seats}')
+    print(f'lock retries:     {retries}')
+    print(f'elapsed:          {elapsed:.2f}s')
+    print(f'bookings/sec:     {total_bookings / elapsed:.1f}')
+
+    oversold = booked_seats > args.seats
+    inconsistent = (
+        booked_seats != reported_seats
+        or booked_seats + travel_option.available_seats != args.seats
+    )
+    os.remove(db_path)
+
+    if oversold or inconsistent:
+        raise SystemExit('FAILED: seat inventory is inconsistent')
+    print('OK: no overselling, seat counter matches bookings')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,126 @@
+"""
+Page latency of OFFSET vs keyset pagination on a large search result
+
+Generates a few million travel options, then times the search queryset at
+page 1 and a deep page with Django's Paginator (COUNT + OFFSET) and with
+travel.pagination.KeysetPaginator.
+
+    python -m benchmarks.keyset_pagination --rows 2000000 --deep-page 500
+"""
+
+import argparse
+import os
+import random
+import statistics
+import time
+
+from .utils import setup_django
+
+
+def generate_rows(rows, batch_size=50000):
+    """Insert rows with executemany; the ORM is far too slow for millions"""
+    from datetime import timedelta
+    from django.db import connection, transaction
+    from django.utils import timezone
+    from travel import cities
+    from travel.constants import TRAVEL_TYPES
+    from travel.models import TravelOption
+
+    rng = random.Random(42)
+    city_ids = [city.pk for city in cities.all_cities()]
+    types = [code for code, _ in TRAVEL_TYPES]
+    now = timezone.now()
+    adapt = connection.ops.adapt_datetimefield_value
+    created = adapt(now)
+
+    columns = (
+        'travel_type', 'source_id', 'destination_id', 'departure_datetime', 'arrival_datetime',
+        'price', 'total_seats', 'available_seats', 'operator_name', 'service_number',
+        'description', 'is_active', 'created_at', 'updated_at',
+    )
+    table = TravelOption._meta.db_table
+    sql = 'INSERT INTO {} ({}) VALUES ({})'.format(
+        table, ', '.join(columns), ', '.join(['%s'] * len(columns))
+    )
+
+    inserted = 0
+    with connection.cursor() as cursor:
+        while inserted < rows:
+            batch = []
+            for i in range(inserted, min(inserted + batch_size, rows)):
+                source, destination = rng.sample(city_ids, 2)
+                departure = now + timedelta(minutes=rng.randint(60, 365 * 24 * 60))
+                batch.append((
+                    rng.choice(types), source, destination,
+                    adapt(departure), adapt(departure + timedelta(hours=rng.randint(1, 20))),
+                    rng.randint(200, 8000), 200, rng.randint(1, 200), 'Bench', f'B-{i}',
+                    '', True, created, created,
+                ))
+            with transaction.atomic():
+                cursor.executemany(sql, batch)
+            inserted += len(batch)
+            print(f'\r  generated {inserted:,} rows', end='', flush=True)
+    print()
+
+
+def timed(fn, repeat):
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - started) * 1000)
+    return statistics.median(samples)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--rows', type=int, default=2_000_000)
+    parser.add_argument('--per-page', type=int, default=10)
+    parser.add_argument('--deep-page', type=int, default=500)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    db_path = setup_django()
+
+    from django.core.paginator import Paginator
+    from django.db import connection
+    from django.test import RequestFactory
+    from travel.pagination import KeysetPaginator, NEXT
+    from travel.views import TravelSearchView
+
+    print(f'Generating {args.rows:,} travel options...')
+    generate_rows(args.rows)
+    with connection.cursor() as cursor:
+        cursor.execute('ANALYZE')
+
+    view = TravelSearchView()
+    view.setup(RequestFactory().get('/travel/search/'))
+    queryset = view.get_queryset()
+    ordering = TravelSearchView.keyset_ordering
+
+    keyset = KeysetPaginator(queryset, args.per_page, ordering=ordering)
+    # A user reaches the deep page by following next tokens; build that
+    # token directly from the last row of the preceding page
+    boundary = queryset.order_by(*ordering)[(args.deep_page - 1) * args.per_page - 1]
+    deep_token = keyset.encode_token(NEXT, boundary)
+
+    def offset_page(number):
+        page = Paginator(queryset.order_by(*ordering), args.per_page).page(number)
+        return list(page.object_list), page.paginator.count
+
+    results = {
+        'offset page 1': timed(lambda: offset_page(1), args.repeat),
+        f'offset page {args.deep_page}': timed(lambda: offset_page(args.deep_page), args.repeat),
+        'keyset page 1': timed(lambda: keyset.page(), args.repeat),
+        f'keyset page {args.deep_page}': timed(lambda: keyset.page(deep_token), args.repeat),
+    }
+
+    print()
+    for label, ms in results.items():
+        print(f'{label:<22} {ms:8.2f} ms')
+
+    os.remove(db_path)
+
+
+if __name__ == '__main__':
+    main()
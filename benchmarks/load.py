@@ -0,0 +1,376 @@
+"""
+Load and latency benchmark for the search, detail, book and cancel flows
+
+Drives TravelSearchView, TravelDetailView, BookTravelView and
+CancelBookingView either in-process through the Django test client or
+over HTTP against a real threaded WSGI server on localhost. Reports
+throughput, p50/p95/p99 latency and queries per request, and writes the
+results to JSON so runs can be compared across commits.
+
+    python -m benchmarks.load --mode client --mode wsgi --concurrency 8 --requests 500
+    python -m benchmarks.load --compare bench_results/old.json bench_results/new.json
+"""
+
+import argparse
+import http.client
+import json
+import os
+import random
+import statistics
+import subprocess
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from urllib.parse import urlencode
+
+from .utils import setup_django
+
+SCENARIOS = ('search', 'detail', 'book', 'cancel')
+MODES = ('client', 'wsgi')
+QUERY_COUNT_HEADER = 'X-Bench-Query-Count'
+# Any 32 character alphanumeric string is a valid unmasked CSRF secret
+CSRF_SECRET = 'benchmarkbenchmarkbenchmarkbench'
+
+
+def percentile(samples, pct):
+    """Nearest-rank percentile of an already sorted list"""
+    if not samples:
+        return 0.0
+    rank = max(int(round(pct / 100 * len(samples))) - 1, 0)
+    return samples[min(rank, len(samples) - 1)]
+
+
+def summarize(latencies, queries, errors, elapsed):
+    latencies = sorted(latencies)
+    return {
+        'requests': len(latencies),
+        'errors': errors,
+        'throughput_rps': round(len(latencies) / elapsed, 1) if elapsed else 0.0,
+        'p50_ms': round(percentile(latencies, 50), 2),
+        'p95_ms': round(percentile(latencies, 95), 2),
+        'p99_ms': round(percentile(latencies, 99), 2),
+        'mean_ms': round(statistics.fmean(latencies), 2) if latencies else 0.0,
+        'queries_per_request': round(statistics.fmean(queries), 2) if queries else 0.0,
+    }
+
+
+def count_queries(app):
+    """Wrap a WSGI app so each response carries its DB query count"""
+    from django.db import connections
+
+    def counting_app(environ, start_response):
+        counter = [0]
+
+        def wrapper(execute, sql, params, many, context):
+            counter[0] += 1
+            return execute(sql, params, many, context)
+
+        captured = {}
+
+        def capture_start_response(status, headers, exc_info=None):
+            captured['status'], captured['headers'] = status, headers
+            captured['exc_info'] = exc_info
+
+        with connections['default'].execute_wrapper(wrapper):
+            result = app(environ, capture_start_response)
+            try:
+                body = b''.join(result)
+            finally:
+                if hasattr(result, 'close'):
+                    result.close()
+
+        headers = list(captured['headers']) + [(QUERY_COUNT_HEADER, str(counter[0]))]
+        start_response(captured['status'], headers, captured['exc_info'])
+        return [body]
+
+    return counting_app
+
+
+class Workload:
+    """Test data and request generators shared by both modes"""
+
+    def __init__(self, args):
+        from django.contrib.auth import get_user_model
+        from django.core.management import call_command
+        from travel.management.commands.populate_sample_data import POPULAR_ROUTES
+        from travel.models import TravelOption
+
+        call_command(
+            'populate_sample_data', '--seed', str(args.seed), '--days', str(args.days),
+            '--users', str(args.concurrency), verbosity=0, stdout=open(os.devnull, 'w'),
+        )
+        self.rng = random.Random(args.seed)
+        self.lock = threading.Lock()
+        self.routes = POPULAR_ROUTES
+        self.option_ids = list(
+            TravelOption.objects.filter(is_active=True).values_list('id', flat=True)
+        )
+        self.users = list(get_user_model().objects.filter(username__startswith='loaduser_'))
+        self.days = args.days
+        self.cancellable = []
+
+    def prepare_cancellations(self, count):
+        """Create one confirmed booking per cancel request"""
+        from bookings.models import Booking
+        from travel.inventory import reserve_seats
+        from travel.models import TravelOption
+
+        self.cancellable = []
+        options = TravelOption.objects.filter(available_seats__gte=1, is_active=True)[:count]
+        for index, option in enumerate(options):
+            user = self.users[index % len(self.users)]
+            reserve_seats(option, 1)
+            booking = Booking.objects.create(
+                user=user, travel_option=option, num_seats=1, total_price=option.price
+            )
+            self.cancellable.append((user, booking.pk))
+
+    def request_for(self, scenario, worker_index):
+        """Return (method, path, data, user) for one request"""
+        from django.urls import reverse
+        from django.utils import timezone
+        from datetime import timedelta
+
+        with self.lock:
+            if scenario == 'search':
+                source, destination = self.rng.choice(self.routes)
+                day = timezone.localdate() + timedelta(days=self.rng.randint(1, self.days))
+                query = {'source': source, 'destination': destination, 'date': day.isoformat()}
+                return 'GET', f"{reverse('travel:search')}?{urlencode(query)}", None, None
+            if scenario == 'detail':
+                pk = self.rng.choice(self.option_ids)
+                return 'GET', reverse('travel:detail', kwargs={'pk': pk}), None, None
+            if scenario == 'book':
+                pk = self.rng.choice(self.option_ids)
+                user = self.users[worker_index % len(self.users)]
+                return 'POST', reverse('travel:book', kwargs={'pk': pk}), {'num_seats': '1'}, user
+            if not self.cancellable:
+                return None
+            user, pk = self.cancellable.pop()
+            return 'POST', reverse('bookings:cancel', kwargs={'pk': pk}), {}, user
+
+
+class ClientDriver:
+    """In-process requests through django.test.Client"""
+
+    def __init__(self):
+        self._local = threading.local()
+
+    def client_for(self, user):
+        from django.test import Client
+
+        clients = getattr(self._local, 'clients', None)
+        if clients is None:
+            clients = self._local.clients = {}
+        key = user.pk if user is not None else None
+        if key not in clients:
+            clients[key] = Client()
+            if user is not None:
+                clients[key].force_login(user)
+        return clients[key]
+
+    def request(self, method, path, data, user):
+        from django.db import connections
+
+        client = self.client_for(user)
+        counter = [0]
+
+        def wrapper(execute, sql, params, many, context):
+            counter[0] += 1
+            return execute(sql, params, many, context)
+
+        # The test client runs the view in this thread, on this connection
+        with connections['default'].execute_wrapper(wrapper):
+            if method == 'GET':
+                response = client.get(path)
+            else:
+                response = client.post(path, data or {})
+        return response.status_code, counter[0]
+
+    def session_cookie(self, user):
+        return f"sessionid={self.client_for(user).cookies['sessionid'].value}"
+
+    def close(self):
+        pass
+
+
+class WSGIDriver(ClientDriver):
+    """Requests over HTTP to a threaded wsgiref server on localhost"""
+
+    def __init__(self):
+        super().__init__()
+        from socketserver import ThreadingMixIn
+        from wsgiref.simple_server import WSGIServer, WSGIRequestHandler, make_server
+        from django.core.wsgi import get_wsgi_application
+
+        class ThreadingWSGIServer(ThreadingMixIn, WSGIServer):
+            daemon_threads = True
+            request_queue_size = 1024
+
+        class QuietHandler(WSGIRequestHandler):
+            def log_message(self, *args):
+                pass
+
+        self.server = make_server(
+            '127.0.0.1', 0, count_queries(get_wsgi_application()),
+            server_class=ThreadingWSGIServer, handler_class=QuietHandler,
+        )
+        self.port = self.server.server_address[1]
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.thread.start()
+
+    def request(self, method, path, data, user):
+        headers = {}
+        cookies = []
+        body = None
+        if user is not None:
+            cookies.append(self.session_cookie(user))
+        if method == 'POST':
+            cookies.append(f'csrftoken={CSRF_SECRET}')
+            headers['X-CSRFToken'] = CSRF_SECRET
+            headers['Content-Type'] = 'application/x-www-form-urlencoded'
+            body = urlencode(data or {})
+        if cookies:
+            headers['Cookie'] = '; '.join(cookies)
+
+        connection = http.client.HTTPConnection('127.0.0.1', self.port, timeout=60)
+        try:
+            connection.request(method, path, body=body, headers=headers)
+            response = connection.getresponse()
+            response.read()
+            return response.status, int(response.getheader(QUERY_COUNT_HEADER, 0))
+        finally:
+            connection.close()
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+def run_scenario(driver, workload, scenario, requests, concurrency):
+    if scenario == 'cancel':
+        workload.prepare_cancellations(requests)
+
+    latencies, queries = [], []
+    errors = [0]
+    lock = threading.Lock()
+    per_worker = [requests // concurrency + (i < requests % concurrency) for i in range(concurrency)]
+
+    def worker(index):
+        from django.db import connections
+
+        for _ in range(per_worker[index]):
+            spec = workload.request_for(scenario, index)
+            if spec is None:
+                break
+            started = time.perf_counter()
+            try:
+                status, query_count = driver.request(*spec)
+            except Exception:
+                status, query_count = 599, 0
+            elapsed_ms = (time.perf_counter() - started) * 1000
+            with lock:
+                if status >= 400:
+                    errors[0] += 1
+                else:
+                    latencies.append(elapsed_ms)
+                    queries.append(query_count)
+        connections.close_all()
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        list(pool.map(worker, range(concurrency)))
+    return summarize(latencies, queries, errors[0], time.perf_counter() - started)
+
+
+def git_revision():
+    try:
+        return subprocess.check_output(
+            ['git', 'rev-parse', '--short', 'HEAD'], stderr=subprocess.DEVNULL, text=True
+        ).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return 'unknown'
+
+
+def compare(old_path, new_path):
+    with open(old_path) as fh:
+        old = json.load(fh)
+    with open(new_path) as fh:
+        new = json.load(fh)
+
+    print(f"{'':24} {old['revision']:>12} {new['revision']:>12} {'change':>8}")
+    for key, new_stats in new['results'].items():
+        old_stats = old['results'].get(key)
+        if not old_stats:
+            continue
+        for metric in ('throughput_rps', 'p50_ms', 'p99_ms', 'queries_per_request'):
+            before, after = old_stats[metric], new_stats[metric]
+            change = f'{(after - before) / before * 100:+.0f}%' if before else 'n/a'
+            print(f'{key + " " + metric:<24} {before:>12} {after:>12} {change:>8}')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--mode', action='append', choices=MODES,
+                        help='client, wsgi or both (repeat the flag); default: both')
+    parser.add_argument('--scenario', action='append', choices=SCENARIOS,
+                        help='Scenario to run (repeatable); default: all')
+    parser.add_argument('--concurrency', type=int, default=8)
+    parser.add_argument('--requests', type=int, default=400, help='Requests per scenario')
+    parser.add_argument('--days', type=int, default=30, help='Days of sample data to generate')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--output', help='JSON results file (default: bench_results/<time>-<rev>.json)')
+    parser.add_argument('--compare', nargs=2, metavar=('OLD', 'NEW'),
+                        help='Compare two saved result files and exit')
+    args = parser.parse_args()
+
+    if args.compare:
+        compare(*args.compare)
+        return
+
+    db_path = setup_django()
+    from django.conf import settings
+    settings.ALLOWED_HOSTS = ['*']
+
+    workload = Workload(args)
+    results = {}
+    for mode in args.mode or MODES:
+        driver = WSGIDriver() if mode == 'wsgi' else ClientDriver()
+        try:
+            for scenario in args.scenario or SCENARIOS:
+                stats = run_scenario(driver, workload, scenario, args.requests, args.concurrency)
+                results[f'{mode}:{scenario}'] = stats
+                print(
+                    f"{mode:>6} {scenario:<7} {stats['throughput_rps']:>8} req/s  "
+                    f"p50 {stats['p50_ms']:>7} ms  p95 {stats['p95_ms']:>7} ms  "
+                    f"p99 {stats['p99_ms']:>7} ms  {stats['queries_per_request']:>5} q/req  "
+                    f"{stats['errors']} errors"
+                )
+        finally:
+            driver.close()
+
+    revision = git_revision()
+    output = args.output
+    if not output:
+        os.makedirs('bench_results', exist_ok=True)
+        output = os.path.join('bench_results', f"{datetime.now():%Y%m%d-%H%M%S}-{revision}.json")
+    with open(output, 'w') as fh:
+        json.dump({
+            'revision': revision,
+            'timestamp': datetime.now().isoformat(timespec='seconds'),
+            'config': {
+                'concurrency': args.concurrency,
+                'requests': args.requests,
+                'days': args.days,
+                'seed': args.seed,
+            },
+            'results': results,
+        }, fh, indent=2)
+    print(f'Results written to {output}')
+
+    os.remove(db_path)
+
+
+if __name__ == '__main__':
+    main()
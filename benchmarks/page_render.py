@@ -0,0 +1,99 @@
+"""
+Render time of the home and search pages with and without caching
+
+Requests the home page and a search results page as an anonymous visitor
+through the Django test client in three setups:
+
+    uncached   templates recompiled on every request, no fragment or page cache
+    fragments  cached template loader and {% cache %} fragments
+    page       fragments plus the anonymous full-page cache
+
+and reports the median and p95 time per request for each.
+
+    python -m benchmarks.page_render --requests 500
+"""
+
+import argparse
+import os
+import statistics
+import time
+
+from .utils import setup_django
+
+
+def timed_requests(client, url, params, requests):
+    client.get(url, params)  # warm up
+    samples = []
+    for _ in range(requests):
+        started = time.perf_counter()
+        response = client.get(url, params)
+        samples.append((time.perf_counter() - started) * 1000)
+        assert response.status_code == 200, response.status_code
+    samples.sort()
+    return statistics.median(samples), samples[int(len(samples) * 0.95)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--requests', type=int, default=500)
+    parser.add_argument('--options', type=int, default=50)
+    args = parser.parse_args()
+
+    db_path = setup_django()
+
+    from copy import deepcopy
+    from datetime import timedelta
+    from django.conf import settings
+    from django.core.cache import caches
+    from django.test import Client
+    from django.test.utils import override_settings
+    from django.urls import reverse
+    from django.utils import timezone
+    from travel import cities
+    from travel.models import TravelOption
+
+    now = timezone.now()
+    TravelOption.objects.bulk_create(
+        TravelOption(
+            travel_type='train', source=cities.by_name('Delhi'), destination=cities.by_name('Mumbai'),
+            departure_datetime=now + timedelta(days=1, minutes=30 * i),
+            price=900 + i, total_seats=500, available_seats=500,
+            operator_name='Indian Railways', service_number=f'12{i:03d}',
+        )
+        for i in range(args.options)
+    )
+
+    uncached_templates = deepcopy(settings.TEMPLATES)
+    uncached_templates[0]['OPTIONS']['loaders'] = [
+        'django.template.loaders.filesystem.Loader',
+        'django.template.loaders.app_directories.Loader',
+    ]
+    no_fragments = deepcopy(settings.CACHES)
+    no_fragments['template_fragments'] = {'BACKEND': 'django.core.cache.backends.dummy.DummyCache'}
+    setups = (
+        ('uncached', {'TEMPLATES': uncached_templates, 'CACHES': no_fragments, 'PAGE_CACHE_VIEWS': {}}),
+        ('fragments', {'PAGE_CACHE_VIEWS': {}}),
+        ('page', {}),
+    )
+    pages = (
+        ('home', reverse('home'), {}),
+        ('search', reverse('travel:search'), {'source': 'Delhi', 'destination': 'Mumbai'}),
+    )
+
+    settings.ALLOWED_HOSTS = ['*']
+    print(f'{"setup":>10} {"page":>7} {"p50 ms":>8} {"p95 ms":>8}')
+    try:
+        for label, overrides in setups:
+            with override_settings(**overrides):
+                for alias in ('template_fragments', 'pages', 'search'):
+                    caches[alias].clear()
+                client = Client()
+                for page, url, params in pages:
+                    p50, p95 = timed_requests(client, url, params, args.requests)
+                    print(f'{label:>10} {page:>7} {p50:>8.2f} {p95:>8.2f}')
+    finally:
+        os.remove(db_path)
+
+
+if __name__ == '__main__':
+    main()
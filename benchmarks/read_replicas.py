@@ -0,0 +1,141 @@
+"""
+Detail page reads on SQLite stand-in replicas while bookings write to the primary
+
+Creates a primary and --replicas SQLite files, fills the primary with
+travel options and copies it to the replicas with sync_replicas. Then it
+serves detail pages (which, unlike search, have no result cache) from
+reader threads while a writer thread books seats on the primary, once with
+every read on the primary and once with the replicas. Reports page
+throughput and latency, where the reads went, and checks that a user who
+just booked reads their own write.
+
+    python -m benchmarks.read_replicas --options 200000 --replicas 2 --duration 10
+"""
+
+import argparse
+import os
+import random
+import statistics
+import tempfile
+import threading
+import time
+
+from .keyset_pagination import generate_rows
+from .utils import make_user, setup_django
+
+
+def run(duration, readers, ids):
+    """Read detail pages from reader threads while one thread books; returns (latencies, bookings, reads per alias)"""
+    from collections import Counter
+    from django.db import connections
+    from django.test import Client
+    from django.urls import reverse
+    from travel.inventory import InsufficientSeats, reserve_seats
+    from travel.models import TravelOption
+
+    stop = threading.Event()
+    latencies, reads, booked = [], Counter(), [0]
+    lock = threading.Lock()
+
+    def count_reads(alias):
+        def wrapper(execute, sql, params, many, context):
+            if sql.lstrip().upper().startswith('SELECT'):
+                with lock:
+                    reads[alias] += 1
+            return execute(sql, params, many, context)
+        return wrapper
+
+    def reader(seed):
+        rng = random.Random(seed)
+        client = Client()
+        wrappers = [(connections[alias], count_reads(alias)) for alias in connections]
+        for connection, wrapper in wrappers:
+            connection.execute_wrappers.append(wrapper)
+        while not stop.is_set():
+            started = time.perf_counter()
+            client.get(reverse('travel:detail', kwargs={'pk': rng.choice(ids)}))
+            with lock:
+                latencies.append(time.perf_counter() - started)
+        connections.close_all()
+
+    def writer():
+        rng = random.Random(0)
+        while not stop.is_set():
+            try:
+                reserve_seats(TravelOption.objects.get(pk=rng.choice(ids)), 1)
+                booked[0] += 1
+            except InsufficientSeats:
+                pass
+        connections.close_all()
+
+    threads = [threading.Thread(target=reader, args=(seed,)) for seed in range(readers)]
+    threads.append(threading.Thread(target=writer))
+    for thread in threads:
+        thread.start()
+    time.sleep(duration)
+    stop.set()
+    for thread in threads:
+        thread.join()
+    return latencies, booked[0], reads
+
+
+def report(label, latencies, booked, reads, duration):
+    ordered = sorted(latencies)
+    p95 = ordered[int(len(ordered) * 0.95)] if ordered else 0
+    where = ', '.join(f'{alias} {count:,}' for alias, count in sorted(reads.items()))
+    print(f'{label:<10} {len(latencies) / duration:7.1f} pages/s  '
+          f'p50 {statistics.median(latencies) * 1000:6.1f}ms  p95 {p95 * 1000:6.1f}ms  '
+          f'{booked:,} bookings  reads: {where}')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--options', type=int, default=200000)
+    parser.add_argument('--replicas', type=int, default=2)
+    parser.add_argument('--readers', type=int, default=4)
+    parser.add_argument('--duration', type=float, default=10)
+    args = parser.parse_args()
+
+    replica_paths = []
+    for number in range(args.replicas):
+        fd, path = tempfile.mkstemp(prefix=f'travel_karo_replica{number + 1}_', suffix='.sqlite3')
+        os.close(fd)
+        replica_paths.append(path)
+    os.environ['DATABASE_REPLICAS'] = ','.join(replica_paths)
+    db_path = setup_django()
+
+    from django.conf import settings
+    from django.core.management import call_command
+    from django.test import Client, override_settings
+    from django.urls import reverse
+    from travel.models import TravelOption
+
+    settings.ALLOWED_HOSTS = ['*']
+    print(f'Generating {args.options:,} travel options...')
+    generate_rows(args.options)
+    call_command('sync_replicas')
+    ids = list(TravelOption.objects.values_list('pk', flat=True)[:5000])
+
+    with override_settings(REPLICA_DATABASES=[]):
+        report('primary', *run(args.duration, args.readers, ids), args.duration)
+    report('replicas', *run(args.duration, args.readers, ids), args.duration)
+
+    # Read-your-writes: the replicas are now behind the primary
+    user = make_user('sticky')
+    option = TravelOption.objects.filter(is_active=True, available_seats__gt=1).first()
+    client = Client()
+    client.force_login(user)
+    response = client.post(reverse('travel:hold', kwargs={'pk': option.pk}), {'num_seats': 1})
+    option.refresh_from_db()
+    detail = client.get(reverse('travel:detail', kwargs={'pk': option.pk}))
+    fresh = str(option.available_seats) in detail.content.decode()
+    stale = TravelOption.objects.using(settings.REPLICA_DATABASES[0]).get(pk=option.pk).available_seats
+    print(f'sticky cookie after booking: {"read_primary" in response.cookies}; '
+          f'primary {option.available_seats} seats, replica {stale}; detail page shows the primary: {fresh}')
+
+    for path in [db_path, *replica_paths]:
+        os.remove(path)
+
+
+if __name__ == '__main__':
+    main()
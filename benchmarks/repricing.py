@@ -0,0 +1,75 @@
+"""
+Time to reprice every future travel option with travel.pricing
+
+Generates travel options, then times each phase of pricing.reprice():
+loading the columns, computing the prices (vectorized with NumPy when it
+is installed, and row by row), a dry run, writing the changed prices back
+and refreshing the fare calendar days they touched. The path reprice()
+takes is printed first. A second run from the stored base prices shows the
+cost when little has changed.
+
+    python -m benchmarks.repricing --options 1000000
+"""
+
+import argparse
+import os
+import time
+
+from .keyset_pagination import generate_rows
+from .utils import setup_django
+
+
+def timed(fn, *args, **kwargs):
+    started = time.perf_counter()
+    result = fn(*args, **kwargs)
+    return result, time.perf_counter() - started
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--options', type=int, default=1_000_000)
+    parser.add_argument('--batch-size', type=int, default=5000)
+    args = parser.parse_args()
+
+    db_path = setup_django()
+
+    from django.utils import timezone
+    from travel import fare_calendar, pricing
+
+    print(f'Generating {args.options:,} travel options...')
+    generate_rows(args.options)
+
+    print('pricing path:   ' + ('vectorized (NumPy)' if pricing.np is not None
+                                else 'row by row (pip install numpy to vectorize)'))
+    now = timezone.now()
+    columns, load_time = timed(pricing.load, now)
+    print(f'load:           {load_time:6.2f}s  {len(columns.ids):,} options')
+    if pricing.np is not None:
+        _, numpy_time = timed(pricing.compute_prices, columns, vectorized=True)
+        print(f'compute numpy:  {numpy_time:6.2f}s')
+    else:
+        print('compute numpy:  skipped, NumPy is not installed')
+    _, python_time = timed(pricing.compute_prices, columns, vectorized=False)
+    print(f'compute python: {python_time:6.2f}s')
+
+    dry, dry_time = timed(pricing.reprice, dry_run=True, now=now)
+    print(f'dry run:        {dry_time:6.2f}s  {len(dry.changes):,} changes')
+    written, write_time = timed(pricing._write, dry.changes, now, args.batch_size)
+    print(f'write:          {write_time:6.2f}s  {written:,} rows ({written / write_time:,.0f} rows/s)')
+    # reprice() refreshes the days of the changed options after commit
+    changed = {change.option_id for change in dry.changes}
+    keys = {
+        fare_calendar.day_key(columns.sources[i], columns.destinations[i], columns.departures[i],
+                              columns.travel_types[i])
+        for i, option_id in enumerate(columns.ids) if option_id in changed
+    }
+    _, refresh_time = timed(fare_calendar.refresh, keys)
+    print(f'fare calendar:  {refresh_time:6.2f}s  {len(keys):,} days refreshed')
+    again, again_time = timed(pricing.reprice, now=now)
+    print(f'second run:     {again_time:6.2f}s  {len(again.changes):,} changes')
+
+    os.remove(db_path)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,118 @@
+"""
+Rollup job cost and dashboard latency, against ad-hoc aggregates
+
+Generates travel options with a few bookings each, half of them departed
+(random routes, so nearly every option is its own rollup row: a worst case),
+then builds the hourly and daily rollups from scratch and times an
+incremental run after --changes bookings departing in the next two weeks
+were cancelled. Finally it
+renders the operations dashboard (30 days) and times the same route
+figures computed ad hoc from Booking joined to TravelOption.
+
+    python -m benchmarks.rollups --options 200000 --bookings 5 --changes 1000
+"""
+
+import argparse
+import os
+import random
+import time
+
+from .archive_departed import generate_bookings
+from .keyset_pagination import generate_rows
+from .utils import make_user, setup_django
+
+
+def timed(fn, *args, **kwargs):
+    started = time.perf_counter()
+    result = fn(*args, **kwargs)
+    return result, time.perf_counter() - started
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--options', type=int, default=200000)
+    parser.add_argument('--bookings', type=int, default=5, help='Bookings per option')
+    parser.add_argument('--changes', type=int, default=1000, help='Bookings cancelled before the incremental run')
+    args = parser.parse_args()
+
+    db_path = setup_django()
+
+    from datetime import datetime, time as dt_time, timedelta
+    from django.conf import settings
+    from django.db import connection
+    from django.db.models import Count, F, Q, Sum
+    from django.test import Client
+    from django.urls import reverse
+    from django.utils import timezone
+    from bookings import rollups
+    from bookings.models import Booking, DailyRollup, HourlyRollup
+    from travel.models import TravelOption
+
+    settings.ALLOWED_HOSTS = ['*']
+    # Nothing is in flight here; with a lag the generated rows would be
+    # picked up again by the incremental run
+    settings.ROLLUP_LAG_SECONDS = 0
+    print(f'Generating {args.options:,} travel options with {args.bookings} bookings each...')
+    generate_rows(args.options)
+    # Departures now span half a year back and half a year ahead
+    TravelOption.objects.update(
+        departure_datetime=F('departure_datetime') - timedelta(days=182),
+        arrival_datetime=F('arrival_datetime') - timedelta(days=182),
+    )
+    generate_bookings(args.bookings)
+    with connection.cursor() as cursor:
+        cursor.execute('ANALYZE')
+
+    days, elapsed = timed(rollups.update, rebuild=True)
+    print(f'full build:     {elapsed:6.2f}s  {days:,} days, '
+          f'{HourlyRollup.objects.count():,} hourly and {DailyRollup.objects.count():,} daily rows')
+
+    now = timezone.now()
+    # Changes cluster on the coming departures
+    upcoming = Booking.objects.filter(
+        travel_option__departure_datetime__gte=now, travel_option__departure_datetime__lt=now + timedelta(days=14)
+    ).values_list('pk', flat=True)
+    ids = random.Random(3).sample(list(upcoming), args.changes)
+    Booking.objects.filter(pk__in=ids).update(status='cancelled', updated_at=now)
+    days, elapsed = timed(rollups.update)
+    print(f'incremental:    {elapsed:6.2f}s  {days:,} days after {args.changes:,} changed bookings')
+
+    queries = [0]
+
+    def count(execute, sql, params, many, context):
+        queries[0] += 1
+        return execute(sql, params, many, context)
+
+    staff = make_user('ops', is_staff=True)
+    client = Client()
+    client.force_login(staff)
+    url = reverse('bookings:dashboard')
+    client.get(url)
+    with connection.execute_wrapper(count):
+        response, elapsed = timed(client.get, url, {'days': 30})
+    print(f'dashboard:      {elapsed * 1000:6.1f}ms  {queries[0]} queries, status {response.status_code}')
+
+    # The route chart alone, straight from the bookings
+    today = timezone.localdate()
+    start = timezone.make_aware(datetime.combine(today - timedelta(days=29), dt_time.min))
+    end = start + timedelta(days=30)
+
+    def ad_hoc():
+        confirmed = Q(status='confirmed')
+        return list(Booking.objects.filter(
+            travel_option__departure_datetime__gte=start, travel_option__departure_datetime__lt=end,
+        ).values('travel_option__source', 'travel_option__destination').annotate(
+            seats=Sum('num_seats', filter=confirmed), revenue=Sum('total_price', filter=confirmed),
+            cancellations=Count('id', filter=~confirmed),
+        ).order_by('-revenue')[:15]) + list(TravelOption.objects.filter(
+            departure_datetime__gte=start, departure_datetime__lt=end, is_active=True,
+        ).values('source', 'destination').annotate(offered=Sum('total_seats')).order_by())
+
+    _, elapsed = timed(ad_hoc)
+    print(f'ad hoc routes:  {elapsed * 1000:6.1f}ms  one chart from Booking joined to TravelOption')
+
+    os.remove(db_path)
+
+
+if __name__ == '__main__':
+    main()
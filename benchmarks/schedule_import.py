@@ -0,0 +1,85 @@
+"""
+Throughput and memory of the import_schedules command
+
+Writes a synthetic CSV schedule (a few rows deliberately invalid), imports
+it into a scratch database, then imports it again so every row takes the
+upsert path. Reports rows/sec and peak RSS, which should not grow with the
+file size.
+
+    python -m benchmarks.schedule_import --rows 5000000
+"""
+
+import argparse
+import csv
+import os
+import random
+import resource
+import tempfile
+import time
+
+from .utils import setup_django
+
+
+def write_schedule(path, rows, seed=42):
+    from datetime import datetime, timedelta
+    from travel.constants import INDIAN_CITIES
+
+    rng = random.Random(seed)
+    cities = [code for code, _ in INDIAN_CITIES]
+    start = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0) + timedelta(days=1)
+    with open(path, 'w', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow([
+            'travel_type', 'source', 'destination', 'departure_datetime', 'arrival_datetime',
+            'price', 'total_seats', 'available_seats', 'operator_name', 'service_number',
+        ])
+        for i in range(rows):
+            source, destination = rng.sample(cities, 2)
+            if i % 1000 == 999:
+                destination = source  # rejected by the clean() rules
+            departure = start + timedelta(minutes=15 * (i % 35040))
+            writer.writerow([
+                'train', source, destination, departure.isoformat(),
+                (departure + timedelta(hours=rng.randint(2, 20))).isoformat(),
+                rng.randint(200, 3000), 500, 500, 'Indian Railways', f'{i // 35040}-{i % 35040}',
+            ])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--rows', type=int, default=1000000)
+    parser.add_argument('--batch-size', type=int, default=5000)
+    args = parser.parse_args()
+
+    db_path = setup_django()
+
+    import warnings
+    from io import StringIO
+    from django.core.cache.backends.base import CacheKeyWarning
+    from django.core.management import call_command
+
+    # City names with spaces make locmem warn about memcached-unsafe keys
+    warnings.simplefilter('ignore', CacheKeyWarning)
+
+    fd, csv_path = tempfile.mkstemp(prefix='travel_karo_schedule_', suffix='.csv')
+    os.close(fd)
+    try:
+        started = time.perf_counter()
+        write_schedule(csv_path, args.rows)
+        print(f'wrote {args.rows:,} rows ({os.path.getsize(csv_path) / 1e6:,.0f} MB) in {time.perf_counter() - started:.1f}s')
+
+        for label in ('insert', 'upsert'):
+            out = StringIO()
+            started = time.perf_counter()
+            call_command('import_schedules', csv_path, '--batch-size', str(args.batch_size), stdout=out, stderr=StringIO())
+            elapsed = time.perf_counter() - started
+            summary = out.getvalue().strip().splitlines()[-1]
+            peak_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+            print(f'{label}: {args.rows / elapsed:,.0f} rows/sec, peak RSS {peak_mb:,.0f} MB -- {summary}')
+    finally:
+        os.remove(csv_path)
+        os.remove(db_path)
+
+
+if __name__ == '__main__':
+    main()
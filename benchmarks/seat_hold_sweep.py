@@ -0,0 +1,103 @@
+"""
+Throughput of the seat hold expiry sweeper
+
+Generates travel options, then inserts expired seat holds against them
+(with the seats already taken, as hold_seats() leaves them) plus a share
+of live holds that must survive. Times travel.inventory.expire_holds and
+checks every expired seat came back exactly once.
+
+    python -m benchmarks.seat_hold_sweep --holds 500000 --batch-size 1000
+"""
+
+import argparse
+import os
+import random
+import time
+
+from .keyset_pagination import generate_rows
+from .utils import make_user, setup_django
+
+
+def generate_holds(holds, live_share, batch_size=50000):
+    """Insert holds with executemany and take their seats; returns seats per option"""
+    from collections import Counter
+    from datetime import timedelta
+    from django.db import connection, transaction
+    from django.db.models import Case, F, When
+    from django.utils import timezone
+    from travel.models import SeatHold, TravelOption
+
+    rng = random.Random(3)
+    user_id = make_user('sweeper').pk
+    option_ids = list(TravelOption.objects.values_list('id', flat=True))
+    adapt = connection.ops.adapt_datetimefield_value
+    now = timezone.now()
+
+    columns = ('travel_option_id', 'user_id', 'num_seats', 'status', 'expires_at', 'created_at')
+    sql = 'INSERT INTO {} ({}) VALUES ({})'.format(
+        SeatHold._meta.db_table, ', '.join(columns), ', '.join(['%s'] * len(columns))
+    )
+    expired_seats, held = Counter(), Counter()
+    with connection.cursor() as cursor:
+        for start in range(0, holds, batch_size):
+            batch = []
+            for _ in range(start, min(start + batch_size, holds)):
+                option_id = rng.choice(option_ids)
+                live = rng.random() < live_share
+                expires = now + timedelta(minutes=rng.randint(1, 10) * (1 if live else -1))
+                batch.append((option_id, user_id, 1, 'active', adapt(expires), adapt(now)))
+                held[option_id] += 1
+                if not live:
+                    expired_seats[option_id] += 1
+            with transaction.atomic():
+                cursor.executemany(sql, batch)
+
+    # Room on every option for all of its holds
+    TravelOption.objects.update(total_seats=2000, available_seats=2000)
+    with transaction.atomic():
+        for chunk in range(0, len(option_ids), 500):
+            ids = option_ids[chunk:chunk + 500]
+            TravelOption.objects.filter(pk__in=ids).update(available_seats=Case(
+                *[When(pk=pk, then=F('available_seats') - held[pk]) for pk in ids]
+            ))
+    return expired_seats
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--options', type=int, default=20000)
+    parser.add_argument('--holds', type=int, default=500000)
+    parser.add_argument('--live-share', type=float, default=0.2, help='Share of holds still live')
+    parser.add_argument('--batch-size', type=int, default=1000)
+    args = parser.parse_args()
+
+    db_path = setup_django()
+
+    from django.db import connection
+    from django.db.models import Sum
+    from travel.inventory import expire_holds
+    from travel.models import SeatHold, TravelOption
+
+    print(f'Generating {args.options:,} travel options and {args.holds:,} holds...')
+    generate_rows(args.options)
+    expired_seats = generate_holds(args.holds, args.live_share)
+    before = dict(TravelOption.objects.values_list('id', 'available_seats'))
+    with connection.cursor() as cursor:
+        cursor.execute('ANALYZE')
+
+    started = time.perf_counter()
+    expired = expire_holds(batch_size=args.batch_size)
+    elapsed = time.perf_counter() - started
+
+    after = dict(TravelOption.objects.values_list('id', 'available_seats'))
+    wrong = sum(1 for pk, seats in after.items() if seats != before[pk] + expired_seats[pk])
+    print(f'expired:        {expired:,} holds in {elapsed:.1f}s ({expired / elapsed:,.0f}/s)')
+    print(f'still active:   {SeatHold.objects.filter(status="active").count():,}')
+    print(f'seats returned: {SeatHold.objects.filter(status="expired").aggregate(n=Sum("num_seats"))["n"]:,}')
+    print(f'options off:    {wrong}')
+
+    os.remove(db_path)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,100 @@
+"""
+Cost of cancelling a whole service
+
+Fills trains with one-seat bookings, then cancels one train booking by
+booking through Booking.cancel_booking() (the only way before) and the
+others with bookings.cancellations.cancel_services, reporting the time and
+queries of each.
+
+    python -m benchmarks.service_cancellation --seats 800 --trains 5
+"""
+
+import argparse
+import os
+import time
+
+from .utils import setup_django
+
+
+def fill_train(number, seats, users):
+    from datetime import timedelta
+    from django.utils import timezone
+    from bookings.models import Booking
+    from travel import cities
+    from travel.models import TravelOption
+
+    option = TravelOption.objects.create(
+        travel_type='train', source=cities.by_name('Delhi'), destination=cities.by_name('Mumbai'),
+        departure_datetime=timezone.now() + timedelta(days=3), price=1500,
+        total_seats=seats, available_seats=0, operator_name='Indian Railways',
+        service_number=f'12{number:03d}',
+    )
+    Booking.objects.bulk_create(
+        (
+            Booking(
+                user=user, travel_option=option, num_seats=1, total_price=option.price,
+                booking_reference=f'TB{option.pk:05d}{seat:05d}', contact_email=user.email,
+            )
+            for seat, user in enumerate(users[:seats])
+        ),
+        batch_size=1000,
+    )
+    return option
+
+
+def timed(label, func):
+    """Run func, printing its wall time and the number of queries it ran"""
+    from django.db import connection
+
+    queries = []
+
+    def count(execute, sql, params, many, context):
+        queries.append(sql)
+        return execute(sql, params, many, context)
+
+    with connection.execute_wrapper(count):
+        started = time.perf_counter()
+        result = func()
+        elapsed = time.perf_counter() - started
+    print(f'{label:<28}{elapsed * 1000:8.1f}ms  {len(queries):6,} queries')
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--seats', type=int, default=800)
+    parser.add_argument('--trains', type=int, default=5, help='Trains cancelled in one call')
+    args = parser.parse_args()
+
+    db_path = setup_django()
+
+    from django.contrib.auth import get_user_model
+    from bookings.cancellations import cancel_services
+
+    User = get_user_model()
+    users = User.objects.bulk_create(
+        User(username=f'rider{i}', email=f'rider{i}@example.com', phone=f'+9195000{i:05d}')
+        for i in range(args.seats)
+    )
+
+    # A baseline cancelled booking by booking, one train cancelled on its
+    # own, then --trains trains in one call
+    print(f'Filling {args.trains + 2} trains of {args.seats} seats...')
+    baseline = fill_train(0, args.seats, users)
+    trains = [fill_train(number, args.seats, users) for number in range(1, args.trains + 2)]
+
+    def cancel_one_by_one():
+        for booking in baseline.bookings.select_related('travel_option'):
+            booking.cancel_booking()
+
+    timed(f'cancel_booking() x {args.seats}', cancel_one_by_one)
+    timed('cancel_services(1 train)', lambda: cancel_services(trains[:1]))
+    label = f'{args.trains} train' + ('s' if args.trains != 1 else '')
+    result = timed(f'cancel_services({label})', lambda: cancel_services(trains[1:]))
+    print(f'refunded {result.bookings:,} bookings, ₹{result.refunded:,.2f}')
+
+    os.remove(db_path)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,83 @@
+"""
+Memory and throughput of the streaming partner feed
+
+Generates travel options, then pulls the whole inventory through the
+travel:options_feed view for growing result sizes. For each size it reports
+rows/sec and the peak Python memory (tracemalloc) while streaming, next to
+the peak of building the same JSON in one piece. The streaming peak should
+stay flat as the row count grows.
+
+    python -m benchmarks.streaming_feed --rows 500000
+"""
+
+import argparse
+import json
+import os
+import time
+import tracemalloc
+
+from .keyset_pagination import generate_rows
+from .utils import setup_django
+
+
+def measure(fn):
+    """Run fn twice: untraced for speed, then under tracemalloc for peak MB"""
+    started = time.perf_counter()
+    result = fn()
+    elapsed = time.perf_counter() - started
+
+    tracemalloc.start()
+    fn()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, elapsed, peak / 1024 / 1024
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--rows', type=int, default=500000)
+    parser.add_argument('--steps', type=int, default=3, help='Result sizes to try, up to --rows')
+    args = parser.parse_args()
+
+    db_path = setup_django()
+
+    from datetime import timedelta
+    from django.conf import settings
+    from django.test import Client
+    from django.urls import reverse
+    from django.utils import timezone
+    from travel import feed
+    from travel.models import TravelOption
+
+    settings.ALLOWED_HOSTS = ['*']
+    generate_rows(args.rows)
+    client = Client()
+    url = reverse('travel:options_feed')
+    last_departure = TravelOption.objects.order_by('-departure_datetime').values_list(
+        'departure_datetime', flat=True
+    ).first()
+    window = last_departure - timezone.now()
+
+    print(f'{"rows":>10} {"stream rows/s":>14} {"stream peak MB":>15} {"buffered peak MB":>17}')
+    try:
+        for step in range(1, args.steps + 1):
+            date_to = timezone.localdate(timezone.now() + window * step / args.steps)
+            params = {'date_to': date_to.isoformat()}
+
+            def stream():
+                response = client.get(url, params)
+                return sum(chunk.count(b'\n') for chunk in response.streaming_content)
+
+            def buffered():
+                queryset = feed.feed_queryset(departure_to=timezone.now() + window * step / args.steps + timedelta(days=1))
+                return len(json.dumps([list(map(str, row)) for row in queryset]))
+
+            rows, elapsed, stream_peak = measure(stream)
+            _, _, buffered_peak = measure(buffered)
+            print(f'{rows:>10,} {rows / elapsed:>14,.0f} {stream_peak:>15.1f} {buffered_peak:>17.1f}')
+    finally:
+        os.remove(db_path)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,59 @@
+"""
+Shared helpers for the benchmark scripts
+"""
+
+import os
+import tempfile
+import zlib
+
+
+def setup_django(db_path=None, migrate=True, profile=None):
+    """
+    Configure Django against a scratch SQLite file and return its path.
+
+    Must be called before any model is imported. The database is created
+    and migrated unless migrate is False (worker processes re-use it).
+    profile picks a SQLite profile from travel_booking.db_profiles instead
+    of settings.DATABASE_PROFILE.
+    """
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'travel_booking.settings')
+
+    if db_path is None:
+        fd, db_path = tempfile.mkstemp(prefix='travel_karo_bench_', suffix='.sqlite3')
+        os.close(fd)
+
+    import django
+    from django.conf import settings
+
+    if profile is not None:
+        # Keep the profile's own lock timeout: it is part of what is measured
+        from travel_booking import db_profiles
+        settings.DATABASES['default'] = db_profiles.database(profile, db_path)
+    else:
+        settings.DATABASES['default']['NAME'] = db_path
+        # Concurrent writers wait for the lock instead of failing immediately
+        settings.DATABASES['default'].setdefault('OPTIONS', {})['timeout'] = 60
+    settings.DEBUG = False
+    django.setup()
+
+    if migrate:
+        from django.core.management import call_command
+        call_command('migrate', verbosity=0, interactive=False)
+
+    return db_path
+
+
+def make_user(username, **extra):
+    """Create a benchmark user with a unique phone number"""
+    from django.contrib.auth import get_user_model
+
+    User = get_user_model()
+    defaults = {
+        'email': f'{username}@example.com',
+        'phone': f'+91{zlib.crc32(username.encode()):010d}',
+    }
+    defaults.update(extra)
+    user = User(username=username, **defaults)
+    user.set_unusable_password()
+    user.save()
+    return user
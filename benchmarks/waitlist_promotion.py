@@ -0,0 +1,112 @@
+"""
+Throughput of waitlist promotion after a mass release of seats
+
+Generates sold-out travel options with a queue of waiting entries on each,
+frees a few seats on every option at once, as a mass cancellation would,
+and times bookings.waitlist.promote over all of them. Checks no option was
+oversold and every queue was served first come, first served.
+
+    python -m benchmarks.waitlist_promotion --options 20000 --queue 20 --freed 6
+"""
+
+import argparse
+import os
+import random
+import time
+
+from .keyset_pagination import generate_rows
+from .utils import setup_django
+
+
+def generate_queues(queue, batch_size=50000):
+    """Sell every option out and put queue entries of 1-3 seats on each"""
+    from datetime import timedelta
+    from django.contrib.auth import get_user_model
+    from django.db import connection, transaction
+    from django.utils import timezone
+    from bookings.models import WaitlistEntry
+    from travel.models import TravelOption
+
+    rng = random.Random(5)
+    User = get_user_model()
+    users = User.objects.bulk_create(
+        User(username=f'queue{i}', email=f'queue{i}@example.com', phone=f'+9196000{i:05d}')
+        for i in range(queue)
+    )
+    TravelOption.objects.update(
+        total_seats=100, available_seats=0, is_active=True,
+        departure_datetime=timezone.now() + timedelta(days=30),
+    )
+    option_ids = list(TravelOption.objects.values_list('id', flat=True))
+    adapt = connection.ops.adapt_datetimefield_value
+    now = timezone.now()
+
+    columns = ('travel_option_id', 'user_id', 'num_seats', 'status', 'created_at')
+    sql = 'INSERT INTO {} ({}) VALUES ({})'.format(
+        WaitlistEntry._meta.db_table, ', '.join(columns), ', '.join(['%s'] * len(columns))
+    )
+    rows = [
+        (option_id, user.pk, rng.randint(1, 3), 'waiting', adapt(now + timedelta(microseconds=position)))
+        for option_id in option_ids
+        for position, user in enumerate(users)
+    ]
+    with connection.cursor() as cursor:
+        for start in range(0, len(rows), batch_size):
+            with transaction.atomic():
+                cursor.executemany(sql, rows[start:start + batch_size])
+    return option_ids
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--options', type=int, default=20000)
+    parser.add_argument('--queue', type=int, default=20, help='Waiting entries per option')
+    parser.add_argument('--freed', type=int, default=6, help='Seats released on every option')
+    args = parser.parse_args()
+
+    db_path = setup_django()
+
+    from django.db import connection
+    from bookings import waitlist
+    from bookings.models import WaitlistEntry
+    from travel.models import TravelOption
+
+    print(f'Generating {args.options:,} sold-out travel options with {args.queue} waiting each...')
+    generate_rows(args.options)
+    option_ids = generate_queues(args.queue)
+    TravelOption.objects.update(available_seats=args.freed)
+    with connection.cursor() as cursor:
+        cursor.execute('ANALYZE')
+
+    started = time.perf_counter()
+    promoted = waitlist.promote(option_ids)
+    elapsed = time.perf_counter() - started
+
+    # The promoted entries of each option must be exactly the queue prefix
+    # that fits in the freed seats
+    queues = {}
+    for option_id, seats, status in WaitlistEntry.objects.order_by(
+        'travel_option', 'created_at', 'id'
+    ).values_list('travel_option', 'num_seats', 'status'):
+        queues.setdefault(option_id, []).append((seats, status))
+    out_of_order = 0
+    for entries in queues.values():
+        taken = 0
+        for seats, status in entries:
+            fits = taken + seats <= args.freed
+            taken += seats
+            if fits != (status == 'promoted') or not fits and status != 'waiting':
+                out_of_order += 1
+                break
+    oversold = TravelOption.objects.filter(available_seats__lt=0).count()
+
+    print(f'promoted:       {promoted:,} entries in {elapsed:.1f}s ({promoted / elapsed:,.0f}/s)')
+    print(f'still waiting:  {WaitlistEntry.objects.filter(status="waiting").count():,}')
+    print(f'oversold:       {oversold}')
+    print(f'queues off:     {out_of_order}')
+
+    os.remove(db_path)
+
+
+if __name__ == '__main__':
+    main()
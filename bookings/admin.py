@@ -1,5 +1,16 @@
 from django.contrib import admin
-from .models import Booking
+from django.http import StreamingHttpResponse
+from django.utils import timezone
+
+from . import exports, waitlist
+from .models import ArchivedBooking, Booking, Notification, WaitlistEntry
+
+
+def _csv_response(stream, name):
+    response = StreamingHttpResponse(stream, content_type='text/csv; charset=utf-8')
+    stamp = timezone.localtime().strftime('%Y%m%d-%H%M')
+    response['Content-Disposition'] = f'attachment; filename="{name}-{stamp}.csv"'
+    return response
 
 
 @admin.register(Booking)
@@ -12,6 +23,9 @@ class BookingAdmin(admin.ModelAdmin):
     date_hierarchy = 'booking_date'
     ordering = ['-booking_date']
     readonly_fields = ('booking_reference', 'booking_date')
+    # user and travel_option are rendered with __str__ in list_display
+    list_select_related = ('user', 'travel_option')
+    actions = ['export_csv', 'export_manifest']
     
     fieldsets = (
         ('Booking Details', {
@@ -24,9 +38,70 @@ class BookingAdmin(admin.ModelAdmin):
             'fields': ('contact_phone', 'contact_email')
         }),
         ('Status', {
-            'fields': ('status', 'booking_date')
+            'fields': ('status', 'booking_date', 'cancelled_at', 'refund_amount')
         }),
         ('Additional Information', {
             'fields': ('special_requests', 'passenger_details')
         }),
     )
+
+    @admin.action(description='Export selected bookings as CSV')
+    def export_csv(self, request, queryset):
+        rows = exports.booking_rows(queryset.order_by())
+        return _csv_response(exports.stream_bookings(rows, excel=True), 'bookings')
+
+    @admin.action(description='Download passenger manifest for selected bookings')
+    def export_manifest(self, request, queryset):
+        rows = exports.manifest_rows(queryset.order_by())
+        return _csv_response(exports.stream_manifest(rows, excel=True), 'manifest')
+
+
+@admin.register(WaitlistEntry)
+class WaitlistEntryAdmin(admin.ModelAdmin):
+    list_display = ('travel_option', 'user', 'num_seats', 'status', 'created_at', 'promoted_at')
+    list_filter = ('status',)
+    list_select_related = ('travel_option', 'user')
+    raw_id_fields = ('travel_option', 'user')
+    date_hierarchy = 'created_at'
+    # The queue order is created_at; entries change only through bookings.waitlist
+    readonly_fields = [field.name for field in WaitlistEntry._meta.fields]
+    actions = ['promote_entries']
+
+    def has_add_permission(self, request):
+        return False
+
+    @admin.action(description='Promote waiting entries on the selected travel options')
+    def promote_entries(self, request, queryset):
+        options = queryset.filter(status='waiting').values_list('travel_option', flat=True).distinct()
+        promoted = waitlist.promote(list(options))
+        self.message_user(request, f'{promoted} waitlist entries promoted.')
+
+
+@admin.register(Notification)
+class NotificationAdmin(admin.ModelAdmin):
+    list_display = ('user', 'kind', 'subject', 'created_at', 'sent_at')
+    list_filter = ('kind', ('sent_at', admin.EmptyFieldListFilter))
+    list_select_related = ('user',)
+    raw_id_fields = ('user', 'booking')
+    search_fields = ('user__username', 'email', 'subject')
+    date_hierarchy = 'created_at'
+    readonly_fields = [field.name for field in Notification._meta.fields]
+
+    def has_add_permission(self, request):
+        return False
+
+
+@admin.register(ArchivedBooking)
+class ArchivedBookingAdmin(admin.ModelAdmin):
+    list_display = ('booking_reference', 'user', 'travel_option', 'num_seats',
+                   'total_price', 'status', 'booking_date')
+    list_filter = ('status',)
+    search_fields = ('booking_reference', 'user__username', 'contact_email')
+    list_select_related = ('user', 'travel_option')
+    raw_id_fields = ('user', 'travel_option')
+    date_hierarchy = 'booking_date'
+    # Written only by bookings.archive
+    readonly_fields = [field.name for field in ArchivedBooking._meta.fields]
+
+    def has_add_permission(self, request):
+        return False
@@ -0,0 +1,111 @@
+"""
+Hot/cold archival of departed travel options
+
+archive_departed() moves options that departed more than
+settings.ARCHIVE_AFTER_DAYS ago, together with all their bookings, into
+ArchivedTravelOption and ArchivedBooking, so the hot tables (and their
+indexes) stay sized to the booking window however much history piles up.
+
+Work is done batch_size options at a time, each batch in its own short
+transaction: two INSERT ... SELECT statements copy the rows with their
+original ids, then the hot rows and their seat holds and waitlist entries
+are deleted. A batch either moves completely or not at all, so an
+interrupted run is resumed by simply running it again.
+
+The deletes are plain DELETE statements: departed options are no longer
+in the search cache or connection graph, so there is nothing for the
+post_delete receivers to do, and Django's cascade collector would load
+every booking into memory to find that out.
+"""
+
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.utils import timezone
+
+from travel.models import ArchivedTravelOption, SeatHold, TravelOption
+
+from .models import ArchivedBooking, Booking, Notification, WaitlistEntry
+
+ARCHIVE_BATCH_SIZE = 100
+
+
+def _in(column, ids):
+    return f'{connection.ops.quote_name(column)} IN ({", ".join(["%s"] * len(ids))})', list(ids)
+
+
+def _copy(cursor, model, archive_model, column, ids, archived_at):
+    """INSERT ... SELECT the rows of model whose column is in ids; returns the row count"""
+    quote = connection.ops.quote_name
+    columns = [
+        field.column for field in archive_model._meta.concrete_fields if field.name != 'archived_at'
+    ]
+    where, params = _in(column, ids)
+    cursor.execute(
+        'INSERT INTO {} ({}, {}) SELECT {}, %s FROM {} WHERE {}'.format(
+            quote(archive_model._meta.db_table),
+            ', '.join(quote(name) for name in columns),
+            quote('archived_at'),
+            ', '.join(quote(name) for name in columns),
+            quote(model._meta.db_table),
+            where,
+        ),
+        [connection.ops.adapt_datetimefield_value(archived_at)] + params,
+    )
+    return cursor.rowcount
+
+
+def _delete(cursor, model, column, ids):
+    where, params = _in(column, ids)
+    cursor.execute(f'DELETE FROM {connection.ops.quote_name(model._meta.db_table)} WHERE {where}', params)
+
+
+def _archive_batch(before, batch_size):
+    with transaction.atomic():
+        ids = list(
+            TravelOption.objects.filter(departure_datetime__lt=before)
+            .order_by('departure_datetime', 'id')
+            .select_for_update(skip_locked=True)
+            .values_list('pk', flat=True)[:batch_size]
+        )
+        if not ids:
+            return 0, 0
+
+        archived_at = timezone.now()
+        with connection.cursor() as cursor:
+            _copy(cursor, TravelOption, ArchivedTravelOption, 'id', ids, archived_at)
+            bookings = _copy(cursor, Booking, ArchivedBooking, 'travel_option_id', ids, archived_at)
+
+            # Children before parents, so no foreign key is left dangling
+            Notification.objects.filter(booking__travel_option__in=ids).update(booking=None)
+            _delete(cursor, SeatHold, 'travel_option_id', ids)
+            _delete(cursor, Booking, 'travel_option_id', ids)
+            _delete(cursor, WaitlistEntry, 'travel_option_id', ids)
+            _delete(cursor, TravelOption, 'id', ids)
+        return len(ids), bookings
+
+
+def archive_departed(before=None, batch_size=ARCHIVE_BATCH_SIZE):
+    """
+    Move options that departed before `before` (default: ARCHIVE_AFTER_DAYS
+    ago) and their bookings to the archive tables. Returns the number of
+    options and bookings moved.
+    """
+    if before is None:
+        before = timezone.now() - timedelta(days=settings.ARCHIVE_AFTER_DAYS)
+    options = bookings = 0
+    while True:
+        batch_options, batch_bookings = _archive_batch(before, batch_size)
+        options += batch_options
+        bookings += batch_bookings
+        if batch_options < batch_size:
+            return options, bookings
+
+
+def find_booking(user, pk):
+    """The user's booking with this id, from the hot table or the archive; None if neither has it"""
+    booking = Booking.objects.filter(user=user, pk=pk).select_related('travel_option').first()
+    if booking is None:
+        booking = ArchivedBooking.objects.filter(user=user, pk=pk).select_related('travel_option').first()
+    return booking
@@ -0,0 +1,106 @@
+"""
+Operator cancellation of whole services
+
+cancel_services() takes travel options off sale and cancels every booking
+on them with a full refund. It bypasses Booking.cancel_booking() (and its
+two-hour cut-off, which protects operators from late customer
+cancellations, not customers from operator ones) and works in a few
+set-based statements per chunk of options, so a full 800-seat train costs
+the same handful of queries as an empty bus:
+
+    one UPDATE takes the options off sale and gives their seats back,
+    one UPDATE cancels and refunds the bookings,
+    one SELECT and one bulk INSERT queue a notification per booking,
+    one UPDATE each releases seat holds and closes the waitlists.
+"""
+
+from collections import namedtuple
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import F, Sum
+from django.utils import timezone
+
+from travel import cities
+from travel.models import SeatHold, TravelOption
+from travel.signals import travel_options_changed
+
+from .models import Booking, Notification, WaitlistEntry
+
+OPTION_CHUNK = 500
+NOTIFICATION_BATCH_SIZE = 1000
+
+
+CancellationResult = namedtuple('CancellationResult', 'options bookings refunded')
+
+
+def _notifications(bookings, reason):
+    rows = bookings.values_list(
+        'pk', 'user_id', 'contact_email', 'booking_reference', 'refund_amount',
+        'travel_option__operator_name', 'travel_option__service_number',
+        'travel_option__source_id', 'travel_option__destination_id',
+        'travel_option__departure_datetime',
+    )
+    for (pk, user_id, email, reference, refund, operator, service,
+         source_id, destination_id, departure) in rows.iterator(chunk_size=NOTIFICATION_BATCH_SIZE):
+        route = f'{cities.name_for(source_id)} to {cities.name_for(destination_id)}'
+        departs = timezone.localtime(departure).strftime('%d/%m/%Y %H:%M')
+        message = (
+            f'{operator} {service} from {route}, departing {departs}, has been cancelled '
+            f'by the operator. Your booking {reference} is cancelled and ₹{refund:,.2f} '
+            f'will be refunded to your original payment method.'
+        )
+        if reason:
+            message += f'\n\nReason: {reason}'
+        yield Notification(
+            user_id=user_id,
+            booking_id=pk,
+            kind='service_cancelled',
+            email=email,
+            subject=f'Booking {reference} cancelled: {operator} {service} will not run',
+            message=message,
+        )
+
+
+def _cancel_chunk(option_ids, now, reason):
+    TravelOption.objects.filter(pk__in=option_ids).update(
+        is_active=False, available_seats=F('total_seats'), updated_at=now
+    )
+    # Operator cancellations are refunded in full
+    cancelled = Booking.objects.filter(travel_option__in=option_ids).exclude(status='cancelled').update(
+        status='cancelled', refund_amount=F('total_price'), cancelled_at=now, updated_at=now
+    )
+    # cancelled_at identifies the bookings cancelled by this call
+    bookings = Booking.objects.filter(travel_option__in=option_ids, status='cancelled', cancelled_at=now)
+    refunded = Decimal('0')
+    if cancelled:
+        refunded = bookings.aggregate(total=Sum('refund_amount'))['total']
+        Notification.objects.bulk_create(
+            _notifications(bookings, reason), batch_size=NOTIFICATION_BATCH_SIZE
+        )
+    SeatHold.objects.filter(travel_option__in=option_ids, status='active').update(
+        status='released', closed_at=now
+    )
+    WaitlistEntry.objects.filter(travel_option__in=option_ids, status='waiting').update(status='cancelled')
+    return cancelled, refunded
+
+
+def cancel_services(travel_options, reason=''):
+    """
+    Cancel whole services: deactivate these travel options (instances or
+    ids), cancel and refund all their bookings and queue a notification
+    for each. Returns a CancellationResult.
+    """
+    option_ids = sorted({getattr(option, 'pk', option) for option in travel_options})
+    now = timezone.now()
+    bookings, refunded = 0, Decimal('0')
+    with transaction.atomic():
+        for start in range(0, len(option_ids), OPTION_CHUNK):
+            chunk_bookings, chunk_refunded = _cancel_chunk(option_ids[start:start + OPTION_CHUNK], now, reason)
+            bookings += chunk_bookings
+            refunded += chunk_refunded
+        if option_ids:
+            travel_options_changed.send(
+                sender=TravelOption, options=list(TravelOption.objects.filter(pk__in=option_ids))
+            )
+    return CancellationResult(len(option_ids), bookings, refunded)
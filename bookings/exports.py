@@ -0,0 +1,175 @@
+"""
+Streaming booking exports and passenger manifests
+
+Both read Booking joined with TravelOption and User through one
+values_list() query consumed with iterator(chunk_size=...): a server-side
+cursor where the database supports it, and no model instances, so
+Booking.__str__ never runs and memory stays at one chunk however many
+bookings match. City ids are turned into names from travel.cities rather
+than joined.
+
+Output is CSV. With excel=True it starts with a UTF-8 byte order mark so
+Excel opens city and passenger names correctly.
+"""
+
+import csv
+import io
+from datetime import datetime, time, timedelta
+
+from django.utils import timezone
+
+from travel import cities
+
+from .models import Booking
+
+CHUNK_SIZE = 2000
+BOM = '\ufeff'
+FORMULA_PREFIXES = ('=', '+', '-', '@', '\t', '\r')
+
+# (CSV header, values_list lookup)
+BOOKING_COLUMNS = (
+    ('booking_reference', 'booking_reference'),
+    ('booking_date', 'booking_date'),
+    ('status', 'status'),
+    ('num_seats', 'num_seats'),
+    ('total_price', 'total_price'),
+    ('username', 'user__username'),
+    ('first_name', 'user__first_name'),
+    ('last_name', 'user__last_name'),
+    ('email', 'user__email'),
+    ('contact_phone', 'contact_phone'),
+    ('contact_email', 'contact_email'),
+    ('travel_type', 'travel_option__travel_type'),
+    ('operator_name', 'travel_option__operator_name'),
+    ('service_number', 'travel_option__service_number'),
+    ('source', 'travel_option__source'),
+    ('destination', 'travel_option__destination'),
+    ('departure_datetime', 'travel_option__departure_datetime'),
+    ('arrival_datetime', 'travel_option__arrival_datetime'),
+)
+
+MANIFEST_HEADER = (
+    'departure_datetime', 'operator_name', 'service_number', 'travel_type',
+    'source', 'destination', 'booking_reference', 'status', 'seat',
+    'passenger_name', 'age', 'gender', 'contact_phone',
+)
+_CITY_LOOKUPS = ('travel_option__source', 'travel_option__destination')
+_MANIFEST_LOOKUPS = (
+    'travel_option__departure_datetime', 'travel_option__operator_name',
+    'travel_option__service_number', 'travel_option__travel_type',
+    'travel_option__source', 'travel_option__destination',
+    'booking_reference', 'status', 'num_seats', 'passenger_details',
+    'user__first_name', 'user__last_name', 'user__username', 'contact_phone',
+)
+
+
+def _day_start(day):
+    return timezone.make_aware(datetime.combine(day, time.min))
+
+
+def _filter(queryset, field, date_from, date_to, operator, status):
+    """Apply the shared filters; dates are local and date_to is inclusive"""
+    if date_from:
+        queryset = queryset.filter(**{f'{field}__gte': _day_start(date_from)})
+    if date_to:
+        queryset = queryset.filter(**{f'{field}__lt': _day_start(date_to + timedelta(days=1))})
+    if operator:
+        queryset = queryset.filter(travel_option__operator_name=operator)
+    if status:
+        queryset = queryset.filter(status=status)
+    return queryset
+
+
+def booking_rows(queryset=None, date_from=None, date_to=None, operator=None, status=None):
+    """values_list of BOOKING_COLUMNS filtered on the booking date"""
+    if queryset is None:
+        queryset = Booking.objects.all()
+    queryset = _filter(queryset, 'booking_date', date_from, date_to, operator, status)
+    return queryset.order_by('booking_date', 'id').values_list(
+        *(lookup for _, lookup in BOOKING_COLUMNS)
+    )
+
+
+def manifest_rows(queryset=None, date_from=None, date_to=None, operator=None, status=None):
+    """
+    values_list for manifests, filtered on the departure date and grouped
+    by service. Cancelled bookings are left out unless status asks for them.
+    """
+    if queryset is None:
+        queryset = Booking.objects.all()
+    if not status:
+        queryset = queryset.exclude(status='cancelled')
+    queryset = _filter(queryset, 'travel_option__departure_datetime', date_from, date_to, operator, status)
+    return queryset.order_by(
+        'travel_option__departure_datetime', 'travel_option_id', 'booking_reference'
+    ).values_list(*_MANIFEST_LOOKUPS)
+
+
+def _format(value):
+    if isinstance(value, datetime):
+        return timezone.localtime(value).strftime('%Y-%m-%d %H:%M')
+    if isinstance(value, str) and value[:1] in FORMULA_PREFIXES:
+        # Keep spreadsheets from evaluating user-entered text as a formula
+        return "'" + value
+    return '' if value is None else value
+
+
+def _with_city_names(rows, lookups):
+    positions = [index for index, lookup in enumerate(lookups) if lookup in _CITY_LOOKUPS]
+    for row in rows:
+        row = list(row)
+        for index in positions:
+            row[index] = cities.name_for(row[index])
+        yield row
+
+
+def _passengers(details, num_seats, lead_name):
+    """
+    One (name, age, gender) per seat from passenger_details.
+
+    passenger_details may hold {"passengers": [{"name", "age", "gender"}]};
+    seats without an entry are listed under the lead passenger's name.
+    """
+    listed = details.get('passengers') if isinstance(details, dict) else None
+    if not isinstance(listed, list):
+        listed = []
+    for seat in range(num_seats):
+        passenger = listed[seat] if seat < len(listed) and isinstance(listed[seat], dict) else {}
+        yield passenger.get('name') or lead_name, passenger.get('age', ''), passenger.get('gender', '')
+
+
+def _manifest_records(rows):
+    for row in rows:
+        (departure, operator, service, travel_type, source, destination,
+         reference, status, num_seats, details, first, last, username, phone) = row
+        lead_name = f'{first} {last}'.strip() or username
+        for seat, (name, age, gender) in enumerate(_passengers(details, num_seats, lead_name), start=1):
+            yield (departure, operator, service, travel_type, source, destination,
+                   reference, status, seat, name, age, gender, phone)
+
+
+def stream_csv(header, records, excel=False):
+    """Yield CSV text a chunk of records at a time"""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    if excel:
+        buffer.write(BOM)
+    writer.writerow(header)
+    for count, record in enumerate(records, start=1):
+        writer.writerow([_format(value) for value in record])
+        if count % CHUNK_SIZE == 0:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+    yield buffer.getvalue()
+
+
+def stream_bookings(rows, excel=False, chunk_size=CHUNK_SIZE):
+    header = [name for name, _ in BOOKING_COLUMNS]
+    records = _with_city_names(rows.iterator(chunk_size=chunk_size), [lookup for _, lookup in BOOKING_COLUMNS])
+    return stream_csv(header, records, excel)
+
+
+def stream_manifest(rows, excel=False, chunk_size=CHUNK_SIZE):
+    rows = _with_city_names(rows.iterator(chunk_size=chunk_size), _MANIFEST_LOOKUPS)
+    return stream_csv(MANIFEST_HEADER, _manifest_records(rows), excel)
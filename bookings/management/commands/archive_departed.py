@@ -0,0 +1,38 @@
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from bookings.archive import ARCHIVE_BATCH_SIZE, archive_departed
+
+
+class Command(BaseCommand):
+    help = 'Move departed travel options and their bookings to the archive tables'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--days', type=int, default=settings.ARCHIVE_AFTER_DAYS,
+            help=f'Archive options that departed more than this many days ago '
+                 f'(default: ARCHIVE_AFTER_DAYS, {settings.ARCHIVE_AFTER_DAYS})'
+        )
+        parser.add_argument(
+            '--batch-size', type=int, default=ARCHIVE_BATCH_SIZE,
+            help=f'Options moved per transaction (default: {ARCHIVE_BATCH_SIZE})'
+        )
+
+    def handle(self, *args, **options):
+        if options['batch_size'] < 1:
+            raise CommandError('--batch-size must be at least 1.')
+        if options['days'] < 0:
+            raise CommandError('--days cannot be negative.')
+
+        started = time.perf_counter()
+        moved, bookings = archive_departed(
+            before=timezone.now() - timedelta(days=options['days']), batch_size=options['batch_size']
+        )
+        self.stdout.write(self.style.SUCCESS(
+            f'Archived {moved} travel options and {bookings} bookings '
+            f'in {time.perf_counter() - started:.1f}s'
+        ))
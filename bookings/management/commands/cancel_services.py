@@ -0,0 +1,43 @@
+from datetime import datetime
+
+from django.core.management.base import BaseCommand, CommandError
+
+from bookings.cancellations import cancel_services
+from travel.dates import local_day_range
+from travel.models import TravelOption
+
+
+class Command(BaseCommand):
+    help = 'Cancel whole services: take them off sale and cancel, refund and notify all their bookings'
+
+    def add_arguments(self, parser):
+        parser.add_argument('ids', nargs='*', type=int, help='Travel option ids to cancel')
+        parser.add_argument('--service-number', help='Cancel this service number ...')
+        parser.add_argument('--date', help='... on this departure date (YYYY-MM-DD)')
+        parser.add_argument('--operator', help='Only services run by this operator')
+        parser.add_argument('--reason', default='', help='Reason included in the notifications')
+
+    def handle(self, *args, **options):
+        if options['ids']:
+            queryset = TravelOption.objects.filter(pk__in=options['ids'])
+        elif options['service_number'] and options['date']:
+            try:
+                date = datetime.strptime(options['date'], '%Y-%m-%d').date()
+            except ValueError:
+                raise CommandError(f'Invalid date {options["date"]!r}; use YYYY-MM-DD.')
+            queryset = TravelOption.objects.filter(
+                service_number=options['service_number'], **local_day_range('departure_datetime', date)
+            )
+        else:
+            raise CommandError('Give travel option ids, or --service-number with --date.')
+        if options['operator']:
+            queryset = queryset.filter(operator_name=options['operator'])
+
+        option_ids = list(queryset.values_list('pk', flat=True))
+        if not option_ids:
+            raise CommandError('No matching travel options.')
+        result = cancel_services(option_ids, reason=options['reason'])
+        self.stdout.write(self.style.SUCCESS(
+            f'Cancelled {result.options} services and {result.bookings} bookings; '
+            f'₹{result.refunded:,.2f} to refund'
+        ))
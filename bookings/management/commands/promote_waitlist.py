@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from bookings import waitlist
+
+
+class Command(BaseCommand):
+    help = 'Promote waiting entries on every option that has free seats (normally done on release)'
+
+    def handle(self, *args, **options):
+        option_ids = list(waitlist.options_with_waiting_entries())
+        promoted = waitlist.promote(option_ids)
+        self.stdout.write(self.style.SUCCESS(
+            f'Promoted {promoted} waitlist entries on {len(option_ids)} travel options'
+        ))
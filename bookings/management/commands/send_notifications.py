@@ -0,0 +1,41 @@
+from django.conf import settings
+from django.core.mail import EmailMessage, get_connection
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from bookings.models import Notification
+
+
+class Command(BaseCommand):
+    help = 'Email queued notifications, a batch per mail server connection'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size', type=int, default=500,
+            help='Notifications sent per connection (default: 500)'
+        )
+
+    def handle(self, *args, **options):
+        if options['batch_size'] < 1:
+            raise CommandError('--batch-size must be at least 1.')
+
+        sent = 0
+        while True:
+            batch = list(Notification.objects.filter(sent_at__isnull=True)[:options['batch_size']])
+            if not batch:
+                break
+            messages = [
+                EmailMessage(notification.subject, notification.message, settings.DEFAULT_FROM_EMAIL,
+                             [notification.email])
+                for notification in batch if notification.email
+            ]
+            with get_connection() as connection:
+                connection.send_messages(messages)
+            # Notifications without an address are marked too, or they would
+            # be picked up again forever
+            Notification.objects.filter(pk__in=[notification.pk for notification in batch]).update(
+                sent_at=timezone.now()
+            )
+            sent += len(messages)
+
+        self.stdout.write(self.style.SUCCESS(f'Sent {sent} notifications'))
@@ -0,0 +1,22 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from bookings import rollups
+
+
+class Command(BaseCommand):
+    help = 'Recompute the occupancy and revenue rollups of departure days changed since the last run'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--rebuild', action='store_true',
+            help='Recompute every departure day, archived ones included'
+        )
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        days = rollups.update(rebuild=options['rebuild'])
+        self.stdout.write(self.style.SUCCESS(
+            f'Recomputed rollups for {days} departure days in {time.perf_counter() - started:.1f}s'
+        ))
@@ -0,0 +1,48 @@
+# Generated by Django 5.2.18 on 2026-10-17 01:45
+
+import django.core.validators
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bookings', '0001_initial'),
+        ('travel', '0007_seat_hold'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='WaitlistEntry',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('num_seats', models.PositiveIntegerField(validators=[django.core.validators.MinValueValidator(1)])),
+                ('status', models.CharField(choices=[('waiting', 'Waiting'), ('promoted', 'Promoted to booking'), ('cancelled', 'Cancelled')], default='waiting', max_length=10)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('promoted_at', models.DateTimeField(blank=True, null=True)),
+                ('travel_option', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='waitlist', to='travel.traveloption')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='waitlist_entries', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Waitlist Entry',
+                'verbose_name_plural': 'Waitlist',
+                'ordering': ['created_at', 'id'],
+            },
+        ),
+        migrations.AddField(
+            model_name='booking',
+            name='waitlist_entry',
+            field=models.OneToOneField(blank=True, help_text='Waitlist entry this booking was promoted from', null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='booking', to='bookings.waitlistentry'),
+        ),
+        migrations.AddIndex(
+            model_name='waitlistentry',
+            index=models.Index(condition=models.Q(('status', 'waiting')), fields=['travel_option', 'created_at', 'id'], name='waitlist_queue_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='waitlistentry',
+            constraint=models.UniqueConstraint(condition=models.Q(('status', 'waiting')), fields=('travel_option', 'user'), name='waitlist_one_waiting_entry_per_user'),
+        ),
+    ]
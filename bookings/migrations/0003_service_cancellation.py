@@ -0,0 +1,44 @@
+# Generated by Django 5.2.18 on 2026-10-17 01:51
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bookings', '0002_waitlist'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='booking',
+            name='cancelled_at',
+            field=models.DateTimeField(blank=True, help_text='Date and time when the booking was cancelled', null=True),
+        ),
+        migrations.AddField(
+            model_name='booking',
+            name='refund_amount',
+            field=models.DecimalField(blank=True, decimal_places=2, help_text='Amount refunded in Indian Rupees (₹) when the booking was cancelled', max_digits=10, null=True),
+        ),
+        migrations.CreateModel(
+            name='Notification',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('service_cancelled', 'Service cancelled')], max_length=30)),
+                ('email', models.EmailField(blank=True, max_length=254)),
+                ('subject', models.CharField(max_length=200)),
+                ('message', models.TextField()),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('sent_at', models.DateTimeField(blank=True, null=True)),
+                ('booking', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='notifications', to='bookings.booking')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='notifications', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'ordering': ['created_at', 'id'],
+                'indexes': [models.Index(condition=models.Q(('sent_at__isnull', True)), fields=['created_at', 'id'], name='notification_unsent_idx')],
+            },
+        ),
+    ]
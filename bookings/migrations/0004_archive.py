@@ -0,0 +1,50 @@
+# Generated by Django 5.2.18 on 2026-10-17 01:54
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bookings', '0003_service_cancellation'),
+        ('travel', '0008_archived_travel_option'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='notification',
+            name='booking',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='notifications', to='bookings.booking'),
+        ),
+        migrations.CreateModel(
+            name='ArchivedBooking',
+            fields=[
+                ('id', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('num_seats', models.PositiveIntegerField()),
+                ('total_price', models.DecimalField(decimal_places=2, max_digits=10)),
+                ('booking_date', models.DateTimeField()),
+                ('status', models.CharField(choices=[('confirmed', 'Confirmed'), ('cancelled', 'Cancelled'), ('pending', 'Pending')], max_length=20)),
+                ('passenger_details', models.JSONField(blank=True, default=dict)),
+                ('booking_reference', models.CharField(max_length=20, unique=True)),
+                ('contact_phone', models.CharField(max_length=15)),
+                ('contact_email', models.EmailField(max_length=254)),
+                ('special_requests', models.TextField(blank=True)),
+                ('refund_amount', models.DecimalField(blank=True, decimal_places=2, max_digits=10, null=True)),
+                ('cancelled_at', models.DateTimeField(blank=True, null=True)),
+                ('created_at', models.DateTimeField()),
+                ('updated_at', models.DateTimeField()),
+                ('archived_at', models.DateTimeField()),
+                ('travel_option', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='bookings', to='travel.archivedtraveloption')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='archived_bookings', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Archived Booking',
+                'verbose_name_plural': 'Archived Bookings',
+                'ordering': ['-booking_date'],
+                'indexes': [models.Index(fields=['user', 'booking_date'], name='archived_booking_user_idx')],
+            },
+        ),
+    ]
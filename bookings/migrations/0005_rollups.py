@@ -0,0 +1,100 @@
+# Generated by Django 5.2.18 on 2026-10-17 02:22
+
+import django.db.models.deletion
+import travel.models
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bookings', '0004_archive'),
+        ('travel', '0009_base_price'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DailyRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('operator_name', models.CharField(blank=True, max_length=100)),
+                ('travel_type', models.CharField(choices=[('flight', 'Flight'), ('train', 'Train'), ('bus', 'Bus')], max_length=10)),
+                ('services', models.PositiveIntegerField(default=0)),
+                ('seats_offered', models.PositiveIntegerField(default=0)),
+                ('seats_sold', models.PositiveIntegerField(default=0)),
+                ('bookings', models.PositiveIntegerField(default=0)),
+                ('cancellations', models.PositiveIntegerField(default=0)),
+                ('revenue', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('refunds', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('date', models.DateField(help_text='Local departure date')),
+            ],
+            options={
+                'verbose_name': 'Daily Rollup',
+                'verbose_name_plural': 'Daily Rollups',
+                'ordering': ['date'],
+            },
+        ),
+        migrations.CreateModel(
+            name='HourlyRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('operator_name', models.CharField(blank=True, max_length=100)),
+                ('travel_type', models.CharField(choices=[('flight', 'Flight'), ('train', 'Train'), ('bus', 'Bus')], max_length=10)),
+                ('services', models.PositiveIntegerField(default=0)),
+                ('seats_offered', models.PositiveIntegerField(default=0)),
+                ('seats_sold', models.PositiveIntegerField(default=0)),
+                ('bookings', models.PositiveIntegerField(default=0)),
+                ('cancellations', models.PositiveIntegerField(default=0)),
+                ('revenue', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('refunds', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('hour', models.DateTimeField(help_text='Start of the local departure hour')),
+            ],
+            options={
+                'verbose_name': 'Hourly Rollup',
+                'verbose_name_plural': 'Hourly Rollups',
+                'ordering': ['hour'],
+            },
+        ),
+        migrations.CreateModel(
+            name='RollupWatermark',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=50, unique=True)),
+                ('value', models.DateTimeField()),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='booking',
+            index=models.Index(fields=['updated_at'], name='booking_updated_idx'),
+        ),
+        migrations.AddField(
+            model_name='dailyrollup',
+            name='destination',
+            field=travel.models.CityForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='+', to='travel.city'),
+        ),
+        migrations.AddField(
+            model_name='dailyrollup',
+            name='source',
+            field=travel.models.CityForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='+', to='travel.city'),
+        ),
+        migrations.AddField(
+            model_name='hourlyrollup',
+            name='destination',
+            field=travel.models.CityForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='+', to='travel.city'),
+        ),
+        migrations.AddField(
+            model_name='hourlyrollup',
+            name='source',
+            field=travel.models.CityForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='+', to='travel.city'),
+        ),
+        migrations.AddConstraint(
+            model_name='dailyrollup',
+            constraint=models.UniqueConstraint(fields=('date', 'source', 'destination', 'operator_name', 'travel_type'), name='daily_rollup_key'),
+        ),
+        migrations.AddConstraint(
+            model_name='hourlyrollup',
+            constraint=models.UniqueConstraint(fields=('hour', 'source', 'destination', 'operator_name', 'travel_type'), name='hourly_rollup_key'),
+        ),
+    ]
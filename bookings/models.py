@@ -2,8 +2,10 @@ from django.db import models
 from django.contrib.auth import get_user_model
 from django.core.validators import MinValueValidator
 from django.db import transaction
-from travel.models import TravelOption
-from travel.constants import BOOKING_STATUS_CHOICES
+from travel.models import ArchivedTravelOption, City, CityForeignKey, TravelOption
+from travel.inventory import release_seats
+from .references import generate_booking_reference
+from travel.constants import BOOKING_STATUS_CHOICES, NOTIFICATION_KIND_CHOICES, TRAVEL_TYPES, WAITLIST_STATUS_CHOICES
 
 User = get_user_model()
 
@@ -79,6 +81,29 @@ class Booking(models.Model):
         blank=True,
         help_text='Any special requests or notes for this booking'
     )
+
+    refund_amount = models.DecimalField(
+        max_digits=10,
+        decimal_places=2,
+        null=True,
+        blank=True,
+        help_text='Amount refunded in Indian Rupees (₹) when the booking was cancelled'
+    )
+
+    cancelled_at = models.DateTimeField(
+        null=True,
+        blank=True,
+        help_text='Date and time when the booking was cancelled'
+    )
+
+    waitlist_entry = models.OneToOneField(
+        'WaitlistEntry',
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='booking',
+        help_text='Waitlist entry this booking was promoted from'
+    )
     
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
@@ -91,6 +116,8 @@ class Booking(models.Model):
             models.Index(fields=['user', 'status']),
             models.Index(fields=['booking_reference']),
             models.Index(fields=['booking_date']),
+            # Changed bookings picked up by bookings.rollups
+            models.Index(fields=['updated_at'], name='booking_updated_idx'),
         ]
 
     def __str__(self):
@@ -129,27 +156,29 @@ class Booking(models.Model):
 
     def cancel_booking(self):
         """Cancel the booking and restore seats"""
+        from django.utils import timezone
+        
         if not self.can_be_cancelled():
             raise ValueError("This booking cannot be cancelled")
         
+        now = timezone.now()
         with transaction.atomic():
-            # Update booking status
-            self.status = 'cancelled'
-            self.save()
+            # Flip the status only if nobody cancelled it concurrently,
+            # so the seats are never released twice
+            updated = Booking.objects.filter(
+                pk=self.pk
+            ).exclude(status='cancelled').update(status='cancelled', cancelled_at=now, updated_at=now)
+            if not updated:
+                raise ValueError("This booking cannot be cancelled")
+            self.status, self.cancelled_at = 'cancelled', now
             
             # Restore seats to travel option
-            self.travel_option.available_seats += self.num_seats
-            self.travel_option.save()
+            release_seats(self.travel_option, self.num_seats)
 
     def save(self, *args, **kwargs):
         # Generate booking reference if not exists
         if not self.booking_reference:
-            import uuid
-            import time
-            # Create a reference with timestamp and random chars
-            timestamp = str(int(time.time()))[-6:]
-            unique_id = str(uuid.uuid4()).replace('-', '')[:6].upper()
-            self.booking_reference = f"TB{timestamp}{unique_id}"
+            self.booking_reference = generate_booking_reference()
         
         # Set contact details from user if not provided
         if not self.contact_phone and self.user.phone:
@@ -175,3 +204,201 @@ class Booking(models.Model):
         from django.utils import timezone
         if self.travel_option and self.travel_option.departure_datetime <= timezone.now():
             raise ValidationError('Cannot book travel for past dates.')
+
+
+class ArchivedBooking(models.Model):
+    """
+    A finished Booking moved out of the hot table with its departed option.
+
+    Rows keep their original id, so booking links keep working; the booking
+    views fall back to this table. Written only by bookings.archive.
+    """
+
+    id = models.BigIntegerField(primary_key=True)
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='archived_bookings')
+    travel_option = models.ForeignKey(ArchivedTravelOption, on_delete=models.CASCADE, related_name='bookings')
+    num_seats = models.PositiveIntegerField()
+    total_price = models.DecimalField(max_digits=10, decimal_places=2)
+    booking_date = models.DateTimeField()
+    status = models.CharField(max_length=20, choices=BOOKING_STATUS_CHOICES)
+    passenger_details = models.JSONField(default=dict, blank=True)
+    booking_reference = models.CharField(max_length=20, unique=True)
+    contact_phone = models.CharField(max_length=15)
+    contact_email = models.EmailField()
+    special_requests = models.TextField(blank=True)
+    refund_amount = models.DecimalField(max_digits=10, decimal_places=2, null=True, blank=True)
+    cancelled_at = models.DateTimeField(null=True, blank=True)
+    created_at = models.DateTimeField()
+    updated_at = models.DateTimeField()
+    archived_at = models.DateTimeField()
+
+    class Meta:
+        verbose_name = 'Archived Booking'
+        verbose_name_plural = 'Archived Bookings'
+        ordering = ['-booking_date']
+        indexes = [
+            # Booking history of a user, newest first
+            models.Index(fields=['user', 'booking_date'], name='archived_booking_user_idx'),
+        ]
+
+    __str__ = Booking.__str__
+    get_formatted_total_price = Booking.get_formatted_total_price
+    get_per_seat_price = Booking.get_per_seat_price
+    get_formatted_per_seat_price = Booking.get_formatted_per_seat_price
+
+    def can_be_cancelled(self):
+        return False
+
+    def cancel_booking(self):
+        raise ValueError("This booking cannot be cancelled")
+
+
+class WaitlistEntry(models.Model):
+    """
+    A request for seats on a sold-out travel option.
+
+    Entries are served first come, first served by bookings.waitlist when
+    seats are released; a promoted entry gets a confirmed Booking.
+    """
+
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='waitlist_entries')
+    travel_option = models.ForeignKey(TravelOption, on_delete=models.CASCADE, related_name='waitlist')
+    num_seats = models.PositiveIntegerField(validators=[MinValueValidator(1)])
+    status = models.CharField(max_length=10, choices=WAITLIST_STATUS_CHOICES, default='waiting')
+    created_at = models.DateTimeField(auto_now_add=True)
+    promoted_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        verbose_name = 'Waitlist Entry'
+        verbose_name_plural = 'Waitlist'
+        ordering = ['created_at', 'id']
+        constraints = [
+            models.UniqueConstraint(
+                fields=['travel_option', 'user'],
+                condition=models.Q(status='waiting'),
+                name='waitlist_one_waiting_entry_per_user',
+            ),
+        ]
+        indexes = [
+            # Promotion reads the waiting queue of an option in FIFO order
+            models.Index(
+                fields=['travel_option', 'created_at', 'id'],
+                name='waitlist_queue_idx',
+                condition=models.Q(status='waiting'),
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.user} waiting for {self.num_seats} seat(s) on {self.travel_option} ({self.status})"
+
+    def leave(self):
+        """Take a waiting entry off the waitlist"""
+        if not WaitlistEntry.objects.filter(pk=self.pk, status='waiting').update(status='cancelled'):
+            raise ValueError('This waitlist entry is no longer waiting.')
+        self.status = 'cancelled'
+
+
+class Notification(models.Model):
+    """
+    A message queued for a user.
+
+    Rows are written in bulk by the code that causes them (for example a
+    service cancellation) and delivered later by the send_notifications
+    command, so a mass event never waits on the mail server.
+    """
+
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='notifications')
+    # Unlinked, not deleted, when the booking is archived
+    booking = models.ForeignKey(
+        Booking, on_delete=models.SET_NULL, null=True, blank=True, related_name='notifications'
+    )
+    kind = models.CharField(max_length=30, choices=NOTIFICATION_KIND_CHOICES)
+    email = models.EmailField(blank=True)
+    subject = models.CharField(max_length=200)
+    message = models.TextField()
+    created_at = models.DateTimeField(auto_now_add=True)
+    sent_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ['created_at', 'id']
+        indexes = [
+            # The sender reads the unsent queue in order
+            models.Index(
+                fields=['created_at', 'id'],
+                name='notification_unsent_idx',
+                condition=models.Q(sent_at__isnull=True),
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.get_kind_display()} for {self.user}: {self.subject}"
+
+
+class Rollup(models.Model):
+    """
+    Totals of the services departing in one period on a route, by operator
+    and travel type. Written only by bookings.rollups.
+    """
+
+    source = CityForeignKey(City, on_delete=models.PROTECT, related_name='+')
+    destination = CityForeignKey(City, on_delete=models.PROTECT, related_name='+')
+    operator_name = models.CharField(max_length=100, blank=True)
+    travel_type = models.CharField(max_length=10, choices=TRAVEL_TYPES)
+
+    services = models.PositiveIntegerField(default=0)
+    seats_offered = models.PositiveIntegerField(default=0)
+    seats_sold = models.PositiveIntegerField(default=0)
+    bookings = models.PositiveIntegerField(default=0)
+    cancellations = models.PositiveIntegerField(default=0)
+    revenue = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    refunds = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+
+    class Meta:
+        abstract = True
+
+    def load_factor(self):
+        """Share of offered seats sold, in percent"""
+        if self.seats_offered:
+            return round(self.seats_sold * 100 / self.seats_offered, 1)
+        return 0
+
+
+class HourlyRollup(Rollup):
+    hour = models.DateTimeField(help_text='Start of the local departure hour')
+
+    class Meta:
+        verbose_name = 'Hourly Rollup'
+        verbose_name_plural = 'Hourly Rollups'
+        ordering = ['hour']
+        constraints = [
+            # Also the index for reading a range of hours
+            models.UniqueConstraint(
+                fields=['hour', 'source', 'destination', 'operator_name', 'travel_type'],
+                name='hourly_rollup_key',
+            ),
+        ]
+
+
+class DailyRollup(Rollup):
+    date = models.DateField(help_text='Local departure date')
+
+    class Meta:
+        verbose_name = 'Daily Rollup'
+        verbose_name_plural = 'Daily Rollups'
+        ordering = ['date']
+        constraints = [
+            models.UniqueConstraint(
+                fields=['date', 'source', 'destination', 'operator_name', 'travel_type'],
+                name='daily_rollup_key',
+            ),
+        ]
+
+
+class RollupWatermark(models.Model):
+    """updated_at up to which bookings.rollups has applied a table's changes"""
+
+    name = models.CharField(max_length=50, unique=True)
+    value = models.DateTimeField()
+
+    def __str__(self):
+        return f"{self.name}: {self.value}"
@@ -0,0 +1,139 @@
+"""
+Booking reference generator
+
+References are time-ordered IDs in the style of Snowflake, packed into the
+existing "TB..." format:
+
+    42 bits  milliseconds since REFERENCE_EPOCH
+    10 bits  node id (settings.BOOKING_REFERENCE_NODE_ID, one per host, or
+             derived from the machine id and hostname when unset)
+    22 bits  process id
+    12 bits  per-process sequence within the millisecond
+
+The node and process ids make every process's ID space disjoint, and the
+sequence makes IDs unique within a process, so uniqueness never needs a
+database round-trip. The number is written as 17 fixed-width base-36
+digits, so references sort in creation order and index inserts append at
+the right edge of the booking_reference index.
+"""
+
+import os
+import socket
+import threading
+import time
+import zlib
+
+from django.conf import settings
+
+PREFIX = 'TB'
+REFERENCE_EPOCH_MS = 1704067200000  # 2024-01-01T00:00:00Z
+
+NODE_BITS = 10
+PID_BITS = 22
+SEQUENCE_BITS = 12
+MAX_NODE_ID = (1 << NODE_BITS) - 1
+MAX_SEQUENCE = (1 << SEQUENCE_BITS) - 1
+
+MACHINE_ID_FILES = ('/etc/machine-id', '/var/lib/dbus/machine-id')
+
+ALPHABET = '0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZ'
+WIDTH = 17  # ceil(86 bits / log2(36))
+
+
+def _encode(number):
+    digits = []
+    while number:
+        number, remainder = divmod(number, 36)
+        digits.append(ALPHABET[remainder])
+    return ''.join(reversed(digits)).rjust(WIDTH, '0')
+
+
+def decode_reference(reference):
+    """Split a generated reference into (timestamp_ms, node_id, pid, sequence)"""
+    number = int(reference[len(PREFIX):], 36)
+    sequence = number & MAX_SEQUENCE
+    number >>= SEQUENCE_BITS
+    pid = number & ((1 << PID_BITS) - 1)
+    number >>= PID_BITS
+    node_id = number & MAX_NODE_ID
+    timestamp_ms = (number >> NODE_BITS) + REFERENCE_EPOCH_MS
+    return timestamp_ms, node_id, pid, sequence
+
+
+def default_node_id():
+    """Derive a node id from the machine id and hostname
+
+    Containers built from one image often share /etc/machine-id but get
+    their own hostname, so both go into the hash. Distinct hosts can still
+    land on the same id; set BOOKING_REFERENCE_NODE_ID to rule that out.
+    """
+    machine_id = ''
+    for path in MACHINE_ID_FILES:
+        try:
+            with open(path) as f:
+                machine_id = f.read().strip()
+        except OSError:
+            continue
+        if machine_id:
+            break
+    return zlib.crc32(f'{machine_id}/{socket.gethostname()}'.encode()) % (MAX_NODE_ID + 1)
+
+
+class ReferenceGenerator:
+    """Thread-safe, fork-aware generator for one process"""
+
+    def __init__(self, node_id=None):
+        self._lock = threading.Lock()
+        self._node_id = node_id
+        self._reset()
+
+    def _reset(self):
+        self._pid = os.getpid()
+        self._last_ms = -1
+        self._sequence = 0
+
+    @property
+    def node_id(self):
+        if self._node_id is None:
+            node_id = getattr(settings, 'BOOKING_REFERENCE_NODE_ID', None)
+            node_id = default_node_id() if node_id is None else int(node_id)
+            if not 0 <= node_id <= MAX_NODE_ID:
+                raise ValueError(f'BOOKING_REFERENCE_NODE_ID must be between 0 and {MAX_NODE_ID}.')
+            self._node_id = node_id
+        return self._node_id
+
+    def next_id(self):
+        with self._lock:
+            if os.getpid() != self._pid:
+                # Forked child: never continue the parent's sequence
+                self._reset()
+
+            now_ms = int(time.time() * 1000) - REFERENCE_EPOCH_MS
+            if now_ms > self._last_ms:
+                self._last_ms = now_ms
+                self._sequence = 0
+            else:
+                # Same millisecond, or the clock stepped back: keep counting
+                # from the last timestamp handed out instead of waiting
+                self._sequence += 1
+                if self._sequence > MAX_SEQUENCE:
+                    self._last_ms += 1
+                    self._sequence = 0
+
+            return (
+                (self._last_ms << (NODE_BITS + PID_BITS + SEQUENCE_BITS))
+                | (self.node_id << (PID_BITS + SEQUENCE_BITS))
+                | ((self._pid & ((1 << PID_BITS) - 1)) << SEQUENCE_BITS)
+                | self._sequence
+            )
+
+    def next_reference(self):
+        return PREFIX + _encode(self.next_id())
+
+
+_generator = ReferenceGenerator()
+
+
+def generate_booking_reference():
+    """Return a new unique booking reference, e.g. 'TB0000A4ZQ1X3K9P2B7'"""
+    return _generator.next_reference()
@@ -0,0 +1,183 @@
+"""
+Occupancy and revenue rollups for Travel Karo
+
+HourlyRollup and DailyRollup hold, per local departure hour or date, route,
+operator and travel type: services, seats offered, seats sold, bookings,
+cancellations, revenue and refunds. Figures belong to the period the
+services depart in, so load factor is seats sold over seats offered. The
+operations dashboard reads only these tables, so its charts cost the same
+whatever the booking volume.
+
+update() is incremental. It finds the departure dates of the bookings and
+travel options whose updated_at passed the stored watermarks, and
+recomputes those whole days. Each day takes two grouped queries per table
+pair (hot, then archive), and its rows are replaced in one transaction.
+Like the fare calendar, a recompute is idempotent, so a run that fails
+halfway is simply repeated. Rows changed in the last ROLLUP_LAG_SECONDS
+are left to the next run, so a transaction that is still committing is
+not skipped.
+
+Archived options and bookings are counted with the hot ones, so
+archive_departed never changes a day's totals. Deleted rows and services
+moved to another day leave their old day stale until update(rebuild=True).
+"""
+
+from collections import defaultdict
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, F, Q, Sum
+from django.db.models.functions import TruncDate, TruncHour
+from django.utils import timezone
+
+from travel.models import ArchivedTravelOption, TravelOption
+from travel.dates import local_day_range
+from .models import ArchivedBooking, Booking, DailyRollup, HourlyRollup, RollupWatermark
+
+# (travel option model, booking model) pairs counted into the rollups
+TABLES = ((TravelOption, Booking), (ArchivedTravelOption, ArchivedBooking))
+
+# Watermark name and the changed rows it follows, with their departure field
+WATERMARKS = (
+    ('bookings', Booking, 'travel_option__departure_datetime'),
+    ('travel_options', TravelOption, 'departure_datetime'),
+)
+
+MEASURES = ('services', 'seats_offered', 'seats_sold', 'bookings', 'cancellations', 'revenue', 'refunds')
+GROUP = ('source', 'destination', 'operator_name', 'travel_type')
+
+
+def _departure_days(queryset, field):
+    return set(
+        queryset.annotate(
+            day=TruncDate(field, tzinfo=timezone.get_current_timezone())
+        ).values_list('day', flat=True).order_by().distinct()
+    )
+
+
+def changed_days(watermarks, until):
+    """Departure dates with rows changed after watermarks (name -> datetime), up to until"""
+    days = set()
+    for name, model, field in WATERMARKS:
+        days |= _departure_days(
+            model.objects.filter(updated_at__gt=watermarks[name], updated_at__lte=until), field
+        )
+    return days
+
+
+def all_days():
+    days = set()
+    for option_model, _ in TABLES:
+        days |= _departure_days(option_model.objects.all(), 'departure_datetime')
+    return days
+
+
+def _hourly_totals(day):
+    """Measures of day by (hour, *GROUP), from the hot and archive tables"""
+    tz = timezone.get_current_timezone()
+    totals = defaultdict(lambda: dict.fromkeys(MEASURES, 0))
+    confirmed, cancelled = Q(status='confirmed'), Q(status='cancelled')
+
+    for option_model, booking_model in TABLES:
+        options = option_model.objects.filter(
+            is_active=True, **local_day_range('departure_datetime', day)
+        ).annotate(
+            hour=TruncHour('departure_datetime', tzinfo=tz)
+        ).values('hour', *GROUP).annotate(
+            services=Count('id'), seats_offered=Sum('total_seats')
+        ).order_by()
+        bookings = booking_model.objects.filter(
+            **local_day_range('travel_option__departure_datetime', day)
+        ).values(
+            hour=TruncHour('travel_option__departure_datetime', tzinfo=tz),
+            **{field: F(f'travel_option__{field}') for field in GROUP},
+        ).annotate(
+            bookings=Count('id', filter=confirmed),
+            seats_sold=Sum('num_seats', filter=confirmed),
+            revenue=Sum('total_price', filter=confirmed),
+            cancellations=Count('id', filter=cancelled),
+            refunds=Sum('refund_amount', filter=cancelled),
+        ).order_by()
+
+        for rows in (options, bookings):
+            for row in rows:
+                measures = totals[(row['hour'], *(row[field] for field in GROUP))]
+                for measure in MEASURES:
+                    measures[measure] += row.get(measure) or 0
+    return totals
+
+
+def recompute_day(day):
+    """Replace the hourly and daily rollups of a local departure date"""
+    def fields(group, measures):
+        return {
+            'source_id': group[0], 'destination_id': group[1],
+            'operator_name': group[2], 'travel_type': group[3], **measures,
+        }
+
+    # Read in the same transaction, so a concurrent archive batch cannot
+    # be counted twice or not at all
+    with transaction.atomic():
+        hourly = _hourly_totals(day)
+        daily = defaultdict(lambda: dict.fromkeys(MEASURES, 0))
+        for (hour, *group), measures in hourly.items():
+            for measure, value in measures.items():
+                daily[tuple(group)][measure] += value
+
+        HourlyRollup.objects.filter(**local_day_range('hour', day)).delete()
+        HourlyRollup.objects.bulk_create(
+            HourlyRollup(hour=hour, **fields(group, measures))
+            for (hour, *group), measures in hourly.items()
+        )
+        DailyRollup.objects.filter(date=day).delete()
+        DailyRollup.objects.bulk_create(
+            DailyRollup(date=day, **fields(group, measures)) for group, measures in daily.items()
+        )
+    return len(hourly)
+
+
+def update(now=None, rebuild=False):
+    """
+    Recompute the days changed since the last run, or every day with
+    rebuild (or on the first run). Returns the number of days recomputed.
+    """
+    now = now or timezone.now()
+    until = now - timedelta(seconds=settings.ROLLUP_LAG_SECONDS)
+    watermarks = dict(RollupWatermark.objects.values_list('name', 'value'))
+    if rebuild or any(name not in watermarks for name, _, _ in WATERMARKS):
+        days = all_days()
+    else:
+        days = changed_days(watermarks, until)
+
+    for day in sorted(days):
+        recompute_day(day)
+    # Advanced only once every day is written; a failed run starts over
+    for name, _, _ in WATERMARKS:
+        RollupWatermark.objects.update_or_create(name=name, defaults={'value': until})
+    return len(days)
+
+
+def _with_load_factor(row):
+    offered = row['seats_offered']
+    row['load_factor'] = round(row['seats_sold'] * 100 / offered, 1) if offered else 0
+    return row
+
+
+def totals(rows):
+    """Sum of the measures of rollup rows (a queryset), with load_factor"""
+    row = rows.aggregate(**{measure: Sum(measure) for measure in MEASURES})
+    return _with_load_factor({measure: value or 0 for measure, value in row.items()})
+
+
+def summarize(rows, *fields, order_by=None, limit=None):
+    """
+    Rollup rows (a queryset) summed by fields, each with a load_factor;
+    ordered by fields unless order_by is given.
+    """
+    summary = rows.values(*fields).annotate(
+        **{measure: Sum(measure) for measure in MEASURES}
+    ).order_by(*(order_by or fields))
+    if limit is not None:
+        summary = summary[:limit]
+    return [_with_load_factor(row) for row in summary]
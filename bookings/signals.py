@@ -0,0 +1,16 @@
+"""
+Signals for the bookings app
+"""
+
+from django.dispatch import receiver
+
+from travel.signals import seats_released
+
+
+@receiver(seats_released)
+def promote_waitlist(sender, options, **kwargs):
+    # Runs inside the transaction that freed the seats, so waiting users
+    # get them before the options show up in search again
+    from . import waitlist
+
+    waitlist.promote(options)
@@ -1,3 +1,574 @@
-from django.test import TestCase
+import csv
+import io
+import os
+import tempfile
+import time
+from datetime import datetime, timedelta
+from unittest import mock
 
-# Create your tests here.
+from django.contrib.auth import get_user_model
+from django.core import mail
+from django.core.management import call_command
+from django.db import connection
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from travel.inventory import expire_holds, hold_seats, reserve_seats
+from travel.models import ArchivedTravelOption, SeatHold, TravelOption
+from travel.search_cache import get_search_cache
+from travel_booking.testing import PerformanceBudgetMixin, make_option, make_user
+from . import archive, rollups, waitlist
+from .cancellations import cancel_services
+from .models import ArchivedBooking, Booking, DailyRollup, HourlyRollup, Notification, WaitlistEntry
+from .references import MAX_NODE_ID, MAX_SEQUENCE, ReferenceGenerator, decode_reference
+
+User = get_user_model()
+
+
+def make_flight(**overrides):
+    """Create the IndiGo flight most booking tests start from"""
+    fields = {
+        'travel_type': 'flight',
+        'source': 'Mumbai',
+        'destination': 'Bangalore',
+        'departure_datetime': timezone.now() + timedelta(days=5),
+        'arrival_datetime': None,
+        'price': 4200,
+        'total_seats': 180,
+        'available_seats': 180,
+        'operator_name': 'IndiGo',
+        'service_number': 'IN-5301',
+    }
+    fields.update(overrides)
+    return make_option(**fields)
+
+
+class MyBookingsViewTests(TestCase):
+
+    def setUp(self):
+        self.user = make_user('frequent', phone='+919800000001')
+        self.client.force_login(self.user)
+        self.url = reverse('bookings:my_bookings')
+
+    def make_bookings(self, count, **option_overrides):
+        option = make_flight(**option_overrides)
+        return [
+            Booking.objects.create(
+                user=self.user, travel_option=option, num_seats=1, total_price=option.price
+            )
+            for _ in range(count)
+        ]
+
+    def test_bookings_are_paginated_newest_first(self):
+        bookings = self.make_bookings(15)
+        expected = sorted(bookings, key=lambda b: (b.booking_date, b.pk), reverse=True)
+
+        first = self.client.get(self.url)
+        self.assertEqual(list(first.context['bookings']), expected[:10])
+
+        second = self.client.get(self.url, {'cursor': first.context['page_obj'].next_token})
+        self.assertEqual(list(second.context['bookings']), expected[10:])
+        self.assertFalse(second.context['page_obj'].has_next())
+
+    def test_counts_match_status_and_departure(self):
+        upcoming = self.make_bookings(2)
+        cancelled = self.make_bookings(1)
+        Booking.objects.filter(pk=cancelled[0].pk).update(status='cancelled')
+        past = self.make_bookings(1)
+        TravelOption.objects.filter(pk=past[0].travel_option_id).update(
+            departure_datetime=timezone.now() - timedelta(days=1)
+        )
+
+        context = self.client.get(self.url).context
+        self.assertEqual(
+            (context['upcoming_count'], context['past_count'], context['cancelled_count']),
+            (len(upcoming), len(past), len(cancelled)),
+        )
+
+    def test_query_count_does_not_grow_with_bookings(self):
+        # session + user + one page query + one count query + waitlist
+        # + archive preview (counted separately only past the preview)
+        budget = 6
+        self.make_bookings(1)
+        with self.assertNumQueries(budget):
+            self.client.get(self.url)
+
+        for _ in range(30):
+            self.make_bookings(1)
+        with self.assertNumQueries(budget):
+            response = self.client.get(self.url)
+        self.assertContains(response, 'Mumbai')
+
+
+class BookingReferenceTests(SimpleTestCase):
+
+    def test_references_are_unique_ordered_and_fit_the_column(self):
+        generator = ReferenceGenerator(node_id=3)
+        references = [generator.next_reference() for _ in range(10000)]
+        self.assertEqual(len(set(references)), len(references))
+        self.assertEqual(references, sorted(references))
+        max_length = Booking._meta.get_field('booking_reference').max_length
+        self.assertTrue(all(r.startswith('TB') and len(r) <= max_length for r in references))
+
+    def test_reference_encodes_node_and_process(self):
+        reference = ReferenceGenerator(node_id=7).next_reference()
+        timestamp_ms, node_id, pid, sequence = decode_reference(reference)
+        self.assertEqual(node_id, 7)
+        self.assertEqual(pid, os.getpid())
+        self.assertAlmostEqual(timestamp_ms / 1000, time.time(), delta=5)
+
+    @override_settings(BOOKING_REFERENCE_NODE_ID=None)
+    @mock.patch('bookings.references.MACHINE_ID_FILES', ())
+    def test_unset_node_id_is_derived_from_the_host(self):
+        with mock.patch('bookings.references.socket.gethostname', return_value='web-1'):
+            first = ReferenceGenerator().node_id
+            self.assertEqual(ReferenceGenerator().node_id, first)
+        with mock.patch('bookings.references.socket.gethostname', return_value='web-2'):
+            second = ReferenceGenerator().node_id
+        self.assertNotEqual(first, second)
+        self.assertTrue(0 <= first <= MAX_NODE_ID and 0 <= second <= MAX_NODE_ID)
+
+    @override_settings(BOOKING_REFERENCE_NODE_ID=5)
+    def test_configured_node_id_wins(self):
+        self.assertEqual(ReferenceGenerator().node_id, 5)
+
+    def test_clock_going_backwards_keeps_order(self):
+        generator = ReferenceGenerator(node_id=0)
+        with mock.patch('bookings.references.time.time', return_value=2000000000.0):
+            first = generator.next_reference()
+        with mock.patch('bookings.references.time.time', return_value=1999999990.0):
+            second = generator.next_reference()
+        self.assertLess(first, second)
+
+    def test_sequence_overflow_borrows_next_millisecond(self):
+        generator = ReferenceGenerator(node_id=0)
+        with mock.patch('bookings.references.time.time', return_value=2000000000.0):
+            references = [generator.next_reference() for _ in range(MAX_SEQUENCE + 2)]
+        self.assertEqual(len(set(references)), len(references))
+        self.assertEqual(decode_reference(references[-1])[0], 2000000000001)
+
+    def test_forked_child_restarts_sequence(self):
+        generator = ReferenceGenerator(node_id=0)
+        with mock.patch('bookings.references.time.time', return_value=2000000000.0):
+            parent = generator.next_reference()
+            with mock.patch('bookings.references.os.getpid', return_value=os.getpid() + 1):
+                child = generator.next_reference()
+        self.assertNotEqual(parent, child)
+        self.assertEqual(decode_reference(child)[3], 0)
+
+
+class BookingExportTests(TestCase):
+
+    def setUp(self):
+        self.user = make_user(
+            'finance', first_name='Asha', last_name='Rao', email='asha@example.com', phone='+919800000002'
+        )
+        self.indigo = make_flight()
+        self.vistara = make_flight(operator_name='Vistara', service_number='UK-801')
+        self.family = Booking.objects.create(
+            user=self.user, travel_option=self.indigo, num_seats=3, total_price=12600,
+            passenger_details={'passengers': [
+                {'name': 'Asha Rao', 'age': 34, 'gender': 'F'},
+                {'name': '=HYPERLINK("x")', 'age': 36, 'gender': 'M'},
+            ]},
+        )
+        self.solo = Booking.objects.create(user=self.user, travel_option=self.vistara, num_seats=1)
+        self.cancelled = Booking.objects.create(
+            user=self.user, travel_option=self.indigo, num_seats=1, status='cancelled'
+        )
+
+    def export(self, *args):
+        fd, path = tempfile.mkstemp(suffix='.csv')
+        os.close(fd)
+        self.addCleanup(os.remove, path)
+        call_command('export_bookings', *args, '--output', path, stderr=io.StringIO())
+        with open(path, encoding='utf-8', newline='') as f:
+            return list(csv.DictReader(f))
+
+    def test_export_is_one_joined_query(self):
+        with self.assertNumQueries(1):
+            rows = self.export()
+        self.assertEqual(
+            [row['booking_reference'] for row in rows],
+            [self.family.booking_reference, self.solo.booking_reference, self.cancelled.booking_reference],
+        )
+        self.assertEqual(rows[0]['email'], 'asha@example.com')
+        # Leading + and - start formulas too, so phone numbers are quoted
+        self.assertEqual(rows[0]['contact_phone'], "'+919800000002")
+        self.assertEqual(rows[0]['service_number'], 'IN-5301')
+        self.assertEqual(rows[1]['operator_name'], 'Vistara')
+
+    def test_export_filters(self):
+        rows = self.export('--operator', 'IndiGo', '--status', 'confirmed')
+        self.assertEqual([row['booking_reference'] for row in rows], [self.family.booking_reference])
+
+        tomorrow = (timezone.localdate() + timedelta(days=1)).isoformat()
+        self.assertEqual(self.export('--from', tomorrow), [])
+
+    def test_manifest_lists_each_seat_and_skips_cancelled(self):
+        rows = self.export('--manifest', '--operator', 'IndiGo')
+        self.assertEqual([row['seat'] for row in rows], ['1', '2', '3'])
+        self.assertEqual(
+            [row['passenger_name'] for row in rows],
+            ['Asha Rao', '\'=HYPERLINK("x")', 'Asha Rao'],
+        )
+        self.assertEqual(rows[1]['age'], '36')
+        self.assertEqual({row['booking_reference'] for row in rows}, {self.family.booking_reference})
+
+    def test_admin_action_streams_csv(self):
+        admin = User.objects.create_superuser(username='admin', password='pass12345', email='a@example.com')
+        self.client.force_login(admin)
+        response = self.client.post(reverse('admin:bookings_booking_changelist'), {
+            'action': 'export_manifest',
+            '_selected_action': [self.solo.pk],
+        })
+        self.assertTrue(response.streaming)
+        self.assertIn('attachment; filename="manifest-', response['Content-Disposition'])
+        content = b''.join(response.streaming_content).decode('utf-8')
+        self.assertTrue(content.startswith('\ufeffdeparture_datetime,'))
+        self.assertIn(self.solo.booking_reference, content)
+        self.assertNotIn(self.family.booking_reference, content)
+
+
+class WaitlistTests(TestCase):
+
+    def setUp(self):
+        self.users = [
+            make_user(f'waiting{i}', phone=f'+91980000010{i}')
+            for i in range(4)
+        ]
+        self.option = make_flight(total_seats=3, available_seats=3)
+
+    def book(self, user, num_seats, option=None):
+        option = option or self.option
+        reserve_seats(option, num_seats)
+        return Booking.objects.create(user=user, travel_option=option, num_seats=num_seats)
+
+    def seats_left(self, option=None):
+        option = option or self.option
+        option.refresh_from_db()
+        return option.available_seats
+
+    def test_cancellation_promotes_in_fifo_order(self):
+        booking = self.book(self.users[0], 3)
+        first = waitlist.join(self.option, self.users[1], 2)
+        second = waitlist.join(self.option, self.users[2], 2)
+        third = waitlist.join(self.option, self.users[3], 1)
+
+        booking.cancel_booking()
+
+        # The first entry fits; the second does not, and the third may not
+        # jump the queue
+        statuses = dict(WaitlistEntry.objects.values_list('pk', 'status'))
+        self.assertEqual(
+            [statuses[first.pk], statuses[second.pk], statuses[third.pk]],
+            ['promoted', 'waiting', 'waiting'],
+        )
+        promoted = Booking.objects.get(waitlist_entry=first)
+        self.assertEqual((promoted.user, promoted.num_seats, promoted.status), (self.users[1], 2, 'confirmed'))
+        self.assertEqual(promoted.total_price, 8400)
+        self.assertTrue(promoted.booking_reference)
+        self.assertEqual(self.seats_left(), 1)
+
+    def test_added_capacity_and_expired_holds_are_promoted(self):
+        self.book(self.users[0], 3)
+        entry = waitlist.join(self.option, self.users[1], 2)
+
+        self.option.refresh_from_db()
+        self.option.total_seats, self.option.available_seats = 4, 1
+        self.option.save()
+        self.assertEqual(WaitlistEntry.objects.get(pk=entry.pk).status, 'waiting')
+        self.option.total_seats, self.option.available_seats = 5, 2
+        self.option.save()
+        self.assertEqual(WaitlistEntry.objects.get(pk=entry.pk).status, 'promoted')
+        self.assertEqual(self.seats_left(), 0)
+
+        other = make_flight(total_seats=1, available_seats=1, service_number='IN-5302')
+        hold_seats(other, self.users[0], 1, minutes=-1)
+        entry = waitlist.join(other, self.users[2], 1)
+        expire_holds()
+        self.assertEqual(WaitlistEntry.objects.get(pk=entry.pk).status, 'promoted')
+
+    def test_join_rules(self):
+        with self.assertRaisesMessage(ValueError, 'book them directly'):
+            waitlist.join(self.option, self.users[0], 1)
+        self.book(self.users[1], 3)
+        entry = waitlist.join(self.option, self.users[0], 1)
+        with self.assertRaisesMessage(ValueError, 'already on the waitlist'):
+            waitlist.join(self.option, self.users[0], 1)
+        entry.leave()
+        waitlist.join(self.option, self.users[0], 1)
+
+    def test_batch_promotion_query_count_does_not_grow(self):
+        queue = User.objects.bulk_create(
+            User(username=f'queue{i}', email=f'queue{i}@example.com', phone=f'+9197000{i:05d}')
+            for i in range(20)
+        )
+
+        def fill(count):
+            options = [
+                make_flight(total_seats=count, available_seats=count, service_number=f'BATCH-{count}-{i}')
+                for i in range(3)
+            ]
+            for option in options:
+                self.book(self.users[0], count, option)
+                WaitlistEntry.objects.bulk_create(
+                    WaitlistEntry(travel_option=option, user=user, num_seats=1)
+                    for user in queue[:count]
+                )
+            TravelOption.objects.filter(pk__in=[option.pk for option in options]).update(available_seats=count)
+            return options
+
+        small, large = fill(2), fill(20)
+        with CaptureQueriesContext(connection) as small_queries:
+            self.assertEqual(waitlist.promote(small), 6)
+        with CaptureQueriesContext(connection) as large_queries:
+            self.assertEqual(waitlist.promote(large), 60)
+        self.assertEqual(len(small_queries), len(large_queries))
+        self.assertEqual([self.seats_left(option) for option in large], [0, 0, 0])
+
+    def test_promote_command_catches_up(self):
+        self.book(self.users[0], 3)
+        entry = waitlist.join(self.option, self.users[1], 2)
+        # Seats freed behind the signal's back, e.g. by a crashed process
+        TravelOption.objects.filter(pk=self.option.pk).update(available_seats=2)
+        call_command('promote_waitlist', stdout=io.StringIO())
+        self.assertEqual(WaitlistEntry.objects.get(pk=entry.pk).status, 'promoted')
+        self.assertEqual(self.seats_left(), 0)
+
+    def test_sold_out_option_is_found_in_search_and_waitlisted(self):
+        get_search_cache().clear()
+        self.book(self.users[1], 3)
+        self.client.force_login(self.users[0])
+        response = self.client.get(reverse('travel:search'), {'source': 'Mumbai', 'destination': 'Bangalore'})
+        self.assertEqual(list(response.context['travel_options']), [self.option])
+        join_url = reverse('bookings:join_waitlist', kwargs={'pk': self.option.pk})
+        self.assertContains(response, 'Sold out')
+        self.assertContains(response, f'action="{join_url}"')
+
+        self.client.post(join_url, {'num_seats': 1})
+        self.assertEqual(WaitlistEntry.objects.get(user=self.users[0]).travel_option, self.option)
+
+    def test_join_view(self):
+        self.book(self.users[1], 3)
+        self.client.force_login(self.users[0])
+        response = self.client.post(
+            reverse('bookings:join_waitlist', kwargs={'pk': self.option.pk}), {'num_seats': 2}
+        )
+        self.assertRedirects(response, reverse('bookings:my_bookings'), fetch_redirect_response=False)
+        entry = WaitlistEntry.objects.get(user=self.users[0])
+        self.assertContains(self.client.get(reverse('bookings:my_bookings')), 'Waitlist')
+
+        self.client.post(reverse('bookings:leave_waitlist', kwargs={'pk': entry.pk}))
+        self.assertEqual(WaitlistEntry.objects.get(pk=entry.pk).status, 'cancelled')
+
+
+class ServiceCancellationTests(TestCase):
+
+    def setUp(self):
+        self.users = User.objects.bulk_create(
+            User(username=f'rider{i}', email=f'rider{i}@example.com', phone=f'+9195000{i:05d}')
+            for i in range(40)
+        )
+
+    def fill(self, seats, **overrides):
+        # Departing within the two hours customers can no longer cancel in
+        option = make_flight(
+            total_seats=seats, available_seats=0, departure_datetime=timezone.now() + timedelta(hours=1),
+            **overrides
+        )
+        Booking.objects.bulk_create(
+            Booking(
+                user=user, travel_option=option, num_seats=1, total_price=option.price,
+                booking_reference=f'TB{option.pk}-{user.pk}', contact_email=user.email,
+            )
+            for user in self.users[:seats]
+        )
+        return option
+
+    def test_cancels_refunds_and_notifies(self):
+        option = self.fill(3)
+        other = self.fill(2, service_number='IN-5302')
+        Booking.objects.filter(travel_option=option, user=self.users[0]).update(status='cancelled')
+        hold = hold_seats(make_flight(service_number='IN-5303'), self.users[0], 1)
+        SeatHold.objects.filter(pk=hold.pk).update(travel_option=option)
+        entry = WaitlistEntry.objects.create(travel_option=option, user=self.users[5], num_seats=1)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            result = cancel_services([option], reason='Aircraft unavailable')
+
+        self.assertEqual(result, (1, 2, 8400))
+        option.refresh_from_db()
+        self.assertEqual((option.is_active, option.available_seats), (False, 3))
+        cancelled = option.bookings.filter(refund_amount=4200, cancelled_at__isnull=False)
+        self.assertEqual(cancelled.count(), 2)
+        # The booking cancelled earlier is not refunded or notified again
+        self.assertEqual(option.bookings.get(user=self.users[0]).refund_amount, None)
+        self.assertFalse(other.bookings.filter(status='cancelled').exists())
+        self.assertEqual(SeatHold.objects.get(pk=hold.pk).status, 'released')
+        self.assertEqual(WaitlistEntry.objects.get(pk=entry.pk).status, 'cancelled')
+
+        notifications = Notification.objects.order_by('email')
+        self.assertEqual([n.email for n in notifications], ['rider1@example.com', 'rider2@example.com'])
+        self.assertIn('₹4,200.00', notifications[0].message)
+        self.assertIn('Aircraft unavailable', notifications[0].message)
+
+        call_command('send_notifications', stdout=io.StringIO())
+        self.assertEqual(len(mail.outbox), 2)
+        self.assertFalse(Notification.objects.filter(sent_at__isnull=True).exists())
+
+    def test_query_count_does_not_grow_with_bookings(self):
+        small, large = self.fill(2), self.fill(40, service_number='IN-5302')
+        with CaptureQueriesContext(connection) as small_queries:
+            cancel_services([small])
+        with CaptureQueriesContext(connection) as large_queries:
+            self.assertEqual(cancel_services([large]).bookings, 40)
+        self.assertEqual(len(small_queries), len(large_queries))
+
+    def test_command_by_service_number_and_date(self):
+        option = self.fill(2)
+        call_command(
+            'cancel_services', '--service-number', 'IN-5301',
+            '--date', timezone.localtime(option.departure_datetime).strftime('%Y-%m-%d'),
+            stdout=io.StringIO(),
+        )
+        self.assertEqual(option.bookings.filter(status='cancelled').count(), 2)
+
+
+class ArchiveTests(TestCase):
+
+    def setUp(self):
+        self.user = make_user('traveller', phone='+919800000003')
+        self.departed = [
+            make_flight(service_number=f'OLD-{i}', departure_datetime=timezone.now() - timedelta(days=40 + i))
+            for i in range(3)
+        ]
+        self.recent = make_flight(service_number='RECENT', departure_datetime=timezone.now() - timedelta(days=2))
+        self.future = make_flight(service_number='FUTURE')
+        self.bookings = {
+            option.service_number: Booking.objects.create(
+                user=self.user, travel_option=option, num_seats=2, total_price=8400
+            )
+            for option in self.departed + [self.recent, self.future]
+        }
+        self.notification = Notification.objects.create(
+            user=self.user, booking=self.bookings['OLD-0'], kind='service_cancelled',
+            subject='Cancelled', message='Cancelled',
+        )
+
+    def test_moves_departed_options_and_bookings_in_batches(self):
+        self.assertEqual(archive.archive_departed(batch_size=2), (3, 3))
+
+        self.assertCountEqual(
+            TravelOption.objects.values_list('service_number', flat=True), ['RECENT', 'FUTURE']
+        )
+        self.assertEqual(Booking.objects.count(), 2)
+        old = ArchivedBooking.objects.select_related('travel_option').get(pk=self.bookings['OLD-1'].pk)
+        self.assertEqual(
+            (old.booking_reference, old.total_price, old.travel_option.service_number, old.user),
+            (self.bookings['OLD-1'].booking_reference, 8400, 'OLD-1', self.user),
+        )
+        self.assertEqual(old.travel_option.source.name, 'Mumbai')
+        self.notification.refresh_from_db()
+        self.assertIsNone(self.notification.booking)
+
+        # Nothing left to move: a second run is a no-op
+        self.assertEqual(archive.archive_departed(), (0, 0))
+        self.assertEqual(ArchivedTravelOption.objects.count(), 3)
+
+    def test_history_and_detail_fall_back_to_archive(self):
+        archive.archive_departed()
+        self.client.force_login(self.user)
+
+        context = self.client.get(reverse('bookings:my_bookings')).context
+        self.assertEqual(len(context['archived_bookings']), 3)
+        self.assertEqual(context['past_count'], 4)
+
+        pk = self.bookings['OLD-2'].pk
+        self.assertEqual(archive.find_booking(self.user, pk).travel_option.service_number, 'OLD-2')
+        self.assertEqual(archive.find_booking(self.user, self.bookings['FUTURE'].pk).status, 'confirmed')
+        other = make_user('other', phone='+919800000004')
+        self.assertIsNone(archive.find_booking(other, pk))
+
+        response = self.client.post(reverse('bookings:cancel', kwargs={'pk': pk}))
+        self.assertRedirects(response, reverse('bookings:detail', kwargs={'pk': pk}), fetch_redirect_response=False)
+        self.assertEqual(ArchivedBooking.objects.get(pk=pk).status, 'confirmed')
+
+    def test_my_bookings_shows_latest_archived_and_links_to_archive(self):
+        option = self.departed[0]
+        for _ in range(11):
+            Booking.objects.create(user=self.user, travel_option=option, num_seats=1, total_price=4200)
+        archive.archive_departed()
+        self.client.force_login(self.user)
+
+        response = self.client.get(reverse('bookings:my_bookings'))
+        self.assertEqual(len(response.context['archived_bookings']), 10)
+        self.assertEqual(response.context['archived_count'], 14)
+        self.assertEqual(response.context['past_count'], 15)
+        self.assertContains(response, reverse('bookings:archived_bookings'))
+
+        page = list(self.client.get(reverse('bookings:archived_bookings')).context['bookings'])
+        self.assertEqual(len(page), 14)
+        self.assertEqual(page, sorted(page, key=lambda b: (b.booking_date, b.pk), reverse=True))
+
+
+# No lag, so each update sees the rows written just before it
+@override_settings(ROLLUP_LAG_SECONDS=0)
+class RollupTests(PerformanceBudgetMixin, TestCase):
+
+    def setUp(self):
+        self.user = make_user('ops', phone='+919800000004')
+        self.day = timezone.localdate() - timedelta(days=1)
+        self.option = make_flight(
+            total_seats=100, available_seats=100,
+            departure_datetime=timezone.make_aware(datetime.combine(self.day, datetime.min.time())) + timedelta(hours=9),
+        )
+        self.book(3, 12600)
+        self.book(1, 4200, status='cancelled', refund_amount=4200)
+
+    def book(self, num_seats, total_price, **fields):
+        return Booking.objects.create(
+            user=self.user, travel_option=self.option, num_seats=num_seats, total_price=total_price, **fields
+        )
+
+    def daily(self):
+        return DailyRollup.objects.values_list(
+            'services', 'seats_offered', 'seats_sold', 'bookings', 'cancellations', 'revenue', 'refunds'
+        ).get(date=self.day, source=self.option.source, operator_name='IndiGo', travel_type='flight')
+
+    def test_update_recomputes_only_changed_days(self):
+        self.assertEqual(rollups.update(), 1)
+        self.assertEqual(self.daily(), (1, 100, 3, 1, 1, 12600, 4200))
+        hourly = HourlyRollup.objects.get()
+        self.assertEqual((timezone.localtime(hourly.hour).hour, hourly.seats_sold), (9, 3))
+
+        self.assertEqual(rollups.update(), 0)
+        self.book(2, 8400)
+        make_flight(service_number='IN-5302')
+        self.assertEqual(rollups.update(), 2)
+        self.assertEqual(self.daily(), (1, 100, 5, 2, 1, 21000, 4200))
+        self.assertEqual(DailyRollup.objects.get(date=self.day).load_factor(), 5.0)
+
+    def test_archived_days_keep_their_totals(self):
+        rollups.update()
+        archive.archive_departed(before=timezone.now())
+        self.assertEqual(Booking.objects.count(), 0)
+
+        call_command('update_rollups', '--rebuild', stdout=io.StringIO())
+        self.assertEqual(self.daily(), (1, 100, 3, 1, 1, 12600, 4200))
+
+    def test_dashboard_is_staff_only_and_reads_rollups(self):
+        rollups.update()
+        url = reverse('bookings:dashboard')
+        self.client.force_login(self.user)
+        self.assertEqual(self.client.get(url).status_code, 403)
+
+        self.user.is_staff = True
+        self.user.save()
+        response = self.client.get(url, {'days': 7, 'travel_type': 'flight'})
+        self.assertWithinBudget(response)
+        self.assertEqual(response.context['totals']['seats_sold'], 3)
+        self.assertEqual(response.context['by_route'][0]['route'], 'Mumbai → Bangalore')
+        self.assertContains(response, '₹12,600')
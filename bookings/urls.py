@@ -5,6 +5,10 @@ app_name = 'bookings'
 
 urlpatterns = [
     path('my-bookings/', views.MyBookingsView.as_view(), name='my_bookings'),
+    path('my-bookings/archive/', views.ArchivedBookingsView.as_view(), name='archived_bookings'),
     path('<int:pk>/', views.BookingDetailView.as_view(), name='detail'),
     path('<int:pk>/cancel/', views.CancelBookingView.as_view(), name='cancel'),
+    path('waitlist/join/<int:pk>/', views.JoinWaitlistView.as_view(), name='join_waitlist'),
+    path('waitlist/<int:pk>/leave/', views.LeaveWaitlistView.as_view(), name='leave_waitlist'),
+    path('dashboard/', views.OperationsDashboardView.as_view(), name='dashboard'),
 ]
@@ -1,63 +1,104 @@
+from datetime import timedelta
+
+from django.http import Http404
 from django.shortcuts import render, get_object_or_404, redirect
-from django.views.generic import ListView, DetailView, View
-from django.contrib.auth.mixins import LoginRequiredMixin
+from django.views.generic import ListView, DetailView, TemplateView, View
+from django.contrib.auth.mixins import LoginRequiredMixin, UserPassesTestMixin
 from django.contrib import messages
+from django.db.models import Count, Q
 from django.utils import timezone
-from .models import Booking
+from travel import cities
+from travel.constants import TRAVEL_TYPES
+from travel.models import TravelOption
+from travel.pagination import KeysetPaginationMixin
+from travel.dates import local_day_range
+from . import archive, rollups, waitlist
+from .models import ArchivedBooking, Booking, DailyRollup, HourlyRollup, WaitlistEntry
 
 
-class MyBookingsView(LoginRequiredMixin, ListView):
+class MyBookingsView(LoginRequiredMixin, KeysetPaginationMixin, ListView):
     """View to display user's bookings"""
     template_name = 'bookings/my_bookings.html'
     context_object_name = 'bookings'
     paginate_by = 10
+    keyset_ordering = ('booking_date', 'id')
+    keyset_descending = True
+    archive_preview = 10
 
     def get_queryset(self):
         return Booking.objects.filter(
             user=self.request.user
-        ).order_by('-booking_date')
+        ).select_related('travel_option').order_by('-booking_date')
     
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
         
-        # Separate upcoming and past bookings
+        # Count upcoming, past and cancelled bookings in one aggregate; the
+        # page is the only set of rows loaded
         now = timezone.now()
-        all_bookings = self.get_queryset()
-        
-        context['upcoming_bookings'] = all_bookings.filter(
-            travel_option__departure_datetime__gte=now,
-            status='confirmed'
-        )
-        context['past_bookings'] = all_bookings.filter(
-            travel_option__departure_datetime__lt=now
+        counts = self.get_queryset().order_by().aggregate(
+            upcoming=Count('id', filter=Q(travel_option__departure_datetime__gte=now, status='confirmed')),
+            past=Count('id', filter=Q(travel_option__departure_datetime__lt=now)),
+            cancelled=Count('id', filter=Q(status='cancelled')),
         )
-        context['cancelled_bookings'] = all_bookings.filter(
-            status='cancelled'
+        
+        # Latest departed trips moved to the archive by bookings.archive; the
+        # rest are on ArchivedBookingsView. Counted only past the preview.
+        archived_queryset = ArchivedBooking.objects.filter(user=self.request.user)
+        archived = list(
+            archived_queryset.select_related('travel_option')[:self.archive_preview + 1]
         )
+        archived_count = len(archived)
+        if archived_count > self.archive_preview:
+            archived_count = archived_queryset.count()
+        
+        context['upcoming_count'] = counts['upcoming']
+        context['past_count'] = counts['past'] + archived_count
+        context['archived_bookings'] = archived[:self.archive_preview]
+        context['archived_count'] = archived_count
+        context['cancelled_count'] = counts['cancelled']
+        context['waitlist_entries'] = WaitlistEntry.objects.filter(
+            user=self.request.user, status='waiting'
+        ).select_related('travel_option')
         
         return context
 
 
+class ArchivedBookingsView(LoginRequiredMixin, KeysetPaginationMixin, ListView):
+    """View to page through the user's archived bookings"""
+    template_name = 'bookings/archived_bookings.html'
+    context_object_name = 'bookings'
+    paginate_by = 20
+    keyset_ordering = ('booking_date', 'id')
+    keyset_descending = True
+
+    def get_queryset(self):
+        return ArchivedBooking.objects.filter(
+            user=self.request.user
+        ).select_related('travel_option').order_by('-booking_date')
+
+
 class BookingDetailView(LoginRequiredMixin, DetailView):
     """View to show booking details"""
     model = Booking
     template_name = 'bookings/detail.html'
     context_object_name = 'booking'
 
-    def get_queryset(self):
-        # Ensure users can only see their own bookings
-        return Booking.objects.filter(user=self.request.user)
+    def get_object(self, queryset=None):
+        # Users only see their own bookings, archived ones included
+        booking = archive.find_booking(self.request.user, self.kwargs['pk'])
+        if booking is None:
+            raise Http404('No booking found')
+        return booking
 
 
 class CancelBookingView(LoginRequiredMixin, View):
     """View to cancel a booking"""
     
     def post(self, request, pk):
-        booking = get_object_or_404(
-            Booking, 
-            pk=pk, 
-            user=request.user
-        )
+        booking = archive.find_booking(request.user, pk)
+        if booking is None:
+            raise Http404('No booking found')
         
         try:
             booking.cancel_booking()
@@ -71,3 +112,82 @@ class CancelBookingView(LoginRequiredMixin, View):
             messages.error(request, 'There was an error cancelling your booking. Please try again.')
         
         return redirect('bookings:detail', pk=booking.pk)
+
+
+class JoinWaitlistView(LoginRequiredMixin, View):
+    """Put the user on the waitlist of a sold-out travel option"""
+
+    def post(self, request, pk):
+        travel_option = get_object_or_404(TravelOption, pk=pk)
+        try:
+            num_seats = int(request.POST.get('num_seats', 1))
+        except ValueError:
+            num_seats = 0
+
+        try:
+            waitlist.join(travel_option, request.user, num_seats)
+        except ValueError as e:
+            messages.error(request, str(e))
+            return redirect('travel:detail', pk=travel_option.pk)
+
+        messages.success(
+            request,
+            'You are on the waitlist. Seats that free up are booked for you automatically, in order of joining.'
+        )
+        return redirect('bookings:my_bookings')
+
+
+class LeaveWaitlistView(LoginRequiredMixin, View):
+    """Take the user off a waitlist"""
+
+    def post(self, request, pk):
+        entry = get_object_or_404(WaitlistEntry, pk=pk, user=request.user)
+        try:
+            entry.leave()
+            messages.success(request, 'You have left the waitlist.')
+        except ValueError as e:
+            messages.error(request, str(e))
+        return redirect('bookings:my_bookings')
+
+
+class OperationsDashboardView(LoginRequiredMixin, UserPassesTestMixin, TemplateView):
+    """Load factor and revenue for staff, read from the rollup tables only"""
+    template_name = 'bookings/dashboard.html'
+    periods = (7, 30, 90)
+    top = 15
+
+    def test_func(self):
+        return self.request.user.is_staff
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        days = self.request.GET.get('days', '')
+        days = int(days) if days.isdigit() and int(days) in self.periods else 30
+        travel_type = self.request.GET.get('travel_type')
+        if travel_type not in dict(TRAVEL_TYPES):
+            travel_type = None
+
+        # Departures of the last `days` days, today included
+        today = timezone.localdate()
+        daily = DailyRollup.objects.filter(date__gt=today - timedelta(days=days), date__lte=today)
+        hourly = HourlyRollup.objects.filter(**local_day_range('hour', today))
+        if travel_type:
+            daily, hourly = daily.filter(travel_type=travel_type), hourly.filter(travel_type=travel_type)
+
+        by_route = rollups.summarize(daily, 'source', 'destination', order_by=['-revenue'], limit=self.top)
+        for row in by_route:
+            row['route'] = f"{cities.name_for(row['source'])} → {cities.name_for(row['destination'])}"
+
+        context.update({
+            'days': days,
+            'periods': self.periods,
+            'travel_type': travel_type,
+            'travel_types': TRAVEL_TYPES,
+            'totals': rollups.totals(daily),
+            'by_day': rollups.summarize(daily, 'date'),
+            'by_hour': rollups.summarize(hourly, 'hour'),
+            'by_route': by_route,
+            'by_operator': rollups.summarize(daily, 'operator_name', order_by=['-revenue'], limit=self.top),
+            'by_type': rollups.summarize(daily, 'travel_type'),
+        })
+        return context
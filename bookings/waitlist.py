@@ -0,0 +1,132 @@
+"""
+Waitlist for sold-out travel options
+
+Users join the waitlist of an option that cannot seat them. Whenever
+seats are released (travel.signals.seats_released: cancellations, expired
+holds, added capacity) promote() hands them to waiting entries strictly
+first come, first served, inside the transaction that freed them: the
+queue is served in order and stops at the first entry that does not fit,
+so a large party at the front is never overtaken by smaller ones behind.
+
+promote() is set-based, so a mass cancellation costs the same handful of
+queries per chunk of options however many entries it promotes: a window
+SUM picks the entries that fit, one bulk INSERT creates their bookings,
+one UPDATE marks them promoted and one UPDATE takes the seats.
+"""
+
+from django.db import transaction
+from django.db.models import F, OuterRef, Subquery, Sum, Window
+from django.utils import timezone
+
+from travel.models import TravelOption
+from travel.signals import travel_options_changed
+
+from .models import Booking, WaitlistEntry
+from .references import generate_booking_reference
+
+OPTION_CHUNK = 500
+UPDATE_CHUNK = 1000
+
+
+def join(travel_option, user, num_seats):
+    """Put user on the waitlist of travel_option; raises ValueError when not allowed"""
+    if num_seats <= 0:
+        raise ValueError('Number of seats must be positive.')
+    if not travel_option.is_active or travel_option.departure_datetime <= timezone.now():
+        raise ValueError('This travel option is not open for booking.')
+    if num_seats > travel_option.total_seats:
+        raise ValueError('This travel option does not have that many seats.')
+    if num_seats <= travel_option.available_seats:
+        raise ValueError('Seats are available; book them directly.')
+    if WaitlistEntry.objects.filter(travel_option=travel_option, user=user, status='waiting').exists():
+        raise ValueError('You are already on the waitlist for this travel option.')
+    return WaitlistEntry.objects.create(travel_option=travel_option, user=user, num_seats=num_seats)
+
+
+def _promote_chunk(option_ids, now):
+    # Lock the options where the database can, so the seats read below
+    # are still free when they are taken
+    free_options = list(
+        TravelOption.objects.select_for_update()
+        .filter(pk__in=option_ids, is_active=True, available_seats__gt=0, departure_datetime__gt=now)
+        .values_list('pk', flat=True)
+    )
+    if not free_options:
+        return 0
+
+    # seats_through is the number of seats the queue needs up to and
+    # including each entry, so the entries that fit are a FIFO prefix
+    entries = list(
+        WaitlistEntry.objects.filter(travel_option__in=free_options, status='waiting')
+        .annotate(
+            free_seats=F('travel_option__available_seats'),
+            seats_through=Window(
+                Sum('num_seats'),
+                partition_by=[F('travel_option')],
+                order_by=[F('created_at').asc(), F('id').asc()],
+            ),
+        )
+        .filter(seats_through__lte=F('free_seats'))
+        .select_related('user', 'travel_option')
+    )
+    if not entries:
+        return 0
+
+    Booking.objects.bulk_create(
+        [
+            Booking(
+                user=entry.user,
+                travel_option=entry.travel_option,
+                num_seats=entry.num_seats,
+                total_price=entry.travel_option.price * entry.num_seats,
+                status='confirmed',
+                booking_reference=generate_booking_reference(),
+                contact_phone=entry.user.phone or '',
+                contact_email=entry.user.email,
+                waitlist_entry=entry,
+            )
+            for entry in entries
+        ],
+        batch_size=UPDATE_CHUNK,
+    )
+    for start in range(0, len(entries), UPDATE_CHUNK):
+        WaitlistEntry.objects.filter(
+            pk__in=[entry.pk for entry in entries[start:start + UPDATE_CHUNK]]
+        ).update(status='promoted', promoted_at=now)
+
+    # promoted_at identifies the entries promoted by this call
+    promoted = WaitlistEntry.objects.filter(
+        travel_option=OuterRef('pk'), status='promoted', promoted_at=now
+    ).values('travel_option').annotate(seats=Sum('num_seats')).values('seats')
+    option_ids = {entry.travel_option_id for entry in entries}
+    TravelOption.objects.filter(pk__in=option_ids).update(
+        available_seats=F('available_seats') - Subquery(promoted), updated_at=now
+    )
+    travel_options_changed.send(
+        sender=TravelOption, options=list(TravelOption.objects.filter(pk__in=option_ids))
+    )
+    return len(entries)
+
+
+def promote(travel_options):
+    """
+    Promote waiting entries on these travel options (instances or ids) as
+    far as their free seats go. Returns the number of entries promoted.
+    """
+    option_ids = sorted({getattr(option, 'pk', option) for option in travel_options})
+    now = timezone.now()
+    promoted = 0
+    with transaction.atomic():
+        for start in range(0, len(option_ids), OPTION_CHUNK):
+            promoted += _promote_chunk(option_ids[start:start + OPTION_CHUNK], now)
+    return promoted
+
+
+def options_with_waiting_entries():
+    """Ids of bookable options that have free seats and a waiting queue"""
+    return TravelOption.objects.filter(
+        is_active=True,
+        available_seats__gt=0,
+        departure_datetime__gt=timezone.now(),
+        waitlist__status='waiting',
+    ).values_list('pk', flat=True).distinct()
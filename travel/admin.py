@@ -1,15 +1,47 @@
 from django.contrib import admin
-from .models import TravelOption
+from . import cities
+from .models import ArchivedTravelOption, City, FareCalendarDay, SeatHold, TravelOption
+
+
+class CityListFilter(admin.SimpleListFilter):
+    """Filter on a city foreign key with choices from the in-process city cache"""
+
+    def lookups(self, request, model_admin):
+        return [(city.pk, city.name) for city in cities.all_cities()]
+
+    def queryset(self, request, queryset):
+        if self.value():
+            return queryset.filter(**{f'{self.parameter_name}_id': self.value()})
+        return queryset
+
+
+class SourceCityFilter(CityListFilter):
+    title = 'source'
+    parameter_name = 'source'
+
+
+class DestinationCityFilter(CityListFilter):
+    title = 'destination'
+    parameter_name = 'destination'
+
+
+@admin.register(City)
+class CityAdmin(admin.ModelAdmin):
+    list_display = ('name', 'code', 'state', 'latitude', 'longitude')
+    list_filter = ('state',)
+    search_fields = ('name', 'code')
+    ordering = ['name']
 
 
 @admin.register(TravelOption)
 class TravelOptionAdmin(admin.ModelAdmin):
     list_display = ('travel_type', 'source', 'destination', 'departure_datetime', 
                    'price', 'available_seats', 'total_seats', 'is_active')
-    list_filter = ('travel_type', 'source', 'destination', 'is_active')
-    search_fields = ('source', 'destination', 'operator_name', 'service_number')
+    list_filter = ('travel_type', SourceCityFilter, DestinationCityFilter, 'is_active')
+    search_fields = ('source__name', 'destination__name', 'operator_name', 'service_number')
     date_hierarchy = 'departure_datetime'
     ordering = ['departure_datetime']
+    actions = ['cancel_services']
     
     fieldsets = (
         ('Basic Information', {
@@ -19,7 +51,7 @@ class TravelOptionAdmin(admin.ModelAdmin):
             'fields': ('departure_datetime', 'arrival_datetime')
         }),
         ('Pricing & Capacity', {
-            'fields': ('price', 'total_seats', 'available_seats')
+            'fields': ('price', 'base_price', 'total_seats', 'available_seats')
         }),
         ('Operator Details', {
             'fields': ('operator_name', 'service_number', 'description')
@@ -28,3 +60,55 @@ class TravelOptionAdmin(admin.ModelAdmin):
             'fields': ('is_active',)
         }),
     )
+
+    @admin.action(description='Cancel selected services and refund their bookings')
+    def cancel_services(self, request, queryset):
+        from bookings.cancellations import cancel_services
+
+        result = cancel_services(list(queryset.values_list('pk', flat=True)))
+        self.message_user(
+            request,
+            f'Cancelled {result.options} services and {result.bookings} bookings; '
+            f'₹{result.refunded:,.2f} to refund.',
+        )
+
+
+@admin.register(SeatHold)
+class SeatHoldAdmin(admin.ModelAdmin):
+    list_display = ('travel_option', 'user', 'num_seats', 'status', 'expires_at', 'closed_at')
+    list_filter = ('status',)
+    list_select_related = ('travel_option', 'user')
+    raw_id_fields = ('travel_option', 'user', 'booking')
+    date_hierarchy = 'expires_at'
+    # Holds move seats; they change only through travel.inventory
+    readonly_fields = [field.name for field in SeatHold._meta.fields]
+
+    def has_add_permission(self, request):
+        return False
+
+
+@admin.register(FareCalendarDay)
+class FareCalendarDayAdmin(admin.ModelAdmin):
+    list_display = ('source', 'destination', 'travel_date', 'travel_type',
+                   'min_price', 'seats_available', 'option_count', 'updated_at')
+    list_filter = ('travel_type', 'source', 'destination')
+    date_hierarchy = 'travel_date'
+    # Derived data: maintained by travel.fare_calendar, never edited by hand
+    readonly_fields = [field.name for field in FareCalendarDay._meta.fields]
+
+    def has_add_permission(self, request):
+        return False
+
+
+@admin.register(ArchivedTravelOption)
+class ArchivedTravelOptionAdmin(admin.ModelAdmin):
+    list_display = ('travel_type', 'source', 'destination', 'departure_datetime',
+                   'operator_name', 'service_number', 'archived_at')
+    list_filter = ('travel_type',)
+    search_fields = ('operator_name', 'service_number')
+    date_hierarchy = 'departure_datetime'
+    # Written only by bookings.archive
+    readonly_fields = [field.name for field in ArchivedTravelOption._meta.fields]
+
+    def has_add_permission(self, request):
+        return False
@@ -4,3 +4,6 @@ from django.apps import AppConfig
 class TravelConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'travel'
+
+    def ready(self):
+        from . import checks, signals  # noqa: F401
@@ -0,0 +1,18 @@
+from django.conf import settings
+from django.core.checks import Error, Tags, register
+
+
+@register(Tags.caches)
+def check_search_cache_is_shared(app_configs, **kwargs):
+    """Search route versions only invalidate pages in processes that share them"""
+    alias = getattr(settings, 'SEARCH_CACHE_ALIAS', 'search')
+    backend = settings.CACHES.get(alias, {}).get('BACKEND', '')
+    workers = getattr(settings, 'WEB_CONCURRENCY', 1)
+    if backend.endswith('.LocMemCache') and workers > 1:
+        return [Error(
+            f'The {alias!r} cache is per process, but WEB_CONCURRENCY is {workers}.',
+            hint='Set SEARCH_CACHE_URL to a Redis server shared by every worker, '
+                 'or other workers keep serving search results a booking has changed.',
+            id='travel.E001',
+        )]
+    return []
@@ -0,0 +1,91 @@
+"""
+In-process cache of the City table
+
+TravelOption stores cities as small integer keys. Everything that needs a
+name (templates, search, admin filters, the feed, exports) resolves it
+here instead of joining the city table. The whole table, about a hundred
+rows, is loaded on first use and kept for the life of the process.
+
+Saving or deleting a City clears the cache of the process that did it
+(see travel.signals). Other processes reload when they meet a city id they
+do not know, and at most every RELOAD_SECONDS when asked for a name they
+do not know, so new cities appear everywhere; a rename shows up in other
+processes after their next restart.
+"""
+
+import threading
+import time
+
+from .models import City
+
+RELOAD_SECONDS = 60
+
+_lock = threading.Lock()
+# (cities by id, cities by name, monotonic load time), swapped as a whole
+_state = None
+# Bumped on every load; keys template fragments rendered from the table
+_version = 0
+
+
+def _load():
+    global _state, _version
+    with _lock:
+        by_id = {city.pk: city for city in City.objects.order_by('id')}
+        _version += 1
+        _state = (by_id, {city.name: city for city in by_id.values()}, time.monotonic())
+        return _state
+
+
+def _current():
+    state = _state
+    return state if state is not None else _load()
+
+
+def reset():
+    global _state
+    with _lock:
+        _state = None
+
+
+def get(city_id):
+    """Return the City with this id; raises City.DoesNotExist"""
+    city = _current()[0].get(city_id)
+    if city is None:
+        city = _load()[0].get(city_id)
+        if city is None:
+            raise City.DoesNotExist(f'No city with id {city_id!r}')
+    return city
+
+
+def by_name(name):
+    """Return the City with this display name, or None"""
+    by_id, by_name, loaded_at = _current()
+    city = by_name.get(name)
+    if city is None and time.monotonic() - loaded_at >= RELOAD_SECONDS:
+        city = _load()[1].get(name)
+    return city
+
+
+def id_for(name):
+    """City id for a display name, or None if there is no such city"""
+    city = by_name(name)
+    return city.pk if city is not None else None
+
+
+def name_for(city_id):
+    return get(city_id).name
+
+
+def all_cities():
+    return list(_current()[0].values())
+
+
+def version():
+    """Changes whenever this process reloads the table, e.g. after a City is saved"""
+    _current()
+    return _version
+
+
+def choices():
+    """(name, name) pairs in the order cities were added, like INDIAN_CITIES"""
+    return [(city.name, city.name) for city in all_cities()]
@@ -0,0 +1,428 @@
+"""
+Multi-leg connection search for Travel Karo
+
+Most city pairs have no direct service, so ConnectionGraph keeps every
+bookable TravelOption in memory as a time-expanded graph: each city holds
+its departures sorted by time, and each route holds the same legs sorted by
+time. A search walks the departures from the origin city and, for every
+arrival, bisects straight to the departures that respect the layover rules,
+so it only touches legs that could actually be connected.
+
+The graph is built once per process and then kept current incrementally:
+signals from this process upsert or drop single legs, and rows changed by
+other processes are pulled in by updated_at every
+CONNECTION_GRAPH_SYNC_SECONDS. It is rebuilt from scratch every
+CONNECTION_GRAPH_REBUILD_SECONDS to drop departed legs and rows deleted
+elsewhere.
+"""
+
+import heapq
+import threading
+import time
+from bisect import bisect_left
+from collections import namedtuple
+from datetime import datetime, time as dt_time, timedelta, timezone as dt_timezone
+
+from django.conf import settings
+from django.utils import timezone
+
+from . import cities
+from .models import TravelOption
+
+# Minimum connection time in minutes, by (arriving mode, departing mode).
+# Changing between an airport and a station or bus stand takes longer than
+# staying in the same terminal.
+MIN_LAYOVER_MINUTES = {
+    ('flight', 'flight'): 60,
+    ('flight', 'train'): 120,
+    ('flight', 'bus'): 90,
+    ('train', 'flight'): 180,
+    ('train', 'train'): 30,
+    ('train', 'bus'): 60,
+    ('bus', 'flight'): 180,
+    ('bus', 'train'): 60,
+    ('bus', 'bus'): 30,
+}
+DEFAULT_MAX_LAYOVER_HOURS = 12
+MAX_STOPS = 2
+
+# How far before the watermark sync() looks again for late commits
+SYNC_OVERLAP_SECONDS = 5
+
+SORT_CHOICES = ('arrival', 'price', 'duration')
+
+ROW_FIELDS = (
+    'id', 'travel_type', 'source', 'destination', 'departure_datetime',
+    'arrival_datetime', 'price', 'available_seats', 'operator_name', 'service_number',
+)
+
+# departure/arrival are POSIX timestamps so comparisons stay cheap
+Leg = namedtuple('Leg', 'id travel_type source destination departure arrival price seats operator service_number')
+
+
+class Itinerary:
+    """One to three connected legs"""
+
+    __slots__ = ('legs',)
+
+    def __init__(self, legs):
+        self.legs = legs
+
+    @property
+    def departure(self):
+        return self.legs[0].departure
+
+    @property
+    def arrival(self):
+        return self.legs[-1].arrival
+
+    @property
+    def duration(self):
+        return self.arrival - self.departure
+
+    @property
+    def price(self):
+        return sum(leg.price for leg in self.legs)
+
+    @property
+    def stops(self):
+        return len(self.legs) - 1
+
+    def sort_key(self, sort):
+        if sort == 'price':
+            return (self.price, self.arrival)
+        if sort == 'duration':
+            return (self.duration, self.price)
+        return (self.arrival, self.duration)
+
+    def as_dict(self):
+        def iso(timestamp):
+            return timezone.localtime(datetime.fromtimestamp(timestamp, tz=dt_timezone.utc)).isoformat()
+
+        return {
+            'stops': self.stops,
+            'departure': iso(self.departure),
+            'arrival': iso(self.arrival),
+            'duration_minutes': int(self.duration // 60),
+            'total_price': str(self.price),
+            'legs': [
+                {
+                    'id': leg.id,
+                    'travel_type': leg.travel_type,
+                    'source': leg.source,
+                    'destination': leg.destination,
+                    'departure': iso(leg.departure),
+                    'arrival': iso(leg.arrival),
+                    'price': str(leg.price),
+                    'available_seats': leg.seats,
+                    'operator_name': leg.operator,
+                    'service_number': leg.service_number,
+                }
+                for leg in self.legs
+            ],
+        }
+
+
+def _leg_from_row(row):
+    (option_id, travel_type, source, destination, departure, arrival,
+     price, seats, operator, service_number) = row
+    # Rows carry city ids; the graph is searched by name
+    return Leg(
+        option_id, travel_type, cities.name_for(source), cities.name_for(destination),
+        departure.timestamp(), arrival.timestamp(), price, seats, operator, service_number,
+    )
+
+
+class _Departures:
+    """Legs sorted by (departure, id), searchable by departure time"""
+
+    __slots__ = ('keys', 'legs')
+
+    def __init__(self):
+        self.keys = []
+        self.legs = []
+
+    def add(self, leg):
+        key = (leg.departure, leg.id)
+        index = bisect_left(self.keys, key)
+        self.keys.insert(index, key)
+        self.legs.insert(index, leg)
+
+    def replace(self, old, new):
+        index = bisect_left(self.keys, (old.departure, old.id))
+        self.legs[index] = new
+
+    def remove(self, leg):
+        index = bisect_left(self.keys, (leg.departure, leg.id))
+        del self.keys[index]
+        del self.legs[index]
+
+    def between(self, earliest, latest):
+        """Legs departing in [earliest, latest)"""
+        start = bisect_left(self.keys, (earliest,))
+        end = bisect_left(self.keys, (latest,))
+        return self.legs[start:end]
+
+    def sort(self):
+        order = sorted(range(len(self.keys)), key=self.keys.__getitem__)
+        self.keys = [self.keys[i] for i in order]
+        self.legs = [self.legs[i] for i in order]
+
+    def __len__(self):
+        return len(self.legs)
+
+
+class ConnectionGraph:
+    """In-memory time-expanded graph of bookable travel options"""
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._legs = {}
+        self._by_source = {}
+        self._by_route = {}
+        self.watermark = None
+        self.synced_at = 0.0
+        self.built_at = 0.0
+
+    def __len__(self):
+        return len(self._legs)
+
+    @staticmethod
+    def bookable_options():
+        return TravelOption.objects.filter(
+            is_active=True,
+            available_seats__gt=0,
+            arrival_datetime__isnull=False,
+            departure_datetime__gte=timezone.now(),
+        )
+
+    def load(self, rows=None):
+        """Replace the graph with rows of ROW_FIELDS, or every bookable option"""
+        started = time.time()
+        watermark = None
+        if rows is None:
+            # Read the watermark first; rows changed while loading are
+            # simply applied again by the next sync
+            watermark = TravelOption.objects.order_by('-updated_at').values_list('updated_at', flat=True).first()
+            rows = self.bookable_options().values_list(*ROW_FIELDS).iterator(chunk_size=10000)
+
+        legs, by_source, by_route = {}, {}, {}
+        for row in rows:
+            leg = _leg_from_row(row)
+            legs[leg.id] = leg
+            for index, key in ((by_source, leg.source), (by_route, (leg.source, leg.destination))):
+                departures = index.get(key)
+                if departures is None:
+                    departures = index[key] = _Departures()
+                departures.keys.append((leg.departure, leg.id))
+                departures.legs.append(leg)
+        for departures in (*by_source.values(), *by_route.values()):
+            departures.sort()
+
+        with self._lock:
+            self._legs, self._by_source, self._by_route = legs, by_source, by_route
+            self.watermark = watermark
+            self.synced_at = self.built_at = started
+
+    def _add(self, leg):
+        self._legs[leg.id] = leg
+        self._by_source.setdefault(leg.source, _Departures()).add(leg)
+        self._by_route.setdefault((leg.source, leg.destination), _Departures()).add(leg)
+
+    def _remove(self, leg):
+        del self._legs[leg.id]
+        self._by_source[leg.source].remove(leg)
+        self._by_route[(leg.source, leg.destination)].remove(leg)
+
+    def upsert(self, option):
+        """Add, update or drop one TravelOption depending on whether it is bookable"""
+        bookable = (
+            option.pk is not None
+            and option.is_active
+            and option.available_seats > 0
+            and option.arrival_datetime is not None
+        )
+        with self._lock:
+            old = self._legs.get(option.pk)
+            if not bookable:
+                if old is not None:
+                    self._remove(old)
+                return
+
+            new = _leg_from_row([getattr(option, field) for field in (
+                'pk', 'travel_type', 'source_id', 'destination_id', 'departure_datetime',
+                'arrival_datetime', 'price', 'available_seats', 'operator_name', 'service_number',
+            )])
+            if old is None:
+                self._add(new)
+            elif (old.departure, old.source, old.destination) == (new.departure, new.source, new.destination):
+                # Seat and price changes keep the leg's position
+                self._legs[new.id] = new
+                self._by_source[new.source].replace(old, new)
+                self._by_route[(new.source, new.destination)].replace(old, new)
+            else:
+                self._remove(old)
+                self._add(new)
+
+    def discard(self, option_id):
+        with self._lock:
+            old = self._legs.get(option_id)
+            if old is not None:
+                self._remove(old)
+
+    def sync(self):
+        """Apply rows changed since the last load or sync, by updated_at"""
+        started = time.time()
+        if self.watermark is None:
+            self.load()
+            return
+        # Re-read a margin before the watermark: a transaction that stamped
+        # updated_at earlier may have committed after the last sync.
+        # Applying a row twice is harmless.
+        changed = TravelOption.objects.filter(
+            updated_at__gt=self.watermark - timedelta(seconds=SYNC_OVERLAP_SECONDS)
+        ).order_by('updated_at')
+        with self._lock:
+            for option in changed.iterator(chunk_size=2000):
+                self.upsert(option)
+                self.watermark = option.updated_at
+            self.synced_at = started
+
+    def search(self, source, destination, depart_after, depart_before, sort='arrival',
+               max_stops=MAX_STOPS, passengers=1, modes=None, max_layover=None, limit=10):
+        """
+        Return up to limit itineraries from source to destination.
+
+        The first leg departs between depart_after and depart_before
+        (aware datetimes). modes restricts the travel types that may be
+        used; by default flights, trains and buses are mixed freely.
+        """
+        if sort not in SORT_CHOICES:
+            raise ValueError(f'sort must be one of {", ".join(SORT_CHOICES)}.')
+        if source == destination:
+            return []
+
+        max_layover = (max_layover or timedelta(hours=DEFAULT_MAX_LAYOVER_HOURS)).total_seconds()
+        min_layover = min(MIN_LAYOVER_MINUTES.values()) * 60
+        earliest, latest = depart_after.timestamp(), depart_before.timestamp()
+
+        def usable(leg):
+            return leg.seats >= passengers and (modes is None or leg.travel_type in modes)
+
+        def connections(departures, arrived):
+            if departures is None:
+                return ()
+            legs = departures.between(arrived.arrival + min_layover, arrived.arrival + max_layover)
+            return [
+                leg for leg in legs
+                if usable(leg)
+                and leg.departure - arrived.arrival >= MIN_LAYOVER_MINUTES[(arrived.travel_type, leg.travel_type)] * 60
+            ]
+
+        best = []  # heap of (negated rank, counter, itinerary) holding the best `limit`
+        counter = 0
+
+        def offer(legs):
+            nonlocal counter
+            itinerary = Itinerary(legs)
+            key = itinerary.sort_key(sort)
+            entry = (tuple(-value for value in key), counter, itinerary)
+            counter += 1
+            if len(best) < limit:
+                heapq.heappush(best, entry)
+            elif entry[0] > best[0][0]:
+                heapq.heapreplace(best, entry)
+
+        def hopeless(legs):
+            # Every further leg adds time and money, so once the partial
+            # itinerary is no better than the worst kept one, stop extending it
+            if len(best) < limit:
+                return False
+            worst = -best[0][0][0]
+            if sort == 'price':
+                return sum(leg.price for leg in legs) >= worst
+            if sort == 'duration':
+                return legs[-1].arrival - legs[0].departure >= worst
+            return legs[-1].arrival >= worst
+
+        with self._lock:
+            first_legs = self._by_source.get(source)
+            if first_legs is None:
+                return []
+
+            candidates = first_legs.between(earliest, latest)
+            # Try the most promising first legs first so pruning starts early
+            if sort == 'price':
+                candidates.sort(key=lambda leg: leg.price)
+            else:
+                candidates.sort(key=lambda leg: leg.arrival)
+
+            for first in candidates:
+                if not usable(first):
+                    continue
+                if first.destination == destination:
+                    offer((first,))
+                    continue
+                if max_stops < 1 or hopeless((first,)):
+                    continue
+
+                for second in connections(self._by_route.get((first.destination, destination)), first):
+                    offer((first, second))
+
+                if max_stops < 2:
+                    continue
+                for second in connections(self._by_source.get(first.destination), first):
+                    if second.destination in (source, destination) or hopeless((first, second)):
+                        continue
+                    for third in connections(self._by_route.get((second.destination, destination)), second):
+                        offer((first, second, third))
+
+        return [entry[2] for entry in sorted(best, key=lambda entry: entry[0], reverse=True)]
+
+
+_graph = None
+_graph_lock = threading.Lock()
+
+
+def get_graph():
+    """Return this process's graph, building or syncing it when due"""
+    global _graph
+    sync_every = getattr(settings, 'CONNECTION_GRAPH_SYNC_SECONDS', 30)
+    rebuild_every = getattr(settings, 'CONNECTION_GRAPH_REBUILD_SECONDS', 3600)
+
+    with _graph_lock:
+        if _graph is None:
+            graph = ConnectionGraph()
+            graph.load()
+            _graph = graph
+        else:
+            now = time.time()
+            if now - _graph.built_at >= rebuild_every:
+                _graph.load()
+            elif now - _graph.synced_at >= sync_every:
+                _graph.sync()
+        return _graph
+
+
+def reset_graph():
+    global _graph
+    with _graph_lock:
+        _graph = None
+
+
+def options_changed(options):
+    """Upsert changed options into the graph, if this process has built one"""
+    if _graph is not None:
+        for option in options:
+            _graph.upsert(option)
+
+
+def option_deleted(option_id):
+    if _graph is not None:
+        _graph.discard(option_id)
+
+
+def search_day(source, destination, day, **kwargs):
+    """Search itineraries whose first leg departs on a local calendar day"""
+    start = timezone.make_aware(datetime.combine(day, dt_time.min))
+    return get_graph().search(source, destination, start, start + timedelta(days=1), **kwargs)
@@ -107,8 +107,117 @@ INDIAN_CITIES = [
     ('Jalgaon', 'Jalgaon'),
     ('Udaipur', 'Udaipur'),
     ('Maheshtala', 'Maheshtala'),
+    ('Goa', 'Goa'),
 ]
 
+# State code (accounts.User.STATE_CHOICES) and approximate coordinates of
+# each city, used to seed travel.City
+CITY_DETAILS = {
+    'Delhi': ('DL', 28.61, 77.21),
+    'Mumbai': ('MH', 19.08, 72.88),
+    'Bangalore': ('KA', 12.97, 77.59),
+    'Chennai': ('TN', 13.08, 80.27),
+    'Kolkata': ('WB', 22.57, 88.36),
+    'Hyderabad': ('TG', 17.39, 78.49),
+    'Pune': ('MH', 18.52, 73.86),
+    'Ahmedabad': ('GJ', 23.02, 72.57),
+    'Surat': ('GJ', 21.17, 72.83),
+    'Jaipur': ('RJ', 26.91, 75.79),
+    'Lucknow': ('UP', 26.85, 80.95),
+    'Kanpur': ('UP', 26.45, 80.33),
+    'Nagpur': ('MH', 21.15, 79.09),
+    'Indore': ('MP', 22.72, 75.86),
+    'Thane': ('MH', 19.22, 72.98),
+    'Bhopal': ('MP', 23.26, 77.41),
+    'Visakhapatnam': ('AP', 17.69, 83.22),
+    'Pimpri-Chinchwad': ('MH', 18.63, 73.80),
+    'Patna': ('BR', 25.59, 85.14),
+    'Vadodara': ('GJ', 22.31, 73.18),
+    'Ghaziabad': ('UP', 28.67, 77.45),
+    'Ludhiana': ('PB', 30.90, 75.86),
+    'Agra': ('UP', 27.18, 78.01),
+    'Nashik': ('MH', 20.00, 73.79),
+    'Faridabad': ('HR', 28.41, 77.32),
+    'Meerut': ('UP', 28.98, 77.71),
+    'Rajkot': ('GJ', 22.30, 70.80),
+    'Kalyan-Dombivli': ('MH', 19.24, 73.13),
+    'Vasai-Virar': ('MH', 19.42, 72.82),
+    'Varanasi': ('UP', 25.32, 82.97),
+    'Srinagar': ('JK', 34.08, 74.80),
+    'Aurangabad': ('MH', 19.88, 75.34),
+    'Dhanbad': ('JH', 23.80, 86.43),
+    'Amritsar': ('PB', 31.63, 74.87),
+    'Navi Mumbai': ('MH', 19.03, 73.03),
+    'Allahabad': ('UP', 25.44, 81.85),
+    'Howrah': ('WB', 22.59, 88.26),
+    'Ranchi': ('JH', 23.34, 85.31),
+    'Gwalior': ('MP', 26.22, 78.18),
+    'Jabalpur': ('MP', 23.18, 79.99),
+    'Coimbatore': ('TN', 11.02, 76.96),
+    'Vijayawada': ('AP', 16.51, 80.65),
+    'Jodhpur': ('RJ', 26.24, 73.02),
+    'Madurai': ('TN', 9.93, 78.12),
+    'Raipur': ('CG', 21.25, 81.63),
+    'Kota': ('RJ', 25.21, 75.86),
+    'Chandigarh': ('CH', 30.73, 76.78),
+    'Guwahati': ('AS', 26.14, 91.74),
+    'Solapur': ('MH', 17.66, 75.91),
+    'Hubli-Dharwad': ('KA', 15.36, 75.12),
+    'Bareilly': ('UP', 28.37, 79.43),
+    'Moradabad': ('UP', 28.84, 78.77),
+    'Mysore': ('KA', 12.30, 76.64),
+    'Gurgaon': ('HR', 28.46, 77.03),
+    'Aligarh': ('UP', 27.88, 78.08),
+    'Jalandhar': ('PB', 31.33, 75.58),
+    'Tiruchirappalli': ('TN', 10.79, 78.70),
+    'Bhubaneswar': ('OD', 20.30, 85.82),
+    'Salem': ('TN', 11.66, 78.15),
+    'Warangal': ('TG', 17.97, 79.59),
+    'Mira-Bhayandar': ('MH', 19.30, 72.85),
+    'Thiruvananthapuram': ('KL', 8.52, 76.94),
+    'Guntur': ('AP', 16.31, 80.44),
+    'Bhiwandi': ('MH', 19.30, 73.06),
+    'Saharanpur': ('UP', 29.96, 77.55),
+    'Gorakhpur': ('UP', 26.76, 83.37),
+    'Bikaner': ('RJ', 28.02, 73.31),
+    'Amravati': ('MH', 20.93, 77.75),
+    'Noida': ('UP', 28.54, 77.39),
+    'Jamshedpur': ('JH', 22.80, 86.20),
+    'Bhilai': ('CG', 21.21, 81.38),
+    'Cuttack': ('OD', 20.46, 85.88),
+    'Firozabad': ('UP', 27.15, 78.40),
+    'Kochi': ('KL', 9.93, 76.27),
+    'Bhavnagar': ('GJ', 21.76, 72.15),
+    'Dehradun': ('UK', 30.32, 78.03),
+    'Durgapur': ('WB', 23.52, 87.31),
+    'Asansol': ('WB', 23.68, 86.98),
+    'Rourkela': ('OD', 22.26, 84.85),
+    'Nanded': ('MH', 19.14, 77.32),
+    'Kolhapur': ('MH', 16.70, 74.24),
+    'Ajmer': ('RJ', 26.45, 74.64),
+    'Akola': ('MH', 20.70, 77.00),
+    'Gulbarga': ('KA', 17.33, 76.83),
+    'Jamnagar': ('GJ', 22.47, 70.06),
+    'Ujjain': ('MP', 23.18, 75.78),
+    'Loni': ('UP', 28.75, 77.29),
+    'Siliguri': ('WB', 26.73, 88.40),
+    'Jhansi': ('UP', 25.45, 78.57),
+    'Ulhasnagar': ('MH', 19.22, 73.16),
+    'Jammu': ('JK', 32.73, 74.86),
+    'Sangli-Miraj & Kupwad': ('MH', 16.85, 74.58),
+    'Mangalore': ('KA', 12.91, 74.86),
+    'Erode': ('TN', 11.34, 77.72),
+    'Belgaum': ('KA', 15.85, 74.50),
+    'Ambattur': ('TN', 13.11, 80.16),
+    'Tirunelveli': ('TN', 8.71, 77.76),
+    'Malegaon': ('MH', 20.55, 74.53),
+    'Gaya': ('BR', 24.80, 85.00),
+    'Jalgaon': ('MH', 21.00, 75.56),
+    'Udaipur': ('RJ', 24.59, 73.71),
+    'Maheshtala': ('WB', 22.51, 88.25),
+    'Goa': ('GA', 15.49, 73.83),
+}
+
 # Travel types
 TRAVEL_TYPES = [
     ('flight', 'Flight'),
@@ -116,9 +225,36 @@ TRAVEL_TYPES = [
     ('bus', 'Bus'),
 ]
 
+# Dynamic pricing floor and ceiling per travel type (in rupees)
+PRICE_LIMITS = {
+    'flight': (1500, 30000),
+    'train': (150, 6000),
+    'bus': (100, 4000),
+}
+
 # Booking status choices
 BOOKING_STATUS_CHOICES = [
     ('confirmed', 'Confirmed'),
     ('cancelled', 'Cancelled'),
     ('pending', 'Pending'),
 ]
+
+# Waitlist entry status choices
+WAITLIST_STATUS_CHOICES = [
+    ('waiting', 'Waiting'),
+    ('promoted', 'Promoted to booking'),
+    ('cancelled', 'Cancelled'),
+]
+
+# Notification kinds
+NOTIFICATION_KIND_CHOICES = [
+    ('service_cancelled', 'Service cancelled'),
+]
+
+# Seat hold status choices
+SEAT_HOLD_STATUS_CHOICES = [
+    ('active', 'Active'),
+    ('converted', 'Converted to booking'),
+    ('released', 'Released'),
+    ('expired', 'Expired'),
+]
@@ -0,0 +1,20 @@
+"""
+Local calendar day helpers for Travel Karo
+"""
+
+from datetime import datetime, time, timedelta
+
+from django.utils import timezone
+
+
+def local_day_range(field, day):
+    """
+    Filter kwargs selecting a local calendar day as a half-open datetime range.
+
+    Unlike field__date=day, this compares the raw column against two
+    constants, so the database can use an index instead of converting every
+    row to the local timezone.
+    """
+    start = timezone.make_aware(datetime.combine(day, time.min))
+    end = timezone.make_aware(datetime.combine(day + timedelta(days=1), time.min))
+    return {f'{field}__gte': start, f'{field}__lt': end}
@@ -0,0 +1,218 @@
+"""
+Fare calendar for Travel Karo
+
+FareCalendarDay holds the cheapest bookable fare, seats left and option
+count per (source, destination, local date, travel type), so the home page
+can show a month of prices from one indexed range read instead of
+grouping TravelOption on every request.
+
+Rows are refreshed incrementally after commit whenever a TravelOption is
+saved, deleted, booked or cancelled (see travel.signals); each refresh
+recomputes just the affected days from TravelOption, so refreshes are
+idempotent and order-independent. Inside deferred_refresh() the keys are
+collected instead and refreshed once when the block ends, for sweeps that
+commit many small batches. rebuild() recomputes everything and backs the
+rebuild_fare_calendar command.
+
+Keys use city ids, like TravelOption; the rows store city names because
+the calendar is read by name.
+"""
+
+import contextlib
+import contextvars
+from collections import defaultdict
+from datetime import timedelta
+
+from django.db import transaction
+from django.db.models import Count, Min, Q, Sum
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from . import cities
+from .dates import local_day_range
+from .models import FareCalendarDay, TravelOption
+
+DEFAULT_DAYS = 60
+MAX_DAYS = 90
+DELETE_CHUNK = 200
+
+_deferred_keys = contextvars.ContextVar('fare_calendar_deferred_keys', default=None)
+
+
+def day_key(source_id, destination_id, departure_datetime, travel_type):
+    return (source_id, destination_id, timezone.localdate(departure_datetime), travel_type)
+
+
+def option_key(option):
+    return day_key(option.source_id, option.destination_id, option.departure_datetime, option.travel_type)
+
+
+def bookable_options(now):
+    """Options that can still be booked: active, not sold out, not departed"""
+    return TravelOption.objects.filter(is_active=True, available_seats__gt=0, departure_datetime__gte=now)
+
+
+def refresh(keys):
+    """
+    Recompute the calendar rows for (source id, destination id, date, travel_type) keys.
+
+    Keys are grouped by date: one grouped query per date totals every route
+    on it, then one upsert and a chunked delete write the rows, all in one
+    transaction however many keys a bulk change produced.
+    """
+    by_date = defaultdict(set)
+    for source_id, destination_id, travel_date, travel_type in keys:
+        by_date[travel_date].add((source_id, destination_id, travel_type))
+
+    now = timezone.now()
+    with transaction.atomic():
+        for travel_date, routes in by_date.items():
+            options = bookable_options(now).filter(**local_day_range('departure_datetime', travel_date))
+            if len(routes) == 1:
+                (source_id, destination_id, travel_type), = routes
+                options = options.filter(
+                    source_id=source_id, destination_id=destination_id, travel_type=travel_type
+                )
+            # Otherwise the whole day is grouped off the departure index (IN
+            # lists lead SQLite to the travel_type index and a far larger
+            # scan); totals for routes nobody asked for are dropped
+            totals = {
+                (row['source'], row['destination'], row['travel_type']): row
+                for row in options.values('source', 'destination', 'travel_type').annotate(
+                    min_price=Min('price'), seats=Sum('available_seats'), count=Count('id')
+                ).order_by()
+            }
+
+            found, gone = [], []
+            for route in routes:
+                row = totals.get(route)
+                if row is None:
+                    gone.append(route)
+                    continue
+                source_id, destination_id, travel_type = route
+                found.append(FareCalendarDay(
+                    source=cities.name_for(source_id),
+                    destination=cities.name_for(destination_id),
+                    travel_date=travel_date,
+                    travel_type=travel_type,
+                    min_price=row['min_price'],
+                    seats_available=row['seats'],
+                    option_count=row['count'],
+                    updated_at=now,
+                ))
+
+            FareCalendarDay.objects.bulk_create(
+                found,
+                update_conflicts=True,
+                unique_fields=['source', 'destination', 'travel_date', 'travel_type'],
+                update_fields=['min_price', 'seats_available', 'option_count', 'updated_at'],
+                batch_size=500,
+            )
+
+            for start in range(0, len(gone), DELETE_CHUNK):
+                condition = Q()
+                for source_id, destination_id, travel_type in gone[start:start + DELETE_CHUNK]:
+                    condition |= Q(
+                        source=cities.name_for(source_id),
+                        destination=cities.name_for(destination_id),
+                        travel_type=travel_type,
+                    )
+                FareCalendarDay.objects.filter(condition, travel_date=travel_date).delete()
+
+
+def schedule_refresh(keys):
+    """Refresh keys once the current transaction commits, or when deferred_refresh() ends"""
+    keys = set(keys)
+    deferred = _deferred_keys.get()
+    if deferred is not None:
+        deferred |= keys
+    elif keys:
+        transaction.on_commit(lambda: refresh(keys))
+
+
+@contextlib.contextmanager
+def deferred_refresh():
+    """
+    Collect the keys scheduled inside the block and refresh them once at the end.
+
+    Refreshes recompute from TravelOption, so keys from a batch that rolled
+    back are refreshed harmlessly. Nested blocks join the outermost one.
+    """
+    if _deferred_keys.get() is not None:
+        yield
+        return
+    keys = set()
+    token = _deferred_keys.set(keys)
+    try:
+        yield
+    finally:
+        _deferred_keys.reset(token)
+        schedule_refresh(keys)
+
+
+def rebuild(batch_size=5000):
+    """Replace the whole calendar with one grouped scan of TravelOption"""
+    rows = bookable_options(timezone.now()).annotate(
+        travel_date=TruncDate('departure_datetime', tzinfo=timezone.get_current_timezone())
+    ).values(
+        'source', 'destination', 'travel_date', 'travel_type'
+    ).annotate(
+        min_price=Min('price'), seats=Sum('available_seats'), count=Count('id')
+    ).order_by()
+
+    now = timezone.now()
+    with transaction.atomic():
+        FareCalendarDay.objects.all().delete()
+        return len(FareCalendarDay.objects.bulk_create(
+            (
+                FareCalendarDay(
+                    source=cities.name_for(row['source']),
+                    destination=cities.name_for(row['destination']),
+                    travel_date=row['travel_date'],
+                    travel_type=row['travel_type'],
+                    min_price=row['min_price'],
+                    seats_available=row['seats'],
+                    option_count=row['count'],
+                    updated_at=now,
+                )
+                for row in rows.iterator(chunk_size=batch_size)
+            ),
+            batch_size=batch_size,
+        ))
+
+
+def get_calendar(source, destination, start, days=DEFAULT_DAYS, travel_type=None):
+    """
+    Return one entry per date from start, cheapest fare across types unless
+    travel_type is given. Days without a bookable option have min_price None.
+    """
+    end = start + timedelta(days=days)
+    rows = FareCalendarDay.objects.filter(
+        source=source, destination=destination, travel_date__gte=start, travel_date__lt=end,
+    )
+    if travel_type:
+        rows = rows.filter(travel_type=travel_type)
+
+    by_date = {}
+    for travel_date, min_price, seats, count in rows.values_list(
+        'travel_date', 'min_price', 'seats_available', 'option_count'
+    ):
+        day = by_date.get(travel_date)
+        if day is None:
+            by_date[travel_date] = [min_price, seats, count]
+        else:
+            day[0] = min(day[0], min_price)
+            day[1] += seats
+            day[2] += count
+
+    calendar = []
+    for offset in range(days):
+        travel_date = start + timedelta(days=offset)
+        min_price, seats, count = by_date.get(travel_date, (None, 0, 0))
+        calendar.append({
+            'date': travel_date.isoformat(),
+            'min_price': None if min_price is None else str(min_price),
+            'seats_available': seats,
+            'option_count': count,
+        })
+    return calendar
@@ -0,0 +1,116 @@
+"""
+Partner inventory feed for Travel Karo
+
+Streams TravelOption rows as NDJSON or as one chunked JSON document. Rows
+are read with values_list().iterator(chunk_size=...), so neither the
+queryset cache nor model instances are built. Memory stays at one chunk no
+matter how many rows match.
+
+Full pulls return bookable future departures ordered by departure time.
+Delta pulls (since=<updated_at>) return every future row changed at or after
+that timestamp, including rows that were deactivated or sold out, ordered by
+(updated_at, id). A pull only covers changes up to next_since(), LAG_SECONDS
+ago, so rows whose transaction was still committing are not skipped; they
+come with the next pull, which partners start from that value (the JSON
+next_since or the X-Next-Since header). Full pulls and late commits can
+return a row more than once, so partners must upsert rows by id.
+
+Rows carry city names, resolved from travel.cities, like the rest of the
+public API.
+"""
+
+import json
+from datetime import timedelta
+
+from django.utils import timezone
+
+from . import cities
+from .models import TravelOption
+
+FIELDS = (
+    'id', 'travel_type', 'source', 'destination', 'departure_datetime', 'arrival_datetime',
+    'price', 'total_seats', 'available_seats', 'operator_name', 'service_number',
+    'is_active', 'updated_at',
+)
+DATETIME_FIELDS = {'departure_datetime', 'arrival_datetime', 'updated_at'}
+CITY_FIELDS = {'source', 'destination'}
+
+CHUNK_SIZE = 2000
+
+# Changes newer than this may belong to transactions still committing
+LAG_SECONDS = 5
+
+
+def next_since(now=None):
+    """Upper bound of the changes a pull made now covers, and the next since"""
+    return (now or timezone.now()) - timedelta(seconds=LAG_SECONDS)
+
+
+def feed_queryset(source=None, destination=None, travel_type=None,
+                  departure_from=None, departure_to=None, since=None, until=None):
+    """
+    values_list queryset for the feed; cities are names, datetimes must be
+    aware. A delta pull (since) stops before until, by default next_since().
+    """
+    queryset = TravelOption.objects.filter(departure_datetime__gte=timezone.now())
+    if since is None:
+        queryset = queryset.filter(is_active=True, available_seats__gt=0).order_by('departure_datetime', 'id')
+    else:
+        queryset = queryset.filter(
+            updated_at__gte=since, updated_at__lt=until or next_since()
+        ).order_by('updated_at', 'id')
+
+    for field, name in (('source', source), ('destination', destination)):
+        if name:
+            queryset = queryset.filter(**{f'{field}_id': cities.id_for(name)})
+    if travel_type:
+        queryset = queryset.filter(travel_type=travel_type)
+    if departure_from:
+        queryset = queryset.filter(departure_datetime__gte=departure_from)
+    if departure_to:
+        queryset = queryset.filter(departure_datetime__lt=departure_to)
+    return queryset.values_list(*FIELDS)
+
+
+def _encode_row(row):
+    record = {}
+    for name, value in zip(FIELDS, row):
+        if name in DATETIME_FIELDS:
+            value = value.isoformat() if value is not None else None
+        elif name in CITY_FIELDS:
+            value = cities.name_for(value)
+        elif name == 'price':
+            value = str(value)
+        record[name] = value
+    return json.dumps(record, separators=(',', ':'))
+
+
+def _encoded_chunks(queryset, chunk_size):
+    """Yield encoded rows one database chunk at a time"""
+    batch = []
+    for row in queryset.iterator(chunk_size=chunk_size):
+        batch.append(_encode_row(row))
+        if len(batch) >= chunk_size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def stream_ndjson(queryset, chunk_size=CHUNK_SIZE):
+    for batch in _encoded_chunks(queryset, chunk_size):
+        yield '\n'.join(batch) + '\n'
+
+
+def stream_json(queryset, until, chunk_size=CHUNK_SIZE):
+    """
+    One JSON document: {"results": [...], "count": N, "next_since": until}.
+
+    count comes last because it is only known once every row has been sent.
+    """
+    yield '{"results":['
+    count = 0
+    for batch in _encoded_chunks(queryset, chunk_size):
+        yield (',' if count else '') + ','.join(batch)
+        count += len(batch)
+    yield '],' + json.dumps({'count': count, 'next_since': until.isoformat()})[1:]
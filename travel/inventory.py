@@ -0,0 +1,205 @@
+"""
+Seat inventory service for Travel Karo
+
+All changes to TravelOption.available_seats go through this module. Seats
+are reserved and released with a single conditional UPDATE so concurrent
+bookings can never oversell, and only the seat count and updated_at are
+written (no clean(), no full-row save).
+
+Seat holds take seats the same way and keep them for a few minutes while
+the user checks out. A hold ends exactly once: converted into a booking,
+released, or expired by expire_holds(); each of those flips the status
+with a conditional UPDATE, so a conversion racing the sweeper cannot both
+book the seats and give them back.
+"""
+
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F, OuterRef, Subquery, Sum
+from django.db.models.functions import Least
+from django.utils import timezone
+
+from . import fare_calendar
+from .models import SeatHold, TravelOption
+from .signals import seats_released, travel_options_changed
+
+EXPIRE_BATCH_SIZE = 1000
+
+
+class InsufficientSeats(ValueError):
+    """Raised when a reservation cannot be satisfied"""
+
+
+class HoldExpired(ValueError):
+    """Raised when a seat hold has already ended"""
+
+
+def reserve_seats(travel_option, num_seats):
+    """
+    Atomically take num_seats from a travel option.
+
+    The UPDATE only matches while enough seats are left, so two concurrent
+    requests for the last seat cannot both succeed. Raises InsufficientSeats
+    when the option is sold out, inactive or does not have enough seats.
+    """
+    if num_seats <= 0:
+        raise InsufficientSeats('Number of seats must be positive.')
+
+    updated = TravelOption.objects.filter(
+        pk=travel_option.pk,
+        is_active=True,
+        available_seats__gte=num_seats,
+    ).update(available_seats=F('available_seats') - num_seats, updated_at=timezone.now())
+
+    if not updated:
+        raise InsufficientSeats('Not enough seats are available for this travel option.')
+
+    # Keep the in-memory instance close to the database without re-reading it
+    travel_option.available_seats -= num_seats
+    travel_options_changed.send(sender=TravelOption, options=[travel_option])
+    return travel_option
+
+
+def release_seats(travel_option, num_seats):
+    """
+    Atomically give num_seats back to a travel option.
+
+    Capped so available_seats can never exceed total_seats, even if the
+    same booking is released twice.
+    """
+    if num_seats <= 0:
+        return travel_option
+
+    updated = TravelOption.objects.filter(
+        pk=travel_option.pk,
+        available_seats__lte=F('total_seats') - num_seats,
+    ).update(available_seats=F('available_seats') + num_seats, updated_at=timezone.now())
+
+    if not updated:
+        raise ValueError('Cannot release more seats than the travel option holds.')
+
+    travel_option.available_seats += num_seats
+    travel_options_changed.send(sender=TravelOption, options=[travel_option])
+    seats_released.send(sender=TravelOption, options=[travel_option])
+    return travel_option
+
+
+def hold_seats(travel_option, user, num_seats, minutes=None):
+    """
+    Take num_seats from a travel option and keep them for user.
+
+    The hold lasts settings.SEAT_HOLD_MINUTES unless minutes is given.
+    Raises InsufficientSeats like reserve_seats.
+    """
+    if minutes is None:
+        minutes = settings.SEAT_HOLD_MINUTES
+    with transaction.atomic():
+        reserve_seats(travel_option, num_seats)
+        return SeatHold.objects.create(
+            travel_option=travel_option,
+            user=user,
+            num_seats=num_seats,
+            expires_at=timezone.now() + timedelta(minutes=minutes),
+        )
+
+
+def _close_hold(hold, status, **fields):
+    """Move an active hold to status; raises HoldExpired if it already ended"""
+    now = timezone.now()
+    queryset = SeatHold.objects.filter(pk=hold.pk, status='active')
+    if status == 'converted':
+        queryset = queryset.filter(expires_at__gt=now)
+    if not queryset.update(status=status, closed_at=now, **fields):
+        raise HoldExpired('This seat hold has expired or was already used.')
+    hold.status, hold.closed_at = status, now
+    for name, value in fields.items():
+        setattr(hold, name, value)
+
+
+def convert_hold(hold, **booking_fields):
+    """
+    Turn an unexpired hold into a confirmed Booking.
+
+    The seats were taken when the hold was made, so none are reserved
+    again. booking_fields go to Booking (contact details, passengers).
+    """
+    from bookings.models import Booking
+
+    with transaction.atomic():
+        booking = Booking.objects.create(
+            user=hold.user,
+            travel_option=hold.travel_option,
+            num_seats=hold.num_seats,
+            total_price=hold.travel_option.price * hold.num_seats,
+            status='confirmed',
+            **booking_fields
+        )
+        # Rolls the booking back if the hold ended in the meantime
+        _close_hold(hold, 'converted', booking=booking)
+    return booking
+
+
+def release_hold(hold):
+    """Give an active hold's seats back before it expires"""
+    with transaction.atomic():
+        _close_hold(hold, 'released')
+        release_seats(hold.travel_option, hold.num_seats)
+    return hold
+
+
+def _expire_batch(now, batch_size):
+    with transaction.atomic():
+        # skip_locked lets several sweepers share the work where the
+        # database supports it; SQLite ignores it and serializes writers
+        ids = list(
+            SeatHold.objects.filter(status='active', expires_at__lte=now)
+            .order_by('expires_at')
+            .select_for_update(skip_locked=True)
+            .values_list('pk', flat=True)[:batch_size]
+        )
+        if not ids:
+            return 0, 0
+
+        # closed_at marks the rows this batch expired, so a hold converted
+        # between the SELECT and the UPDATE is not given back too
+        closed_at = timezone.now()
+        expired = SeatHold.objects.filter(pk__in=ids, status='active').update(
+            status='expired', closed_at=closed_at
+        )
+        if expired:
+            batch = SeatHold.objects.filter(pk__in=ids, status='expired', closed_at=closed_at)
+            seats = batch.filter(travel_option=OuterRef('pk')).values('travel_option').annotate(
+                seats=Sum('num_seats')
+            ).values('seats')
+            # One UPDATE gives every option in the batch its seats back,
+            # capped like release_seats
+            TravelOption.objects.filter(pk__in=batch.values('travel_option')).update(
+                available_seats=Least(F('total_seats'), F('available_seats') + Subquery(seats)),
+                updated_at=closed_at,
+            )
+            options = list(TravelOption.objects.filter(pk__in=batch.values('travel_option')))
+            travel_options_changed.send(sender=TravelOption, options=options)
+            seats_released.send(sender=TravelOption, options=options)
+        return len(ids), expired
+
+
+def expire_holds(batch_size=EXPIRE_BATCH_SIZE, now=None):
+    """
+    Expire active holds past expires_at and give their seats back.
+
+    Works batch_size holds at a time, each batch in its own transaction
+    with a fixed number of queries whatever its size. The fare calendar
+    days of every batch are refreshed once, after the last batch. Holds
+    that expire after the sweep started are left for the next sweep.
+    Returns the number of holds expired.
+    """
+    now = now or timezone.now()
+    total = 0
+    with fare_calendar.deferred_refresh():
+        while True:
+            selected, expired = _expire_batch(now, batch_size)
+            total += expired
+            if selected < batch_size:
+                return total
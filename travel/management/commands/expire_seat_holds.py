@@ -0,0 +1,51 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import close_old_connections
+
+from travel.inventory import EXPIRE_BATCH_SIZE, expire_holds
+
+
+class Command(BaseCommand):
+    help = 'Give the seats of expired seat holds back, sweeping every few seconds until stopped'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--interval', type=float, default=5,
+            help='Seconds to sleep between sweeps (default: 5)'
+        )
+        parser.add_argument(
+            '--batch-size', type=int, default=EXPIRE_BATCH_SIZE,
+            help=f'Holds expired per transaction (default: {EXPIRE_BATCH_SIZE})'
+        )
+        parser.add_argument(
+            '--once', action='store_true',
+            help='Run a single sweep and exit'
+        )
+
+    def handle(self, *args, **options):
+        if options['batch_size'] < 1:
+            raise CommandError('--batch-size must be at least 1.')
+        if options['interval'] < 0:
+            raise CommandError('--interval cannot be negative.')
+
+        try:
+            while True:
+                self.sweep(options['batch_size'], report=options['once'])
+                if options['once']:
+                    break
+                time.sleep(options['interval'])
+        except KeyboardInterrupt:
+            self.stdout.write('Stopped.')
+
+    def sweep(self, batch_size, report=False):
+        # A long-running loop must not hold on to a connection the database
+        # has dropped
+        close_old_connections()
+        started = time.perf_counter()
+        expired = expire_holds(batch_size=batch_size)
+        if expired or report or self.verbosity > 1:
+            elapsed = time.perf_counter() - started
+            self.stdout.write(
+                self.style.SUCCESS(f'Expired {expired} seat holds in {elapsed:.2f}s')
+            )
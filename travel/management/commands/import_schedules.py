@@ -0,0 +1,300 @@
+import csv
+import gzip
+import io
+import json
+import sys
+import time
+from decimal import Decimal, InvalidOperation
+from itertools import islice
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from travel import cities, fare_calendar, search_cache
+from travel.constants import TRAVEL_TYPES
+from travel.models import TravelOption
+
+NATURAL_KEY = ['operator_name', 'service_number', 'departure_datetime']
+
+# Seat inventory of services that already exist belongs to the booking
+# flow, so an import never overwrites total_seats or available_seats. A new
+# operator price clears base_price, so dynamic pricing starts from it.
+UPDATE_FIELDS = [
+    'travel_type', 'source', 'destination', 'arrival_datetime', 'price', 'base_price',
+    'description', 'is_active', 'updated_at',
+]
+
+TYPES = {code for code, _ in TRAVEL_TYPES}
+MAX_PRICE = Decimal('999999.99')  # max_digits=8, decimal_places=2
+TRUE_VALUES = {'1', 'true', 'yes', 'y', 't'}
+FALSE_VALUES = {'0', 'false', 'no', 'n', 'f'}
+
+
+def _text(value):
+    return '' if value is None else str(value).strip()
+
+
+class Command(BaseCommand):
+    help = 'Import operator schedules from CSV or NDJSON, upserting on (operator, service number, departure)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='CSV or NDJSON file (.gz allowed), or - for stdin')
+        parser.add_argument(
+            '--format', choices=['csv', 'ndjson'],
+            help='Input format (default: from the file extension)'
+        )
+        parser.add_argument(
+            '--batch-size', type=int, default=5000,
+            help='Rows validated and upserted per batch (default: 5000)'
+        )
+        parser.add_argument(
+            '--operator', default='',
+            help='Operator name for rows that do not have one'
+        )
+        parser.add_argument(
+            '--rejects',
+            help='Write rejected rows to this CSV file (line, reason, row)'
+        )
+        parser.add_argument(
+            '--dry-run', action='store_true',
+            help='Validate only; write nothing'
+        )
+
+    def handle(self, *args, **options):
+        if options['batch_size'] < 1:
+            raise CommandError('--batch-size must be positive.')
+
+        path = options['path']
+        fmt = options['format'] or ('ndjson' if '.ndjson' in path or '.jsonl' in path else 'csv')
+        self.batch_size = options['batch_size']
+        self.default_operator = options['operator']
+        self.dry_run = options['dry_run']
+        self.tz = timezone.get_current_timezone()
+
+        rejects_file = open(options['rejects'], 'w', newline='') if options['rejects'] else None
+        self.rejects_writer = csv.writer(rejects_file) if rejects_file else None
+        if self.rejects_writer:
+            self.rejects_writer.writerow(['line', 'reason', 'row'])
+
+        self.imported = self.rejected = self.read = 0
+        self.sample_rejects = []
+        self.routes = set()
+        started = last_report = time.perf_counter()
+
+        try:
+            with self.open_input(path) as stream:
+                rows = self.read_rows(stream, fmt)
+                while True:
+                    batch = list(islice(rows, self.batch_size))
+                    if not batch:
+                        break
+                    self.import_batch(batch)
+
+                    now = time.perf_counter()
+                    if now - last_report >= 1:
+                        last_report = now
+                        done = self.read
+                        self.stdout.write(f'  {done:,} rows ({done / (now - started):,.0f} rows/sec)')
+        finally:
+            if rejects_file:
+                rejects_file.close()
+
+        if self.imported and not self.dry_run:
+            # bulk_create skips the signals that normally keep these current
+            for source, destination in self.routes:
+                search_cache.bump_route_version(source, destination)
+            fare_calendar.rebuild(batch_size=self.batch_size)
+
+        elapsed = max(time.perf_counter() - started, 1e-9)
+        total = self.read
+        for line, reason in self.sample_rejects:
+            self.stderr.write(f'  line {line}: {reason}')
+        verb = 'Validated' if self.dry_run else 'Imported'
+        self.stdout.write(
+            self.style.SUCCESS(
+                f'{verb} {self.imported:,} rows, rejected {self.rejected:,} '
+                f'in {elapsed:.1f}s ({total / elapsed:,.0f} rows/sec)'
+            )
+        )
+
+    def open_input(self, path):
+        if path == '-':
+            return io.TextIOWrapper(sys.stdin.buffer, encoding='utf-8-sig', newline='')
+        try:
+            if path.endswith('.gz'):
+                return gzip.open(path, 'rt', encoding='utf-8-sig', newline='')
+            return open(path, encoding='utf-8-sig', newline='')
+        except OSError as e:
+            raise CommandError(f'Cannot open {path}: {e}')
+
+    def read_rows(self, stream, fmt):
+        """Yield (line number, dict) pairs one at a time; never reads the whole file"""
+        if fmt == 'csv':
+            reader = csv.DictReader(stream)
+            for row in reader:
+                yield reader.line_num, row
+            return
+
+        for line_number, line in enumerate(stream, start=1):
+            if not line.strip():
+                continue
+            try:
+                row = json.loads(line)
+            except ValueError:
+                row = None
+            yield line_number, row if isinstance(row, dict) else {'_error': 'Invalid JSON object'}
+
+    def parse_datetime(self, value):
+        try:
+            parsed = parse_datetime(value) if value else None
+        except ValueError:  # well-formed but out of range, e.g. month 13
+            return None
+        if parsed is not None and timezone.is_naive(parsed):
+            parsed = timezone.make_aware(parsed, self.tz)
+        return parsed
+
+    def validate(self, batch):
+        """
+        Column-at-a-time validation of a batch.
+
+        Applies the field validators and TravelOption.clean() rules to whole
+        columns instead of calling full_clean()/save() per row. Returns the
+        valid TravelOption objects and (line, reason) for every rejected row.
+        """
+        lines = [line for line, _ in batch]
+        rows = [row for _, row in batch]
+        errors = [row.get('_error') for row in rows]
+
+        def column(name):
+            return [_text(row.get(name)) for row in rows]
+
+        def reject(index, reason):
+            if errors[index] is None:
+                errors[index] = reason
+
+        travel_types = [value.lower() for value in column('travel_type')]
+        sources = column('source')
+        destinations = column('destination')
+        source_ids = [cities.id_for(name) for name in sources]
+        destination_ids = [cities.id_for(name) for name in destinations]
+        operators = [value or self.default_operator for value in column('operator_name')]
+        service_numbers = column('service_number')
+        departures = [self.parse_datetime(value) for value in column('departure_datetime')]
+        arrivals = [self.parse_datetime(value) for value in column('arrival_datetime')]
+        raw_arrivals = column('arrival_datetime')
+
+        prices = []
+        for i, value in enumerate(column('price')):
+            try:
+                price = Decimal(value)
+                if not price.is_finite():
+                    raise ValueError(value)
+                prices.append(price.quantize(Decimal('0.01')))
+            except (InvalidOperation, ValueError):
+                prices.append(None)
+                reject(i, f'Invalid price {value!r}')
+
+        def integers(name, default=None):
+            values = []
+            for i, value in enumerate(column(name)):
+                if not value and default is not None:
+                    values.append(default[i])
+                    continue
+                try:
+                    values.append(int(value))
+                except ValueError:
+                    values.append(None)
+                    reject(i, f'Invalid {name} {value!r}')
+            return values
+
+        total_seats = integers('total_seats')
+        available_seats = integers('available_seats', default=total_seats)
+
+        active = []
+        for i, value in enumerate(column('is_active')):
+            lowered = value.lower()
+            if not lowered or lowered in TRUE_VALUES:
+                active.append(True)
+            elif lowered in FALSE_VALUES:
+                active.append(False)
+            else:
+                active.append(None)
+                reject(i, f'Invalid is_active {value!r}')
+
+        for i in range(len(rows)):
+            if travel_types[i] not in TYPES:
+                reject(i, f'Unknown travel_type {travel_types[i]!r}')
+            if source_ids[i] is None:
+                reject(i, f'Unknown source {sources[i]!r}')
+            if destination_ids[i] is None:
+                reject(i, f'Unknown destination {destinations[i]!r}')
+            if not service_numbers[i]:
+                reject(i, 'Missing service_number')
+            if departures[i] is None:
+                reject(i, 'Missing or invalid departure_datetime')
+            if raw_arrivals[i] and arrivals[i] is None:
+                reject(i, 'Invalid arrival_datetime')
+            if prices[i] is not None and not Decimal('0.01') <= prices[i] <= MAX_PRICE:
+                reject(i, 'Price must be between 0.01 and 999999.99')
+            if total_seats[i] is not None and total_seats[i] < 1:
+                reject(i, 'total_seats must be at least 1')
+            if available_seats[i] is not None and available_seats[i] < 0:
+                reject(i, 'available_seats cannot be negative')
+            # TravelOption.clean()
+            if sources[i] == destinations[i]:
+                reject(i, 'Source and destination cannot be the same.')
+            if None not in (available_seats[i], total_seats[i]) and available_seats[i] > total_seats[i]:
+                reject(i, 'Available seats cannot exceed total seats.')
+            if arrivals[i] and departures[i] and arrivals[i] <= departures[i]:
+                reject(i, 'Arrival time must be after departure time.')
+
+        now = timezone.now()
+        valid, rejected = {}, []
+        for i, row in enumerate(rows):
+            if errors[i] is not None:
+                rejected.append((lines[i], errors[i], row))
+                continue
+            # A natural key repeated within a batch keeps its last row; one
+            # INSERT ... ON CONFLICT cannot update the same row twice
+            valid[(operators[i], service_numbers[i], departures[i])] = TravelOption(
+                travel_type=travel_types[i],
+                source_id=source_ids[i],
+                destination_id=destination_ids[i],
+                departure_datetime=departures[i],
+                arrival_datetime=arrivals[i],
+                price=prices[i],
+                total_seats=total_seats[i],
+                available_seats=available_seats[i],
+                operator_name=operators[i],
+                service_number=service_numbers[i],
+                description=_text(rows[i].get('description')),
+                is_active=active[i],
+                updated_at=now,
+            )
+        return list(valid.values()), rejected
+
+    def import_batch(self, batch):
+        options, rejected = self.validate(batch)
+
+        self.rejected += len(rejected)
+        for line, reason, row in rejected:
+            if len(self.sample_rejects) < 10:
+                self.sample_rejects.append((line, reason))
+            if self.rejects_writer:
+                self.rejects_writer.writerow([line, reason, json.dumps(row, default=str)])
+
+        if options and not self.dry_run:
+            with transaction.atomic():
+                TravelOption.objects.bulk_create(
+                    options,
+                    batch_size=self.batch_size,
+                    update_conflicts=True,
+                    unique_fields=NATURAL_KEY,
+                    update_fields=UPDATE_FIELDS,
+                )
+        self.read += len(batch)
+        # Rows repeating a natural key were folded into one upsert
+        self.imported += len(options)
+        self.routes.update((option.source.name, option.destination.name) for option in options)
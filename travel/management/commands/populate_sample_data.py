@@ -1,136 +1,291 @@
-from django.core.management.base import BaseCommand
+from django.core.management.base import BaseCommand, CommandError
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.db import connection, transaction
 from django.utils import timezone
-from datetime import timedelta, datetime
+from datetime import timedelta, datetime, time as dt_time
+from itertools import islice, permutations
 import random
-from travel.models import TravelOption
-from travel.constants import TRAVEL_TYPES
+import time
+from travel import cities, fare_calendar
+from travel.dates import local_day_range
+from travel.models import SeatHold, TravelOption
+from travel.constants import INDIAN_CITIES, TRAVEL_TYPES
+from bookings.models import Booking, Notification, WaitlistEntry
+from bookings.references import generate_booking_reference
+
+User = get_user_model()
+
+# Popular Indian routes
+POPULAR_ROUTES = [
+    ('Delhi', 'Mumbai'),
+    ('Mumbai', 'Delhi'),
+    ('Bangalore', 'Chennai'),
+    ('Chennai', 'Bangalore'),
+    ('Delhi', 'Bangalore'),
+    ('Bangalore', 'Delhi'),
+    ('Mumbai', 'Pune'),
+    ('Pune', 'Mumbai'),
+    ('Delhi', 'Jaipur'),
+    ('Jaipur', 'Delhi'),
+    ('Chennai', 'Hyderabad'),
+    ('Hyderabad', 'Chennai'),
+    ('Mumbai', 'Ahmedabad'),
+    ('Ahmedabad', 'Mumbai'),
+    ('Delhi', 'Chandigarh'),
+    ('Chandigarh', 'Delhi'),
+    ('Bangalore', 'Hyderabad'),
+    ('Hyderabad', 'Bangalore'),
+    ('Mumbai', 'Goa'),
+    ('Goa', 'Mumbai'),
+    ('Delhi', 'Lucknow'),
+    ('Lucknow', 'Delhi'),
+    ('Chennai', 'Kochi'),
+    ('Kochi', 'Chennai'),
+    ('Mumbai', 'Indore'),
+    ('Indore', 'Mumbai'),
+    ('Delhi', 'Amritsar'),
+    ('Amritsar', 'Delhi'),
+    ('Bangalore', 'Mysore'),
+    ('Mysore', 'Bangalore'),
+]
+
+# Airline/Railway/Bus operators
+OPERATORS = {
+    'flight': ['IndiGo', 'SpiceJet', 'Air India', 'Vistara', 'GoFirst'],
+    'train': ['Indian Railways', 'Rajdhani Express', 'Shatabdi Express', 'Duronto Express'],
+    'bus': ['Redbus', 'KSRTC', 'MSRTC', 'Volvo', 'Private Operators']
+}
+
+# Base prices (in rupees)
+BASE_PRICES = {
+    'flight': {'min': 2500, 'max': 8000},
+    'train': {'min': 300, 'max': 2500},
+    'bus': {'min': 200, 'max': 1500}
+}
+
+LOAD_USER_PREFIX = 'loaduser_'
 
 
 class Command(BaseCommand):
     help = 'Populate sample travel data for Indian routes'
 
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--seed', type=int, default=None,
+            help='Random seed; the same seed and options always produce the same data'
+        )
+        parser.add_argument(
+            '--days', type=int, default=30,
+            help='Number of days of departures to generate, starting tomorrow (default: 30)'
+        )
+        parser.add_argument(
+            '--routes', choices=['popular', 'all'], default='popular',
+            help='Generate the popular routes only, or every city pair in INDIAN_CITIES'
+        )
+        parser.add_argument(
+            '--min-options', type=int, default=1,
+            help='Minimum options per route per day (default: 1)'
+        )
+        parser.add_argument(
+            '--max-options', type=int, default=3,
+            help='Maximum options per route per day (default: 3)'
+        )
+        parser.add_argument(
+            '--users', type=int, default=0,
+            help=f'Number of sample users to create ({LOAD_USER_PREFIX}N)'
+        )
+        parser.add_argument(
+            '--bookings', type=int, default=0,
+            help='Approximate number of sample bookings to create'
+        )
+        parser.add_argument(
+            '--batch-size', type=int, default=5000,
+            help='Rows per bulk INSERT (default: 5000)'
+        )
+        parser.add_argument(
+            '--append', action='store_true',
+            help='Keep existing data instead of wiping travel options, bookings and sample users'
+        )
+
     def handle(self, *args, **options):
-        # Clear existing data
-        TravelOption.objects.all().delete()
-        
-        # Popular Indian routes
-        routes = [
-            ('Delhi', 'Mumbai'),
-            ('Mumbai', 'Delhi'),
-            ('Bangalore', 'Chennai'),
-            ('Chennai', 'Bangalore'),
-            ('Delhi', 'Bangalore'),
-            ('Bangalore', 'Delhi'),
-            ('Mumbai', 'Pune'),
-            ('Pune', 'Mumbai'),
-            ('Delhi', 'Jaipur'),
-            ('Jaipur', 'Delhi'),
-            ('Chennai', 'Hyderabad'),
-            ('Hyderabad', 'Chennai'),
-            ('Mumbai', 'Ahmedabad'),
-            ('Ahmedabad', 'Mumbai'),
-            ('Delhi', 'Chandigarh'),
-            ('Chandigarh', 'Delhi'),
-            ('Bangalore', 'Hyderabad'),
-            ('Hyderabad', 'Bangalore'),
-            ('Mumbai', 'Goa'),
-            ('Goa', 'Mumbai'),
-            ('Delhi', 'Lucknow'),
-            ('Lucknow', 'Delhi'),
-            ('Chennai', 'Kochi'),
-            ('Kochi', 'Chennai'),
-            ('Mumbai', 'Indore'),
-            ('Indore', 'Mumbai'),
-            ('Delhi', 'Amritsar'),
-            ('Amritsar', 'Delhi'),
-            ('Bangalore', 'Mysore'),
-            ('Mysore', 'Bangalore'),
-        ]
-
-        # Airline/Railway/Bus operators
-        operators = {
-            'flight': ['IndiGo', 'SpiceJet', 'Air India', 'Vistara', 'GoFirst'],
-            'train': ['Indian Railways', 'Rajdhani Express', 'Shatabdi Express', 'Duronto Express'],
-            'bus': ['Redbus', 'KSRTC', 'MSRTC', 'Volvo', 'Private Operators']
-        }
-
-        # Base prices (in rupees)
-        base_prices = {
-            'flight': {'min': 2500, 'max': 8000},
-            'train': {'min': 300, 'max': 2500},
-            'bus': {'min': 200, 'max': 1500}
-        }
-
-        # Create travel options for the next 30 days
-        created_count = 0
-        for days_ahead in range(1, 31):  # Next 30 days
-            travel_date = timezone.now() + timedelta(days=days_ahead)
-            
+        if options['min_options'] < 1 or options['max_options'] < options['min_options']:
+            raise CommandError('--min-options must be at least 1 and not above --max-options.')
+        if options['batch_size'] < 1:
+            raise CommandError('--batch-size must be positive.')
+
+        self.batch_size = options['batch_size']
+        self.append = options['append']
+        self.rng = random.Random(options['seed'])
+
+        if not options['append']:
+            self.clear_data()
+
+        first_new_id = (TravelOption.objects.order_by('-id').values_list('id', flat=True).first() or 0) + 1
+
+        routes = POPULAR_ROUTES
+        if options['routes'] == 'all':
+            routes = list(permutations([code for code, _ in INDIAN_CITIES], 2))
+
+        created_count = self.insert_in_batches(
+            TravelOption,
+            self.generate_travel_options(
+                routes, options['days'], options['min_options'], options['max_options']
+            ),
+            'travel options',
+        )
+
+        users = User.objects.all()
+        if options['users']:
+            self.create_users(options['users'])
+            users = users.filter(username__startswith=LOAD_USER_PREFIX)
+
+        booking_count = 0
+        if options['bookings']:
+            contacts = list(users.order_by('id').values_list('id', 'phone', 'email'))
+            if not contacts:
+                raise CommandError('Bookings need users; pass --users or create some first.')
+            booking_count = self.insert_in_batches(
+                Booking,
+                self.generate_bookings(first_new_id, created_count, options['bookings'], contacts),
+                'bookings',
+            )
+
+        # bulk_create skips the signals that keep the fare calendar current
+        calendar_days = fare_calendar.rebuild(batch_size=self.batch_size)
+        self.stdout.write(f'Rebuilt fare calendar ({calendar_days:,} route days)')
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f'Successfully created {created_count} travel options for Indian routes!'
+            )
+        )
+        if options['users'] or booking_count:
+            self.stdout.write(
+                self.style.SUCCESS(
+                    f'Created {options["users"]} users and {booking_count} bookings.'
+                )
+            )
+
+    def clear_data(self):
+        """
+        Wipe sample data with plain DELETEs instead of loading every row.
+        Plain DELETEs skip the ORM's cascades, so tables referring to
+        others go first.
+        """
+        with transaction.atomic(), connection.cursor() as cursor:
+            for model in (Notification, SeatHold, Booking, WaitlistEntry, TravelOption):
+                cursor.execute(f'DELETE FROM {connection.ops.quote_name(model._meta.db_table)}')
+            User.objects.filter(username__startswith=LOAD_USER_PREFIX).delete()
+
+    def insert_in_batches(self, model, rows, label):
+        """bulk_create rows in chunks, reporting progress and rows/sec"""
+        inserted = 0
+        started = last_report = time.perf_counter()
+        rows = iter(rows)
+        while True:
+            batch = list(islice(rows, self.batch_size))
+            if not batch:
+                break
+            with transaction.atomic():
+                model.objects.bulk_create(batch, batch_size=self.batch_size)
+            inserted += len(batch)
+
+            now = time.perf_counter()
+            if now - last_report >= 1:
+                last_report = now
+                self.stdout.write(
+                    f'  {inserted:,} {label} ({inserted / (now - started):,.0f} rows/sec)'
+                )
+
+        elapsed = max(time.perf_counter() - started, 1e-9)
+        self.stdout.write(f'Inserted {inserted:,} {label} in {elapsed:.1f}s ({inserted / elapsed:,.0f} rows/sec)')
+        return inserted
+
+    def generate_travel_options(self, routes, days, min_options, max_options):
+        rng = self.rng
+        travel_types = [t[0] for t in TRAVEL_TYPES]
+        today = timezone.localdate()
+
+        # Create travel options for the next N days
+        for days_ahead in range(1, days + 1):
+            travel_date = today + timedelta(days=days_ahead)
+            used_keys = set()
+            if self.append:
+                used_keys.update(TravelOption.objects.filter(
+                    **local_day_range('departure_datetime', travel_date)
+                ).values_list('operator_name', 'service_number', 'departure_datetime'))
+
             for source, destination in routes:
-                # Create 1-3 options per route per day
-                num_options = random.randint(1, 3)
-                
+                # Create several options per route per day
+                num_options = rng.randint(min_options, max_options)
+
                 for _ in range(num_options):
-                    travel_type = random.choice([t[0] for t in TRAVEL_TYPES])
-                    
+                    travel_type = rng.choice(travel_types)
+
                     # Random departure time
-                    hour = random.randint(6, 23)
-                    minute = random.choice([0, 15, 30, 45])
-                    departure_time = travel_date.replace(
-                        hour=hour, 
-                        minute=minute, 
-                        second=0, 
-                        microsecond=0
+                    hour = rng.randint(6, 23)
+                    minute = rng.choice([0, 15, 30, 45])
+                    departure_time = timezone.make_aware(
+                        datetime.combine(travel_date, dt_time(hour, minute))
                     )
-                    
+
                     # Calculate arrival time (add 1-8 hours for flights, 2-24 for trains, 4-16 for buses)
                     if travel_type == 'flight':
-                        journey_hours = random.randint(1, 4)
-                        journey_minutes = random.choice([0, 15, 30, 45])
+                        journey_hours = rng.randint(1, 4)
+                        journey_minutes = rng.choice([0, 15, 30, 45])
                     elif travel_type == 'train':
-                        journey_hours = random.randint(4, 24)
-                        journey_minutes = random.choice([0, 15, 30])
+                        journey_hours = rng.randint(4, 24)
+                        journey_minutes = rng.choice([0, 15, 30])
                     else:  # bus
-                        journey_hours = random.randint(4, 16)
-                        journey_minutes = random.choice([0, 30])
-                    
+                        journey_hours = rng.randint(4, 16)
+                        journey_minutes = rng.choice([0, 30])
+
                     arrival_time = departure_time + timedelta(
-                        hours=journey_hours, 
+                        hours=journey_hours,
                         minutes=journey_minutes
                     )
-                    
+
                     # Random price within range
-                    price_range = base_prices[travel_type]
-                    price = random.randint(price_range['min'], price_range['max'])
-                    
+                    price_range = BASE_PRICES[travel_type]
+                    price = rng.randint(price_range['min'], price_range['max'])
+
                     # Random seats
                     if travel_type == 'flight':
-                        total_seats = random.choice([150, 180, 200, 250])
+                        total_seats = rng.choice([150, 180, 200, 250])
                     elif travel_type == 'train':
-                        total_seats = random.choice([200, 300, 500, 800])
+                        total_seats = rng.choice([200, 300, 500, 800])
                     else:  # bus
-                        total_seats = random.choice([40, 45, 50, 55])
-                    
-                    available_seats = random.randint(
+                        total_seats = rng.choice([40, 45, 50, 55])
+
+                    available_seats = rng.randint(
                         int(total_seats * 0.1),  # At least 10% available
                         int(total_seats * 0.9)   # At most 90% available
                     )
-                    
+
                     # Random operator
-                    operator = random.choice(operators[travel_type])
-                    
-                    # Service number
-                    if travel_type == 'flight':
-                        service_number = f"{operator[:2].upper()}-{random.randint(1000, 9999)}"
-                    elif travel_type == 'train':
-                        service_number = f"{random.randint(10000, 99999)}"
-                    else:  # bus
-                        service_number = f"BUS-{random.randint(1000, 9999)}"
+                    operator = rng.choice(OPERATORS[travel_type])
+
+                    # Service number, unique per operator and departure
+                    # (the travel_option_natural_key constraint)
+                    while True:
+                        if travel_type == 'flight':
+                            service_number = f"{operator[:2].upper()}-{rng.randint(1000, 9999)}"
+                        elif travel_type == 'train':
+                            service_number = f"{rng.randint(10000, 99999)}"
+                        else:  # bus
+                            service_number = f"BUS-{rng.randint(1000, 9999)}"
+                        if (operator, service_number, departure_time) not in used_keys:
+                            used_keys.add((operator, service_number, departure_time))
+                            break
 
-                    travel_option = TravelOption.objects.create(
+                    # bulk_create skips save(), so generated values must already
+                    # satisfy TravelOption.clean(): distinct cities, arrival after
+                    # departure, available <= total
+                    yield TravelOption(
                         travel_type=travel_type,
-                        source=source,
-                        destination=destination,
+                        source_id=cities.id_for(source),
+                        destination_id=cities.id_for(destination),
                         departure_datetime=departure_time,
                         arrival_datetime=arrival_time,
                         price=price,
@@ -140,10 +295,61 @@ class Command(BaseCommand):
                         service_number=service_number,
                         description=f"{travel_type.title()} service from {source} to {destination} operated by {operator}",
                     )
-                    created_count += 1
 
-        self.stdout.write(
-            self.style.SUCCESS(
-                f'Successfully created {created_count} travel options for Indian routes!'
-            )
+    def create_users(self, count):
+        # Hashing is deliberately slow; every sample user shares one hash
+        password = make_password('travelkaro123')
+        offset = User.objects.filter(username__startswith=LOAD_USER_PREFIX).count()
+
+        def generate():
+            for index in range(offset, offset + count):
+                yield User(
+                    username=f'{LOAD_USER_PREFIX}{index}',
+                    first_name='Sample',
+                    last_name=f'User {index}',
+                    email=f'{LOAD_USER_PREFIX}{index}@example.com',
+                    phone=f'+917{index:09d}',
+                    password=password,
+                )
+
+        self.insert_in_batches(User, generate(), 'users')
+
+    def generate_bookings(self, first_option_id, option_count, booking_count, contacts):
+        """
+        Spread bookings over the newly created options.
+
+        Confirmed seats come out of each option's already-sold share
+        (total_seats - available_seats), so seat counts stay consistent.
+        contacts is a list of (user id, phone, email) tuples.
+        """
+        rng = self.rng
+        per_option = booking_count / max(option_count, 1)
+        remaining = booking_count
+        options = TravelOption.objects.filter(id__gte=first_option_id).order_by('id').values_list(
+            'id', 'price', 'total_seats', 'available_seats'
         )
+
+        for option_id, price, total_seats, available_seats in options.iterator(chunk_size=self.batch_size):
+            if remaining <= 0:
+                break
+            sold = total_seats - available_seats
+            wanted = int(per_option) + (rng.random() < per_option % 1)
+            for _ in range(min(wanted, remaining)):
+                if sold <= 0:
+                    break
+                num_seats = min(rng.randint(1, 4), sold)
+                status = 'cancelled' if rng.random() < 0.1 else 'confirmed'
+                if status == 'confirmed':
+                    sold -= num_seats
+                remaining -= 1
+                user_id, phone, email = rng.choice(contacts)
+                yield Booking(
+                    user_id=user_id,
+                    travel_option_id=option_id,
+                    num_seats=num_seats,
+                    total_price=price * num_seats,
+                    status=status,
+                    booking_reference=generate_booking_reference(),
+                    contact_phone=phone,
+                    contact_email=email,
+                )
@@ -0,0 +1,24 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from travel import fare_calendar
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the fare calendar from all future bookable travel options'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size', type=int, default=5000,
+            help='Rows per bulk INSERT (default: 5000)'
+        )
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        count = fare_calendar.rebuild(batch_size=options['batch_size'])
+        self.stdout.write(
+            self.style.SUCCESS(
+                f'Rebuilt fare calendar: {count} route days in {time.perf_counter() - started:.1f}s'
+            )
+        )
@@ -0,0 +1,58 @@
+import csv
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from travel import pricing
+
+
+class Command(BaseCommand):
+    help = 'Reprice every future active travel option from occupancy, time to departure and route demand'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--dry-run', action='store_true',
+            help='Compute and report the new prices without writing them'
+        )
+        parser.add_argument(
+            '--diff', metavar='PATH',
+            help='Write every price change to this CSV file'
+        )
+        parser.add_argument(
+            '--show', type=int, default=10,
+            help='Print this many of the largest changes (default: 10)'
+        )
+        parser.add_argument(
+            '--batch-size', type=int, default=pricing.WRITE_CHUNK,
+            help=f'Prices written per transaction (default: {pricing.WRITE_CHUNK})'
+        )
+
+    def handle(self, *args, **options):
+        if options['batch_size'] < 1:
+            raise CommandError('--batch-size must be at least 1.')
+
+        started = time.perf_counter()
+        result = pricing.reprice(dry_run=options['dry_run'], chunk_size=options['batch_size'])
+        elapsed = time.perf_counter() - started
+        changes = result.changes
+
+        if options['diff']:
+            with open(options['diff'], 'w', newline='') as f:
+                writer = csv.writer(f)
+                writer.writerow(['option_id', 'old_price', 'new_price'])
+                writer.writerows(changes)
+
+        largest = sorted(changes, key=lambda change: abs(change.new_price - change.old_price), reverse=True)
+        for change in largest[:options['show']]:
+            self.stdout.write(
+                f'  #{change.option_id}: ₹{change.old_price:,.2f} -> ₹{change.new_price:,.2f}'
+            )
+
+        raised = sum(1 for change in changes if change.new_price > change.old_price)
+        summary = f'{len(changes)} of {result.options} prices ({raised} up, {len(changes) - raised} down)'
+        if options['dry_run']:
+            self.stdout.write(f'Dry run: would change {summary} in {elapsed:.1f}s')
+        else:
+            self.stdout.write(self.style.SUCCESS(
+                f'Changed {summary} in {elapsed:.1f}s; wrote {result.written}'
+            ))
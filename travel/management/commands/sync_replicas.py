@@ -0,0 +1,51 @@
+import sqlite3
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS
+
+
+class Command(BaseCommand):
+    help = 'Copy the primary SQLite database over the local replica files (stand-ins for replication)'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--interval', type=float,
+            help='Keep copying every INTERVAL seconds until stopped, simulating replication lag'
+        )
+
+    def handle(self, *args, **options):
+        databases = settings.DATABASES
+        replicas = settings.REPLICA_DATABASES
+        if not replicas:
+            raise CommandError('No replicas configured; set DATABASE_REPLICAS.')
+        for alias in [DEFAULT_DB_ALIAS, *replicas]:
+            if databases[alias]['ENGINE'] != 'django.db.backends.sqlite3':
+                raise CommandError(f'{alias} is not SQLite; use the database\'s own replication.')
+
+        try:
+            while True:
+                self.sync(databases[DEFAULT_DB_ALIAS]['NAME'], [databases[alias]['NAME'] for alias in replicas])
+                if options['interval'] is None:
+                    break
+                time.sleep(options['interval'])
+        except KeyboardInterrupt:
+            self.stdout.write('Stopped.')
+
+    def sync(self, primary, replicas):
+        started = time.perf_counter()
+        # The backup API copies a consistent snapshot while writers continue
+        source = sqlite3.connect(primary)
+        try:
+            for replica in replicas:
+                target = sqlite3.connect(replica)
+                try:
+                    source.backup(target)
+                finally:
+                    target.close()
+        finally:
+            source.close()
+        self.stdout.write(self.style.SUCCESS(
+            f'Copied the primary to {len(replicas)} replicas in {time.perf_counter() - started:.2f}s'
+        ))
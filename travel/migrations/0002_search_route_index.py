@@ -0,0 +1,17 @@
+# Generated by Django 5.2.18 on 2026-10-17 00:34
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('travel', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='traveloption',
+            index=models.Index(condition=models.Q(('available_seats__gt', 0), ('is_active', True)), fields=['source', 'destination', 'departure_datetime', 'id'], name='travel_search_route_idx'),
+        ),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 5.2.18 on 2026-10-17 00:48
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('travel', '0002_search_route_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='FareCalendarDay',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('source', models.CharField(choices=[('Delhi', 'Delhi'), ('Mumbai', 'Mumbai'), ('Bangalore', 'Bangalore'), ('Chennai', 'Chennai'), ('Kolkata', 'Kolkata'), ('Hyderabad', 'Hyderabad'), ('Pune', 'Pune'), ('Ahmedabad', 'Ahmedabad'), ('Surat', 'Surat'), ('Jaipur', 'Jaipur'), ('Lucknow', 'Lucknow'), ('Kanpur', 'Kanpur'), ('Nagpur', 'Nagpur'), ('Indore', 'Indore'), ('Thane', 'Thane'), ('Bhopal', 'Bhopal'), ('Visakhapatnam', 'Visakhapatnam'), ('Pimpri-Chinchwad', 'Pimpri-Chinchwad'), ('Patna', 'Patna'), ('Vadodara', 'Vadodara'), ('Ghaziabad', 'Ghaziabad'), ('Ludhiana', 'Ludhiana'), ('Agra', 'Agra'), ('Nashik', 'Nashik'), ('Faridabad', 'Faridabad'), ('Meerut', 'Meerut'), ('Rajkot', 'Rajkot'), ('Kalyan-Dombivli', 'Kalyan-Dombivli'), ('Vasai-Virar', 'Vasai-Virar'), ('Varanasi', 'Varanasi'), ('Srinagar', 'Srinagar'), ('Aurangabad', 'Aurangabad'), ('Dhanbad', 'Dhanbad'), ('Amritsar', 'Amritsar'), ('Navi Mumbai', 'Navi Mumbai'), ('Allahabad', 'Allahabad'), ('Howrah', 'Howrah'), ('Ranchi', 'Ranchi'), ('Gwalior', 'Gwalior'), ('Jabalpur', 'Jabalpur'), ('Coimbatore', 'Coimbatore'), ('Vijayawada', 'Vijayawada'), ('Jodhpur', 'Jodhpur'), ('Madurai', 'Madurai'), ('Raipur', 'Raipur'), ('Kota', 'Kota'), ('Chandigarh', 'Chandigarh'), ('Guwahati', 'Guwahati'), ('Solapur', 'Solapur'), ('Hubli-Dharwad', 'Hubli-Dharwad'), ('Bareilly', 'Bareilly'), ('Moradabad', 'Moradabad'), ('Mysore', 'Mysore'), ('Gurgaon', 'Gurgaon'), ('Aligarh', 'Aligarh'), ('Jalandhar', 'Jalandhar'), ('Tiruchirappalli', 'Tiruchirappalli'), ('Bhubaneswar', 'Bhubaneswar'), ('Salem', 'Salem'), ('Warangal', 'Warangal'), ('Mira-Bhayandar', 'Mira-Bhayandar'), ('Thiruvananthapuram', 'Thiruvananthapuram'), ('Guntur', 'Guntur'), ('Bhiwandi', 'Bhiwandi'), ('Saharanpur', 'Saharanpur'), ('Gorakhpur', 'Gorakhpur'), ('Bikaner', 'Bikaner'), ('Amravati', 'Amravati'), ('Noida', 'Noida'), ('Jamshedpur', 'Jamshedpur'), ('Bhilai', 'Bhilai'), ('Cuttack', 'Cuttack'), ('Firozabad', 'Firozabad'), ('Kochi', 'Kochi'), ('Bhavnagar', 'Bhavnagar'), ('Dehradun', 'Dehradun'), ('Durgapur', 'Durgapur'), ('Asansol', 'Asansol'), ('Rourkela', 'Rourkela'), ('Nanded', 'Nanded'), ('Kolhapur', 'Kolhapur'), ('Ajmer', 'Ajmer'), ('Akola', 'Akola'), ('Gulbarga', 'Gulbarga'), ('Jamnagar', 'Jamnagar'), ('Ujjain', 'Ujjain'), ('Loni', 'Loni'), ('Siliguri', 'Siliguri'), ('Jhansi', 'Jhansi'), ('Ulhasnagar', 'Ulhasnagar'), ('Jammu', 'Jammu'), ('Sangli-Miraj & Kupwad', 'Sangli-Miraj & Kupwad'), ('Mangalore', 'Mangalore'), ('Erode', 'Erode'), ('Belgaum', 'Belgaum'), ('Ambattur', 'Ambattur'), ('Tirunelveli', 'Tirunelveli'), ('Malegaon', 'Malegaon'), ('Gaya', 'Gaya'), ('Jalgaon', 'Jalgaon'), ('Udaipur', 'Udaipur'), ('Maheshtala', 'Maheshtala')], max_length=100)),
+                ('destination', models.CharField(choices=[('Delhi', 'Delhi'), ('Mumbai', 'Mumbai'), ('Bangalore', 'Bangalore'), ('Chennai', 'Chennai'), ('Kolkata', 'Kolkata'), ('Hyderabad', 'Hyderabad'), ('Pune', 'Pune'), ('Ahmedabad', 'Ahmedabad'), ('Surat', 'Surat'), ('Jaipur', 'Jaipur'), ('Lucknow', 'Lucknow'), ('Kanpur', 'Kanpur'), ('Nagpur', 'Nagpur'), ('Indore', 'Indore'), ('Thane', 'Thane'), ('Bhopal', 'Bhopal'), ('Visakhapatnam', 'Visakhapatnam'), ('Pimpri-Chinchwad', 'Pimpri-Chinchwad'), ('Patna', 'Patna'), ('Vadodara', 'Vadodara'), ('Ghaziabad', 'Ghaziabad'), ('Ludhiana', 'Ludhiana'), ('Agra', 'Agra'), ('Nashik', 'Nashik'), ('Faridabad', 'Faridabad'), ('Meerut', 'Meerut'), ('Rajkot', 'Rajkot'), ('Kalyan-Dombivli', 'Kalyan-Dombivli'), ('Vasai-Virar', 'Vasai-Virar'), ('Varanasi', 'Varanasi'), ('Srinagar', 'Srinagar'), ('Aurangabad', 'Aurangabad'), ('Dhanbad', 'Dhanbad'), ('Amritsar', 'Amritsar'), ('Navi Mumbai', 'Navi Mumbai'), ('Allahabad', 'Allahabad'), ('Howrah', 'Howrah'), ('Ranchi', 'Ranchi'), ('Gwalior', 'Gwalior'), ('Jabalpur', 'Jabalpur'), ('Coimbatore', 'Coimbatore'), ('Vijayawada', 'Vijayawada'), ('Jodhpur', 'Jodhpur'), ('Madurai', 'Madurai'), ('Raipur', 'Raipur'), ('Kota', 'Kota'), ('Chandigarh', 'Chandigarh'), ('Guwahati', 'Guwahati'), ('Solapur', 'Solapur'), ('Hubli-Dharwad', 'Hubli-Dharwad'), ('Bareilly', 'Bareilly'), ('Moradabad', 'Moradabad'), ('Mysore', 'Mysore'), ('Gurgaon', 'Gurgaon'), ('Aligarh', 'Aligarh'), ('Jalandhar', 'Jalandhar'), ('Tiruchirappalli', 'Tiruchirappalli'), ('Bhubaneswar', 'Bhubaneswar'), ('Salem', 'Salem'), ('Warangal', 'Warangal'), ('Mira-Bhayandar', 'Mira-Bhayandar'), ('Thiruvananthapuram', 'Thiruvananthapuram'), ('Guntur', 'Guntur'), ('Bhiwandi', 'Bhiwandi'), ('Saharanpur', 'Saharanpur'), ('Gorakhpur', 'Gorakhpur'), ('Bikaner', 'Bikaner'), ('Amravati', 'Amravati'), ('Noida', 'Noida'), ('Jamshedpur', 'Jamshedpur'), ('Bhilai', 'Bhilai'), ('Cuttack', 'Cuttack'), ('Firozabad', 'Firozabad'), ('Kochi', 'Kochi'), ('Bhavnagar', 'Bhavnagar'), ('Dehradun', 'Dehradun'), ('Durgapur', 'Durgapur'), ('Asansol', 'Asansol'), ('Rourkela', 'Rourkela'), ('Nanded', 'Nanded'), ('Kolhapur', 'Kolhapur'), ('Ajmer', 'Ajmer'), ('Akola', 'Akola'), ('Gulbarga', 'Gulbarga'), ('Jamnagar', 'Jamnagar'), ('Ujjain', 'Ujjain'), ('Loni', 'Loni'), ('Siliguri', 'Siliguri'), ('Jhansi', 'Jhansi'), ('Ulhasnagar', 'Ulhasnagar'), ('Jammu', 'Jammu'), ('Sangli-Miraj & Kupwad', 'Sangli-Miraj & Kupwad'), ('Mangalore', 'Mangalore'), ('Erode', 'Erode'), ('Belgaum', 'Belgaum'), ('Ambattur', 'Ambattur'), ('Tirunelveli', 'Tirunelveli'), ('Malegaon', 'Malegaon'), ('Gaya', 'Gaya'), ('Jalgaon', 'Jalgaon'), ('Udaipur', 'Udaipur'), ('Maheshtala', 'Maheshtala')], max_length=100)),
+                ('travel_date', models.DateField(help_text='Local departure date')),
+                ('travel_type', models.CharField(choices=[('flight', 'Flight'), ('train', 'Train'), ('bus', 'Bus')], max_length=10)),
+                ('min_price', models.DecimalField(decimal_places=2, max_digits=8)),
+                ('seats_available', models.PositiveIntegerField()),
+                ('option_count', models.PositiveIntegerField()),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name': 'Fare Calendar Day',
+                'verbose_name_plural': 'Fare Calendar',
+                'ordering': ['source', 'destination', 'travel_date', 'travel_type'],
+                'constraints': [models.UniqueConstraint(fields=('source', 'destination', 'travel_date', 'travel_type'), name='fare_calendar_day_unique')],
+            },
+        ),
+    ]
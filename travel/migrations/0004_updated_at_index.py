@@ -0,0 +1,17 @@
+# Generated by Django 5.2.18 on 2026-10-17 00:53
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('travel', '0003_fare_calendar'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='traveloption',
+            index=models.Index(fields=['updated_at', 'id'], name='travel_updated_idx'),
+        ),
+    ]
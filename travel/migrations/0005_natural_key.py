@@ -0,0 +1,48 @@
+# Generated by Django 5.2.18 on 2026-10-17 00:57
+
+from django.db import migrations, models
+from django.db.models import Count
+
+KEY = ('operator_name', 'service_number', 'departure_datetime')
+LISTED = 20
+
+
+def check_natural_keys(apps, schema_editor):
+    """Stop, listing them, if options share a natural key; they are operator data to resolve by hand"""
+    TravelOption = apps.get_model('travel', 'TravelOption')
+    duplicates = list(
+        TravelOption.objects.values(*KEY).annotate(rows=Count('id')).filter(rows__gt=1).order_by(*KEY)
+    )
+    if duplicates:
+        lines = [
+            f'  operator={key["operator_name"]!r} service_number={key["service_number"]!r} '
+            f'departure={key["departure_datetime"].isoformat()}: {key["rows"]} options'
+            for key in duplicates[:LISTED]
+        ]
+        if len(duplicates) > LISTED:
+            lines.append(f'  ... and {len(duplicates) - LISTED} more')
+        raise ValueError(
+            f'{len(duplicates)} (operator, service number, departure) keys are used by more than one '
+            'travel option. Give each a distinct service number, or delete the extra options, '
+            'then migrate again:\n' + '\n'.join(lines)
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('travel', '0004_updated_at_index'),
+    ]
+
+    operations = [
+        migrations.RunPython(check_natural_keys, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='traveloption',
+            name='service_number',
+            field=models.CharField(help_text='Flight number, train number, or bus service number', max_length=50),
+        ),
+        migrations.AddConstraint(
+            model_name='traveloption',
+            constraint=models.UniqueConstraint(fields=('operator_name', 'service_number', 'departure_datetime'), name='travel_option_natural_key'),
+        ),
+    ]
@@ -0,0 +1,149 @@
+# Generated by Django 5.2.18 on 2026-10-17 01:24
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.utils.text import slugify
+
+import travel.models
+
+
+def seed_cities(apps, schema_editor):
+    """Create a City for every known city and every name already in use"""
+    from travel.constants import CITY_DETAILS, INDIAN_CITIES
+
+    City = apps.get_model('travel', 'City')
+    TravelOption = apps.get_model('travel', 'TravelOption')
+
+    names = [name for name, _ in INDIAN_CITIES]
+    in_use = set(TravelOption.objects.values_list('source', flat=True))
+    in_use |= set(TravelOption.objects.values_list('destination', flat=True))
+    names += sorted(in_use - set(names))
+
+    cities = []
+    for name in names:
+        state, latitude, longitude = CITY_DETAILS.get(name, ('', None, None))
+        cities.append(City(
+            code=slugify(name), name=name, state=state, latitude=latitude, longitude=longitude,
+        ))
+    City.objects.bulk_create(cities)
+
+
+def link_cities(apps, schema_editor):
+    City = apps.get_model('travel', 'City')
+    TravelOption = apps.get_model('travel', 'TravelOption')
+    for city_id, name in City.objects.values_list('id', 'name'):
+        TravelOption.objects.filter(source=name).update(source_city=city_id)
+        TravelOption.objects.filter(destination=name).update(destination_city=city_id)
+
+
+def unlink_cities(apps, schema_editor):
+    City = apps.get_model('travel', 'City')
+    TravelOption = apps.get_model('travel', 'TravelOption')
+    for city_id, name in City.objects.values_list('id', 'name'):
+        TravelOption.objects.filter(source_city=city_id).update(source=name)
+        TravelOption.objects.filter(destination_city=city_id).update(destination=name)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('travel', '0005_natural_key'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='City',
+            fields=[
+                ('id', models.SmallAutoField(primary_key=True, serialize=False)),
+                ('code', models.SlugField(help_text='Short stable identifier, e.g. navi-mumbai', unique=True)),
+                ('name', models.CharField(help_text='Display name, also used in search URLs', max_length=100, unique=True)),
+                ('state', models.CharField(blank=True, help_text='State code, as in User.STATE_CHOICES', max_length=2)),
+                ('latitude', models.DecimalField(blank=True, decimal_places=5, max_digits=8, null=True)),
+                ('longitude', models.DecimalField(blank=True, decimal_places=5, max_digits=8, null=True)),
+            ],
+            options={
+                'verbose_name': 'City',
+                'verbose_name_plural': 'Cities',
+                'ordering': ['id'],
+            },
+        ),
+        migrations.RunPython(seed_cities, migrations.RunPython.noop),
+
+        # Fill integer keys next to the old name columns, then swap them in
+        migrations.AddField(
+            model_name='traveloption',
+            name='source_city',
+            field=travel.models.CityForeignKey(null=True, on_delete=django.db.models.deletion.PROTECT, related_name='+', to='travel.city'),
+        ),
+        migrations.AddField(
+            model_name='traveloption',
+            name='destination_city',
+            field=travel.models.CityForeignKey(null=True, on_delete=django.db.models.deletion.PROTECT, related_name='+', to='travel.city'),
+        ),
+        migrations.RunPython(link_cities, unlink_cities),
+        migrations.RemoveIndex(
+            model_name='traveloption',
+            name='travel_search_route_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='traveloption',
+            name='travel_trav_source_ea197d_idx',
+        ),
+        # A default lets the name columns be re-added when migrating back
+        migrations.AlterField(
+            model_name='traveloption',
+            name='source',
+            field=models.CharField(default='', max_length=100),
+        ),
+        migrations.AlterField(
+            model_name='traveloption',
+            name='destination',
+            field=models.CharField(default='', max_length=100),
+        ),
+        migrations.RemoveField(
+            model_name='traveloption',
+            name='source',
+        ),
+        migrations.RemoveField(
+            model_name='traveloption',
+            name='destination',
+        ),
+        migrations.RenameField(
+            model_name='traveloption',
+            old_name='source_city',
+            new_name='source',
+        ),
+        migrations.RenameField(
+            model_name='traveloption',
+            old_name='destination_city',
+            new_name='destination',
+        ),
+        migrations.AlterField(
+            model_name='traveloption',
+            name='source',
+            field=travel.models.CityForeignKey(db_index=False, help_text='Departure city', on_delete=django.db.models.deletion.PROTECT, related_name='departures', to='travel.city'),
+        ),
+        migrations.AlterField(
+            model_name='traveloption',
+            name='destination',
+            field=travel.models.CityForeignKey(help_text='Arrival city', on_delete=django.db.models.deletion.PROTECT, related_name='arrivals', to='travel.city'),
+        ),
+        migrations.AddIndex(
+            model_name='traveloption',
+            index=models.Index(condition=models.Q(('available_seats__gt', 0), ('is_active', True)), fields=['source', 'destination', 'departure_datetime', 'id'], name='travel_search_route_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='traveloption',
+            index=models.Index(fields=['source', 'destination'], name='travel_trav_source__46341b_idx'),
+        ),
+        migrations.AlterField(
+            model_name='farecalendarday',
+            name='destination',
+            field=models.CharField(choices=[('Delhi', 'Delhi'), ('Mumbai', 'Mumbai'), ('Bangalore', 'Bangalore'), ('Chennai', 'Chennai'), ('Kolkata', 'Kolkata'), ('Hyderabad', 'Hyderabad'), ('Pune', 'Pune'), ('Ahmedabad', 'Ahmedabad'), ('Surat', 'Surat'), ('Jaipur', 'Jaipur'), ('Lucknow', 'Lucknow'), ('Kanpur', 'Kanpur'), ('Nagpur', 'Nagpur'), ('Indore', 'Indore'), ('Thane', 'Thane'), ('Bhopal', 'Bhopal'), ('Visakhapatnam', 'Visakhapatnam'), ('Pimpri-Chinchwad', 'Pimpri-Chinchwad'), ('Patna', 'Patna'), ('Vadodara', 'Vadodara'), ('Ghaziabad', 'Ghaziabad'), ('Ludhiana', 'Ludhiana'), ('Agra', 'Agra'), ('Nashik', 'Nashik'), ('Faridabad', 'Faridabad'), ('Meerut', 'Meerut'), ('Rajkot', 'Rajkot'), ('Kalyan-Dombivli', 'Kalyan-Dombivli'), ('Vasai-Virar', 'Vasai-Virar'), ('Varanasi', 'Varanasi'), ('Srinagar', 'Srinagar'), ('Aurangabad', 'Aurangabad'), ('Dhanbad', 'Dhanbad'), ('Amritsar', 'Amritsar'), ('Navi Mumbai', 'Navi Mumbai'), ('Allahabad', 'Allahabad'), ('Howrah', 'Howrah'), ('Ranchi', 'Ranchi'), ('Gwalior', 'Gwalior'), ('Jabalpur', 'Jabalpur'), ('Coimbatore', 'Coimbatore'), ('Vijayawada', 'Vijayawada'), ('Jodhpur', 'Jodhpur'), ('Madurai', 'Madurai'), ('Raipur', 'Raipur'), ('Kota', 'Kota'), ('Chandigarh', 'Chandigarh'), ('Guwahati', 'Guwahati'), ('Solapur', 'Solapur'), ('Hubli-Dharwad', 'Hubli-Dharwad'), ('Bareilly', 'Bareilly'), ('Moradabad', 'Moradabad'), ('Mysore', 'Mysore'), ('Gurgaon', 'Gurgaon'), ('Aligarh', 'Aligarh'), ('Jalandhar', 'Jalandhar'), ('Tiruchirappalli', 'Tiruchirappalli'), ('Bhubaneswar', 'Bhubaneswar'), ('Salem', 'Salem'), ('Warangal', 'Warangal'), ('Mira-Bhayandar', 'Mira-Bhayandar'), ('Thiruvananthapuram', 'Thiruvananthapuram'), ('Guntur', 'Guntur'), ('Bhiwandi', 'Bhiwandi'), ('Saharanpur', 'Saharanpur'), ('Gorakhpur', 'Gorakhpur'), ('Bikaner', 'Bikaner'), ('Amravati', 'Amravati'), ('Noida', 'Noida'), ('Jamshedpur', 'Jamshedpur'), ('Bhilai', 'Bhilai'), ('Cuttack', 'Cuttack'), ('Firozabad', 'Firozabad'), ('Kochi', 'Kochi'), ('Bhavnagar', 'Bhavnagar'), ('Dehradun', 'Dehradun'), ('Durgapur', 'Durgapur'), ('Asansol', 'Asansol'), ('Rourkela', 'Rourkela'), ('Nanded', 'Nanded'), ('Kolhapur', 'Kolhapur'), ('Ajmer', 'Ajmer'), ('Akola', 'Akola'), ('Gulbarga', 'Gulbarga'), ('Jamnagar', 'Jamnagar'), ('Ujjain', 'Ujjain'), ('Loni', 'Loni'), ('Siliguri', 'Siliguri'), ('Jhansi', 'Jhansi'), ('Ulhasnagar', 'Ulhasnagar'), ('Jammu', 'Jammu'), ('Sangli-Miraj & Kupwad', 'Sangli-Miraj & Kupwad'), ('Mangalore', 'Mangalore'), ('Erode', 'Erode'), ('Belgaum', 'Belgaum'), ('Ambattur', 'Ambattur'), ('Tirunelveli', 'Tirunelveli'), ('Malegaon', 'Malegaon'), ('Gaya', 'Gaya'), ('Jalgaon', 'Jalgaon'), ('Udaipur', 'Udaipur'), ('Maheshtala', 'Maheshtala'), ('Goa', 'Goa')], max_length=100),
+        ),
+        migrations.AlterField(
+            model_name='farecalendarday',
+            name='source',
+            field=models.CharField(choices=[('Delhi', 'Delhi'), ('Mumbai', 'Mumbai'), ('Bangalore', 'Bangalore'), ('Chennai', 'Chennai'), ('Kolkata', 'Kolkata'), ('Hyderabad', 'Hyderabad'), ('Pune', 'Pune'), ('Ahmedabad', 'Ahmedabad'), ('Surat', 'Surat'), ('Jaipur', 'Jaipur'), ('Lucknow', 'Lucknow'), ('Kanpur', 'Kanpur'), ('Nagpur', 'Nagpur'), ('Indore', 'Indore'), ('Thane', 'Thane'), ('Bhopal', 'Bhopal'), ('Visakhapatnam', 'Visakhapatnam'), ('Pimpri-Chinchwad', 'Pimpri-Chinchwad'), ('Patna', 'Patna'), ('Vadodara', 'Vadodara'), ('Ghaziabad', 'Ghaziabad'), ('Ludhiana', 'Ludhiana'), ('Agra', 'Agra'), ('Nashik', 'Nashik'), ('Faridabad', 'Faridabad'), ('Meerut', 'Meerut'), ('Rajkot', 'Rajkot'), ('Kalyan-Dombivli', 'Kalyan-Dombivli'), ('Vasai-Virar', 'Vasai-Virar'), ('Varanasi', 'Varanasi'), ('Srinagar', 'Srinagar'), ('Aurangabad', 'Aurangabad'), ('Dhanbad', 'Dhanbad'), ('Amritsar', 'Amritsar'), ('Navi Mumbai', 'Navi Mumbai'), ('Allahabad', 'Allahabad'), ('Howrah', 'Howrah'), ('Ranchi', 'Ranchi'), ('Gwalior', 'Gwalior'), ('Jabalpur', 'Jabalpur'), ('Coimbatore', 'Coimbatore'), ('Vijayawada', 'Vijayawada'), ('Jodhpur', 'Jodhpur'), ('Madurai', 'Madurai'), ('Raipur', 'Raipur'), ('Kota', 'Kota'), ('Chandigarh', 'Chandigarh'), ('Guwahati', 'Guwahati'), ('Solapur', 'Solapur'), ('Hubli-Dharwad', 'Hubli-Dharwad'), ('Bareilly', 'Bareilly'), ('Moradabad', 'Moradabad'), ('Mysore', 'Mysore'), ('Gurgaon', 'Gurgaon'), ('Aligarh', 'Aligarh'), ('Jalandhar', 'Jalandhar'), ('Tiruchirappalli', 'Tiruchirappalli'), ('Bhubaneswar', 'Bhubaneswar'), ('Salem', 'Salem'), ('Warangal', 'Warangal'), ('Mira-Bhayandar', 'Mira-Bhayandar'), ('Thiruvananthapuram', 'Thiruvananthapuram'), ('Guntur', 'Guntur'), ('Bhiwandi', 'Bhiwandi'), ('Saharanpur', 'Saharanpur'), ('Gorakhpur', 'Gorakhpur'), ('Bikaner', 'Bikaner'), ('Amravati', 'Amravati'), ('Noida', 'Noida'), ('Jamshedpur', 'Jamshedpur'), ('Bhilai', 'Bhilai'), ('Cuttack', 'Cuttack'), ('Firozabad', 'Firozabad'), ('Kochi', 'Kochi'), ('Bhavnagar', 'Bhavnagar'), ('Dehradun', 'Dehradun'), ('Durgapur', 'Durgapur'), ('Asansol', 'Asansol'), ('Rourkela', 'Rourkela'), ('Nanded', 'Nanded'), ('Kolhapur', 'Kolhapur'), ('Ajmer', 'Ajmer'), ('Akola', 'Akola'), ('Gulbarga', 'Gulbarga'), ('Jamnagar', 'Jamnagar'), ('Ujjain', 'Ujjain'), ('Loni', 'Loni'), ('Siliguri', 'Siliguri'), ('Jhansi', 'Jhansi'), ('Ulhasnagar', 'Ulhasnagar'), ('Jammu', 'Jammu'), ('Sangli-Miraj & Kupwad', 'Sangli-Miraj & Kupwad'), ('Mangalore', 'Mangalore'), ('Erode', 'Erode'), ('Belgaum', 'Belgaum'), ('Ambattur', 'Ambattur'), ('Tirunelveli', 'Tirunelveli'), ('Malegaon', 'Malegaon'), ('Gaya', 'Gaya'), ('Jalgaon', 'Jalgaon'), ('Udaipur', 'Udaipur'), ('Maheshtala', 'Maheshtala'), ('Goa', 'Goa')], max_length=100),
+        ),
+    ]
@@ -0,0 +1,38 @@
+# Generated by Django 5.2.18 on 2026-10-17 01:26
+
+import django.core.validators
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bookings', '0001_initial'),
+        ('travel', '0006_city'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SeatHold',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('num_seats', models.PositiveIntegerField(validators=[django.core.validators.MinValueValidator(1)])),
+                ('status', models.CharField(choices=[('active', 'Active'), ('converted', 'Converted to booking'), ('released', 'Released'), ('expired', 'Expired')], default='active', max_length=10)),
+                ('expires_at', models.DateTimeField()),
+                ('closed_at', models.DateTimeField(blank=True, help_text='When the hold was converted, released or expired', null=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('booking', models.OneToOneField(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='seat_hold', to='bookings.booking')),
+                ('travel_option', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='holds', to='travel.traveloption')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='seat_holds', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Seat Hold',
+                'verbose_name_plural': 'Seat Holds',
+                'ordering': ['-created_at'],
+                'indexes': [models.Index(condition=models.Q(('status', 'active')), fields=['expires_at'], name='travel_active_hold_expiry_idx'), models.Index(fields=['user', 'status'], name='travel_seat_user_id_839517_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,41 @@
+# Generated by Django 5.2.18 on 2026-10-17 01:54
+
+import django.db.models.deletion
+import travel.models
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('travel', '0007_seat_hold'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ArchivedTravelOption',
+            fields=[
+                ('id', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('travel_type', models.CharField(choices=[('flight', 'Flight'), ('train', 'Train'), ('bus', 'Bus')], max_length=10)),
+                ('departure_datetime', models.DateTimeField(db_index=True)),
+                ('arrival_datetime', models.DateTimeField(blank=True, null=True)),
+                ('price', models.DecimalField(decimal_places=2, max_digits=8)),
+                ('total_seats', models.PositiveIntegerField()),
+                ('available_seats', models.PositiveIntegerField()),
+                ('operator_name', models.CharField(blank=True, max_length=100)),
+                ('service_number', models.CharField(blank=True, max_length=50)),
+                ('description', models.TextField(blank=True)),
+                ('is_active', models.BooleanField()),
+                ('created_at', models.DateTimeField()),
+                ('updated_at', models.DateTimeField()),
+                ('archived_at', models.DateTimeField()),
+                ('destination', travel.models.CityForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='+', to='travel.city')),
+                ('source', travel.models.CityForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='+', to='travel.city')),
+            ],
+            options={
+                'verbose_name': 'Archived Travel Option',
+                'verbose_name_plural': 'Archived Travel Options',
+                'ordering': ['departure_datetime'],
+            },
+        ),
+    ]
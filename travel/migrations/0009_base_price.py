@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-17 02:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('travel', '0008_archived_travel_option'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='traveloption',
+            name='base_price',
+            field=models.DecimalField(blank=True, decimal_places=2, help_text='Operator fare that dynamic pricing starts from; empty until first repriced', max_digits=8, null=True),
+        ),
+    ]
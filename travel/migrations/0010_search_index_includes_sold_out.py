@@ -0,0 +1,21 @@
+# Generated by Django 5.2.18 on 2026-10-17 03:06
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('travel', '0009_base_price'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='traveloption',
+            name='travel_search_route_idx',
+        ),
+        migrations.AddIndex(
+            model_name='traveloption',
+            index=models.Index(condition=models.Q(('is_active', True)), fields=['source', 'destination', 'departure_datetime', 'id'], name='travel_search_route_idx'),
+        ),
+    ]
@@ -1,7 +1,47 @@
+from django.conf import settings
 from django.db import models
 from django.core.validators import MinValueValidator
+from django.db.models.fields.related_descriptors import ForwardManyToOneDescriptor
 from django.urls import reverse
-from .constants import INDIAN_CITIES, TRAVEL_TYPES
+from .constants import INDIAN_CITIES, SEAT_HOLD_STATUS_CHOICES, TRAVEL_TYPES
+
+
+class City(models.Model):
+    """
+    A city served by Travel Karo.
+
+    TravelOption points at cities with a two-byte key instead of repeating
+    the name in every row and route index entry. Names are resolved through
+    the in-process cache in travel.cities, not by joining.
+    """
+
+    id = models.SmallAutoField(primary_key=True)
+    code = models.SlugField(max_length=50, unique=True, help_text='Short stable identifier, e.g. navi-mumbai')
+    name = models.CharField(max_length=100, unique=True, help_text='Display name, also used in search URLs')
+    state = models.CharField(max_length=2, blank=True, help_text='State code, as in User.STATE_CHOICES')
+    latitude = models.DecimalField(max_digits=8, decimal_places=5, null=True, blank=True)
+    longitude = models.DecimalField(max_digits=8, decimal_places=5, null=True, blank=True)
+
+    class Meta:
+        verbose_name = 'City'
+        verbose_name_plural = 'Cities'
+        ordering = ['id']
+
+    def __str__(self):
+        return self.name
+
+
+class CachedCityDescriptor(ForwardManyToOneDescriptor):
+    """Resolve option.source / option.destination from travel.cities without a query"""
+
+    def get_object(self, instance):
+        from . import cities
+
+        return cities.get(getattr(instance, self.field.attname))
+
+
+class CityForeignKey(models.ForeignKey):
+    forward_related_accessor_class = CachedCityDescriptor
 
 
 class TravelOption(models.Model):
@@ -16,15 +56,19 @@ class TravelOption(models.Model):
         help_text='Type of travel (Flight, Train, Bus)'
     )
     
-    source = models.CharField(
-        max_length=100,
-        choices=INDIAN_CITIES,
+    # No single-column index: every route index below starts with source
+    source = CityForeignKey(
+        City,
+        on_delete=models.PROTECT,
+        db_index=False,
+        related_name='departures',
         help_text='Departure city'
     )
     
-    destination = models.CharField(
-        max_length=100,
-        choices=INDIAN_CITIES,
+    destination = CityForeignKey(
+        City,
+        on_delete=models.PROTECT,
+        related_name='arrivals',
         help_text='Arrival city'
     )
     
@@ -44,6 +88,15 @@ class TravelOption(models.Model):
         validators=[MinValueValidator(0.01)],
         help_text='Price in Indian Rupees (₹)'
     )
+
+    # Set by travel.pricing the first time it reprices the option
+    base_price = models.DecimalField(
+        max_digits=8,
+        decimal_places=2,
+        null=True,
+        blank=True,
+        help_text='Operator fare that dynamic pricing starts from; empty until first repriced'
+    )
     
     total_seats = models.PositiveIntegerField(
         validators=[MinValueValidator(1)],
@@ -64,8 +117,7 @@ class TravelOption(models.Model):
     
     service_number = models.CharField(
         max_length=50,
-        help_text='Flight number, train number, or bus service number',
-        blank=True
+        help_text='Flight number, train number, or bus service number'
     )
     
     description = models.TextField(
@@ -85,7 +137,24 @@ class TravelOption(models.Model):
         verbose_name = 'Travel Option'
         verbose_name_plural = 'Travel Options'
         ordering = ['departure_datetime']
+        constraints = [
+            # Natural key used by import_schedules to upsert operator schedules
+            models.UniqueConstraint(
+                fields=['operator_name', 'service_number', 'departure_datetime'],
+                name='travel_option_natural_key',
+            ),
+        ]
         indexes = [
+            # Matches TravelSearchView: equality on the route, range and
+            # keyset order on departure, restricted to active rows (sold-out
+            # ones are listed for the waitlist)
+            models.Index(
+                fields=['source', 'destination', 'departure_datetime', 'id'],
+                name='travel_search_route_idx',
+                condition=models.Q(is_active=True),
+            ),
+            # Delta pulls from the partner feed (?since=updated_at)
+            models.Index(fields=['updated_at', 'id'], name='travel_updated_idx'),
             models.Index(fields=['source', 'destination']),
             models.Index(fields=['departure_datetime']),
             models.Index(fields=['travel_type']),
@@ -127,7 +196,7 @@ class TravelOption(models.Model):
         from django.core.exceptions import ValidationError
         
         # Ensure source and destination are different
-        if self.source == self.destination:
+        if self.source_id == self.destination_id:
             raise ValidationError('Source and destination cannot be the same.')
         
         # Ensure available seats don't exceed total seats
@@ -141,3 +210,123 @@ class TravelOption(models.Model):
     def save(self, *args, **kwargs):
         self.clean()
         super().save(*args, **kwargs)
+
+
+class FareCalendarDay(models.Model):
+    """
+    Cheapest bookable fare for a route, travel type and local date.
+
+    Derived from TravelOption and kept current by travel.fare_calendar; the
+    unique constraint doubles as the index for 60-day calendar reads.
+    """
+
+    source = models.CharField(max_length=100, choices=INDIAN_CITIES)
+    destination = models.CharField(max_length=100, choices=INDIAN_CITIES)
+    travel_date = models.DateField(help_text='Local departure date')
+    travel_type = models.CharField(max_length=10, choices=TRAVEL_TYPES)
+
+    min_price = models.DecimalField(max_digits=8, decimal_places=2)
+    seats_available = models.PositiveIntegerField()
+    option_count = models.PositiveIntegerField()
+
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name = 'Fare Calendar Day'
+        verbose_name_plural = 'Fare Calendar'
+        ordering = ['source', 'destination', 'travel_date', 'travel_type']
+        constraints = [
+            models.UniqueConstraint(
+                fields=['source', 'destination', 'travel_date', 'travel_type'],
+                name='fare_calendar_day_unique',
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.source} to {self.destination} ({self.travel_type}) on {self.travel_date}: ₹{self.min_price:,.2f}"
+
+
+class SeatHold(models.Model):
+    """
+    Seats set aside for a user while they check out.
+
+    The seats leave TravelOption.available_seats when the hold is made and
+    come back when it is released or expires, unless it was converted into
+    a booking first. All state changes go through travel.inventory.
+    """
+
+    travel_option = models.ForeignKey(TravelOption, on_delete=models.CASCADE, related_name='holds')
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='seat_holds')
+    num_seats = models.PositiveIntegerField(validators=[MinValueValidator(1)])
+    status = models.CharField(max_length=10, choices=SEAT_HOLD_STATUS_CHOICES, default='active')
+    expires_at = models.DateTimeField()
+    closed_at = models.DateTimeField(
+        null=True, blank=True, help_text='When the hold was converted, released or expired'
+    )
+    booking = models.OneToOneField(
+        'bookings.Booking', on_delete=models.SET_NULL, null=True, blank=True, related_name='seat_hold'
+    )
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        verbose_name = 'Seat Hold'
+        verbose_name_plural = 'Seat Holds'
+        ordering = ['-created_at']
+        indexes = [
+            # The expiry sweeper reads active holds in expiry order; closed
+            # holds never enter the index
+            models.Index(
+                fields=['expires_at'],
+                name='travel_active_hold_expiry_idx',
+                condition=models.Q(status='active'),
+            ),
+            models.Index(fields=['user', 'status']),
+        ]
+
+    def __str__(self):
+        return f"{self.num_seats} seat(s) on {self.travel_option_id} for {self.user_id} ({self.status})"
+
+    def is_active(self):
+        from django.utils import timezone
+
+        return self.status == 'active' and self.expires_at > timezone.now()
+
+
+class ArchivedTravelOption(models.Model):
+    """
+    A departed TravelOption moved out of the hot table.
+
+    Rows keep their original id and are written only by bookings.archive,
+    which moves an option together with its bookings. The table carries
+    none of TravelOption's search indexes.
+    """
+
+    id = models.BigIntegerField(primary_key=True)
+    travel_type = models.CharField(max_length=10, choices=TRAVEL_TYPES)
+    source = CityForeignKey(City, on_delete=models.PROTECT, related_name='+')
+    destination = CityForeignKey(City, on_delete=models.PROTECT, related_name='+')
+    departure_datetime = models.DateTimeField(db_index=True)
+    arrival_datetime = models.DateTimeField(null=True, blank=True)
+    price = models.DecimalField(max_digits=8, decimal_places=2)
+    total_seats = models.PositiveIntegerField()
+    available_seats = models.PositiveIntegerField()
+    operator_name = models.CharField(max_length=100, blank=True)
+    service_number = models.CharField(max_length=50, blank=True)
+    description = models.TextField(blank=True)
+    is_active = models.BooleanField()
+    created_at = models.DateTimeField()
+    updated_at = models.DateTimeField()
+    archived_at = models.DateTimeField()
+
+    class Meta:
+        verbose_name = 'Archived Travel Option'
+        verbose_name_plural = 'Archived Travel Options'
+        ordering = ['departure_datetime']
+
+    __str__ = TravelOption.__str__
+    get_formatted_price = TravelOption.get_formatted_price
+    get_duration = TravelOption.get_duration
+    get_occupancy_percentage = TravelOption.get_occupancy_percentage
+
+    def is_available(self):
+        return False
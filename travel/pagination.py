@@ -0,0 +1,205 @@
+"""
+Keyset (cursor) pagination for Travel Karo list views
+
+Django's Paginator uses LIMIT/OFFSET, so deep pages scan and throw away
+every earlier row and each page pays a separate COUNT(*). KeysetPaginator
+instead seeks past the last row shown using an index on the ordering
+columns, e.g. (departure_datetime, id), so page 500 costs the same as
+page 1. Pages are addressed by opaque next/previous tokens instead of
+page numbers.
+"""
+
+import base64
+import datetime
+import decimal
+import json
+
+from django.db.models import Q
+from django.http import Http404
+
+NEXT = 'n'
+PREVIOUS = 'p'
+
+
+class InvalidCursor(ValueError):
+    """Raised when a pagination token cannot be decoded"""
+
+
+def _encode_value(value):
+    # Unlike DjangoJSONEncoder, keep full microsecond precision; a truncated
+    # timestamp would make the seek skip or repeat rows
+    if isinstance(value, (datetime.datetime, datetime.date, datetime.time)):
+        return value.isoformat()
+    if isinstance(value, decimal.Decimal):
+        return str(value)
+    raise TypeError(f'Cannot encode {type(value).__name__} in a pagination token')
+
+
+class KeysetPage:
+    """
+    One page of results.
+
+    Holds no reference to the queryset so it can be pickled into a cache.
+    """
+
+    def __init__(self, object_list, has_next, has_previous, next_token=None,
+                 previous_token=None, approximate_total=None, total_is_capped=False):
+        self.object_list = object_list
+        self._has_next = has_next
+        self._has_previous = has_previous
+        self.next_token = next_token
+        self.previous_token = previous_token
+        self.approximate_total = approximate_total
+        self.total_is_capped = total_is_capped
+
+    def __repr__(self):
+        return f'<KeysetPage of {len(self.object_list)} objects>'
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __getitem__(self, index):
+        return self.object_list[index]
+
+    def has_next(self):
+        return self._has_next
+
+    def has_previous(self):
+        return self._has_previous
+
+    def has_other_pages(self):
+        return self._has_next or self._has_previous
+
+
+class KeysetPaginator:
+    """
+    Paginate a queryset by seeking on its ordering columns.
+
+    ordering names the key columns; the last one must be unique (normally
+    'id') so every row has a distinct position. count_limit, when set, adds
+    a bounded COUNT over at most count_limit + 1 rows for an approximate
+    total; leave it as None to skip counting entirely.
+    """
+
+    def __init__(self, queryset, per_page, ordering=('id',), descending=False, count_limit=None):
+        self.queryset = queryset
+        self.per_page = int(per_page)
+        self.ordering = tuple(ordering)
+        self.descending = descending
+        self.count_limit = count_limit
+        self._fields = [queryset.model._meta.get_field(name) for name in self.ordering]
+
+    def _order_by(self, reverse=False):
+        descending = self.descending != reverse
+        return [f'-{name}' if descending else name for name in self.ordering]
+
+    def _seek(self, values, reverse=False):
+        """Q for rows strictly after values in (optionally reversed) page order"""
+        descending = self.descending != reverse
+        lookup = 'lt' if descending else 'gt'
+        condition = Q()
+        for position, name in enumerate(self.ordering):
+            equal = {prefix: values[i] for i, prefix in enumerate(self.ordering[:position])}
+            condition |= Q(**equal, **{f'{name}__{lookup}': values[position]})
+        return condition
+
+    def _key(self, obj):
+        return [getattr(obj, field.attname) for field in self._fields]
+
+    def encode_token(self, direction, obj):
+        payload = json.dumps([direction, self._key(obj)], default=_encode_value, separators=(',', ':'))
+        return base64.urlsafe_b64encode(payload.encode()).decode().rstrip('=')
+
+    def decode_token(self, token):
+        try:
+            padded = token + '=' * (-len(token) % 4)
+            direction, raw_values = json.loads(base64.urlsafe_b64decode(padded.encode()))
+            if direction not in (NEXT, PREVIOUS) or len(raw_values) != len(self._fields):
+                raise ValueError(token)
+            values = [field.to_python(value) for field, value in zip(self._fields, raw_values)]
+        except Exception as exc:
+            raise InvalidCursor(f'Invalid pagination token: {token!r}') from exc
+        return direction, values
+
+    def _rows_query(self, token):
+        queryset = self.queryset
+        direction = NEXT
+        if token:
+            direction, values = self.decode_token(token)
+            queryset = queryset.filter(self._seek(values, reverse=direction == PREVIOUS))
+        reverse = direction == PREVIOUS
+        return queryset.order_by(*self._order_by(reverse))[:self.per_page + 1], reverse
+
+    def _count_query(self):
+        return self.queryset.order_by()[:self.count_limit + 1]
+
+    def _build_page(self, rows, token, reverse, count):
+        has_more = len(rows) > self.per_page
+        rows = rows[:self.per_page]
+        if reverse:
+            rows.reverse()
+            has_next, has_previous = bool(token), has_more
+        else:
+            has_next, has_previous = has_more, bool(token)
+
+        page = KeysetPage(
+            rows,
+            has_next=has_next,
+            has_previous=has_previous,
+            next_token=self.encode_token(NEXT, rows[-1]) if has_next and rows else None,
+            previous_token=self.encode_token(PREVIOUS, rows[0]) if has_previous and rows else None,
+        )
+        if count is not None:
+            page.approximate_total = min(count, self.count_limit)
+            page.total_is_capped = count > self.count_limit
+        return page
+
+    def page(self, token=None):
+        """Return the page addressed by token, or the first page"""
+        rows_query, reverse = self._rows_query(token)
+        rows = list(rows_query)
+        count = self._count_query().count() if self.count_limit is not None else None
+        return self._build_page(rows, token, reverse, count)
+
+    async def apage(self, token=None):
+        """Async version of page() for async views"""
+        rows_query, reverse = self._rows_query(token)
+        rows = [row async for row in rows_query.aiterator()]
+        count = await self._count_query().acount() if self.count_limit is not None else None
+        return self._build_page(rows, token, reverse, count)
+
+
+class KeysetPaginationMixin:
+    """
+    Drop-in replacement for ListView's OFFSET pagination.
+
+    Views set keyset_ordering (and keyset_descending for newest-first
+    lists); templates get page_obj with next_token/previous_token.
+    """
+    cursor_kwarg = 'cursor'
+    keyset_ordering = ('id',)
+    keyset_descending = False
+    approximate_count_limit = None
+
+    def get_paginator(self, queryset, per_page, orphans=0, allow_empty_first_page=True, **kwargs):
+        return KeysetPaginator(
+            queryset,
+            per_page,
+            ordering=self.keyset_ordering,
+            descending=self.keyset_descending,
+            count_limit=self.approximate_count_limit,
+        )
+
+    def get_page(self, paginator):
+        return paginator.page(self.request.GET.get(self.cursor_kwarg) or None)
+
+    def paginate_queryset(self, queryset, page_size):
+        paginator = self.get_paginator(queryset, page_size)
+        try:
+            page = self.get_page(paginator)
+        except InvalidCursor:
+            raise Http404('Invalid page.')
+        return (paginator, page, page.object_list, page.has_other_pages())
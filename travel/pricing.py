@@ -0,0 +1,247 @@
+"""
+Dynamic pricing for Travel Karo
+
+reprice() recomputes the price of every future active TravelOption from
+its base fare and three factors:
+
+    occupancy           share of seats sold; fuller services cost more
+    time to departure   a last-minute premium that fades over a few days
+                        and a small discount for booking weeks ahead
+    route demand        occupancy of the option's route against the
+                        occupancy of all routes
+
+The result is kept within the PRICE_LIMITS floor and ceiling of the travel
+type and within MIN_RATIO..MAX_RATIO of the base fare, then rounded to
+whole rupees. The base fare is the operator's price: base_price once an
+option has been repriced (the first repricing copies price into it), price
+before that.
+
+Options are loaded once as columns and priced in one vectorized pass with
+NumPy when it is installed (pip install numpy); without it the same
+formula runs row by row. Only prices that changed are written, with
+chunked executemany UPDATEs, each guarded by the price that was read so a
+concurrent edit is never overwritten.
+
+Repricing changes too many rows to send travel_options_changed with model
+instances. It refreshes the same derived data itself instead: search
+versions of the changed routes and the fare calendar days of the changed
+options; the connection graph picks the rows up by updated_at.
+"""
+
+import math
+from collections import defaultdict, namedtuple
+from datetime import datetime, timezone as dt_timezone
+from decimal import Decimal
+
+from django.db import connection, transaction
+from django.db.models import CharField, FloatField
+from django.db.models.functions import Cast, Coalesce
+from django.utils import timezone
+
+from . import cities, fare_calendar, search_cache
+from .constants import PRICE_LIMITS
+from .models import TravelOption
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+# price factor = OCCUPANCY_BASE + OCCUPANCY_WEIGHT * occupancy²: 0.85 empty,
+# 1.0 half full, 1.45 sold out
+OCCUPANCY_BASE = 0.85
+OCCUPANCY_WEIGHT = 0.6
+
+# + LAST_MINUTE_PREMIUM at departure, decaying over LAST_MINUTE_DAYS;
+# - EARLY_DISCOUNT approached over EARLY_DAYS
+LAST_MINUTE_PREMIUM = 0.3
+LAST_MINUTE_DAYS = 3
+EARLY_DISCOUNT = 0.1
+EARLY_DAYS = 30
+
+# A route twice as full as average costs DEMAND_WEIGHT more, within bounds
+DEMAND_WEIGHT = 0.15
+DEMAND_MIN = 0.9
+DEMAND_MAX = 1.15
+
+# New prices stay within these multiples of the base fare
+MIN_RATIO = 0.7
+MAX_RATIO = 2.0
+
+LOAD_CHUNK = 20000
+WRITE_CHUNK = 5000
+
+Columns = namedtuple(
+    'Columns',
+    'ids travel_types sources destinations departures days total_seats available_seats prices base_prices',
+)
+PriceChange = namedtuple('PriceChange', 'option_id old_price new_price')
+RepricingResult = namedtuple('RepricingResult', 'options changes written')
+
+
+def load(now):
+    """Every future active option as Columns of plain lists, in id order"""
+    columns = Columns(*([] for _ in Columns._fields))
+    # Departures are read as text and base fares as floats: fromisoformat()
+    # is several times faster than the ORM's per-row datetime conversion
+    rows = TravelOption.objects.filter(
+        is_active=True, departure_datetime__gt=now
+    ).order_by('id').values_list(
+        'id', 'travel_type', 'source_id', 'destination_id', Cast('departure_datetime', CharField()),
+        'total_seats', 'available_seats', 'price', Cast(Coalesce('base_price', 'price'), FloatField()),
+    )
+    for row in rows.iterator(chunk_size=LOAD_CHUNK):
+        option_id, travel_type, source_id, destination_id, departure, total, available, price, base = row
+        departure = datetime.fromisoformat(departure)
+        if departure.tzinfo is None:
+            # SQLite stores UTC without an offset
+            departure = departure.replace(tzinfo=dt_timezone.utc)
+        columns.ids.append(option_id)
+        columns.travel_types.append(travel_type)
+        columns.sources.append(source_id)
+        columns.destinations.append(destination_id)
+        columns.departures.append(departure)
+        columns.days.append((departure - now).total_seconds() / 86400)
+        columns.total_seats.append(total)
+        columns.available_seats.append(available)
+        columns.prices.append(price)
+        columns.base_prices.append(base)
+    return columns
+
+
+def _compute_numpy(columns):
+    total = np.array(columns.total_seats, dtype=float)
+    sold = total - np.array(columns.available_seats, dtype=float)
+    days = np.array(columns.days)
+    base = np.array(columns.base_prices)
+
+    routes = np.array(columns.sources, dtype=np.int64) << 32 | np.array(columns.destinations, dtype=np.int64)
+    _, route_index = np.unique(routes, return_inverse=True)
+    overall = sold.sum() / total.sum()
+    if overall > 0:
+        route_occupancy = np.bincount(route_index, weights=sold) / np.bincount(route_index, weights=total)
+        demand = np.clip(1 + DEMAND_WEIGHT * (route_occupancy / overall - 1), DEMAND_MIN, DEMAND_MAX)[route_index]
+    else:
+        demand = 1.0
+
+    occupancy = sold / np.maximum(total, 1)
+    price = (
+        base
+        * (OCCUPANCY_BASE + OCCUPANCY_WEIGHT * occupancy ** 2)
+        * (1 + LAST_MINUTE_PREMIUM * np.exp(-days / LAST_MINUTE_DAYS)
+           - EARLY_DISCOUNT * (1 - np.exp(-days / EARLY_DAYS)))
+        * demand
+    )
+
+    types = np.array(columns.travel_types)
+    floors, ceilings = np.zeros(len(types)), np.full(len(types), np.inf)
+    for travel_type, (floor, ceiling) in PRICE_LIMITS.items():
+        of_type = types == travel_type
+        floors[of_type], ceilings[of_type] = floor, ceiling
+    price = np.minimum(np.maximum(price, np.maximum(floors, base * MIN_RATIO)),
+                       np.minimum(ceilings, base * MAX_RATIO))
+    return np.maximum(np.floor(price + 0.5), 1).tolist()
+
+
+def _compute_python(columns):
+    sold_by_route, seats_by_route = defaultdict(int), defaultdict(int)
+    routes = list(zip(columns.sources, columns.destinations))
+    for route, total, available in zip(routes, columns.total_seats, columns.available_seats):
+        sold_by_route[route] += total - available
+        seats_by_route[route] += total
+    seats = sum(seats_by_route.values())
+    overall = sum(sold_by_route.values()) / seats if seats else 0
+    demand = {
+        route: min(max(1 + DEMAND_WEIGHT * (sold_by_route[route] / seats_by_route[route] / overall - 1),
+                       DEMAND_MIN), DEMAND_MAX) if overall > 0 else 1.0
+        for route in seats_by_route
+    }
+
+    prices = []
+    for route, travel_type, days, total, available, base in zip(
+        routes, columns.travel_types, columns.days, columns.total_seats,
+        columns.available_seats, columns.base_prices,
+    ):
+        occupancy = (total - available) / max(total, 1)
+        price = (
+            base
+            * (OCCUPANCY_BASE + OCCUPANCY_WEIGHT * occupancy ** 2)
+            * (1 + LAST_MINUTE_PREMIUM * math.exp(-days / LAST_MINUTE_DAYS)
+               - EARLY_DISCOUNT * (1 - math.exp(-days / EARLY_DAYS)))
+            * demand[route]
+        )
+        floor, ceiling = PRICE_LIMITS.get(travel_type, (0, math.inf))
+        price = min(max(price, max(floor, base * MIN_RATIO)), min(ceiling, base * MAX_RATIO))
+        prices.append(max(math.floor(price + 0.5), 1))
+    return prices
+
+
+def compute_prices(columns, vectorized=None):
+    """New whole-rupee prices for columns, in the same order"""
+    if vectorized is None:
+        vectorized = np is not None
+    if not columns.ids:
+        return []
+    return _compute_numpy(columns) if vectorized else _compute_python(columns)
+
+
+def _write(changes, now, chunk_size):
+    """Write changed prices in chunks of one transaction each; returns rows updated"""
+    quote = connection.ops.quote_name
+    sql = 'UPDATE {table} SET {price} = %s, {base} = COALESCE({base}, {price}), {updated} = %s ' \
+          'WHERE {id} = %s AND {price} = %s'.format(
+              table=quote(TravelOption._meta.db_table), price=quote('price'), base=quote('base_price'),
+              updated=quote('updated_at'), id=quote('id'),
+          )
+    updated_at = connection.ops.adapt_datetimefield_value(now)
+    written = 0
+    with connection.cursor() as cursor:
+        for start in range(0, len(changes), chunk_size):
+            with transaction.atomic():
+                cursor.executemany(sql, [
+                    (change.new_price, updated_at, change.option_id, change.old_price)
+                    for change in changes[start:start + chunk_size]
+                ])
+                written += cursor.rowcount
+    return written
+
+
+def _bump_search_versions(routes):
+    for source_id, destination_id in routes:
+        search_cache.bump_route_version(cities.name_for(source_id), cities.name_for(destination_id))
+
+
+def reprice(dry_run=False, now=None, chunk_size=WRITE_CHUNK, vectorized=None):
+    """
+    Reprice every future active option and write the changed prices.
+
+    With dry_run nothing is written. Returns a RepricingResult with the
+    number of options priced, the PriceChanges and the rows written.
+    """
+    now = now or timezone.now()
+    columns = load(now)
+    new_prices = compute_prices(columns, vectorized)
+    changed = [
+        i for i, (old, new) in enumerate(zip(columns.prices, new_prices)) if old != new
+    ]
+    # Whole-rupee prices repeat a lot; build each Decimal once
+    decimals = {}
+    changes = [
+        PriceChange(columns.ids[i], columns.prices[i], decimals.get(new_prices[i]) or decimals.setdefault(
+            new_prices[i], Decimal(int(new_prices[i])).quantize(Decimal('0.01'))
+        ))
+        for i in changed
+    ]
+    if dry_run or not changes:
+        return RepricingResult(len(columns.ids), changes, 0)
+
+    written = _write(changes, now, chunk_size)
+
+    routes = {(columns.sources[i], columns.destinations[i]) for i in changed}
+    transaction.on_commit(lambda: _bump_search_versions(routes))
+    fare_calendar.schedule_refresh(
+        fare_calendar.day_key(columns.sources[i], columns.destinations[i], columns.departures[i],
+                              columns.travel_types[i])
+        for i in changed
+    )
+    return RepricingResult(len(columns.ids), changes, written)
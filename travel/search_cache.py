@@ -0,0 +1,161 @@
+"""
+Versioned cache for travel search results
+
+Cache keys combine the normalized search parameters, the page requested and
+a version counter for the searched route. Saving, booking or cancelling a
+TravelOption bumps the counter of its route (see travel.signals), so stale
+pages simply stop being addressed and age out of the LRU-bounded cache
+backend instead of being deleted one by one.
+
+Searches that do not pin both source and destination use a global version
+that is bumped on every change.
+
+Every process must share the search cache for this to hold; see the
+CACHES note in settings and travel.checks.
+"""
+
+import hashlib
+import json
+import threading
+import time
+from datetime import datetime
+
+from django.conf import settings
+from django.core.cache import caches
+
+SEARCH_PARAMS = ('source', 'destination', 'travel_type', 'date')
+ANY = '*'
+
+_stats_lock = threading.Lock()
+_stats = {'hits': 0, 'misses': 0}
+
+
+def get_search_cache():
+    return caches[getattr(settings, 'SEARCH_CACHE_ALIAS', 'search')]
+
+
+def normalize_search_params(params):
+    """
+    Reduce a query dict to the parameters that affect the result set.
+
+    Empty values are dropped, strings are stripped and dates that cannot
+    be parsed are ignored, exactly like TravelSearchView ignores them.
+    """
+    normalized = {}
+    for name in SEARCH_PARAMS:
+        value = (params.get(name) or '').strip()
+        if not value:
+            continue
+        if name == 'date':
+            try:
+                value = datetime.strptime(value, '%Y-%m-%d').date().isoformat()
+            except ValueError:
+                continue
+        normalized[name] = value
+    return normalized
+
+
+def _version_key(source, destination):
+    return f'search:version:{source}|{destination}'
+
+
+def _initial_version():
+    # Versions live in the same LRU cache and can be evicted. Seeding a new
+    # counter from the clock keeps it from reusing an old version number
+    # whose pages may still be cached.
+    return int(time.time() * 1000)
+
+
+def route_version(source, destination):
+    cache = get_search_cache()
+    key = _version_key(source, destination)
+    version = cache.get(key)
+    if version is None:
+        # Versions never expire; incr() keeps that, so they only leave the
+        # cache when it is full and culled
+        initial = _initial_version()
+        cache.add(key, initial, timeout=None)
+        version = cache.get(key, initial)
+    return version
+
+
+def bump_route_version(source, destination):
+    """Invalidate cached searches for a route and every wildcard search"""
+    cache = get_search_cache()
+    for key in (_version_key(source, destination), _version_key(ANY, ANY)):
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.set(key, _initial_version(), timeout=None)
+
+
+def search_version(params):
+    """Version counter covering the result set of normalized search params"""
+    if 'source' in params and 'destination' in params:
+        return route_version(params['source'], params['destination'])
+    return route_version(ANY, ANY)
+
+
+def make_key(params, page_key):
+    payload = json.dumps(
+        [search_version(params), sorted(params.items()), str(page_key)],
+        separators=(',', ':'),
+    )
+    return 'search:page:' + hashlib.md5(payload.encode()).hexdigest()
+
+
+def get_or_set(params, page_key, producer):
+    """
+    Return the cached value for a search page, calling producer() on a miss.
+
+    Exceptions from producer (e.g. Http404 for an invalid page) propagate
+    and nothing is cached.
+    """
+    cache = get_search_cache()
+    key = make_key(params, page_key)
+    value = cache.get(key)
+    if value is not None:
+        _record('hits')
+        return value
+
+    _record('misses')
+    value = producer()
+    cache.set(key, value)
+    return value
+
+
+async def aget_or_set(params, page_key, producer):
+    """Async version of get_or_set(); producer is an async callable"""
+    from asgiref.sync import sync_to_async
+
+    cache = get_search_cache()
+    key = await sync_to_async(make_key)(params, page_key)
+    value = await cache.aget(key)
+    if value is not None:
+        _record('hits')
+        return value
+
+    _record('misses')
+    value = await producer()
+    await cache.aset(key, value)
+    return value
+
+
+def _record(counter):
+    with _stats_lock:
+        _stats[counter] += 1
+
+
+def get_stats():
+    """Return hit/miss counters for this process"""
+    with _stats_lock:
+        stats = dict(_stats)
+    lookups = stats['hits'] + stats['misses']
+    stats['hit_ratio'] = round(stats['hits'] / lookups, 3) if lookups else 0.0
+    return stats
+
+
+def reset_stats():
+    with _stats_lock:
+        for counter in _stats:
+            _stats[counter] = 0
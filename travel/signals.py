@@ -0,0 +1,122 @@
+"""
+Signals for the travel app
+
+TravelOption rows are also changed with set-based UPDATEs (see
+travel.inventory) which never fire post_save. Code doing that sends
+travel_options_changed instead, so caches and derived data can react to
+both kinds of change through the same receivers.
+
+seats_released is sent as well whenever seats come back (a cancellation,
+an expired hold, more capacity), inside the transaction that freed them,
+so the waitlist can take them before anyone else sees them.
+"""
+
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete, pre_save
+from django.dispatch import Signal, receiver
+
+from .models import City, TravelOption
+
+# Sent with options=<iterable of TravelOption> after seats or prices change
+travel_options_changed = Signal()
+
+# Sent with options=<iterable of TravelOption> after seats were given back
+seats_released = Signal()
+
+
+def _bump_search_versions(options):
+    from .search_cache import bump_route_version
+
+    routes = {(option.source.name, option.destination.name) for option in options}
+    for source, destination in routes:
+        bump_route_version(source, destination)
+
+
+def _schedule_search_invalidation(options):
+    # Bump after commit so a concurrent request cannot re-cache the old rows
+    # under the new version
+    options = list(options)
+    transaction.on_commit(lambda: _bump_search_versions(options))
+
+
+def _schedule_connection_update(options):
+    from . import connections
+
+    options = list(options)
+    transaction.on_commit(lambda: connections.options_changed(options))
+
+
+@receiver(post_save, sender=City)
+@receiver(post_delete, sender=City)
+def reset_city_cache(sender, **kwargs):
+    from . import cities
+
+    cities.reset()
+
+
+@receiver(post_save, sender=TravelOption)
+@receiver(post_delete, sender=TravelOption)
+def invalidate_search_on_save(sender, instance, **kwargs):
+    _schedule_search_invalidation([instance])
+
+
+@receiver(travel_options_changed)
+def invalidate_search_on_change(sender, options, **kwargs):
+    _schedule_search_invalidation(options)
+
+
+@receiver(post_save, sender=TravelOption)
+@receiver(travel_options_changed)
+def update_connection_graph(sender, instance=None, options=None, **kwargs):
+    _schedule_connection_update([instance] if options is None else options)
+
+
+@receiver(post_delete, sender=TravelOption)
+def remove_from_connection_graph(sender, instance, **kwargs):
+    from . import connections
+
+    option_id = instance.pk
+    transaction.on_commit(lambda: connections.option_deleted(option_id))
+
+
+@receiver(pre_save, sender=TravelOption)
+def remember_fare_calendar_day(sender, instance, **kwargs):
+    # A save can move an option to another route or day; the old day must be
+    # refreshed too
+    if instance._state.adding or instance.pk is None:
+        return
+    from .fare_calendar import day_key
+
+    previous = TravelOption.objects.filter(pk=instance.pk).values_list(
+        'source', 'destination', 'departure_datetime', 'travel_type', 'available_seats'
+    ).first()
+    instance._previous_fare_calendar_key = day_key(*previous[:4]) if previous else None
+    instance._previous_available_seats = previous[4] if previous else None
+
+
+@receiver(post_save, sender=TravelOption)
+@receiver(post_delete, sender=TravelOption)
+def refresh_fare_calendar_on_save(sender, instance, **kwargs):
+    from .fare_calendar import option_key, schedule_refresh
+
+    keys = {option_key(instance)}
+    previous = getattr(instance, '_previous_fare_calendar_key', None)
+    if previous:
+        keys.add(previous)
+    schedule_refresh(keys)
+
+
+@receiver(travel_options_changed)
+def refresh_fare_calendar_on_change(sender, options, **kwargs):
+    from .fare_calendar import option_key, schedule_refresh
+
+    schedule_refresh(option_key(option) for option in options)
+
+
+@receiver(post_save, sender=TravelOption)
+def release_added_capacity(sender, instance, created, **kwargs):
+    # Seats added by editing an option (more capacity, a manual fix) are
+    # released like any other
+    previous = getattr(instance, '_previous_available_seats', None)
+    if not created and previous is not None and instance.available_seats > previous:
+        seats_released.send(sender=TravelOption, options=[instance])
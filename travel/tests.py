@@ -1,3 +1,919 @@
-from django.test import TestCase
+import json
+import os
+import re
+import tempfile
+import time
+import unittest
+from io import StringIO
+from datetime import datetime, timedelta
+from decimal import Decimal
+from unittest import mock
 
-# Create your tests here.
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.db import connection
+from django.contrib.auth.models import AnonymousUser
+from django.http import Http404
+from django.test import AsyncRequestFactory, TestCase, RequestFactory, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from bookings.models import Booking, Notification, WaitlistEntry
+from travel_booking.testing import make_option, make_user
+from . import cities, connections, fare_calendar, feed, pricing, search_cache
+from .inventory import (
+    HoldExpired, InsufficientSeats, convert_hold, expire_holds, hold_seats, release_hold,
+    release_seats, reserve_seats,
+)
+from .checks import check_search_cache_is_shared
+from .constants import INDIAN_CITIES
+from .models import City, FareCalendarDay, SeatHold, TravelOption
+from .pagination import KeysetPaginator, InvalidCursor
+from .views import AsyncTravelDetailView, AsyncTravelSearchView, TravelOptionFeedView, TravelSearchView, search_queryset
+
+
+class InventoryTests(TestCase):
+
+    def setUp(self):
+        self.option = make_option(total_seats=5, available_seats=5)
+
+    def test_reserve_decrements_only_when_enough_seats(self):
+        reserve_seats(self.option, 3)
+        self.option.refresh_from_db()
+        self.assertEqual(self.option.available_seats, 2)
+
+        with self.assertRaises(InsufficientSeats):
+            reserve_seats(self.option, 3)
+        self.option.refresh_from_db()
+        self.assertEqual(self.option.available_seats, 2)
+
+    def test_reserve_uses_database_value_not_stale_instance(self):
+        stale = TravelOption.objects.get(pk=self.option.pk)
+        reserve_seats(self.option, 5)
+
+        # The stale copy still thinks 5 seats are left
+        with self.assertRaises(InsufficientSeats):
+            reserve_seats(stale, 1)
+
+    def test_reserve_rejects_inactive_option(self):
+        TravelOption.objects.filter(pk=self.option.pk).update(is_active=False)
+        with self.assertRaises(InsufficientSeats):
+            reserve_seats(self.option, 1)
+
+    def test_reserve_is_a_single_update(self):
+        with self.assertNumQueries(1):
+            reserve_seats(self.option, 1)
+
+    def test_release_never_exceeds_total_seats(self):
+        reserve_seats(self.option, 2)
+        release_seats(self.option, 2)
+        with self.assertRaises(ValueError):
+            release_seats(self.option, 1)
+        self.option.refresh_from_db()
+        self.assertEqual(self.option.available_seats, 5)
+
+
+class BookTravelViewTests(TestCase):
+
+    def setUp(self):
+        self.user = make_user()
+        self.client.force_login(self.user)
+        self.option = make_option(total_seats=4, available_seats=4)
+        self.url = reverse('travel:book', kwargs={'pk': self.option.pk})
+
+    def test_booking_reserves_seats(self):
+        response = self.client.post(self.url, {'num_seats': 3})
+        booking = Booking.objects.get(user=self.user)
+        self.assertRedirects(
+            response, reverse('bookings:detail', kwargs={'pk': booking.pk}),
+            fetch_redirect_response=False
+        )
+        self.option.refresh_from_db()
+        self.assertEqual(self.option.available_seats, 1)
+
+    def test_booking_does_not_oversell(self):
+        self.client.post(self.url, {'num_seats': 3})
+        self.client.post(self.url, {'num_seats': 3})
+        self.option.refresh_from_db()
+        self.assertEqual(self.option.available_seats, 1)
+        self.assertEqual(Booking.objects.count(), 1)
+
+    def test_cancellation_restores_seats_once(self):
+        self.client.post(self.url, {'num_seats': 2})
+        booking = Booking.objects.get(user=self.user)
+
+        booking.cancel_booking()
+        self.option.refresh_from_db()
+        self.assertEqual(self.option.available_seats, 4)
+
+        with self.assertRaises(ValueError):
+            booking.cancel_booking()
+        self.option.refresh_from_db()
+        self.assertEqual(self.option.available_seats, 4)
+
+
+class SeatHoldTests(TestCase):
+
+    def setUp(self):
+        self.user = make_user()
+        self.option = make_option(total_seats=10, available_seats=10)
+
+    def seats_left(self, option=None):
+        option = option or self.option
+        option.refresh_from_db()
+        return option.available_seats
+
+    def test_hold_takes_seats_and_conversion_keeps_them(self):
+        hold = hold_seats(self.option, self.user, 3)
+        self.assertEqual(self.seats_left(), 7)
+        with self.assertRaises(InsufficientSeats):
+            hold_seats(self.option, self.user, 8)
+
+        booking = convert_hold(hold)
+        self.assertEqual((booking.num_seats, booking.total_price), (3, 4500))
+        self.assertEqual(self.seats_left(), 7)
+        hold.refresh_from_db()
+        self.assertEqual((hold.status, hold.booking), ('converted', booking))
+        with self.assertRaises(HoldExpired):
+            release_hold(hold)
+
+    def test_expired_hold_cannot_be_converted(self):
+        hold = hold_seats(self.option, self.user, 2, minutes=-1)
+        with self.assertRaises(HoldExpired):
+            convert_hold(hold)
+        self.assertFalse(Booking.objects.exists())
+
+    def test_sweeper_gives_expired_seats_back_in_batches(self):
+        other = make_option(total_seats=5, available_seats=5)
+        for option, seats in ((self.option, 1), (self.option, 2), (other, 4), (self.option, 1)):
+            hold_seats(option, self.user, seats, minutes=-1)
+        live = hold_seats(self.option, self.user, 1)
+        converted = hold_seats(other, self.user, 1, minutes=-1)
+        SeatHold.objects.filter(pk=converted.pk).update(status='converted')
+
+        with mock.patch.object(fare_calendar, 'refresh', wraps=fare_calendar.refresh) as refresh:
+            with self.captureOnCommitCallbacks(execute=True):
+                self.assertEqual(expire_holds(batch_size=2), 4)
+        # Two batches, one fare calendar refresh
+        refresh.assert_called_once_with({fare_calendar.option_key(self.option), fare_calendar.option_key(other)})
+        self.assertEqual((self.seats_left(), self.seats_left(other)), (9, 4))
+        self.assertEqual(SeatHold.objects.get(pk=live.pk).status, 'active')
+        self.assertEqual(SeatHold.objects.filter(status='expired').count(), 4)
+        self.assertEqual(expire_holds(), 0)
+
+    def test_release_and_command(self):
+        release_hold(hold_seats(self.option, self.user, 4))
+        hold_seats(self.option, self.user, 2, minutes=-1)
+        self.assertEqual(self.seats_left(), 8)
+
+        out = StringIO()
+        call_command('expire_seat_holds', '--once', stdout=out)
+        self.assertIn('Expired 1 seat holds', out.getvalue())
+        self.assertEqual(self.seats_left(), 10)
+
+    def test_checkout_flow(self):
+        self.client.force_login(self.user)
+        response = self.client.post(reverse('travel:hold', kwargs={'pk': self.option.pk}), {'num_seats': 2})
+        hold = SeatHold.objects.get()
+        checkout = reverse('travel:checkout', kwargs={'pk': hold.pk})
+        self.assertRedirects(response, checkout)
+        self.assertContains(self.client.get(checkout), 'Confirm Booking')
+
+        response = self.client.post(checkout)
+        booking = Booking.objects.get(user=self.user)
+        self.assertRedirects(
+            response, reverse('bookings:detail', kwargs={'pk': booking.pk}), fetch_redirect_response=False
+        )
+        self.assertEqual(self.seats_left(), 8)
+
+        self.client.force_login(make_user('someone_else'))
+        self.assertEqual(self.client.get(checkout).status_code, 404)
+
+
+# These exercise the search result cache, which sits under the page cache
+@override_settings(PAGE_CACHE_VIEWS={})
+class SearchCacheTests(TestCase):
+
+    def setUp(self):
+        search_cache.get_search_cache().clear()
+        search_cache.reset_stats()
+        self.option = make_option()
+        self.url = reverse('travel:search')
+        self.params = {'source': 'Delhi', 'destination': 'Mumbai'}
+
+    def test_normalize_drops_empty_and_invalid_values(self):
+        params = search_cache.normalize_search_params(
+            {'source': ' Delhi ', 'destination': '', 'date': 'not-a-date', 'page': '2'}
+        )
+        self.assertEqual(params, {'source': 'Delhi'})
+
+    def test_repeated_search_is_served_from_cache(self):
+        self.client.get(self.url, self.params)
+        with self.assertNumQueries(0):
+            response = self.client.get(self.url, self.params)
+        self.assertEqual(list(response.context['travel_options']), [self.option])
+        self.assertEqual(response.context['page_obj'].approximate_total, 1)
+        self.assertEqual(search_cache.get_stats()['hits'], 1)
+        self.assertEqual(search_cache.get_stats()['misses'], 1)
+
+    def test_booking_invalidates_route(self):
+        self.client.get(self.url, self.params)
+        with self.captureOnCommitCallbacks(execute=True):
+            reserve_seats(self.option, 4)
+
+        response = self.client.get(self.url, self.params)
+        self.assertEqual(response.context['travel_options'][0].available_seats, 6)
+        self.assertEqual(search_cache.get_stats()['misses'], 2)
+
+    def test_save_invalidates_route_and_wildcard_searches(self):
+        self.client.get(self.url, self.params)
+        self.client.get(self.url)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.option.price = 999
+            self.option.save()
+
+        self.client.get(self.url, self.params)
+        self.client.get(self.url)
+        self.assertEqual(search_cache.get_stats()['misses'], 4)
+
+    def test_route_versions_outlive_the_page_timeout(self):
+        version = search_cache.route_version('Delhi', 'Mumbai')
+        search_cache.bump_route_version('Delhi', 'Mumbai')
+        later = time.time() + 10 * search_cache.get_search_cache().default_timeout
+        with mock.patch('time.time', return_value=later):
+            self.assertEqual(search_cache.route_version('Delhi', 'Mumbai'), version + 1)
+
+    def test_check_requires_a_shared_cache_for_several_workers(self):
+        self.assertEqual(check_search_cache_is_shared(None), [])
+        with override_settings(WEB_CONCURRENCY=4):
+            self.assertEqual([e.id for e in check_search_cache_is_shared(None)], ['travel.E001'])
+        redis = {'BACKEND': 'django.core.cache.backends.redis.RedisCache', 'LOCATION': 'redis://cache:6379'}
+        with override_settings(WEB_CONCURRENCY=4, CACHES={**settings.CACHES, 'search': redis}):
+            self.assertEqual(check_search_cache_is_shared(None), [])
+
+    def test_other_routes_stay_cached(self):
+        self.client.get(self.url, {'source': 'Pune', 'destination': 'Goa'})
+        with self.captureOnCommitCallbacks(execute=True):
+            reserve_seats(self.option, 1)
+
+        self.client.get(self.url, {'source': 'Pune', 'destination': 'Goa'})
+        self.assertEqual(search_cache.get_stats()['hits'], 1)
+
+
+class KeysetPaginatorTests(TestCase):
+
+    def setUp(self):
+        base = timezone.now() + timedelta(days=3)
+        # Pairs of options share a departure time so the id tie-breaker matters
+        for i in range(25):
+            make_option(departure_datetime=base + timedelta(hours=i // 2))
+        self.queryset = TravelOption.objects.all()
+        self.expected = list(self.queryset.order_by('departure_datetime', 'id'))
+
+    def walk(self, paginator):
+        pages = [paginator.page()]
+        while pages[-1].has_next():
+            pages.append(paginator.page(pages[-1].next_token))
+        return pages
+
+    def test_forward_walk_visits_every_row_once(self):
+        pages = self.walk(KeysetPaginator(self.queryset, 10, ordering=('departure_datetime', 'id')))
+        self.assertEqual([len(page) for page in pages], [10, 10, 5])
+        self.assertEqual([obj for page in pages for obj in page], self.expected)
+        self.assertFalse(pages[0].has_previous())
+
+    def test_previous_token_returns_preceding_page(self):
+        paginator = KeysetPaginator(self.queryset, 10, ordering=('departure_datetime', 'id'))
+        pages = self.walk(paginator)
+        back = paginator.page(pages[2].previous_token)
+        self.assertEqual(back.object_list, pages[1].object_list)
+        self.assertTrue(back.has_next())
+        self.assertTrue(back.has_previous())
+
+    def test_descending_order(self):
+        paginator = KeysetPaginator(
+            self.queryset, 10, ordering=('departure_datetime', 'id'), descending=True
+        )
+        rows = [obj for page in self.walk(paginator) for obj in page]
+        self.assertEqual(rows, self.expected[::-1])
+
+    def test_page_is_one_query_and_count_is_capped(self):
+        paginator = KeysetPaginator(self.queryset, 10, ordering=('departure_datetime', 'id'))
+        with self.assertNumQueries(1):
+            paginator.page()
+
+        paginator.count_limit = 20
+        page = paginator.page()
+        self.assertEqual(page.approximate_total, 20)
+        self.assertTrue(page.total_is_capped)
+
+    def test_invalid_token(self):
+        paginator = KeysetPaginator(self.queryset, 10, ordering=('departure_datetime', 'id'))
+        with self.assertRaises(InvalidCursor):
+            paginator.page('not-a-token')
+        response = self.client.get(reverse('travel:search'), {'cursor': 'garbage'})
+        self.assertEqual(response.status_code, 404)
+
+    def test_search_view_follows_next_token(self):
+        url = reverse('travel:search')
+        first = self.client.get(url)
+        self.assertEqual(first.context['page_obj'].approximate_total, 25)
+        second = self.client.get(url, {'cursor': first.context['page_obj'].next_token})
+        self.assertEqual(list(second.context['travel_options']), self.expected[10:20])
+
+
+class SearchQueryPlanTests(TestCase):
+
+    def search_queryset(self, **params):
+        view = TravelSearchView()
+        view.setup(RequestFactory().get(reverse('travel:search'), params))
+        queryset = view.get_queryset()
+        return queryset.order_by(*TravelSearchView.keyset_ordering)[:11]
+
+    def test_local_day_filter_is_half_open(self):
+        day = (timezone.localtime() + timedelta(days=10)).date()
+        midnight = datetime.combine(day, datetime.min.time())
+        late = make_option(
+            departure_datetime=timezone.make_aware(midnight + timedelta(hours=23, minutes=30)),
+            arrival_datetime=None,
+        )
+        make_option(
+            departure_datetime=timezone.make_aware(midnight + timedelta(days=1)),
+            arrival_datetime=None,
+        )
+
+        results = list(self.search_queryset(date=day.isoformat()))
+        self.assertEqual(results, [late])
+
+    @unittest.skipUnless(connection.vendor == 'sqlite', 'EXPLAIN output is SQLite specific')
+    def test_route_search_uses_search_index(self):
+        day = (timezone.localtime() + timedelta(days=10)).date()
+        plan = self.search_queryset(
+            source='Delhi', destination='Mumbai', date=day.isoformat()
+        ).explain()
+
+        self.assertIn('USING INDEX travel_search_route_idx', plan)
+        self.assertNotIn('SCAN travel_traveloption', plan)
+        # The index also provides the keyset order, so no sort step either
+        self.assertNotIn('TEMP B-TREE', plan)
+
+
+class PopulateSampleDataTests(TestCase):
+
+    def populate(self, *args):
+        call_command('populate_sample_data', '--days', '2', *args, stdout=StringIO())
+        return list(TravelOption.objects.order_by('id').values_list(
+            'source', 'destination', 'departure_datetime', 'price', 'available_seats'
+        ))
+
+    def test_seed_makes_data_reproducible(self):
+        first = self.populate('--seed', '7')
+        second = self.populate('--seed', '7')
+        self.assertEqual(first, second)
+        self.assertNotEqual(first, self.populate('--seed', '8'))
+
+    def test_append_keeps_existing_rows_and_bookings_fit_sold_seats(self):
+        self.populate('--seed', '1', '--users', '5', '--bookings', '40')
+        count = TravelOption.objects.count()
+        out = StringIO()
+        call_command('populate_sample_data', '--days', '2', '--seed', '1', '--append', '--batch-size', '7', stdout=out)
+        created = int(re.search(r'Successfully created (\d+)', out.getvalue()).group(1))
+        self.assertEqual(TravelOption.objects.count(), count + created)
+
+        for option in TravelOption.objects.prefetch_related('bookings'):
+            booked = sum(b.num_seats for b in option.bookings.all() if b.status == 'confirmed')
+            self.assertLessEqual(booked + option.available_seats, option.total_seats)
+
+    def test_clear_deletes_holds_and_waitlist_entries(self):
+        self.populate('--seed', '1', '--users', '2', '--bookings', '5')
+        booking = Booking.objects.select_related('travel_option').first()
+        option = booking.travel_option
+        # Not a sample user, so its rows are not deleted along with the user
+        user = get_user_model().objects.create_user('traveller', password='pw')
+        hold_seats(option, user, 1)
+        WaitlistEntry.objects.create(travel_option=option, user=user, num_seats=1)
+        Notification.objects.create(user=user, booking=booking, kind='service_cancelled', subject='s', message='m')
+
+        self.populate('--seed', '1')
+        connection.check_constraints()
+        self.assertFalse(SeatHold.objects.exists())
+        self.assertFalse(WaitlistEntry.objects.exists())
+        self.assertFalse(Notification.objects.exists())
+
+
+class ConnectionSearchTests(TestCase):
+
+    def setUp(self):
+        connections.reset_graph()
+        self.addCleanup(connections.reset_graph)
+        self.day = timezone.localdate() + timedelta(days=7)
+        self.morning = timezone.make_aware(datetime.combine(self.day, datetime.min.time())) + timedelta(hours=6)
+
+    def leg(self, source, destination, depart_hours, journey_hours, travel_type='flight', price=3000, **extra):
+        departure = self.morning + timedelta(hours=depart_hours)
+        return make_option(
+            travel_type=travel_type, source=source, destination=destination, price=price,
+            departure_datetime=departure, arrival_datetime=departure + timedelta(hours=journey_hours),
+            **extra
+        )
+
+    def search(self, source='Delhi', destination='Goa', **kwargs):
+        return connections.search_day(source, destination, self.day, **kwargs)
+
+    def test_one_and_two_stop_itineraries_ranked_by_arrival_and_price(self):
+        first = self.leg('Delhi', 'Mumbai', 0, 2)
+        to_goa = self.leg('Mumbai', 'Goa', 3.5, 1, price=2500)
+        self.leg('Delhi', 'Pune', 1, 2, price=1000)
+        pune_mumbai = self.leg('Pune', 'Mumbai', 4.5, 1, travel_type='bus', price=300)
+        late_to_goa = self.leg('Mumbai', 'Goa', 8.5, 1, price=1500)
+
+        by_arrival = self.search()
+        self.assertEqual([o.id for o in by_arrival[0].legs], [first.pk, to_goa.pk])
+
+        cheapest = self.search(sort='price')[0]
+        self.assertEqual(cheapest.stops, 2)
+        self.assertEqual(cheapest.legs[1].id, pune_mumbai.pk)
+        self.assertEqual(cheapest.legs[2].id, late_to_goa.pk)
+        self.assertEqual(cheapest.price, 2800)
+
+        self.assertTrue(all(i.stops <= 1 for i in self.search(max_stops=1)))
+
+    def test_minimum_layover_depends_on_modes(self):
+        self.leg('Delhi', 'Mumbai', 0, 2)  # flight lands 08:00
+        self.leg('Mumbai', 'Goa', 3, 10, travel_type='train')  # 60 min later: too tight
+        ok = self.leg('Mumbai', 'Goa', 4, 10, travel_type='train')  # 120 min later
+        self.leg('Mumbai', 'Goa', 2.5, 1)  # flight to flight needs 60 min
+
+        self.assertEqual([i.legs[1].id for i in self.search()], [ok.pk])
+        self.assertEqual(self.search(modes={'flight'}), [])
+
+    def test_graph_follows_bookings_and_new_options(self):
+        self.leg('Delhi', 'Mumbai', 0, 2, total_seats=2, available_seats=2)
+        onward = self.leg('Mumbai', 'Goa', 3.5, 1, total_seats=2, available_seats=2)
+        self.assertEqual(len(self.search()), 1)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            reserve_seats(onward, 2)
+        self.assertEqual(self.search(), [])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            replacement = self.leg('Mumbai', 'Goa', 5, 1)
+        self.assertEqual(self.search()[0].legs[1].id, replacement.pk)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            replacement.delete()
+        self.assertEqual(self.search(), [])
+
+    def test_sync_picks_up_rows_changed_elsewhere(self):
+        self.leg('Delhi', 'Mumbai', 0, 2)
+        graph = connections.get_graph()
+        onward = self.leg('Mumbai', 'Goa', 3.5, 1)
+        graph.discard(onward.pk)  # as if saved by another process
+        self.assertEqual(self.search(), [])
+
+        graph.sync()
+        self.assertEqual(self.search()[0].legs[1].id, onward.pk)
+
+    def test_sync_picks_up_late_commits_behind_the_watermark(self):
+        first = self.leg('Delhi', 'Mumbai', 0, 2)
+        graph = connections.get_graph()
+        onward = self.leg('Mumbai', 'Goa', 3.5, 1)
+        graph.discard(onward.pk)
+        # Stamped before the graph's watermark, committed after it was read
+        TravelOption.objects.filter(pk=onward.pk).update(updated_at=first.updated_at - timedelta(seconds=1))
+
+        graph.sync()
+        self.assertEqual(self.search()[0].legs[1].id, onward.pk)
+
+    def test_connections_endpoint(self):
+        self.leg('Delhi', 'Mumbai', 0, 2)
+        self.leg('Mumbai', 'Goa', 3.5, 1)
+        url = reverse('travel:connections')
+
+        response = self.client.get(url, {
+            'source': 'Delhi', 'destination': 'Goa', 'date': self.day.isoformat(), 'sort': 'duration',
+        })
+        self.assertEqual(response.status_code, 200)
+        itinerary = response.json()['itineraries'][0]
+        self.assertEqual(itinerary['stops'], 1)
+        self.assertEqual(itinerary['duration_minutes'], 270)
+        self.assertEqual([leg['destination'] for leg in itinerary['legs']], ['Mumbai', 'Goa'])
+
+        bad = self.client.get(url, {'source': 'Delhi', 'destination': 'Goa', 'date': 'tomorrow'})
+        self.assertEqual(bad.status_code, 400)
+
+
+class FareCalendarTests(TestCase):
+
+    def setUp(self):
+        self.day = timezone.localdate() + timedelta(days=3)
+        self.departure = timezone.make_aware(datetime.combine(self.day, datetime.min.time())) + timedelta(hours=9)
+
+    def make_fare(self, **overrides):
+        fields = {'departure_datetime': self.departure, 'arrival_datetime': self.departure + timedelta(hours=16)}
+        fields.update(overrides)
+        with self.captureOnCommitCallbacks(execute=True):
+            return make_option(**fields)
+
+    def calendar_day(self, day=None, travel_type='train'):
+        return FareCalendarDay.objects.filter(
+            source='Delhi', destination='Mumbai', travel_date=day or self.day, travel_type=travel_type
+        ).first()
+
+    def test_save_booking_and_cancellation_refresh_the_day(self):
+        cheap = self.make_fare(price=900, available_seats=2, total_seats=2)
+        self.make_fare(price=1500, available_seats=10)
+        day = self.calendar_day()
+        self.assertEqual((day.min_price, day.seats_available, day.option_count), (900, 12, 2))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            reserve_seats(cheap, 2)
+        day = self.calendar_day()
+        self.assertEqual((day.min_price, day.seats_available, day.option_count), (1500, 10, 1))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            release_seats(cheap, 1)
+        self.assertEqual(self.calendar_day().min_price, 900)
+
+    def test_moving_or_deleting_an_option_refreshes_old_day(self):
+        option = self.make_fare()
+        later = self.day + timedelta(days=1)
+        with self.captureOnCommitCallbacks(execute=True):
+            option.departure_datetime += timedelta(days=1)
+            option.arrival_datetime += timedelta(days=1)
+            option.save()
+        self.assertIsNone(self.calendar_day())
+        self.assertIsNotNone(self.calendar_day(later))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            option.delete()
+        self.assertFalse(FareCalendarDay.objects.exists())
+
+    def test_same_day_refresh_skips_departed_options(self):
+        today = timezone.localdate()
+        noon = timezone.make_aware(datetime.combine(today, datetime.min.time())) + timedelta(hours=12)
+        departed = make_option(departure_datetime=noon - timedelta(hours=3), price=700)
+        make_option(departure_datetime=noon + timedelta(hours=3), price=1100)
+
+        with mock.patch('django.utils.timezone.now', return_value=noon):
+            fare_calendar.refresh([fare_calendar.option_key(departed)])
+        day = self.calendar_day(today)
+        self.assertEqual((day.min_price, day.option_count), (1100, 1))
+
+    def test_rebuild_matches_incremental_rows(self):
+        self.make_fare(price=900)
+        self.make_fare(price=2500, travel_type='flight', departure_datetime=self.departure + timedelta(hours=14))
+        incremental = sorted(FareCalendarDay.objects.values_list(
+            'source', 'destination', 'travel_date', 'travel_type', 'min_price', 'seats_available', 'option_count'
+        ))
+
+        out = StringIO()
+        call_command('rebuild_fare_calendar', stdout=out)
+        rebuilt = sorted(FareCalendarDay.objects.values_list(
+            'source', 'destination', 'travel_date', 'travel_type', 'min_price', 'seats_available', 'option_count'
+        ))
+        self.assertEqual(rebuilt, incremental)
+        self.assertIn('2 route days', out.getvalue())
+
+    def test_endpoint_serves_sixty_days_in_one_query(self):
+        self.make_fare(price=900)
+        self.make_fare(price=2500, travel_type='flight')
+        url = reverse('travel:fare_calendar')
+
+        with self.assertNumQueries(1):
+            response = self.client.get(url, {'source': 'Delhi', 'destination': 'Mumbai'})
+        days = response.json()['days']
+        self.assertEqual(len(days), 60)
+        entry = days[3]
+        self.assertEqual(entry['date'], self.day.isoformat())
+        self.assertEqual((entry['min_price'], entry['option_count']), ('900.00', 2))
+        self.assertIsNone(days[0]['min_price'])
+
+        flights = self.client.get(url, {'source': 'Delhi', 'destination': 'Mumbai', 'travel_type': 'flight'})
+        self.assertEqual(flights.json()['days'][3]['min_price'], '2500.00')
+        self.assertEqual(self.client.get(url, {'source': 'Delhi'}).status_code, 400)
+
+    def test_calendar_read_uses_unique_index(self):
+        if connection.vendor != 'sqlite':
+            self.skipTest('EXPLAIN output checked for SQLite only')
+        start = timezone.localdate()
+        queryset = FareCalendarDay.objects.filter(
+            source='Delhi', destination='Mumbai', travel_date__gte=start, travel_date__lt=start + timedelta(days=60)
+        )
+        # SQLite names the unique constraint's index sqlite_autoindex_*
+        self.assertRegex(queryset.explain(), r'SEARCH .*INDEX .*source=\? AND destination=\? AND travel_date>')
+
+
+class AsyncTravelViewTests(TestCase):
+
+    def setUp(self):
+        search_cache.get_search_cache().clear()
+        self.options = [
+            make_option(departure_datetime=timezone.now() + timedelta(days=7, hours=i)) for i in range(12)
+        ]
+        self.factory = AsyncRequestFactory()
+
+    async def get(self, view, path, data=None, **kwargs):
+        request = self.factory.get(path, data or {})
+        request.user = AnonymousUser()
+        response = await view.as_view()(request, **kwargs)
+        if hasattr(response, 'render'):
+            await sync_to_async(response.render)()
+        return response
+
+    async def test_async_search_matches_sync_search(self):
+        params = {'source': 'Delhi', 'destination': 'Mumbai'}
+        sync_response = await sync_to_async(self.client.get)(reverse('travel:search'), params)
+        response = await self.get(AsyncTravelSearchView, reverse('travel:search'), params)
+
+        page = response.context_data['page_obj']
+        self.assertEqual(list(page), list(sync_response.context['page_obj']))
+        self.assertEqual(page.approximate_total, 12)
+
+        second = await self.get(AsyncTravelSearchView, reverse('travel:search'), {**params, 'cursor': page.next_token})
+        self.assertEqual([o.pk for o in second.context_data['travel_options']], [o.pk for o in self.options[10:]])
+        self.assertContains(second, self.options[-1].get_absolute_url())
+
+    async def test_async_search_loads_cold_city_cache(self):
+        cities.reset()
+        self.addCleanup(cities.reset)
+        response = await self.get(AsyncTravelSearchView, reverse('travel:search'), {
+            'source': 'Delhi', 'destination': 'Mumbai',
+        })
+        self.assertEqual(response.context_data['page_obj'].approximate_total, 12)
+
+    async def test_async_search_rejects_bad_cursor(self):
+        with self.assertRaises(Http404):
+            await self.get(AsyncTravelSearchView, reverse('travel:search'), {'cursor': 'garbage'})
+
+    async def test_async_detail(self):
+        option = self.options[0]
+        response = await self.get(AsyncTravelDetailView, option.get_absolute_url(), pk=option.pk)
+        self.assertEqual(response.context_data['travel_option'], option)
+        self.assertContains(response, option.service_number)
+
+        with self.assertRaises(Http404):
+            await self.get(AsyncTravelDetailView, '/travel/0/', pk=0)
+
+
+class TravelOptionFeedTests(TestCase):
+
+    def setUp(self):
+        self.url = reverse('travel:options_feed')
+        self.options = [
+            make_option(departure_datetime=timezone.now() + timedelta(days=2, hours=i),
+                        arrival_datetime=timezone.now() + timedelta(days=2, hours=i + 16))
+            for i in range(5)
+        ]
+        make_option(is_active=False)
+        make_option(available_seats=0)
+
+    def read(self, response):
+        return b''.join(response.streaming_content).decode()
+
+    def test_ndjson_streams_bookable_rows_in_departure_order(self):
+        with mock.patch.object(TravelOptionFeedView, 'chunk_size', 2):
+            response = self.client.get(self.url, {'source': 'Delhi'})
+            self.assertTrue(response.streaming)
+            self.assertEqual(response['Content-Type'], 'application/x-ndjson')
+            rows = [json.loads(line) for line in self.read(response).splitlines()]
+        self.assertEqual([row['id'] for row in rows], [o.pk for o in self.options])
+        self.assertEqual(rows[0]['price'], '1500.00')
+
+    def test_json_document_reports_count_and_next_since(self):
+        response = self.client.get(self.url, {'format': 'json'})
+        document = json.loads(self.read(response))
+        self.assertEqual(document['count'], 5)
+        self.assertEqual(len(document['results']), 5)
+        self.assertEqual(document['next_since'], response['X-Next-Since'])
+        self.assertLessEqual(parse_datetime(document['next_since']), timezone.now() - timedelta(seconds=feed.LAG_SECONDS))
+
+    @mock.patch.object(feed, 'LAG_SECONDS', 0)
+    def test_since_returns_changed_rows_including_sold_out(self):
+        since = timezone.now()
+        sold_out = self.options[1]
+        reserve_seats(sold_out, sold_out.available_seats)
+
+        response = self.client.get(self.url, {'since': since.isoformat(), 'format': 'json'})
+        document = json.loads(self.read(response))
+        self.assertEqual([row['id'] for row in document['results']], [sold_out.pk])
+        self.assertEqual(document['results'][0]['available_seats'], 0)
+
+    def test_changes_within_the_lag_wait_for_the_next_pull(self):
+        since = timezone.now() - timedelta(minutes=1)
+        changed = self.options[2]
+        reserve_seats(changed, 1)
+
+        response = self.client.get(self.url, {'since': since.isoformat(), 'format': 'json'})
+        document = json.loads(self.read(response))
+        self.assertEqual(document['results'], [])
+
+        with mock.patch.object(feed, 'LAG_SECONDS', 0):
+            response = self.client.get(self.url, {'since': document['next_since'], 'format': 'json'})
+        self.assertIn(changed.pk, [row['id'] for row in json.loads(self.read(response))['results']])
+
+    def test_date_window_and_validation(self):
+        day = timezone.localdate(self.options[0].departure_datetime)
+        response = self.client.get(self.url, {'date_from': day.isoformat(), 'date_to': day.isoformat()})
+        ids = {json.loads(line)['id'] for line in self.read(response).splitlines()}
+        expected = {o.pk for o in self.options if timezone.localdate(o.departure_datetime) == day}
+        self.assertEqual(ids, expected)
+
+        self.assertEqual(self.client.get(self.url, {'since': 'yesterday'}).status_code, 400)
+        self.assertEqual(self.client.get(self.url, {'format': 'xml'}).status_code, 400)
+
+
+class ImportSchedulesTests(TestCase):
+
+    HEADER = 'travel_type,source,destination,departure_datetime,arrival_datetime,price,total_seats,available_seats,operator_name,service_number\n'
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmpdir.cleanup)
+        self.day = (timezone.localdate() + timedelta(days=10)).isoformat()
+
+    def write(self, name, content):
+        path = os.path.join(self.tmpdir.name, name)
+        with open(path, 'w') as f:
+            f.write(content)
+        return path
+
+    def run_import(self, path, *args):
+        out, err = StringIO(), StringIO()
+        call_command('import_schedules', path, '--batch-size', '2', *args, stdout=out, stderr=err)
+        return out.getvalue(), err.getvalue()
+
+    def test_csv_rows_are_validated_and_upserted(self):
+        path = self.write('schedule.csv', self.HEADER + '\n'.join([
+            f'flight,Delhi,Mumbai,{self.day}T06:00,{self.day}T08:10,4200,180,,IndiGo,6E-101',
+            f'flight,Delhi,Delhi,{self.day}T07:00,{self.day}T09:00,4200,180,180,IndiGo,6E-102',
+            f'train,Delhi,Jaipur,{self.day}T09:00,{self.day}T08:00,900,500,500,Indian Railways,12015',
+            f'bus,Pune,Mumbai,{self.day}T10:00,,abc,40,40,MSRTC,BUS-7',
+            f'bus,Pune,Mumbai,{self.day}T11:00,,450,40,41,MSRTC,BUS-8',
+            f'bus,Pune,Mumbai,{self.day}T12:00,{self.day}T15:00,450,40,40,MSRTC,BUS-9',
+        ]) + '\n')
+        rejects = os.path.join(self.tmpdir.name, 'rejects.csv')
+
+        out, err = self.run_import(path, '--rejects', rejects)
+        self.assertIn('Imported 2 rows, rejected 4', out)
+        self.assertIn('Source and destination cannot be the same.', err)
+        self.assertIn('Arrival time must be after departure time.', err)
+        self.assertIn('Available seats cannot exceed total seats.', err)
+        with open(rejects) as f:
+            self.assertEqual(len(f.read().splitlines()), 5)
+
+        flight = TravelOption.objects.get(service_number='6E-101')
+        self.assertEqual((flight.available_seats, flight.price), (180, 4200))
+        self.assertEqual(timezone.localtime(flight.departure_datetime).hour, 6)
+
+    def test_reimport_updates_schedule_but_keeps_sold_seats(self):
+        first = self.write('a.csv', self.HEADER + f'flight,Delhi,Mumbai,{self.day}T06:00,{self.day}T08:10,4200,180,180,IndiGo,6E-101\n')
+        self.run_import(first)
+        option = TravelOption.objects.get()
+        reserve_seats(option, 3)
+
+        second = self.write('b.csv', self.HEADER + f'flight,Delhi,Mumbai,{self.day}T06:00,{self.day}T08:30,3900,180,180,IndiGo,6E-101\n')
+        self.run_import(second)
+        option = TravelOption.objects.get()
+        self.assertEqual((option.price, option.available_seats), (3900, 177))
+        self.assertEqual(timezone.localtime(option.arrival_datetime).minute, 30)
+
+    def test_repeated_key_counts_once_and_service_number_is_required(self):
+        path = self.write('repeats.csv', self.HEADER + '\n'.join([
+            f'flight,Delhi,Mumbai,{self.day}T06:00,,4200,180,180,IndiGo,6E-101',
+            f'flight,Delhi,Mumbai,{self.day}T06:00,,4300,180,180,IndiGo,6E-101',
+            f'flight,Delhi,Mumbai,{self.day}T07:00,,4200,180,180,IndiGo,',
+        ]) + '\n')
+
+        out, err = self.run_import(path, '--batch-size', '3')
+        self.assertIn('Imported 1 rows, rejected 1', out)
+        self.assertIn('Missing service_number', err)
+        self.assertEqual(TravelOption.objects.get().price, 4300)
+
+    def test_ndjson_and_dry_run(self):
+        rows = [
+            {'travel_type': 'train', 'source': 'Chennai', 'destination': 'Bangalore',
+             'departure_datetime': f'{self.day}T06:00:00+05:30', 'price': '650', 'total_seats': 300,
+             'service_number': '12007'},
+            'not json',
+        ]
+        path = self.write('schedule.ndjson', '\n'.join(
+            json.dumps(row) if isinstance(row, dict) else row for row in rows
+        ) + '\n')
+
+        out, _ = self.run_import(path, '--dry-run', '--operator', 'Shatabdi Express')
+        self.assertIn('Validated 1 rows, rejected 1', out)
+        self.assertFalse(TravelOption.objects.exists())
+
+        self.run_import(path, '--operator', 'Shatabdi Express')
+        option = TravelOption.objects.get()
+        self.assertEqual((option.operator_name, option.available_seats), ('Shatabdi Express', 300))
+        self.assertTrue(FareCalendarDay.objects.filter(source='Chennai', destination='Bangalore').exists())
+
+
+class CityTests(TestCase):
+
+    def test_migration_seeds_every_city(self):
+        names = set(City.objects.values_list('name', flat=True))
+        self.assertLessEqual({name for name, _ in INDIAN_CITIES}, names)
+        self.assertEqual(City.objects.get(code='goa').name, 'Goa')
+
+    def test_city_names_resolve_without_queries(self):
+        option = TravelOption.objects.get(pk=make_option().pk)
+        with self.assertNumQueries(0):
+            self.assertEqual((str(option.source), option.destination.name), ('Delhi', 'Mumbai'))
+
+    def test_search_by_name(self):
+        option = make_option()
+        self.assertEqual(list(search_queryset({'source': 'Delhi', 'destination': 'Mumbai'})), [option])
+        self.assertFalse(search_queryset({'source': 'Atlantis'}).exists())
+
+    def test_new_city_is_usable_at_once(self):
+        # The cache outlives the test transaction
+        self.addCleanup(cities.reset)
+        City.objects.create(code='leh', name='Leh', state='LA')
+        option = make_option(destination='Leh')
+        self.assertEqual(list(search_queryset({'destination': 'Leh'})), [option])
+        self.assertEqual(cities.name_for(option.destination_id), 'Leh')
+
+
+class DynamicPricingTests(TestCase):
+
+    def setUp(self):
+        self.now = timezone.now()
+        # One route, so route demand is neutral
+        self.empty = make_option(
+            price=1000, total_seats=100, available_seats=100,
+            departure_datetime=self.now + timedelta(days=40), arrival_datetime=None,
+        )
+        self.full = make_option(
+            price=1000, total_seats=100, available_seats=5,
+            departure_datetime=self.now + timedelta(hours=12), arrival_datetime=None,
+        )
+        self.bus = make_option(
+            travel_type='bus', price=100, departure_datetime=self.now + timedelta(days=40), arrival_datetime=None,
+        )
+
+    def prices(self):
+        return [
+            TravelOption.objects.values_list('price', 'base_price').get(pk=option.pk)
+            for option in (self.empty, self.full, self.bus)
+        ]
+
+    def test_prices_follow_occupancy_and_departure_within_limits(self):
+        result = pricing.reprice(now=self.now)
+        self.assertEqual((result.options, len(result.changes), result.written), (3, 2, 2))
+        # Early and empty is discounted, last-minute and nearly sold out is
+        # dearer; the bus is already at its type's floor
+        self.assertEqual(self.prices(), [(787, 1000), (1743, 1000), (100, None)])
+
+        # Repricing starts from base_price, so a second run changes nothing
+        self.assertEqual(pricing.reprice(now=self.now).changes, [])
+
+    def test_dry_run_writes_a_diff_only(self):
+        tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(tmpdir.cleanup)
+        diff = os.path.join(tmpdir.name, 'diff.csv')
+        out = StringIO()
+        call_command('reprice', '--dry-run', '--diff', diff, stdout=out)
+
+        self.assertIn('Dry run: would change 2 of 3 prices (1 up, 1 down)', out.getvalue())
+        self.assertIn(f'#{self.full.pk}: ₹1,000.00 -> ₹1,743.00', out.getvalue())
+        with open(diff) as f:
+            self.assertEqual(len(f.read().splitlines()), 3)
+        self.assertEqual(self.prices(), [(1000, None), (1000, None), (100, None)])
+
+    def test_concurrently_edited_price_is_kept(self):
+        TravelOption.objects.filter(pk=self.full.pk).update(price=1200)
+        change = pricing.PriceChange(self.full.pk, Decimal('1000.00'), Decimal('1743.00'))
+        self.assertEqual(pricing._write([change], self.now, 10), 0)
+        self.assertEqual(TravelOption.objects.get(pk=self.full.pk).price, 1200)
+
+    def test_search_and_fare_calendar_are_refreshed(self):
+        call_command('rebuild_fare_calendar', stdout=StringIO())
+        version = search_cache.route_version('Delhi', 'Mumbai')
+        bus_day = FareCalendarDay.objects.get(travel_type='bus')
+        with self.captureOnCommitCallbacks(execute=True):
+            pricing.reprice(now=self.now)
+
+        self.assertNotEqual(search_cache.route_version('Delhi', 'Mumbai'), version)
+        day = FareCalendarDay.objects.get(
+            source='Delhi', destination='Mumbai', travel_type='train',
+            travel_date=timezone.localdate(self.empty.departure_datetime),
+        )
+        self.assertEqual(day.min_price, 787)
+        # Only the days of changed options are refreshed; the bus kept its price
+        self.assertEqual(FareCalendarDay.objects.get(pk=bus_day.pk).updated_at, bus_day.updated_at)
+
+    @unittest.skipUnless(pricing.np, 'NumPy is not installed')
+    def test_vectorized_prices_match_row_by_row(self):
+        make_option(destination='Pune', price=2400, total_seats=50, available_seats=7)
+        make_option(travel_type='flight', price=900, available_seats=1)
+        columns = pricing.load(self.now)
+        self.assertEqual(
+            pricing.compute_prices(columns, vectorized=True),
+            pricing.compute_prices(columns, vectorized=False),
+        )
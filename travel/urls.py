@@ -1,10 +1,22 @@
+from django.conf import settings
 from django.urls import path
 from . import views
 
 app_name = 'travel'
 
+# ASGI deployments serve the read-only pages from async views
+if settings.TRAVEL_ASYNC_VIEWS:
+    search_view, detail_view = views.AsyncTravelSearchView, views.AsyncTravelDetailView
+else:
+    search_view, detail_view = views.TravelSearchView, views.TravelDetailView
+
 urlpatterns = [
-    path('search/', views.TravelSearchView.as_view(), name='search'),
-    path('<int:pk>/', views.TravelDetailView.as_view(), name='detail'),
+    path('search/', search_view.as_view(), name='search'),
+    path('connections/', views.ConnectionSearchView.as_view(), name='connections'),
+    path('fares/', views.FareCalendarView.as_view(), name='fare_calendar'),
+    path('api/options/', views.TravelOptionFeedView.as_view(), name='options_feed'),
+    path('<int:pk>/', detail_view.as_view(), name='detail'),
     path('book/<int:pk>/', views.BookTravelView.as_view(), name='book'),
+    path('hold/<int:pk>/', views.HoldSeatsView.as_view(), name='hold'),
+    path('checkout/<int:pk>/', views.CheckoutView.as_view(), name='checkout'),
 ]
@@ -1,60 +1,218 @@
+from datetime import datetime
+
+from asgiref.sync import sync_to_async
 from django.shortcuts import render, get_object_or_404, redirect
-from django.views.generic import ListView, DetailView
+from django.views.generic import ListView, DetailView, View
 from django.contrib.auth.mixins import LoginRequiredMixin
 from django.contrib import messages
+from django.db import transaction
 from django.db.models import Q
+from django.http import Http404, JsonResponse, StreamingHttpResponse
+from django.template.response import TemplateResponse
 from django.utils import timezone
-from .models import TravelOption
+from django.utils.dateparse import parse_datetime
+from .models import SeatHold, TravelOption
+from .inventory import (
+    HoldExpired, InsufficientSeats, convert_hold, hold_seats, release_hold, reserve_seats,
+)
+from . import cities, connections, fare_calendar, feed, search_cache
+from .pagination import InvalidCursor, KeysetPaginationMixin, KeysetPaginator
 from bookings.models import Booking
-from .constants import INDIAN_CITIES, TRAVEL_TYPES
+from .constants import TRAVEL_TYPES
+from .dates import local_day_range
+
+
+def search_queryset(search_params):
+    """
+    Active future options matching normalized search parameters. Sold-out
+    options are included so users can join their waitlist.
+    """
+    queryset = TravelOption.objects.filter(
+        is_active=True,
+        departure_datetime__gte=timezone.now(),
+    ).order_by('departure_datetime')
+    
+    # Apply filters; cities are searched by name but stored as ids
+    for field in ('source', 'destination'):
+        name = search_params.get(field)
+        if name:
+            city_id = cities.id_for(name)
+            if city_id is None:
+                return queryset.none()
+            queryset = queryset.filter(**{f'{field}_id': city_id})
+    
+    travel_type = search_params.get('travel_type')
+    if travel_type:
+        queryset = queryset.filter(travel_type=travel_type)
+    
+    date = search_params.get('date')
+    if date:
+        date_obj = datetime.strptime(date, '%Y-%m-%d').date()
+        queryset = queryset.filter(**local_day_range('departure_datetime', date_obj))
+
+    return queryset
+
+
+def search_form_context(search_params):
+    """
+    Choices of the search form, the valid selection and the city table
+    version; the cached select fragments are keyed on the last two.
+    """
+    types = dict(TRAVEL_TYPES)
+    selected = {
+        field: search_params[field] for field in ('source', 'destination')
+        if field in search_params and cities.by_name(search_params[field]) is not None
+    }
+    if search_params.get('travel_type') in types:
+        selected['travel_type'] = search_params['travel_type']
+    return {
+        'cities': cities.choices(),
+        'city_version': cities.version(),
+        'travel_types': TRAVEL_TYPES,
+        'selected': selected,
+    }
 
 
-class TravelSearchView(ListView):
+class TravelSearchView(KeysetPaginationMixin, ListView):
     """View to search and list travel options"""
     model = TravelOption
     template_name = 'travel/search.html'
     context_object_name = 'travel_options'
     paginate_by = 10
+    keyset_ordering = ('departure_datetime', 'id')
+    approximate_count_limit = 1000
 
     def get_queryset(self):
-        queryset = TravelOption.objects.filter(
-            is_active=True,
-            departure_datetime__gte=timezone.now(),
-            available_seats__gt=0
-        ).order_by('departure_datetime')
-        
-        # Apply filters
-        source = self.request.GET.get('source')
-        if source:
-            queryset = queryset.filter(source=source)
-        
-        destination = self.request.GET.get('destination')
-        if destination:
-            queryset = queryset.filter(destination=destination)
-        
-        travel_type = self.request.GET.get('travel_type')
-        if travel_type:
-            queryset = queryset.filter(travel_type=travel_type)
-        
-        date = self.request.GET.get('date')
-        if date:
-            try:
-                from datetime import datetime
-                date_obj = datetime.strptime(date, '%Y-%m-%d').date()
-                queryset = queryset.filter(departure_datetime__date=date_obj)
-            except ValueError:
-                pass
-        
-        return queryset
+        self.search_params = search_cache.normalize_search_params(self.request.GET)
+        return search_queryset(self.search_params)
+
+    def get_page(self, paginator):
+        """Serve the requested page from the versioned search cache"""
+        cursor = self.request.GET.get(self.cursor_kwarg) or None
+        return search_cache.get_or_set(
+            self.search_params, cursor or '', lambda: paginator.page(cursor)
+        )
     
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
-        context['cities'] = INDIAN_CITIES
-        context['travel_types'] = TRAVEL_TYPES
+        context.update(search_form_context(self.search_params))
         context['search_params'] = self.request.GET
         return context
 
 
+class ConnectionSearchView(View):
+    """JSON view returning direct, 1-stop and 2-stop itineraries"""
+    max_limit = 50
+
+    def get(self, request, *args, **kwargs):
+        source = request.GET.get('source', '').strip()
+        destination = request.GET.get('destination', '').strip()
+        sort = request.GET.get('sort', 'arrival')
+        modes = set(request.GET.getlist('travel_type')) or None
+        try:
+            day = datetime.strptime(request.GET.get('date', ''), '%Y-%m-%d').date()
+            max_stops = min(int(request.GET.get('max_stops', connections.MAX_STOPS)), connections.MAX_STOPS)
+            passengers = max(int(request.GET.get('passengers', 1)), 1)
+            limit = min(max(int(request.GET.get('limit', 10)), 1), self.max_limit)
+            if not source or not destination:
+                raise ValueError('source and destination are required.')
+            if sort not in connections.SORT_CHOICES:
+                raise ValueError(f'sort must be one of {", ".join(connections.SORT_CHOICES)}.')
+        except ValueError as e:
+            return JsonResponse({'error': str(e)}, status=400)
+
+        itineraries = connections.search_day(
+            source, destination, day,
+            sort=sort, max_stops=max_stops, passengers=passengers, modes=modes, limit=limit,
+        )
+        return JsonResponse({
+            'source': source,
+            'destination': destination,
+            'date': day.isoformat(),
+            'sort': sort,
+            'itineraries': [itinerary.as_dict() for itinerary in itineraries],
+        })
+
+
+class FareCalendarView(View):
+    """JSON view returning the cheapest fare per day for a route"""
+
+    def get(self, request, *args, **kwargs):
+        source = request.GET.get('source', '').strip()
+        destination = request.GET.get('destination', '').strip()
+        travel_type = request.GET.get('travel_type', '').strip() or None
+        today = timezone.localdate()
+        try:
+            start = request.GET.get('start')
+            start = max(datetime.strptime(start, '%Y-%m-%d').date(), today) if start else today
+            days = min(max(int(request.GET.get('days', fare_calendar.DEFAULT_DAYS)), 1), fare_calendar.MAX_DAYS)
+            if not source or not destination:
+                raise ValueError('source and destination are required.')
+        except ValueError as e:
+            return JsonResponse({'error': str(e)}, status=400)
+
+        return JsonResponse({
+            'source': source,
+            'destination': destination,
+            'travel_type': travel_type,
+            'days': fare_calendar.get_calendar(source, destination, start, days, travel_type),
+        })
+
+
+class TravelOptionFeedView(View):
+    """
+    Read-only partner feed streaming travel options as NDJSON or JSON.
+
+    Filters: source, destination, travel_type, date_from/date_to (local
+    dates, date_to inclusive) and since (ISO 8601 updated_at) for deltas.
+    format=ndjson (default) or json. X-Next-Since is the since of the next
+    pull.
+    """
+    chunk_size = feed.CHUNK_SIZE
+
+    def get(self, request, *args, **kwargs):
+        params = request.GET
+        output = params.get('format', 'ndjson')
+        try:
+            if output not in ('ndjson', 'json'):
+                raise ValueError('format must be ndjson or json.')
+            departure_from = departure_to = since = None
+            if params.get('date_from'):
+                day = datetime.strptime(params['date_from'], '%Y-%m-%d').date()
+                departure_from = local_day_range('departure_datetime', day)['departure_datetime__gte']
+            if params.get('date_to'):
+                day = datetime.strptime(params['date_to'], '%Y-%m-%d').date()
+                departure_to = local_day_range('departure_datetime', day)['departure_datetime__lt']
+            if params.get('since'):
+                # A literal '+' in the offset arrives as a space unless escaped
+                since = parse_datetime(params['since'].replace(' ', '+'))
+                if since is None:
+                    raise ValueError('since must be an ISO 8601 datetime.')
+                if timezone.is_naive(since):
+                    since = timezone.make_aware(since)
+        except ValueError as e:
+            return JsonResponse({'error': str(e)}, status=400)
+
+        until = feed.next_since()
+        queryset = feed.feed_queryset(
+            source=params.get('source'),
+            destination=params.get('destination'),
+            travel_type=params.get('travel_type'),
+            departure_from=departure_from,
+            departure_to=departure_to,
+            since=since,
+            until=until,
+        )
+        if output == 'json':
+            stream, content_type = feed.stream_json(queryset, until, self.chunk_size), 'application/json'
+        else:
+            stream, content_type = feed.stream_ndjson(queryset, self.chunk_size), 'application/x-ndjson'
+        response = StreamingHttpResponse(stream, content_type=content_type)
+        response['Cache-Control'] = 'no-store'
+        response['X-Next-Since'] = until.isoformat()
+        return response
+
+
 class TravelDetailView(DetailView):
     """View to show travel option details"""
     model = TravelOption
@@ -62,6 +220,65 @@ class TravelDetailView(DetailView):
     context_object_name = 'travel_option'
 
 
+class AsyncTravelSearchView(View):
+    """
+    Async version of TravelSearchView for ASGI deployments.
+
+    Reads through the async ORM (aiterator, acount) so a slow client or
+    query does not hold a worker thread. Renders the same template with
+    the same context as TravelSearchView.
+    """
+    template_name = 'travel/search.html'
+    paginate_by = TravelSearchView.paginate_by
+    keyset_ordering = TravelSearchView.keyset_ordering
+    approximate_count_limit = TravelSearchView.approximate_count_limit
+    cursor_kwarg = 'cursor'
+
+    async def get(self, request, *args, **kwargs):
+        search_params = search_cache.normalize_search_params(request.GET)
+        # Resolving city names may (re)load the cities cache, a sync query
+        queryset = await sync_to_async(search_queryset)(search_params)
+        form_context = await sync_to_async(search_form_context)(search_params)
+        paginator = KeysetPaginator(
+            queryset,
+            self.paginate_by,
+            ordering=self.keyset_ordering,
+            count_limit=self.approximate_count_limit,
+        )
+        cursor = request.GET.get(self.cursor_kwarg) or None
+        try:
+            page = await search_cache.aget_or_set(
+                search_params, cursor or '', lambda: paginator.apage(cursor)
+            )
+        except InvalidCursor:
+            raise Http404('Invalid page.')
+
+        return TemplateResponse(request, self.template_name, {
+            'paginator': paginator,
+            'page_obj': page,
+            'is_paginated': page.has_other_pages(),
+            'object_list': page.object_list,
+            'travel_options': page.object_list,
+            'search_params': request.GET,
+            **form_context,
+        })
+
+
+class AsyncTravelDetailView(View):
+    """Async version of TravelDetailView for ASGI deployments"""
+    template_name = TravelDetailView.template_name
+
+    async def get(self, request, pk, *args, **kwargs):
+        try:
+            travel_option = await TravelOption.objects.aget(pk=pk)
+        except TravelOption.DoesNotExist:
+            raise Http404('No travel option found matching the query.')
+        return TemplateResponse(request, self.template_name, {
+            'object': travel_option,
+            'travel_option': travel_option,
+        })
+
+
 class BookTravelView(LoginRequiredMixin, DetailView):
     """View to book a travel option"""
     model = TravelOption
@@ -78,18 +295,17 @@ class BookTravelView(LoginRequiredMixin, DetailView):
             return redirect('travel:detail', pk=travel_option.pk)
         
         try:
-            # Create booking
-            booking = Booking.objects.create(
-                user=request.user,
-                travel_option=travel_option,
-                num_seats=num_seats,
-                total_price=travel_option.price * num_seats,
-                status='confirmed'
-            )
-            
-            # Reduce available seats
-            travel_option.available_seats -= num_seats
-            travel_option.save()
+            with transaction.atomic():
+                # Take the seats first; the conditional update fails instead of overselling
+                reserve_seats(travel_option, num_seats)
+
+                booking = Booking.objects.create(
+                    user=request.user,
+                    travel_option=travel_option,
+                    num_seats=num_seats,
+                    total_price=travel_option.price * num_seats,
+                    status='confirmed'
+                )
             
             messages.success(
                 request, 
@@ -97,6 +313,71 @@ class BookTravelView(LoginRequiredMixin, DetailView):
             )
             return redirect('bookings:detail', pk=booking.pk)
             
+        except InsufficientSeats:
+            messages.error(request, 'Sorry, the requested seats are no longer available.')
+            return redirect('travel:detail', pk=travel_option.pk)
         except Exception as e:
             messages.error(request, 'There was an error processing your booking. Please try again.')
             return redirect('travel:detail', pk=travel_option.pk)
+
+
+class HoldSeatsView(LoginRequiredMixin, View):
+    """Hold seats on a travel option while the user checks out"""
+
+    def post(self, request, pk):
+        travel_option = get_object_or_404(TravelOption, pk=pk)
+        try:
+            num_seats = int(request.POST.get('num_seats', 1))
+        except ValueError:
+            num_seats = 0
+
+        if num_seats <= 0 or num_seats > travel_option.available_seats:
+            messages.error(request, 'Invalid number of seats requested.')
+            return redirect('travel:detail', pk=travel_option.pk)
+
+        try:
+            hold = hold_seats(travel_option, request.user, num_seats)
+        except InsufficientSeats:
+            messages.error(request, 'Sorry, the requested seats are no longer available.')
+            return redirect('travel:detail', pk=travel_option.pk)
+        return redirect('travel:checkout', pk=hold.pk)
+
+
+class CheckoutView(LoginRequiredMixin, DetailView):
+    """Confirm a seat hold as a booking, or give the seats back"""
+    template_name = 'travel/checkout.html'
+    context_object_name = 'hold'
+
+    def get_queryset(self):
+        return SeatHold.objects.filter(user=self.request.user).select_related('travel_option')
+
+    def get(self, request, *args, **kwargs):
+        self.object = hold = self.get_object()
+        if hold.booking_id:
+            return redirect('bookings:detail', pk=hold.booking_id)
+        if not hold.is_active():
+            messages.warning(request, 'Your seat hold has expired. Please choose your seats again.')
+            return redirect('travel:detail', pk=hold.travel_option_id)
+        return self.render_to_response(self.get_context_data(object=hold))
+
+    def post(self, request, *args, **kwargs):
+        hold = self.get_object()
+        if request.POST.get('action') == 'release':
+            try:
+                release_hold(hold)
+            except HoldExpired:
+                pass
+            messages.info(request, 'Your held seats have been released.')
+            return redirect('travel:detail', pk=hold.travel_option_id)
+
+        try:
+            booking = convert_hold(hold)
+        except HoldExpired:
+            messages.error(request, 'Your seat hold has expired. Please choose your seats again.')
+            return redirect('travel:detail', pk=hold.travel_option_id)
+
+        messages.success(
+            request,
+            f'Booking confirmed! Your booking reference is {booking.booking_reference}'
+        )
+        return redirect('bookings:detail', pk=booking.pk)
@@ -12,5 +12,10 @@ import os
 from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'travel_booking.settings')
+# Serve search and detail from the async views (see travel/urls.py)
+os.environ.setdefault('TRAVEL_ASYNC_VIEWS', 'True')
+# Connections are not reused across requests under ASGI; pool them instead
+# (see travel_booking/db_profiles.py)
+os.environ.setdefault('CONN_MAX_AGE', '0')
 
 application = get_asgi_application()
@@ -0,0 +1,106 @@
+"""
+Database performance profiles
+
+settings.DATABASES is built from the profile named by DATABASE_PROFILE:
+
+    sqlite          (default) WAL journal, synchronous=NORMAL, a busy
+                    timeout, a larger page cache and memory-mapped reads,
+                    set by pragmas on every new connection. Transactions
+                    start with BEGIN IMMEDIATE, so a booking takes the write
+                    lock up front and waits for it (busy_timeout) instead
+                    of failing with "database is locked" when it upgrades
+                    from a read. Connections are kept for CONN_MAX_AGE
+                    seconds and health-checked before reuse.
+    sqlite-basic    Django's stock SQLite settings, for comparison.
+    postgres        PostgreSQL through psycopg 3's connection pool
+                    (pip install "psycopg[binary,pool]"), configured from
+                    the POSTGRES_* environment variables.
+
+WAL lets readers carry on while a booking writes, and with
+synchronous=NORMAL a commit no longer waits for an fsync of the database
+file, only for the WAL append; a power loss can lose the last commits but
+never corrupts the database.
+
+Under ASGI keep CONN_MAX_AGE at 0 (connections are not reused across
+requests there) and use the postgres profile's pool instead.
+"""
+
+import os
+
+# Seconds a connection waits for a lock before "database is locked"; the
+# driver passes it to sqlite3_busy_timeout, same as PRAGMA busy_timeout
+SQLITE_BUSY_TIMEOUT = 5
+
+SQLITE_PRAGMAS = {
+    'journal_mode': 'WAL',
+    'synchronous': 'NORMAL',
+    # Negative sizes are KiB: a 64 MiB page cache per connection
+    'cache_size': -64000,
+    'mmap_size': 256 * 1024 * 1024,
+    'temp_store': 'MEMORY',
+}
+
+
+def sqlite(name, pragmas=None):
+    pragmas = SQLITE_PRAGMAS if pragmas is None else pragmas
+    return {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': name,
+        'CONN_MAX_AGE': int(os.getenv('CONN_MAX_AGE', '600')),
+        'CONN_HEALTH_CHECKS': True,
+        'OPTIONS': {
+            'init_command': ';'.join(f'PRAGMA {pragma}={value}' for pragma, value in pragmas.items()),
+            'transaction_mode': 'IMMEDIATE',
+            'timeout': SQLITE_BUSY_TIMEOUT,
+        },
+    }
+
+
+def sqlite_basic(name):
+    return {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': name,
+    }
+
+
+def postgres(host=None):
+    from psycopg_pool import ConnectionPool
+
+    return {
+        'ENGINE': 'django.db.backends.postgresql',
+        'NAME': os.getenv('POSTGRES_DB', 'travel_karo'),
+        'USER': os.getenv('POSTGRES_USER', 'travel_karo'),
+        'PASSWORD': os.getenv('POSTGRES_PASSWORD', ''),
+        'HOST': host or os.getenv('POSTGRES_HOST', 'localhost'),
+        'PORT': os.getenv('POSTGRES_PORT', '5432'),
+        # The pool keeps the connections; Django must not hold them as well
+        'CONN_MAX_AGE': 0,
+        'OPTIONS': {
+            'pool': {
+                'min_size': int(os.getenv('POSTGRES_POOL_MIN_SIZE', '4')),
+                'max_size': int(os.getenv('POSTGRES_POOL_MAX_SIZE', '16')),
+                'timeout': int(os.getenv('POSTGRES_POOL_TIMEOUT', '10')),
+                # Health check before a pooled connection is handed out
+                'check': ConnectionPool.check_connection,
+            },
+        },
+    }
+
+
+PROFILES = {
+    'sqlite': sqlite,
+    'sqlite-basic': sqlite_basic,
+    'postgres': postgres,
+}
+
+
+def database(profile, location=None):
+    """
+    Settings for one DATABASES entry of profile. location is the SQLite
+    file, or the server host for postgres (default: POSTGRES_HOST).
+    """
+    try:
+        build = PROFILES[profile]
+    except KeyError:
+        raise ValueError(f'Unknown DATABASE_PROFILE {profile!r}; use one of {", ".join(PROFILES)}.')
+    return build(location)
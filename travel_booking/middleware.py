@@ -0,0 +1,192 @@
+"""
+Request instrumentation for Travel Karo
+
+RequestMetricsMiddleware measures every request's wall time, database
+query count and time, and template render time, tagged with the resolved
+URL name (e.g. 'travel:search'). The numbers are sent back in a
+Server-Timing header, attached to the request as request.metrics, and
+folded into in-process histograms that can be read with get_histograms().
+"""
+
+import threading
+import time
+from bisect import bisect_left
+from contextlib import ExitStack
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.db import connections
+
+# Upper bounds, in milliseconds, of the histogram buckets
+BUCKET_BOUNDS_MS = (1, 2.5, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, float('inf'))
+QUERY_BUCKET_BOUNDS = (0, 1, 2, 3, 5, 8, 13, 21, 34, 55, 89, float('inf'))
+
+
+class RequestMetrics:
+    """Measurements for a single request"""
+
+    def __init__(self):
+        self.view_name = None
+        self.queries = 0
+        self.db_ms = 0.0
+        self.template_ms = 0.0
+        self.total_ms = 0.0
+        self._render_started = None
+
+    def record_query(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.queries += 1
+            self.db_ms += (time.perf_counter() - started) * 1000
+
+    def render_started(self):
+        self._render_started = time.perf_counter()
+
+    def render_finished(self, response):
+        if self._render_started is not None:
+            self.template_ms += (time.perf_counter() - self._render_started) * 1000
+            self._render_started = None
+        return response
+
+    def server_timing(self):
+        return ', '.join([
+            f'db;dur={self.db_ms:.1f};desc="{self.queries} queries"',
+            f'tpl;dur={self.template_ms:.1f}',
+            f'total;dur={self.total_ms:.1f}',
+        ])
+
+
+class Histogram:
+    """Fixed-bucket histogram; cheap enough to update on every request"""
+
+    def __init__(self, bounds):
+        self.bounds = bounds
+        self.counts = [0] * len(bounds)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value):
+        self.counts[bisect_left(self.bounds, value)] += 1
+        self.count += 1
+        self.sum += value
+
+    def snapshot(self):
+        return {
+            'count': self.count,
+            'sum': round(self.sum, 3),
+            'buckets': {
+                ('+Inf' if bound == float('inf') else bound): count
+                for bound, count in zip(self.bounds, self.counts)
+            },
+        }
+
+
+_histograms_lock = threading.Lock()
+_histograms = {}
+
+
+def _observe(metrics):
+    with _histograms_lock:
+        histograms = _histograms.get(metrics.view_name)
+        if histograms is None:
+            histograms = _histograms[metrics.view_name] = {
+                'total_ms': Histogram(BUCKET_BOUNDS_MS),
+                'db_ms': Histogram(BUCKET_BOUNDS_MS),
+                'template_ms': Histogram(BUCKET_BOUNDS_MS),
+                'queries': Histogram(QUERY_BUCKET_BOUNDS),
+            }
+        histograms['total_ms'].observe(metrics.total_ms)
+        histograms['db_ms'].observe(metrics.db_ms)
+        histograms['template_ms'].observe(metrics.template_ms)
+        histograms['queries'].observe(metrics.queries)
+
+
+def get_histograms():
+    """Return {view_name: {metric: histogram snapshot}} for this process"""
+    with _histograms_lock:
+        return {
+            view_name: {name: histogram.snapshot() for name, histogram in histograms.items()}
+            for view_name, histograms in _histograms.items()
+        }
+
+
+def reset_histograms():
+    with _histograms_lock:
+        _histograms.clear()
+
+
+def _add_query_wrappers(metrics):
+    for connection in connections.all():
+        connection.execute_wrappers.append(metrics.record_query)
+
+
+def _remove_query_wrappers(metrics):
+    for connection in connections.all():
+        if metrics.record_query in connection.execute_wrappers:
+            connection.execute_wrappers.remove(metrics.record_query)
+
+
+class RequestMetricsMiddleware:
+    """
+    Time each request and count its queries.
+
+    Should be listed first in MIDDLEWARE so the wall time covers every other
+    middleware. Template time is measured from process_template_response to
+    the end of rendering, so it includes queries run lazily by templates.
+    Works in both sync (WSGI) and async (ASGI) request handling.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.server_timing = getattr(settings, 'REQUEST_METRICS_SERVER_TIMING', True)
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+
+        metrics = request.metrics = RequestMetrics()
+        started = time.perf_counter()
+
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(metrics.record_query))
+            response = self.get_response(request)
+
+        return self.finish(request, response, started)
+
+    async def __acall__(self, request):
+        metrics = request.metrics = RequestMetrics()
+        started = time.perf_counter()
+
+        # Under ASGI the ORM runs in the request's thread-sensitive worker
+        # thread, whose connection objects differ from the event loop's, so
+        # the wrappers are installed from that thread
+        await sync_to_async(_add_query_wrappers)(metrics)
+        try:
+            response = await self.get_response(request)
+        finally:
+            await sync_to_async(_remove_query_wrappers)(metrics)
+
+        return self.finish(request, response, started)
+
+    def finish(self, request, response, started):
+        metrics = request.metrics
+        metrics.total_ms = (time.perf_counter() - started) * 1000
+        match = getattr(request, 'resolver_match', None)
+        metrics.view_name = match.view_name if match else '<unresolved>'
+        _observe(metrics)
+
+        if self.server_timing:
+            response['Server-Timing'] = metrics.server_timing()
+        return response
+
+    def process_template_response(self, request, response):
+        request.metrics.render_started()
+        response.add_post_render_callback(request.metrics.render_finished)
+        return response
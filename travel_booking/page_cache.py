@@ -0,0 +1,102 @@
+"""
+Full-page cache for anonymous traffic
+
+AnonymousPageCacheMiddleware serves whole rendered pages from the cache to
+anonymous GET and HEAD requests for the URL names listed in
+PAGE_CACHE_VIEWS. The key varies on the URL name, the path and the query
+string with its parameters sorted. Search pages also include the route
+version from travel.search_cache, so a cached page stops being served as
+soon as a booking or schedule change bumps the route.
+
+Pages are never cached or served for authenticated users, for requests
+with pending messages, or when the response sets cookies, is not a 200
+or asks not to be cached.
+"""
+
+import hashlib
+import json
+
+from django.conf import settings
+from django.contrib import messages
+from django.core.cache import caches
+from django.http import HttpResponse
+from django.utils.cache import patch_cache_control
+from django.utils.deprecation import MiddlewareMixin
+
+from travel import search_cache
+
+
+def get_page_cache():
+    return caches[getattr(settings, 'PAGE_CACHE_ALIAS', 'default')]
+
+
+def _cache_control_forbids(response):
+    cache_control = response.get('Cache-Control', '')
+    return 'private' in cache_control or 'no-store' in cache_control or 'no-cache' in cache_control
+
+
+def make_key(request, view_name):
+    params = sorted((name, values) for name, values in request.GET.lists())
+    version = None
+    if view_name == 'travel:search':
+        version = search_cache.search_version(search_cache.normalize_search_params(request.GET))
+    payload = json.dumps([view_name, request.path, params, version], separators=(',', ':'))
+    return 'page:' + hashlib.md5(payload.encode()).hexdigest()
+
+
+class AnonymousPageCacheMiddleware(MiddlewareMixin):
+    """
+    Serve cached pages to anonymous visitors.
+
+    Must come after AuthenticationMiddleware and MessageMiddleware. Adds an
+    X-Page-Cache header (hit or miss) to every page it considers.
+    """
+
+    def __init__(self, get_response):
+        super().__init__(get_response)
+        self.timeouts = getattr(settings, 'PAGE_CACHE_VIEWS', {})
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        view_name = request.resolver_match.view_name
+        if (
+            view_name not in self.timeouts
+            or request.method not in ('GET', 'HEAD')
+            or request.user.is_authenticated
+            or len(messages.get_messages(request))
+        ):
+            return None
+
+        request.page_cache_key = make_key(request, view_name)
+        request.page_cache_timeout = self.timeouts[view_name]
+        cached = get_page_cache().get(request.page_cache_key)
+        if cached is None:
+            return None
+
+        content, content_type = cached
+        response = HttpResponse(content, content_type=content_type)
+        response.page_cache_hit = True
+        return response
+
+    def process_response(self, request, response):
+        key = getattr(request, 'page_cache_key', None)
+        if key is None:
+            return response
+
+        if getattr(response, 'page_cache_hit', False):
+            response['X-Page-Cache'] = 'hit'
+        else:
+            response['X-Page-Cache'] = 'miss'
+            if (
+                request.method == 'GET'
+                and response.status_code == 200
+                and not response.streaming
+                and not response.cookies
+                and not _cache_control_forbids(response)
+            ):
+                get_page_cache().set(
+                    key, (response.content, response['Content-Type']), request.page_cache_timeout
+                )
+        # Browsers and shared proxies must not keep a page that depends on the
+        # visitor being anonymous
+        patch_cache_control(response, private=True)
+        return response
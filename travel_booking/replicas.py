@@ -0,0 +1,168 @@
+"""
+Read replica routing
+
+ReplicaRouter sends reads made while serving the URL names listed in
+REPLICA_READ_VIEWS (search, detail, fare calendar, feed) to a random alias
+from REPLICA_DATABASES, and everything else, including every write, to
+the primary ('default'). ReplicaRoutingMiddleware decides per request.
+
+Read-your-writes: a request that writes to the primary sets a short-lived
+cookie (REPLICA_STICKY_COOKIE, REPLICA_STICKY_SECONDS), and requests that
+carry it read from the primary too, so the page a user is redirected to
+after booking or cancelling never comes from a replica that is behind.
+
+Reads of sessions, users and permissions (PRIMARY_APPS), reads inside a
+transaction on the primary, and anything outside a request (management
+commands, signals run after commit), stay on the primary.
+"""
+
+import contextvars
+import random
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
+
+# Writes to these apps do not make a user's next pages read from the primary
+UNSTICKY_APPS = {'sessions'}
+
+# Always read from the primary: a lagging replica must not lose a fresh
+# login, session or permission change
+PRIMARY_APPS = {'sessions', 'auth', 'accounts', 'contenttypes'}
+
+
+class RequestRouting:
+    """Routing state of one request, shared with the threads serving it"""
+
+    def __init__(self, use_replicas=False):
+        self.use_replicas = use_replicas
+        self.wrote = False
+
+
+_routing = contextvars.ContextVar('replica_routing', default=None)
+
+
+def replica_aliases():
+    return getattr(settings, 'REPLICA_DATABASES', [])
+
+
+class ReplicaRouter:
+
+    def db_for_read(self, model, **hints):
+        routing = _routing.get()
+        if routing is None or not routing.use_replicas or model._meta.app_label in PRIMARY_APPS:
+            return None
+        replicas = replica_aliases()
+        if not replicas or connections[DEFAULT_DB_ALIAS].in_atomic_block:
+            return None
+        return random.choice(replicas)
+
+    def db_for_write(self, model, **hints):
+        routing = _routing.get()
+        if routing is not None and model._meta.app_label not in UNSTICKY_APPS:
+            routing.wrote = True
+        # Instances read from a replica are still saved to the primary
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        databases = {DEFAULT_DB_ALIAS, *replica_aliases()}
+        if obj1._state.db in databases and obj2._state.db in databases:
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # Replicas get their schema from the primary
+        if db in replica_aliases():
+            return False
+        return None
+
+
+def _iterate_routed(content, routing):
+    """Re-enter routing around each chunk of a response streamed after the middleware returned"""
+    iterator = iter(content)
+    while True:
+        token = _routing.set(routing)
+        try:
+            chunk = next(iterator)
+        except StopIteration:
+            return
+        finally:
+            _routing.reset(token)
+        yield chunk
+
+
+async def _aiterate_routed(content, routing):
+    iterator = aiter(content)
+    while True:
+        token = _routing.set(routing)
+        try:
+            chunk = await anext(iterator)
+        except StopAsyncIteration:
+            return
+        finally:
+            _routing.reset(token)
+        yield chunk
+
+
+class ReplicaRoutingMiddleware:
+    """
+    Route a request's reads to the replicas or the primary.
+
+    Should come right after RequestMetricsMiddleware, before the session
+    middleware, so writes made while saving the response are seen too.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.read_views = set(getattr(settings, 'REPLICA_READ_VIEWS', ()))
+        self.cookie = getattr(settings, 'REPLICA_STICKY_COOKIE', 'read_primary')
+        self.sticky_seconds = getattr(settings, 'REPLICA_STICKY_SECONDS', 10)
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+
+        routing = RequestRouting()
+        token = _routing.set(routing)
+        try:
+            response = self.get_response(request)
+        finally:
+            _routing.reset(token)
+        return self.finish(routing, response)
+
+    async def __acall__(self, request):
+        routing = RequestRouting()
+        token = _routing.set(routing)
+        try:
+            response = await self.get_response(request)
+        finally:
+            _routing.reset(token)
+        return self.finish(routing, response)
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        # The state object is shared, not the context variable, so this
+        # works when Django calls process_view from a worker thread
+        routing = _routing.get()
+        if routing is not None:
+            routing.use_replicas = (
+                request.resolver_match.view_name in self.read_views
+                and request.method in ('GET', 'HEAD')
+                and self.cookie not in request.COOKIES
+            )
+        return None
+
+    def finish(self, routing, response):
+        if routing.use_replicas and response.streaming:
+            if response.is_async:
+                response.streaming_content = _aiterate_routed(response.streaming_content, routing)
+            else:
+                response.streaming_content = _iterate_routed(response.streaming_content, routing)
+        if routing.wrote:
+            response.set_cookie(
+                self.cookie, '1', max_age=self.sticky_seconds, httponly=True, samesite='Lax'
+            )
+        return response
@@ -14,6 +14,8 @@ import os
 from pathlib import Path
 from dotenv import load_dotenv
 
+from . import db_profiles
+
 # Load environment variables
 load_dotenv()
 
@@ -49,12 +51,15 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'travel_booking.middleware.RequestMetricsMiddleware',
+    'travel_booking.replicas.ReplicaRoutingMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
+    'travel_booking.page_cache.AnonymousPageCacheMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
 
@@ -64,7 +69,6 @@ TEMPLATES = [
     {
         'BACKEND': 'django.template.backends.django.DjangoTemplates',
         'DIRS': [BASE_DIR / 'templates'],
-        'APP_DIRS': True,
         'OPTIONS': {
             'context_processors': [
                 'django.template.context_processors.debug',
@@ -72,6 +76,15 @@ TEMPLATES = [
                 'django.contrib.auth.context_processors.auth',
                 'django.contrib.messages.context_processors.messages',
             ],
+            # Compiled templates are kept in memory for the life of the
+            # process; runserver's autoreloader clears them when a template
+            # changes, so this is safe in development too
+            'loaders': [
+                ('django.template.loaders.cached.Loader', [
+                    'django.template.loaders.filesystem.Loader',
+                    'django.template.loaders.app_directories.Loader',
+                ]),
+            ],
         },
     },
 ]
@@ -82,14 +95,179 @@ WSGI_APPLICATION = 'travel_booking.wsgi.application'
 # Database
 # https://docs.djangoproject.com/en/5.2/ref/settings/#databases
 
+# Connection settings, pragmas and pooling come from a performance profile
+# (see travel_booking/db_profiles.py): sqlite (default), sqlite-basic or
+# postgres.
+DATABASE_PROFILE = os.getenv('DATABASE_PROFILE', 'sqlite')
+_postgres = DATABASE_PROFILE == 'postgres'
+
 DATABASES = {
+    'default': db_profiles.database(DATABASE_PROFILE, None if _postgres else BASE_DIR / 'db.sqlite3'),
+}
+
+# Read replicas. DATABASE_REPLICAS is a comma-separated list of database
+# files (hosts with the postgres profile); locally they are SQLite copies of
+# the primary refreshed with `manage.py sync_replicas`. Tests read them
+# through the primary.
+REPLICA_DATABASES = []
+for number, name in enumerate(filter(None, os.getenv('DATABASE_REPLICAS', '').split(',')), 1):
+    alias = f'replica{number}'
+    name = name.strip()
+    DATABASES[alias] = db_profiles.database(DATABASE_PROFILE, name if _postgres else BASE_DIR / name)
+    DATABASES[alias]['TEST'] = {'MIRROR': 'default'}
+    REPLICA_DATABASES.append(alias)
+
+DATABASE_ROUTERS = ['travel_booking.replicas.ReplicaRouter']
+
+# Reads made by these views go to a replica (see travel_booking/replicas.py)
+REPLICA_READ_VIEWS = {
+    'home',
+    'travel:search',
+    'travel:detail',
+    'travel:connections',
+    'travel:fare_calendar',
+    'travel:options_feed',
+    'bookings:dashboard',
+}
+
+# After writing, a user reads from the primary for this long, which must
+# cover the replication lag
+REPLICA_STICKY_COOKIE = 'read_primary'
+REPLICA_STICKY_SECONDS = int(os.getenv('REPLICA_STICKY_SECONDS', '10'))
+
+
+# Caches
+# https://docs.djangoproject.com/en/5.2/topics/cache/
+# The local-memory backend evicts least-recently-used entries once MAX_ENTRIES
+# is reached, which bounds the search result cache per process.
+#
+# Cached searches are invalidated by route version counters kept in the
+# 'search' cache, so every process serving searches must share it. Local
+# memory is per process: with more than one worker (WEB_CONCURRENCY, as
+# read by gunicorn and uvicorn) set SEARCH_CACHE_URL to a Redis server, or
+# `manage.py check` fails (travel.E001).
+
+WEB_CONCURRENCY = int(os.getenv('WEB_CONCURRENCY', '1'))
+SEARCH_CACHE_URL = os.getenv('SEARCH_CACHE_URL', '')
+SEARCH_CACHE_TIMEOUT = int(os.getenv('SEARCH_CACHE_TIMEOUT', '300'))
+
+CACHES = {
     'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': BASE_DIR / 'db.sqlite3',
-    }
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'travel-karo-default',
+    },
+    'search': {
+        'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+        'LOCATION': SEARCH_CACHE_URL,
+        'TIMEOUT': SEARCH_CACHE_TIMEOUT,
+    } if SEARCH_CACHE_URL else {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'travel-karo-search',
+        'TIMEOUT': SEARCH_CACHE_TIMEOUT,
+        'OPTIONS': {
+            'MAX_ENTRIES': int(os.getenv('SEARCH_CACHE_MAX_ENTRIES', '5000')),
+            'CULL_FREQUENCY': 10,
+        },
+    },
+    # {% cache %} fragments: city/type selects and static home sections
+    'template_fragments': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'travel-karo-fragments',
+        'OPTIONS': {'MAX_ENTRIES': 1000},
+    },
+    'pages': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'travel-karo-pages',
+        'OPTIONS': {
+            'MAX_ENTRIES': int(os.getenv('PAGE_CACHE_MAX_ENTRIES', '2000')),
+            'CULL_FREQUENCY': 10,
+        },
+    },
+}
+
+SEARCH_CACHE_ALIAS = 'search'
+
+
+# Full-page cache for anonymous visitors
+# travel_booking.page_cache serves these URL names from the 'pages' cache
+# for the given number of seconds. Search pages are also keyed by route
+# version, so bookings and schedule changes are visible immediately.
+
+PAGE_CACHE_ALIAS = 'pages'
+PAGE_CACHE_VIEWS = {
+    'home': int(os.getenv('PAGE_CACHE_HOME_SECONDS', '600')),
+    'travel:search': int(os.getenv('PAGE_CACHE_SEARCH_SECONDS', '60')),
 }
 
 
+# Request instrumentation
+# RequestMetricsMiddleware adds a Server-Timing header to every response.
+# Budgets are enforced in tests through travel_booking.testing.
+
+REQUEST_METRICS_SERVER_TIMING = os.getenv('REQUEST_METRICS_SERVER_TIMING', 'True').lower() == 'true'
+
+PERFORMANCE_BUDGETS = {
+    'travel:search': {'queries': 4, 'ms': 500},
+    'travel:detail': {'queries': 3, 'ms': 300},
+    'travel:book': {'queries': 8, 'ms': 500},
+    'bookings:my_bookings': {'queries': 6, 'ms': 500},
+    'bookings:cancel': {'queries': 9, 'ms': 500},
+    'bookings:dashboard': {'queries': 8, 'ms': 500},
+}
+
+
+# Async views
+# travel_booking.asgi turns this on so the search and detail pages are
+# served by async views; WSGI deployments keep the sync ones.
+
+TRAVEL_ASYNC_VIEWS = os.getenv('TRAVEL_ASYNC_VIEWS', 'False').lower() == 'true'
+
+
+# Seat holds
+# Seats picked on the detail page are held this long while the user checks
+# out; run `manage.py expire_seat_holds` to give expired holds back.
+
+SEAT_HOLD_MINUTES = int(os.getenv('SEAT_HOLD_MINUTES', '10'))
+
+# Notifications are queued in the database and emailed by
+# `manage.py send_notifications`.
+
+EMAIL_BACKEND = os.getenv('EMAIL_BACKEND', 'django.core.mail.backends.console.EmailBackend')
+DEFAULT_FROM_EMAIL = os.getenv('DEFAULT_FROM_EMAIL', 'Travel Karo <bookings@travelkaro.in>')
+
+# Options that departed this many days ago move, with their bookings, to the
+# archive tables; run `manage.py archive_departed` daily.
+
+ARCHIVE_AFTER_DAYS = int(os.getenv('ARCHIVE_AFTER_DAYS', '30'))
+
+
+# Operations rollups
+# The staff dashboard reads rollup tables; run `manage.py update_rollups`
+# every minute or so. Rows changed in the last LAG seconds wait for the
+# next run, so transactions still committing are not skipped.
+
+ROLLUP_LAG_SECONDS = int(os.getenv('ROLLUP_LAG_SECONDS', '30'))
+
+
+# Booking references
+# Give every host that creates bookings a distinct node id (0-1023);
+# processes on one host are told apart by their pid. When unset, each host
+# derives one from its machine id and hostname, which can still collide.
+
+BOOKING_REFERENCE_NODE_ID = os.getenv('BOOKING_REFERENCE_NODE_ID') or None
+if BOOKING_REFERENCE_NODE_ID is not None:
+    BOOKING_REFERENCE_NODE_ID = int(BOOKING_REFERENCE_NODE_ID)
+
+
+# Connection search
+# travel.connections keeps an in-memory graph per process; changes made by
+# other processes are pulled in every SYNC seconds and the graph is rebuilt
+# every REBUILD seconds.
+
+CONNECTION_GRAPH_SYNC_SECONDS = int(os.getenv('CONNECTION_GRAPH_SYNC_SECONDS', '30'))
+CONNECTION_GRAPH_REBUILD_SECONDS = int(os.getenv('CONNECTION_GRAPH_REBUILD_SECONDS', '3600'))
+
+
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
 
@@ -0,0 +1,90 @@
+"""
+Test helpers shared by the apps' test suites
+
+make_option and make_user create the rows most tests start from.
+
+Views declare query and latency budgets in settings.PERFORMANCE_BUDGETS,
+keyed by URL name. Tests that mix in PerformanceBudgetMixin can then
+assert that a response stayed within its view's budget, so N+1 query
+regressions fail the test suite instead of reaching production.
+"""
+
+import itertools
+from datetime import timedelta
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.utils import timezone
+
+# Keeps make_option rows distinct under travel_option_natural_key
+_service_numbers = itertools.count(12952)
+
+
+def make_option(**overrides):
+    """Create a bookable travel option departing next week; cities may be names"""
+    from travel import cities
+    from travel.models import TravelOption
+
+    fields = {
+        'travel_type': 'train',
+        'source': 'Delhi',
+        'destination': 'Mumbai',
+        'departure_datetime': timezone.now() + timedelta(days=7),
+        'arrival_datetime': timezone.now() + timedelta(days=7, hours=16),
+        'price': 1500,
+        'total_seats': 10,
+        'available_seats': 10,
+        'operator_name': 'Indian Railways',
+        'service_number': str(next(_service_numbers)),
+    }
+    fields.update(overrides)
+    for field in ('source', 'destination'):
+        if isinstance(fields[field], str):
+            fields[field] = cities.by_name(fields[field])
+    return TravelOption.objects.create(**fields)
+
+
+def make_user(username='traveller', **overrides):
+    fields = {
+        'email': f'{username}@example.com',
+        'phone': f'+9198{abs(hash(username)) % 10**8:08d}',
+    }
+    fields.update(overrides)
+    return get_user_model().objects.create_user(username=username, password='pass12345', **fields)
+
+
+class PerformanceBudgetMixin:
+    """TestCase mixin; needs RequestMetricsMiddleware in MIDDLEWARE"""
+
+    def get_budget(self, view_name):
+        return dict(getattr(settings, 'PERFORMANCE_BUDGETS', {}).get(view_name, {}))
+
+    def assertWithinBudget(self, response, queries=None, ms=None):
+        """
+        Fail if the request behind response exceeded its budget.
+
+        queries and ms override the declared budget for this assertion.
+        """
+        metrics = getattr(response.wsgi_request, 'metrics', None)
+        if metrics is None:
+            self.fail('No request metrics recorded; is RequestMetricsMiddleware installed?')
+
+        budget = self.get_budget(metrics.view_name)
+        if queries is not None:
+            budget['queries'] = queries
+        if ms is not None:
+            budget['ms'] = ms
+        if not budget:
+            self.fail(f'No performance budget declared for {metrics.view_name!r}')
+
+        if 'queries' in budget and metrics.queries > budget['queries']:
+            self.fail(
+                f'{metrics.view_name} ran {metrics.queries} queries, '
+                f'budget is {budget["queries"]}'
+            )
+        if 'ms' in budget and metrics.total_ms > budget['ms']:
+            self.fail(
+                f'{metrics.view_name} took {metrics.total_ms:.1f} ms, '
+                f'budget is {budget["ms"]} ms'
+            )
+        return metrics
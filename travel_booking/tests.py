@@ -0,0 +1,268 @@
+import os
+import tempfile
+from datetime import timedelta
+
+from django.contrib import messages
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import Permission
+from django.contrib.contenttypes.models import ContentType
+from django.contrib.sessions.models import Session
+from django.db import router
+from django.db.utils import ConnectionHandler
+from django.http import HttpResponse, StreamingHttpResponse
+from django.test import RequestFactory, SimpleTestCase, TestCase, override_settings
+from django.urls import resolve, reverse
+from django.utils import timezone
+
+from travel import cities
+from travel.inventory import reserve_seats
+from travel.models import City, TravelOption
+from travel.search_cache import get_search_cache
+from . import db_profiles
+from .middleware import get_histograms, reset_histograms
+from .page_cache import get_page_cache
+from .replicas import ReplicaRoutingMiddleware
+from .testing import PerformanceBudgetMixin
+
+User = get_user_model()
+
+
+class RequestMetricsMiddlewareTests(PerformanceBudgetMixin, TestCase):
+
+    def setUp(self):
+        get_search_cache().clear()
+        reset_histograms()
+        self.option = TravelOption.objects.create(
+            travel_type='bus', source=cities.by_name('Pune'), destination=cities.by_name('Mumbai'),
+            departure_datetime=timezone.now() + timedelta(days=2),
+            price=450, total_seats=40, available_seats=40,
+        )
+
+    def test_server_timing_header(self):
+        response = self.client.get(reverse('travel:search'))
+        self.assertRegex(
+            response['Server-Timing'],
+            r'^db;dur=[\d.]+;desc="\d+ queries", tpl;dur=[\d.]+, total;dur=[\d.]+$'
+        )
+
+    def test_metrics_are_tagged_with_url_name(self):
+        response = self.client.get(reverse('travel:detail', kwargs={'pk': self.option.pk}))
+        metrics = response.wsgi_request.metrics
+        self.assertEqual(metrics.view_name, 'travel:detail')
+        self.assertEqual(metrics.queries, 1)
+        self.assertGreater(metrics.template_ms, 0)
+
+        histograms = get_histograms()['travel:detail']
+        self.assertEqual(histograms['total_ms']['count'], 1)
+        self.assertEqual(histograms['queries']['buckets'][1], 1)
+
+    def test_declared_budgets_hold(self):
+        user = User.objects.create_user(
+            username='budget', password='pass12345', email='budget@example.com', phone='+919811111111'
+        )
+        self.client.force_login(user)
+        self.assertWithinBudget(self.client.get(reverse('travel:search')))
+        self.assertWithinBudget(self.client.get(reverse('travel:detail', kwargs={'pk': self.option.pk})))
+        self.assertWithinBudget(self.client.get(reverse('bookings:my_bookings')))
+
+    def test_exceeding_budget_fails(self):
+        response = self.client.get(reverse('travel:search'))
+        with self.assertRaisesMessage(AssertionError, 'budget is 0'):
+            self.assertWithinBudget(response, queries=0)
+
+    async def test_async_requests_are_measured(self):
+        response = await self.async_client.get(reverse('travel:detail', kwargs={'pk': self.option.pk}))
+        self.assertEqual(response.status_code, 200)
+        metrics = response.asgi_request.metrics
+        self.assertEqual(metrics.view_name, 'travel:detail')
+        self.assertEqual(metrics.queries, 1)
+        self.assertIn('Server-Timing', response)
+
+
+class AnonymousPageCacheTests(TestCase):
+
+    def setUp(self):
+        get_search_cache().clear()
+        get_page_cache().clear()
+        self.option = TravelOption.objects.create(
+            travel_type='bus', source=cities.by_name('Pune'), destination=cities.by_name('Mumbai'),
+            departure_datetime=timezone.now() + timedelta(days=2),
+            price=450, total_seats=40, available_seats=40,
+        )
+        self.url = reverse('travel:search')
+
+    def test_repeat_anonymous_get_is_served_without_queries(self):
+        first = self.client.get(self.url, {'source': 'Pune', 'destination': 'Mumbai'})
+        self.assertEqual(first['X-Page-Cache'], 'miss')
+        self.assertIn('private', first['Cache-Control'])
+
+        # Parameter order does not matter
+        with self.assertNumQueries(0):
+            second = self.client.get(self.url + '?destination=Mumbai&source=Pune')
+        self.assertEqual(second['X-Page-Cache'], 'hit')
+        self.assertEqual(second.content, first.content)
+
+    def test_booking_invalidates_cached_search_page(self):
+        params = {'source': 'Pune', 'destination': 'Mumbai'}
+        self.assertContains(self.client.get(self.url, params), '40 seats left')
+        with self.captureOnCommitCallbacks(execute=True):
+            reserve_seats(self.option, 5)
+
+        response = self.client.get(self.url, params)
+        self.assertEqual(response['X-Page-Cache'], 'miss')
+        self.assertContains(response, '35 seats left')
+
+    def test_authenticated_users_bypass_cache(self):
+        self.client.get(reverse('home'))
+        user = User.objects.create_user(
+            username='cached', password='pass12345', email='cached@example.com', phone='+919822222222'
+        )
+        self.client.force_login(user)
+        response = self.client.get(reverse('home'))
+        self.assertNotIn('X-Page-Cache', response)
+        self.assertContains(response, 'My Bookings')
+
+    def test_pages_with_messages_are_not_served_from_cache(self):
+        self.client.get(reverse('home'))
+        request = self.client.get(reverse('home')).wsgi_request
+        self.assertEqual(self.client.get(reverse('home'))['X-Page-Cache'], 'hit')
+
+        storage = messages.storage.cookie.CookieStorage(request)
+        storage.add(messages.INFO, 'Welcome back')
+        self.client.cookies['messages'] = storage._encode(storage._queued_messages)
+        response = self.client.get(reverse('home'))
+        self.assertNotIn('X-Page-Cache', response)
+        self.assertContains(response, 'Welcome back')
+
+    def test_cached_select_fragments_keep_the_selection(self):
+        self.client.get(self.url, {'source': 'Pune'})
+        content = self.client.get(self.url, {'source': 'Mumbai', 'destination': 'Pune'}).content.decode()
+        source_select, destination_select = content.split('name="destination"')
+        self.assertIn('<option value="Mumbai" selected>', source_select)
+        self.assertNotIn('<option value="Pune" selected>', source_select)
+        self.assertIn('<option value="Pune" selected>', destination_select)
+
+    def test_select_fragments_follow_city_renames_and_ignore_unknown_values(self):
+        self.addCleanup(cities.reset)
+        self.client.get(self.url, {'source': 'Pune'})
+        content = self.client.get(self.url, {'source': 'PUNE', 'destination': 'Atlantis'}).content.decode()
+        self.assertNotIn('selected>', content.split('name="travel_type"')[0])
+
+        city = City.objects.get(name='Pune')
+        city.name = 'Poona'
+        city.save()
+        content = self.client.get(self.url, {'source': 'Poona'}).content.decode()
+        self.assertIn('<option value="Poona" selected>', content)
+        self.assertNotIn('value="Pune"', content)
+
+
+@override_settings(REPLICA_DATABASES=['replica1', 'replica2'])
+class ReplicaRoutingTests(SimpleTestCase):
+
+    def serve(self, method, path, cookies=None, write=False, streaming=False, model=TravelOption):
+        """Run a request through the middleware; returns (database read from, response)"""
+        request = getattr(RequestFactory(), method)(path)
+        request.COOKIES.update(cookies or {})
+        request.resolver_match = resolve(path)
+        reads = []
+
+        def get_response(request):
+            middleware.process_view(request, None, (), {})
+            reads.append(router.db_for_read(model))
+            if write:
+                router.db_for_write(TravelOption)
+            if streaming:
+                return StreamingHttpResponse(reads.append(router.db_for_read(TravelOption)) or b'' for _ in range(1))
+            return HttpResponse()
+
+        middleware = ReplicaRoutingMiddleware(get_response)
+        response = middleware(request)
+        if streaming:
+            b''.join(response.streaming_content)
+        return reads, response
+
+    def test_search_reads_from_replicas_and_writes_go_to_primary(self):
+        reads, response = self.serve('get', reverse('travel:search'))
+        self.assertIn(reads[0], ['replica1', 'replica2'])
+        self.assertEqual(router.db_for_write(TravelOption), 'default')
+        self.assertNotIn('read_primary', response.cookies)
+
+    def test_other_views_and_posts_read_from_primary(self):
+        self.assertEqual(self.serve('get', reverse('bookings:my_bookings'))[0], ['default'])
+        self.assertEqual(self.serve('post', reverse('travel:detail', kwargs={'pk': 1}))[0], ['default'])
+        # Outside a request, e.g. in management commands
+        self.assertEqual(router.db_for_read(TravelOption), 'default')
+
+    def test_sessions_users_and_permissions_read_from_primary(self):
+        for model in (Session, User, Permission, ContentType):
+            with self.subTest(model=model.__name__):
+                self.assertEqual(self.serve('get', reverse('travel:search'), model=model)[0], ['default'])
+
+    def test_writes_make_the_user_read_from_primary(self):
+        _, response = self.serve('post', reverse('travel:hold', kwargs={'pk': 1}), write=True)
+        cookie = response.cookies['read_primary']
+        self.assertEqual(cookie['max-age'], 10)
+
+        reads, _ = self.serve('get', reverse('travel:detail', kwargs={'pk': 1}), cookies={'read_primary': '1'})
+        self.assertEqual(reads, ['default'])
+
+    def test_streamed_responses_keep_reading_from_replicas(self):
+        reads, _ = self.serve('get', reverse('travel:options_feed'), streaming=True)
+        self.assertEqual(len(reads), 2)
+        self.assertIn(reads[1], ['replica1', 'replica2'])
+
+
+class ReplicaStickinessTests(TestCase):
+
+    def test_booking_sets_sticky_cookie_and_anonymous_search_does_not(self):
+        option = TravelOption.objects.create(
+            travel_type='bus', source=cities.by_name('Pune'), destination=cities.by_name('Mumbai'),
+            departure_datetime=timezone.now() + timedelta(days=2), price=600,
+            total_seats=40, available_seats=40, operator_name='Neeta', service_number='NT-1',
+        )
+        self.assertNotIn('read_primary', self.client.get(reverse('travel:search')).cookies)
+
+        user = User.objects.create_user(
+            username='sticky', password='pass12345', email='sticky@example.com', phone='+919833333333'
+        )
+        self.client.force_login(user)
+        response = self.client.post(reverse('travel:hold', kwargs={'pk': option.pk}), {'num_seats': 1})
+        self.assertIn('read_primary', response.cookies)
+
+
+class DatabaseProfileTests(SimpleTestCase):
+    # Connections are made to scratch files, never to the test database
+    databases = {'default'}
+
+    def connect(self, profile):
+        fd, path = tempfile.mkstemp(suffix='.sqlite3')
+        os.close(fd)
+        for suffix in ('', '-wal', '-shm'):
+            self.addCleanup(lambda name=path + suffix: os.path.exists(name) and os.remove(name))
+        handler = ConnectionHandler({'default': db_profiles.database(profile, path)})
+        self.addCleanup(handler.close_all)
+        return handler['default']
+
+    def pragma(self, connection, name):
+        with connection.cursor() as cursor:
+            cursor.execute(f'PRAGMA {name}')
+            return cursor.fetchone()[0]
+
+    def test_sqlite_profile_applies_pragmas_on_connect(self):
+        connection = self.connect('sqlite')
+        self.assertEqual(self.pragma(connection, 'journal_mode'), 'wal')
+        self.assertEqual(self.pragma(connection, 'synchronous'), 1)
+        self.assertEqual(self.pragma(connection, 'busy_timeout'), 5000)
+        self.assertEqual(self.pragma(connection, 'cache_size'), -64000)
+        self.assertEqual(connection.transaction_mode, 'IMMEDIATE')
+        self.assertEqual(connection.settings_dict['CONN_MAX_AGE'], 600)
+        self.assertTrue(connection.settings_dict['CONN_HEALTH_CHECKS'])
+
+    def test_basic_profile_keeps_django_defaults(self):
+        connection = self.connect('sqlite-basic')
+        self.assertEqual(self.pragma(connection, 'journal_mode'), 'delete')
+        self.assertEqual(connection.settings_dict['CONN_MAX_AGE'], 0)
+
+    def test_unknown_profile(self):
+        with self.assertRaisesMessage(ValueError, 'sqlite, sqlite-basic, postgres'):
+            db_profiles.database('mysql')